@@ -88,6 +88,7 @@ export class SidecarManager extends EventEmitter {
 					env: {
 						...process.env,
 						LOG_LEVEL: 'INFO',
+						APP_DATA_DIR: app.getPath('userData'),
 					},
 					stdio: ['ignore', 'pipe', 'pipe'],
 				},
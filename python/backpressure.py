@@ -0,0 +1,175 @@
+"""
+Backpressure Module: Bounded hand-off from agent output to SSE subscribers.
+
+A slow SSE consumer must not make the sidecar buffer a chatty agent's output
+without limit. Events are published to a request's EventStream only while
+its slowest subscriber is less than high_water events behind; beyond that
+the overflow policy decides whether the producer waits (which, through the
+bounded line queue in CagentRuntime, stops reading the subprocess pipe),
+drops INFO events, or merges consecutive THINKING text, INFO lines and
+status updates. A producer
+never waits longer than max_block on a subscriber that has stopped reading:
+past that the subscriber's own slow-subscriber policy is applied to it.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from coalescing import CoalescingStats, can_merge, merge_run, mergeable_text
+from event_parser import CagentEvent, EventType
+from event_stream import EventStream
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy:
+    """What to do with new events while subscribers are high_water events behind."""
+
+    BLOCK = "block"  # wait for subscribers to catch up
+    DROP_INFO = "drop-info"  # discard INFO events, wait for everything else
+    COALESCE = "coalesce"  # merge THINKING/INFO runs and status updates, wait for everything else
+
+    ALL = (BLOCK, DROP_INFO, COALESCE)
+
+
+# cagent JSON "type" values that only report state; a newer one supersedes an
+# older one under the coalesce policy. Other INFO objects (agent_choice
+# deltas among them) may carry output and are never superseded.
+STATUS_KINDS = frozenset({"token_usage", "session_title"})
+
+
+@dataclass
+class PipelineStats:
+    """Per-request queue depth high-water marks and overflow counters."""
+    line_queue_high_water: int = 0
+    backlog_high_water: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    blocked_seconds: float = 0.0
+    stalled_subscribers: int = 0
+    coalescing: CoalescingStats = field(default_factory=CoalescingStats)
+
+    def observe_line_queue(self, depth: int) -> None:
+        """Record the current depth of the runtime's subprocess line queue."""
+        if depth > self.line_queue_high_water:
+            self.line_queue_high_water = depth
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {**asdict(self), "coalescing": self.coalescing.to_dict()}
+
+
+def merge_events(pending: CagentEvent, event: CagentEvent) -> Optional[CagentEvent]:
+    """
+    Merge two consecutive events of the same coalescible type.
+
+    THINKING text and plain INFO lines are joined as by EventCoalescer; an
+    INFO object of a STATUS_KINDS type supersedes an older one of that type.
+
+    Args:
+        pending: Event held back so far
+        event: Newer event
+
+    Returns:
+        Merged event, or None if the two cannot be merged
+    """
+    if can_merge(pending, event):
+        return merge_run([pending, event])
+    if (
+        pending.event_type == EventType.INFO
+        and event.event_type == EventType.INFO
+        and event.data.get("type") in STATUS_KINDS
+        and pending.data.get("type") == event.data.get("type")
+    ):
+        # Status updates supersede each other; keep the newest
+        return CagentEvent(
+            event_type=EventType.INFO,
+            data={**event.data, "coalesced": pending.data.get("coalesced", 1) + 1},
+            timestamp=event.timestamp,
+            seq=event.seq,
+        )
+    return None
+
+
+class BackpressuredPublisher:
+    """Publish events to an EventStream under a backlog bound and overflow policy."""
+
+    def __init__(
+        self,
+        stream: EventStream,
+        policy: str = OverflowPolicy.BLOCK,
+        high_water: int = 256,
+        stats: Optional[PipelineStats] = None,
+        max_block: Optional[float] = 5.0,
+    ):
+        """
+        Initialize publisher.
+
+        Args:
+            stream: Stream the events are published to
+            policy: OverflowPolicy value
+            high_water: Subscriber backlog at which the policy applies
+            stats: Counters to update, created if not given
+            max_block: Seconds to wait for capacity before subscribers still
+                high_water events behind are treated as stalled (None waits
+                indefinitely)
+        """
+        if policy not in OverflowPolicy.ALL:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.stream = stream
+        self.policy = policy
+        self.high_water = max(1, high_water)
+        self.stats = stats if stats is not None else PipelineStats()
+        self.max_block = max_block
+        self._pending: Optional[CagentEvent] = None
+
+    async def publish(self, event: CagentEvent) -> None:
+        """
+        Publish an event, waiting, dropping or merging when subscribers lag.
+
+        Args:
+            event: Event to publish
+        """
+        overflowing = self.stream.backlog >= self.high_water
+
+        if overflowing and self.policy == OverflowPolicy.DROP_INFO and event.event_type == EventType.INFO:
+            self.stats.dropped += 1
+            return
+
+        if overflowing and self.policy == OverflowPolicy.COALESCE and event.event_type in (
+            EventType.THINKING,
+            EventType.INFO,
+        ):
+            if self._pending is None:
+                self._pending = event
+                return
+            merged = merge_events(self._pending, event)
+            if merged is not None:
+                self._pending = merged
+                self.stats.coalesced += 1
+                return
+
+        await self.flush()
+        await self._publish_when_ready(event)
+
+    async def flush(self) -> None:
+        """Publish any event held back by coalescing."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await self._publish_when_ready(pending)
+
+    async def _publish_when_ready(self, event: CagentEvent) -> None:
+        if self.stream.backlog >= self.high_water:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self.stream.wait_for_capacity(self.high_water), self.max_block)
+            except asyncio.TimeoutError:
+                self.stats.stalled_subscribers += self.stream.shed_stalled(self.high_water)
+            self.stats.blocked_seconds += time.monotonic() - started
+
+        if not self.stream.closed:
+            self.stream.publish(event)
+        self.stats.backlog_high_water = max(self.stats.backlog_high_water, self.stream.backlog)
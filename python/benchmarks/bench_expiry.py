@@ -0,0 +1,131 @@
+"""
+Expiry Benchmark: Idle tracking of many requests, sweep vs deadline heap.
+
+Tracks --requests request ids and compares:
+
+    sweep      dict of datetime.now() per request, refreshed on every event
+               and scanned in full by a periodic sweeper (as before)
+    deadline   DeadlineTracker: monotonic deadlines refreshed with a dict
+               store, expired from a lazily updated heap
+
+and reports the cost of a refresh (the per-event hot path), of an expiry
+pass, and how late expiry fires after the idle deadline for a sweeper with
+--sweep-interval seconds of period versus the tracker's loop timer.
+
+Usage:
+    python benchmarks/bench_expiry.py [--requests 10000] [--refreshes 200000] [--sweep-interval 60]
+"""
+
+import argparse
+import asyncio
+import pathlib
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from expiry import DeadlineTracker  # noqa: E402
+
+IDLE = timedelta(minutes=5)
+
+
+def bench_sweep(request_ids: list[str], refreshes: list[str]) -> tuple[float, float]:
+    """Per-refresh and per-sweep seconds of the datetime dict + full scan."""
+    timestamps = {request_id: datetime.now() for request_id in request_ids}
+    active: set[str] = set()
+
+    start = time.perf_counter()
+    for request_id in refreshes:
+        timestamps[request_id] = datetime.now()
+    refresh = (time.perf_counter() - start) / len(refreshes)
+
+    start = time.perf_counter()
+    now = datetime.now()
+    stale = [
+        request_id
+        for request_id, ts in list(timestamps.items())
+        if request_id not in active and now - ts > IDLE
+    ]
+    for request_id in stale:
+        timestamps.pop(request_id, None)
+    sweep = time.perf_counter() - start
+    return refresh, sweep
+
+
+def bench_deadline(request_ids: list[str], refreshes: list[str]) -> tuple[float, float]:
+    """Per-refresh seconds and the cost of an expiry pass with nothing due."""
+    tracker = DeadlineTracker(IDLE.total_seconds(), lambda key: None)
+    for request_id in request_ids:
+        tracker.touch(request_id)
+
+    start = time.perf_counter()
+    for request_id in refreshes:
+        tracker.touch(request_id)
+    refresh = (time.perf_counter() - start) / len(refreshes)
+
+    start = time.perf_counter()
+    tracker.expire_due()
+    check = time.perf_counter() - start
+    return refresh, check
+
+
+def bench_expire_all(request_ids: list[str]) -> float:
+    """Seconds to expire every tracked request once all deadlines passed."""
+    now = [0.0]
+    tracker = DeadlineTracker(1.0, lambda key: None, clock=lambda: now[0])
+    for request_id in request_ids:
+        tracker.touch(request_id)
+    now[0] = 2.0
+    start = time.perf_counter()
+    tracker.expire_due()
+    return time.perf_counter() - start
+
+
+async def timer_lateness(count: int, timeout: float) -> list[float]:
+    """How long after their deadline the loop timer expires keys."""
+    fired: dict[str, float] = {}
+    tracker = DeadlineTracker(timeout, lambda key: fired.setdefault(key, time.monotonic()))
+    tracker.start()
+    deadlines = {}
+    for i in range(count):
+        key = f"req-{i}"
+        tracker.touch(key)
+        deadlines[key] = tracker.deadline(key)
+        if i % 100 == 0:
+            await asyncio.sleep(0.001)
+    while len(fired) < count:
+        await asyncio.sleep(timeout / 10)
+    tracker.stop()
+    return [fired[key] - deadline for key, deadline in deadlines.items()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--refreshes", type=int, default=200000)
+    parser.add_argument("--sweep-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    request_ids = [f"req-{i}" for i in range(args.requests)]
+    rng = random.Random(0)
+    refreshes = [rng.choice(request_ids) for _ in range(args.refreshes)]
+
+    sweep_refresh, sweep = bench_sweep(request_ids, refreshes)
+    deadline_refresh, check = bench_deadline(request_ids, refreshes)
+    expire_all = bench_expire_all(request_ids)
+    lateness = asyncio.run(timer_lateness(args.requests, timeout=0.5))
+
+    sweep_lateness = f"0 - {args.sweep_interval:g} s"
+    timer_late = f"median {statistics.median(lateness) * 1e3:.1f} ms, max {max(lateness) * 1e3:.1f} ms"
+    print(f"{args.requests} tracked requests, {args.refreshes} refreshes")
+    print(f"{'':10s} {'refresh':>12s} {'expiry pass':>14s} {'expiry lateness':>30s}")
+    print(f"{'sweep':10s} {sweep_refresh * 1e9:>9.0f} ns {sweep * 1e3:>11.3f} ms {sweep_lateness:>30s}")
+    print(f"{'deadline':10s} {deadline_refresh * 1e9:>9.0f} ns {check * 1e3:>11.3f} ms {timer_late:>30s}")
+    print(f"expiring all {args.requests} at once: {expire_all * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
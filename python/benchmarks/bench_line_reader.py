@@ -0,0 +1,126 @@
+"""
+Line Reader Benchmark: Throughput of cagent output splitting on long lines.
+
+Feeds synthetic cagent --json output (a few multi-megabyte tool results
+between small events) through an asyncio.StreamReader in pipe-sized chunks
+and compares:
+
+    readline          StreamReader.readline() + decode + rstrip, as before
+                      (fails on lines above the 64 KiB default limit, so it
+                      runs with the limit raised to the longest line)
+    chunked           ChunkedLineReader with everything kept in memory
+    chunked+spill     ChunkedLineReader spilling lines above --max-line-mb
+
+Usage:
+    python benchmarks/bench_line_reader.py [--line-mb 1 4 16] [--runs 5] [--max-line-mb 2]
+"""
+
+import argparse
+import asyncio
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from line_reader import ChunkedLineReader, SpilledLine  # noqa: E402
+
+PIPE_CHUNK = 64 * 1024
+
+
+def build_output(line_mb: float, big_lines: int = 3, small_lines: int = 2000) -> bytes:
+    """Build cagent-like output with big_lines lines of about line_mb megabytes."""
+    photo = {"uuid": "0" * 36, "path": "/Users/me/Pictures/" + "p" * 200, "keywords": ["k"] * 20}
+    photo_size = len(json.dumps(photo)) + 2
+    photos = [photo] * max(1, int(line_mb * 1024 * 1024 / photo_size))
+    big = json.dumps({"tool_result": photos}).encode("utf-8")
+    small = json.dumps({"thinking": "step"}).encode("utf-8")
+
+    lines = []
+    for _ in range(big_lines):
+        lines.extend([small] * (small_lines // big_lines))
+        lines.append(big)
+    lines.append(json.dumps({"result": "done"}).encode("utf-8"))
+    return b"\n".join(lines) + b"\n"
+
+
+async def feed(stream: asyncio.StreamReader, data: bytes) -> None:
+    """Deliver data in pipe-sized chunks, yielding to the reader in between."""
+    view = memoryview(data)
+    for offset in range(0, len(data), PIPE_CHUNK):
+        stream.feed_data(view[offset:offset + PIPE_CHUNK])
+        await asyncio.sleep(0)
+    stream.feed_eof()
+
+
+async def run_readline(data: bytes, limit: int) -> int:
+    """Split with readline(); returns the number of lines."""
+    stream = asyncio.StreamReader(limit=limit)
+    producer = asyncio.create_task(feed(stream, data))
+    count = 0
+    while True:
+        raw_line = await stream.readline()
+        if not raw_line:
+            break
+        raw_line.decode("utf-8", errors="ignore").rstrip("\r\n")
+        count += 1
+    await producer
+    return count
+
+
+async def run_chunked(data: bytes, max_line_bytes: int) -> int:
+    """Split with ChunkedLineReader; returns the number of lines."""
+    stream = asyncio.StreamReader()
+    producer = asyncio.create_task(feed(stream, data))
+    count = 0
+    async for line in ChunkedLineReader(stream, max_line_bytes=max_line_bytes):
+        if isinstance(line, SpilledLine):
+            line.discard()
+        count += 1
+    await producer
+    return count
+
+
+async def time_runs(factory, runs: int) -> list[float]:
+    """Run factory() runs times and return wall-clock seconds per run."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await factory()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Check the readline limit, then time each variant per line size."""
+    max_line_bytes = int(args.max_line_mb * 1024 * 1024)
+
+    try:
+        await run_readline(build_output(0.1, big_lines=1, small_lines=1), limit=2**16)
+        print("readline with the default 64 KiB limit: ok")
+    except ValueError as e:
+        print(f"readline with the default 64 KiB limit: fails ({e})")
+    print()
+
+    print(f"{'line size':>10} {'variant':>14} {'p50 ms':>9} {'MB/s':>8}")
+    for line_mb in args.line_mb:
+        data = build_output(line_mb)
+        size_mb = len(data) / (1024 * 1024)
+        variants = {
+            "readline": lambda: run_readline(data, limit=len(data)),
+            "chunked": lambda: run_chunked(data, max_line_bytes=len(data)),
+            "chunked+spill": lambda: run_chunked(data, max_line_bytes=max_line_bytes),
+        }
+        for name, factory in variants.items():
+            p50 = statistics.median(await time_runs(factory, args.runs))
+            print(f"{line_mb:>8} MB {name:>14} {p50 * 1000:>9.1f} {size_mb / p50:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--line-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-line-mb", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,165 @@
+"""
+Parser Benchmark: Lines per second of EventParser.parse_line.
+
+Builds a synthetic cagent transcript of about --mb megabytes, mixing JSON
+event objects, marker lines ([THINKING], Calling tool:, [TOOL RESULT] ...)
+and plain log lines, and parses every line with:
+
+    before    one regex search per marker kind in priority order, then a
+              split to extract content; json.loads attempted on every line
+    after     EventParser: marker literals found with substring searches
+              on the lowered line after a ":"/"[" pre-check, json.loads
+              only for lines that start with "{"
+
+in both JSON mode (cagent --json) and text mode. A third variant, chunked,
+feeds the transcript to EventParser.parse_chunk in 64 KiB pipe reads.
+
+Usage:
+    python benchmarks/bench_parser.py [--mb 8] [--runs 3] [--seed 0]
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from event_parser import CagentEvent, EventParser, EventType  # noqa: E402
+from line_reader import DEFAULT_CHUNK_SIZE  # noqa: E402
+
+
+class LegacyParser:
+    """EventParser.parse_line as it was before the single-pass classifier."""
+
+    THINKING_PATTERN = re.compile(r"\[THINKING\]|Thinking:", re.IGNORECASE)
+    TOOL_CALL_PATTERN = re.compile(r"\[TOOL\]|Calling tool:", re.IGNORECASE)
+    TOOL_RESULT_PATTERN = re.compile(r"\[TOOL RESULT\]|Tool result:", re.IGNORECASE)
+    AGENT_OUTPUT_PATTERN = re.compile(r"\[OUTPUT\]|Output:", re.IGNORECASE)
+    ERROR_PATTERN = re.compile(r"\[ERROR\]|Error:", re.IGNORECASE)
+
+    def __init__(self, json_mode: bool = True):
+        self.json_mode = json_mode
+        self._parser = EventParser(json_mode)
+
+    def parse_line(self, line, is_stderr=False):
+        if not line or line.isspace():
+            return None
+        timestamp = time.time()
+        if self.json_mode and not is_stderr:
+            try:
+                obj = json.loads(line)
+                if isinstance(obj, dict):
+                    return self._parser.parse_object(obj, timestamp)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                pass
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="ignore")
+        if is_stderr:
+            return CagentEvent(EventType.ERROR, {"error": line}, timestamp)
+        stripped = line.strip()
+        if not stripped:
+            return None
+        if self.THINKING_PATTERN.search(stripped):
+            content = self.THINKING_PATTERN.split(stripped)[-1].strip()
+            return CagentEvent(EventType.THINKING, {"content": content or stripped}, timestamp)
+        if self.TOOL_CALL_PATTERN.search(stripped):
+            content = self.TOOL_CALL_PATTERN.split(stripped)[-1].strip()
+            return CagentEvent(EventType.TOOL_CALL, {"content": content or stripped}, timestamp)
+        if self.TOOL_RESULT_PATTERN.search(stripped):
+            content = self.TOOL_RESULT_PATTERN.split(stripped)[-1].strip()
+            return CagentEvent(EventType.TOOL_RESULT, {"content": content or stripped}, timestamp)
+        if self.AGENT_OUTPUT_PATTERN.search(stripped):
+            content = self.AGENT_OUTPUT_PATTERN.split(stripped)[-1].strip()
+            return CagentEvent(EventType.RESULT, {"result": content or stripped}, timestamp)
+        if self.ERROR_PATTERN.search(stripped):
+            return CagentEvent(EventType.ERROR, {"error": stripped}, timestamp)
+        return CagentEvent(EventType.INFO, {"message": stripped}, timestamp)
+
+
+WORDS = "photo album keyword face place export caption album metadata library smart".split()
+
+
+def build_transcript(megabytes: float, seed: int) -> list[bytes]:
+    """Lines of a plausible agent run: mostly log and thinking lines, some JSON."""
+    rng = random.Random(seed)
+
+    def words(low: int, high: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    makers = [
+        (30, lambda: f"time=2026-01-01T10:00:00Z level=debug msg=\"{words(4, 16)}\" agent=photos"),
+        (25, lambda: f"Thinking: {words(6, 30)}"),
+        (10, lambda: f"[TOOL] photos.search query=\"{words(1, 4)}\""),
+        (10, lambda: f"[TOOL RESULT] {words(20, 200)}"),
+        (15, lambda: json.dumps({"type": "thinking", "content": words(6, 30)})),
+        (5, lambda: json.dumps({"type": "tool_result", "content": [words(3, 8) for _ in range(rng.randint(1, 40))]})),
+        (3, lambda: f"Output: {words(10, 40)}"),
+        (2, lambda: f"Error: {words(3, 10)}"),
+    ]
+    weights = [weight for weight, _ in makers]
+    limit = int(megabytes * 1024 * 1024)
+    lines, size = [], 0
+    while size < limit:
+        line = rng.choices(makers, weights)[0][1]().encode("utf-8")
+        lines.append(line)
+        size += len(line) + 1
+    return lines
+
+
+def lines_per_second(parser, lines: list[bytes], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        for line in lines:
+            parser.parse_line(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def chunked_lines_per_second(json_mode: bool, data: bytes, line_count: int, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        parser = EventParser(json_mode)
+        start = time.perf_counter()
+        for offset in range(0, len(data), DEFAULT_CHUNK_SIZE):
+            parser.parse_chunk(data[offset:offset + DEFAULT_CHUNK_SIZE])
+        parser.parse_chunk(b"", final=True)
+        best = min(best, time.perf_counter() - start)
+    return line_count / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=8.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = build_transcript(args.mb, args.seed)
+    data = b"\n".join(lines) + b"\n"
+    size = len(data)
+    print(f"{len(lines)} lines, {size / 1024 / 1024:.1f} MB, best of {args.runs} runs")
+
+    for json_mode in (True, False):
+        legacy = LegacyParser(json_mode)
+        current = EventParser(json_mode)
+        for line in lines:
+            before, after = legacy.parse_line(line), current.parse_line(line)
+            assert (before.event_type, before.data) == (after.event_type, after.data), line
+
+        before = lines_per_second(legacy, lines, args.runs)
+        after = lines_per_second(current, lines, args.runs)
+        chunked = chunked_lines_per_second(json_mode, data, len(lines), args.runs)
+        mode = "json mode" if json_mode else "text mode"
+        print(
+            f"{mode:10s} before {before:>10,.0f} lines/s   after {after:>10,.0f} lines/s ({after / before:.2f}x)"
+            f"   chunked {chunked:>10,.0f} lines/s ({chunked / before:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
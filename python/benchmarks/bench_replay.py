@@ -0,0 +1,152 @@
+"""
+Replay Benchmark: End-to-end latency and throughput from recorded cassettes.
+
+Starts the sidecar (main.py) in-process under uvicorn with CASSETTE_MODE=replay,
+then fires --requests POST /agent/execute calls, --concurrency at a time, and
+reads each run's SSE stream to its terminal event. This exercises the whole
+main.py -> runtime.py -> event_parser.py path without cagent or LLM calls.
+
+By default a synthetic cassette (--events THINKING lines of --event-bytes,
+--gap seconds apart, then a result) is written to a temp directory; pass
+--cassettes with a directory recorded via CASSETTE_MODE=record together with
+--prompt/--agent of a recorded request to replay real runs instead.
+
+Usage:
+    python benchmarks/bench_replay.py [--requests 200] [--concurrency 8] [--speed 0]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+
+def write_synthetic_cassette(directory: pathlib.Path, args: argparse.Namespace) -> None:
+    """Record-free cassette answering args.prompt for args.agent."""
+    from cassette import Cassette
+
+    payload = "x" * args.event_bytes
+    chunks = [
+        (i * args.gap, "stdout", (json.dumps({"thinking": f"{i} {payload}"}) + "\n").encode("utf-8"))
+        for i in range(args.events)
+    ]
+    duration = args.events * args.gap
+    chunks.append((duration, "stdout", (json.dumps({"result": "done"}) + "\n").encode("utf-8")))
+    stdin = json.dumps({"input": args.prompt, "context": {}}).encode("utf-8")
+    Cassette(agent_id=args.agent, stdin=stdin, chunks=chunks, duration=duration).save(directory)
+
+
+def free_port() -> int:
+    """Pick an unused localhost port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_one(client, args: argparse.Namespace) -> tuple[float, float, int]:
+    """Execute one request; returns (time to first event, total time, events)."""
+    started = time.perf_counter()
+    response = await client.post(
+        "/agent/execute",
+        json={"agent_id": args.agent, "input": {"input": args.prompt}, "coalesce": False},
+    )
+    response.raise_for_status()
+    request_id = response.json()["request_id"]
+
+    first = None
+    events = 0
+    async with client.stream("GET", f"/agent/stream/{request_id}") as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            events += 1
+            if first is None:
+                first = time.perf_counter() - started
+            if json.loads(line[5:]).get("event_type") in ("result", "error"):
+                break
+    return first or float("nan"), time.perf_counter() - started, events
+
+
+async def drive(port: int, args: argparse.Namespace) -> None:
+    """Run the request load against the server and print a summary."""
+    import httpx
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        async def limited():
+            async with semaphore:
+                return await run_one(client, args)
+
+        await run_one(client, args)  # warm up
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    first = sorted(r[0] for r in results)
+    total = sorted(r[1] for r in results)
+    events = sum(r[2] for r in results)
+    print(f"requests={args.requests} concurrency={args.concurrency} speed={args.speed}")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s, {events / elapsed:.0f} events/s")
+    print(
+        f"first event: p50={statistics.median(first) * 1000:.1f}ms "
+        f"p95={first[int(len(first) * 0.95) - 1] * 1000:.1f}ms"
+    )
+    print(
+        f"complete:    p50={statistics.median(total) * 1000:.1f}ms "
+        f"p95={total[int(len(total) * 0.95) - 1] * 1000:.1f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Start the sidecar in replay mode and benchmark it."""
+    import uvicorn
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette_dir = pathlib.Path(args.cassettes or tmp)
+        if not args.cassettes:
+            write_synthetic_cassette(cassette_dir, args)
+
+        os.environ.update(
+            CASSETTE_MODE="replay",
+            CASSETTE_DIR=str(cassette_dir),
+            CASSETTE_REPLAY_SPEED=str(args.speed),
+        )
+        import main as sidecar
+
+        logging.getLogger().setLevel(logging.WARNING)
+
+        port = free_port()
+        server = uvicorn.Server(
+            uvicorn.Config(sidecar.app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        try:
+            await drive(port, args)
+        finally:
+            server.should_exit = True
+            await serving
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=0.0, help="playback speed, 0 = no delays")
+    parser.add_argument("--cassettes", help="directory of recorded cassettes")
+    parser.add_argument("--agent", default="orchestrator")
+    parser.add_argument("--prompt", default="benchmark")
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--event-bytes", type=int, default=200)
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between recorded events")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,121 @@
+"""
+Serialization Benchmark: Cost of turning one event into SSE bytes.
+
+Compares, per event and for --subscribers readers of the same run:
+
+    before        dataclasses.asdict (deep copy) + json.dumps at publish,
+                  then an sse_starlette ServerSentEvent built and encoded
+                  from the payload for every subscriber
+    once/json     CagentEvent.to_json() + sse_frame() at publish with the
+                  json module; subscribers write the shared frame as-is
+    once/orjson   the same with orjson (skipped when it is not installed)
+    raw           a typed event still holding the cagent line as raw bytes,
+                  checked to decode as an object and spliced into the
+                  payload without re-encoding
+
+for a small thinking event and a tool result of about --tool-mb megabytes.
+
+Usage:
+    python benchmarks/bench_serialization.py [--subscribers 3] [--tool-mb 1] [--runs 5]
+"""
+
+import argparse
+import dataclasses
+import json
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import event_codec  # noqa: E402
+from event_codec import sse_frame  # noqa: E402
+from event_parser import CagentEvent, EventType, ThinkingEvent, ToolResultEvent  # noqa: E402
+
+try:
+    from sse_starlette.event import ServerSentEvent
+except ImportError:  # older sse_starlette
+    from sse_starlette.sse import ServerSentEvent
+
+
+@dataclasses.dataclass
+class DataclassEvent:
+    """The previous CagentEvent representation."""
+    event_type: str
+    data: dict
+    timestamp: float
+
+
+def build_events(tool_mb: float) -> dict[str, dict]:
+    """Event data of a token-level thinking event and a large tool result."""
+    photo = {"uuid": "0" * 36, "path": "/Users/me/Pictures/" + "p" * 200, "keywords": ["k"] * 20}
+    photo_size = len(json.dumps(photo)) + 2
+    photos = [dict(photo) for _ in range(max(1, int(tool_mb * 1024 * 1024 / photo_size)))]
+    return {
+        "thinking": {"content": "Looking at the photo metadata"},
+        "tool_result": {"content": photos},
+    }
+
+
+def time_before(event_type: str, data: dict, subscribers: int, iterations: int) -> float:
+    event = DataclassEvent(event_type, data, time.time())
+    start = time.perf_counter()
+    for seq in range(iterations):
+        payload = json.dumps(dataclasses.asdict(event))
+        for _ in range(subscribers):
+            ServerSentEvent(id=str(seq), event=event_type, data=payload).encode()
+    return (time.perf_counter() - start) / iterations
+
+
+def time_once(event_type: str, data: dict, subscribers: int, iterations: int) -> float:
+    event = CagentEvent(event_type, data, time.time())
+    start = time.perf_counter()
+    for seq in range(iterations):
+        frame = sse_frame(event_type, event.to_json(), seq)
+        for _ in range(subscribers):
+            bytes(frame)  # what sse_starlette does with a bytes chunk
+    return (time.perf_counter() - start) / iterations
+
+
+def time_raw(event_type: str, data: dict, subscribers: int, iterations: int) -> float:
+    event_class = ThinkingEvent if event_type == EventType.THINKING else ToolResultEvent
+    raw = event_codec.dumps(data)
+    start = time.perf_counter()
+    for seq in range(iterations):
+        event = event_class(None, time.time(), raw=raw)  # as parsed from the line
+        frame = sse_frame(event_type, event.to_json(), seq)
+        for _ in range(subscribers):
+            bytes(frame)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=3)
+    parser.add_argument("--tool-mb", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    events = build_events(args.tool_mb)
+    variants = [("before", None, time_before), ("once/json", "json", time_once)]
+    if "orjson" in event_codec.BACKENDS:
+        variants.append(("once/orjson", "orjson", time_once))
+    variants.append(("raw", None, time_raw))
+
+    print(f"{args.subscribers} subscribers, best of {args.runs} runs, time per event")
+    print(f"{'':14s}" + "".join(f"{name:>16s}" for name in events))
+    for label, backend, bench in variants:
+        if backend is not None:
+            event_codec.set_backend(backend)
+        cells = []
+        for name, data in events.items():
+            iterations = 20000 if name == "thinking" else 10
+            event_type = EventType.THINKING if name == "thinking" else EventType.TOOL_RESULT
+            best = min(bench(event_type, data, args.subscribers, iterations) for _ in range(args.runs))
+            cells.append(f"{best * 1e6:>13.1f} us")
+        print(f"{label:14s}" + "".join(f"{cell:>16s}" for cell in cells))
+    event_codec.set_backend("auto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Worker Pool Benchmark: Time-to-first-event with and without pre-spawned workers.
+
+Runs CagentRuntime.execute_agent against a stand-in `cagent` executable that
+spends --boot seconds starting up (team.yaml parsing and MCP toolset boot in
+the real binary) before it reads stdin. Pass --real to benchmark the cagent
+on PATH with python/team.yaml instead.
+
+Usage:
+    python benchmarks/bench_worker_pool.py [--runs 10] [--boot 0.5] [--real]
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import statistics
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from runtime import CagentRuntime  # noqa: E402
+
+SHIM_SOURCE = """#!{python}
+import json, os, sys, time
+if sys.argv[1:2] == ["version"]:
+    print("cagent version bench-shim")
+    sys.exit(0)
+time.sleep(float(os.environ.get("CAGENT_SHIM_BOOT_SECONDS", "0.5")))
+request = json.loads(sys.stdin.read() or "{{}}")
+print(json.dumps({{"result": "echo: " + str(request.get("input"))}}), flush=True)
+"""
+
+
+def install_shim(directory: pathlib.Path, boot_seconds: float) -> None:
+    """Put a fake cagent executable first on PATH."""
+    shim = directory / "cagent"
+    shim.write_text(SHIM_SOURCE.format(python=sys.executable))
+    shim.chmod(shim.stat().st_mode | stat.S_IXUSR)
+    os.environ["PATH"] = f"{directory}{os.pathsep}{os.environ['PATH']}"
+    os.environ["CAGENT_SHIM_BOOT_SECONDS"] = str(boot_seconds)
+
+
+async def time_to_first_event(runtime: CagentRuntime, agent_id: str, runs: int, gap: float) -> list[float]:
+    """Measure seconds from execute_agent() to its first event, once per run."""
+    samples = []
+    for i in range(runs):
+        started = time.perf_counter()
+        first = None
+        async for _event in runtime.execute_agent(agent_id, f"run {i}"):
+            if first is None:
+                first = time.perf_counter() - started
+        samples.append(first if first is not None else float("nan"))
+        await asyncio.sleep(gap)
+    return samples
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    """Print p50/p95/mean in milliseconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<12} p50={statistics.median(ordered) * 1000:8.1f}ms "
+        f"p95={p95 * 1000:8.1f}ms mean={statistics.mean(ordered) * 1000:8.1f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--boot", type=float, default=0.5, help="shim start-up seconds")
+    parser.add_argument("--agent", default="orchestrator")
+    parser.add_argument("--real", action="store_true", help="use the cagent on PATH")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = pathlib.Path(tmp)
+        if args.real:
+            team_yaml = str(pathlib.Path(__file__).resolve().parent.parent / "team.yaml")
+        else:
+            install_shim(tmp_path, args.boot)
+            team_yaml = str(tmp_path / "team.yaml")
+            pathlib.Path(team_yaml).write_text("agents: {}\n")
+
+        # Leave the pool time to replenish between runs, as interactive use does
+        gap = args.boot * 1.5
+
+        cold = CagentRuntime(team_yaml)
+        cold_samples = await time_to_first_event(cold, args.agent, args.runs, gap)
+        await cold.shutdown()
+
+        warm = CagentRuntime(team_yaml)
+        await warm.enable_worker_pool([args.agent], size_per_agent=1)
+        await asyncio.sleep(args.boot)
+        warm_samples = await time_to_first_event(warm, args.agent, args.runs, gap)
+        pool_stats = warm.worker_pool.stats()
+        await warm.shutdown()
+
+    summarize("no pool", cold_samples)
+    summarize("warm pool", warm_samples)
+    print(f"pool: hits={pool_stats['hits']} misses={pool_stats['misses']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,404 @@
+"""
+Cassette Module: Record and replay cagent executions.
+
+In record mode every cagent process started by CagentRuntime is wrapped so
+its stdin, timestamped stdout/stderr chunks and exit code are written to a
+gzipped JSON-lines cassette once it exits. ReplayProcess plays a cassette
+back as a stand-in process (stdin sink, StreamReader stdout/stderr, wait())
+at real or accelerated speed, so ReplayRuntime can run the unchanged
+execute_agent path offline without the cagent binary or LLM calls.
+
+Cassette layout (one JSON value per line):
+
+    {"version": 1, "agent_id": ..., "stdin": ..., "recorded_at": ...}
+    [seconds, "o" | "e", text]            stdout/stderr chunk
+    [seconds, "o" | "e", base64, "b64"]   chunk that is not valid UTF-8
+    {"exit": code, "t": seconds}
+
+Times are seconds after the process received its input (stdin closed).
+Cassettes are named after the request digest, so replay picks the cassette
+recorded for an identical agent_id, input and context.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import pathlib
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from result_cache import request_digest
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+CASSETTE_SUFFIX = ".cassette.jsonl.gz"
+
+_TEE_CHUNK_SIZE = 64 * 1024
+_CHANNELS = {"stdout": "o", "stderr": "e"}
+_CHANNEL_NAMES = {code: name for name, code in _CHANNELS.items()}
+
+
+class CassetteNotFoundError(Exception):
+    """No cassette was recorded for a request."""
+
+    pass
+
+
+def cassette_key(agent_id: str, stdin: bytes) -> str:
+    """
+    Identify a request by the input cagent received on stdin.
+
+    Args:
+        agent_id: Agent that was executed
+        stdin: Raw stdin payload ({"input": ..., "context": ...})
+
+    Returns:
+        Request digest shared by identical requests
+    """
+    try:
+        request = json.loads(stdin)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        request = None
+    if not isinstance(request, dict):
+        return request_digest(agent_id, stdin.decode("utf-8", errors="replace"), None)
+    return request_digest(agent_id, request.get("input"), request.get("context"))
+
+
+@dataclass
+class Cassette:
+    """One recorded cagent execution."""
+    agent_id: str
+    stdin: bytes
+    chunks: list[tuple[float, str, bytes]] = field(default_factory=list)
+    exit_code: int = 0
+    duration: float = 0.0
+    recorded_at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> str:
+        """Request digest this cassette answers."""
+        return cassette_key(self.agent_id, self.stdin)
+
+    def filename(self) -> str:
+        """File name of the cassette within a cassette directory."""
+        return f"{self.agent_id}-{self.key[:16]}{CASSETTE_SUFFIX}"
+
+    def save(self, directory: pathlib.Path) -> pathlib.Path:
+        """
+        Write the cassette into directory, replacing an older recording.
+
+        Args:
+            directory: Cassette directory
+
+        Returns:
+            Path of the written file
+        """
+        path = directory / self.filename()
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            header = {
+                "version": CASSETTE_VERSION,
+                "agent_id": self.agent_id,
+                "stdin": self.stdin.decode("utf-8", errors="replace"),
+                "recorded_at": self.recorded_at,
+            }
+            f.write(json.dumps(header) + "\n")
+            for offset, channel, data in self.chunks:
+                record: list = [round(offset, 6), _CHANNELS[channel]]
+                try:
+                    record.append(data.decode("utf-8"))
+                except UnicodeDecodeError:
+                    record.extend([base64.b64encode(data).decode("ascii"), "b64"])
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"exit": self.exit_code, "t": round(self.duration, 6)}) + "\n")
+        return path
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "Cassette":
+        """
+        Read a cassette file.
+
+        Args:
+            path: Cassette file written by save()
+
+        Returns:
+            Loaded cassette
+
+        Raises:
+            ValueError: If the file is not a supported cassette
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {header.get('version')}")
+            cassette = cls(
+                agent_id=header["agent_id"],
+                stdin=header["stdin"].encode("utf-8"),
+                recorded_at=header.get("recorded_at", 0.0),
+            )
+            for line in f:
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    cassette.exit_code = record["exit"]
+                    cassette.duration = record.get("t", 0.0)
+                    continue
+                if len(record) == 4:
+                    data = base64.b64decode(record[2])
+                else:
+                    data = record[2].encode("utf-8")
+                cassette.chunks.append((record[0], _CHANNEL_NAMES[record[1]], data))
+        return cassette
+
+
+class _RecordingStdin:
+    """Pass stdin writes through to the process while keeping a copy."""
+
+    def __init__(self, writer: asyncio.StreamWriter, on_close):
+        self._writer = writer
+        self._on_close = on_close
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+        self._writer.write(data)
+
+    def drain(self):
+        return self._writer.drain()
+
+    def close(self) -> None:
+        self._writer.close()
+        self._on_close()
+
+    def wait_closed(self):
+        return self._writer.wait_closed()
+
+
+class RecordingProcess:
+    """Wrap a cagent process and write a cassette when it exits."""
+
+    def __init__(self, agent_id: str, proc: asyncio.subprocess.Process, recorder: "CassetteRecorder"):
+        """
+        Initialize recording wrapper.
+
+        Args:
+            agent_id: Agent the process runs
+            proc: Process started with stdin, stdout and stderr pipes
+            recorder: Recorder that owns the cassette directory
+        """
+        self.agent_id = agent_id
+        self._proc = proc
+        self._recorder = recorder
+        self._loop = asyncio.get_running_loop()
+        self._input_at: Optional[float] = None
+        self._chunks: list[tuple[float, str, bytes]] = []
+        self._saved = False
+
+        self.stdin = _RecordingStdin(proc.stdin, self._mark_input)
+        self.stdout = asyncio.StreamReader()
+        self.stderr = asyncio.StreamReader()
+        self._tees = [
+            asyncio.create_task(self._tee(proc.stdout, self.stdout, "stdout")),
+            asyncio.create_task(self._tee(proc.stderr, self.stderr, "stderr")),
+        ]
+
+    @property
+    def pid(self) -> int:
+        """Pid of the wrapped process."""
+        return self._proc.pid
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """Exit code of the wrapped process, None while running."""
+        return self._proc.returncode
+
+    async def wait(self) -> int:
+        """Wait for exit and all output, then write the cassette once."""
+        returncode = await self._proc.wait()
+        await asyncio.gather(*self._tees, return_exceptions=True)
+        if not self._saved and self._input_at is not None:
+            self._saved = True
+            await self._recorder.save(self._cassette(returncode))
+        return returncode
+
+    def _mark_input(self) -> None:
+        self._input_at = self._loop.time()
+
+    def _cassette(self, returncode: int) -> Cassette:
+        started = self._input_at
+        return Cassette(
+            agent_id=self.agent_id,
+            stdin=bytes(self.stdin.data),
+            chunks=[(max(0.0, at - started), channel, data) for at, channel, data in self._chunks],
+            exit_code=returncode,
+            duration=self._loop.time() - started,
+        )
+
+    async def _tee(self, source: asyncio.StreamReader, sink: asyncio.StreamReader, channel: str) -> None:
+        try:
+            while True:
+                chunk = await source.read(_TEE_CHUNK_SIZE)
+                if not chunk:
+                    return
+                self._chunks.append((self._loop.time(), channel, chunk))
+                sink.feed_data(chunk)
+        finally:
+            sink.feed_eof()
+
+
+class CassetteRecorder:
+    """Wrap spawned processes for recording and write their cassettes."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize recorder.
+
+        Args:
+            directory: Cassette directory, created if missing
+        """
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+        self.failures = 0
+
+    def wrap(self, agent_id: str, proc: asyncio.subprocess.Process) -> RecordingProcess:
+        """Record the given process."""
+        return RecordingProcess(agent_id, proc, self)
+
+    async def save(self, cassette: Cassette) -> None:
+        """Write a cassette without blocking the event loop; failures are logged only."""
+        try:
+            path = await asyncio.to_thread(cassette.save, self.directory)
+        except Exception:
+            self.failures += 1
+            logger.exception(f"Failed to write cassette for {cassette.agent_id}")
+            return
+        self.recorded += 1
+        logger.info(f"Recorded cassette {path.name} ({len(cassette.chunks)} chunks)")
+
+
+class CassetteLibrary:
+    """Look up recorded cassettes by request, caching loaded files."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize library.
+
+        Args:
+            directory: Cassette directory
+        """
+        self.directory = pathlib.Path(directory)
+        self._loaded: dict[pathlib.Path, Cassette] = {}
+
+    def find(self, agent_id: str, stdin: bytes) -> Cassette:
+        """
+        Return the cassette recorded for a request.
+
+        Args:
+            agent_id: Agent being executed
+            stdin: Input the runtime sent to the process
+
+        Raises:
+            CassetteNotFoundError: If no cassette matches
+        """
+        key = cassette_key(agent_id, stdin)
+        path = self.directory / f"{agent_id}-{key[:16]}{CASSETTE_SUFFIX}"
+        cassette = self._loaded.get(path)
+        if cassette is None:
+            if not path.is_file():
+                raise CassetteNotFoundError(f"No cassette for agent {agent_id} request {key[:16]}")
+            cassette = Cassette.load(path)
+            self._loaded[path] = cassette
+        return cassette
+
+
+class _ReplayStdin:
+    """Collect the runtime's input and start playback when it is closed."""
+
+    def __init__(self, on_close):
+        self._on_close = on_close
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+
+    async def drain(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self._on_close(bytes(self.data))
+
+    async def wait_closed(self) -> None:
+        return None
+
+
+class ReplayProcess:
+    """Stand-in for a cagent process that plays back a recorded cassette."""
+
+    def __init__(self, pid: int, agent_id: str, library: CassetteLibrary, speed: float = 1.0):
+        """
+        Initialize replay process.
+
+        Args:
+            pid: Synthetic pid identifying this replay
+            agent_id: Agent being executed
+            library: Where the cassette is looked up once input arrives
+            speed: Playback speed multiplier; 0 plays without delays
+        """
+        self.pid = pid
+        self.agent_id = agent_id
+        self.library = library
+        self.speed = speed
+        self.returncode: Optional[int] = None
+
+        self.stdin = _ReplayStdin(self._start)
+        self.stdout = asyncio.StreamReader()
+        self.stderr = asyncio.StreamReader()
+        self._player: Optional[asyncio.Task] = None
+        self._exited = asyncio.Event()
+
+    async def wait(self) -> int:
+        """Wait until the cassette has been played to its end."""
+        await self._exited.wait()
+        return self.returncode
+
+    def kill(self) -> None:
+        """Stop playback as if the process was killed."""
+        if self._player is not None:
+            self._player.cancel()
+        if self.returncode is None:
+            self._exit(-9)
+
+    def _start(self, stdin: bytes) -> None:
+        try:
+            cassette = self.library.find(self.agent_id, stdin)
+        except (CassetteNotFoundError, ValueError, OSError) as e:
+            logger.warning(f"Replay PID={self.pid}: {e}")
+            self.stderr.feed_data(f"{e}\n".encode("utf-8"))
+            self._exit(1)
+            return
+        self._player = asyncio.create_task(self._play(cassette))
+
+    async def _play(self, cassette: Cassette) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        streams = {"stdout": self.stdout, "stderr": self.stderr}
+        for offset, channel, data in cassette.chunks:
+            if self.speed > 0:
+                delay = started + offset / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            streams[channel].feed_data(data)
+        if self.speed > 0:
+            delay = started + cassette.duration / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._exit(cassette.exit_code)
+
+    def _exit(self, returncode: int) -> None:
+        self.returncode = returncode
+        self.stdout.feed_eof()
+        self.stderr.feed_eof()
+        self._exited.set()
@@ -0,0 +1,261 @@
+"""
+Coalescing Module: Windowed merging of high-frequency agent events.
+
+Token-level THINKING events and plain INFO lines each cost a replay buffer
+entry, an SSE frame and a renderer IPC message. EventCoalescer sits between
+CagentRuntime.execute_agent() and the publisher and merges runs of
+consecutive events of the same kind for up to a time window or byte budget.
+Every other event (tool calls and results, structured INFO objects,
+results, errors) ends the current run and passes through unchanged, so
+event boundaries that matter to consumers are never moved or merged.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import AsyncGenerator, AsyncIterable, Callable, Optional, Sequence
+
+from event_parser import CagentEvent, EventType, ThinkingEvent, TypedEvent
+
+# Event type -> data key holding the text that is concatenated
+_TEXT_KEYS = {
+    EventType.THINKING: "content",
+    EventType.INFO: "message",
+}
+
+# Data keys that only tag an event; a plain INFO line has no others
+_TAG_KEYS = frozenset({"branch", "coalesced"})
+
+
+def mergeable_text(event: CagentEvent) -> Optional[str]:
+    """Text of a THINKING event or plain INFO line, None if the event is not mergeable."""
+    key = _TEXT_KEYS.get(event.event_type)
+    if key is None or (isinstance(event, TypedEvent) and event.raw is not None):
+        return None
+    text = event.data.get(key)
+    if not isinstance(text, str):
+        return None
+    if event.event_type == EventType.INFO and not event.data.keys() <= _TAG_KEYS | {key}:
+        return None  # structured progress/status object
+    return text
+
+
+def can_merge(first: CagentEvent, event: CagentEvent) -> bool:
+    """Both mergeable, same event type and class, and equal data apart from the text."""
+    if type(first) is not type(event) or first.event_type != event.event_type:
+        return False
+    if mergeable_text(first) is None or mergeable_text(event) is None:
+        return False
+    ignored = (_TEXT_KEYS[event.event_type], "coalesced")
+    return {name: value for name, value in first.data.items() if name not in ignored} == {
+        name: value for name, value in event.data.items() if name not in ignored
+    }
+
+
+def merge_run(run: Sequence[CagentEvent]) -> CagentEvent:
+    """
+    Merge a run of events accepted by can_merge() into one.
+
+    Args:
+        run: Consecutive events, oldest first; may themselves be merged
+
+    Returns:
+        Event with the joined text, the last event's other data, timestamp
+        and seq, and data["coalesced"] = number of source events
+    """
+    last = run[-1]
+    if len(run) == 1:
+        return last
+
+    key = _TEXT_KEYS[last.event_type]
+    # Streamed reasoning arrives as token deltas; text lines are lines
+    separator = "" if isinstance(last, ThinkingEvent) else "\n"
+    data = {
+        **last.data,
+        key: separator.join(event.data[key] for event in run),
+        "coalesced": sum(event.data.get("coalesced", 1) for event in run),
+    }
+    if isinstance(last, TypedEvent):
+        return type(last)(data, last.timestamp, last.seq)
+    return CagentEvent(last.event_type, data, last.timestamp, last.seq)
+
+
+@dataclass
+class CoalescingStats:
+    """Events entering and leaving windowed coalescing."""
+    events_in: int = 0
+    events_out: int = 0
+    window_flushes: int = 0
+    budget_flushes: int = 0
+
+    @property
+    def merge_ratio(self) -> float:
+        """Input events per emitted event (1.0 when nothing was merged)."""
+        return self.events_in / self.events_out if self.events_out else 1.0
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {**asdict(self), "merge_ratio": round(self.merge_ratio, 3)}
+
+
+class EventCoalescer:
+    """Merge consecutive THINKING or plain INFO events within a window or byte budget."""
+
+    def __init__(
+        self,
+        window: float = 0.05,
+        max_bytes: int = 16 * 1024,
+        stats: Optional[CoalescingStats] = None,
+        totals: Optional[CoalescingStats] = None,
+        max_pending: int = 256,
+        backlog: Optional[Callable[[], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize coalescer.
+
+        Args:
+            window: Seconds a run of mergeable events is held back at most,
+                counted from its first event
+            max_bytes: Merged text size (UTF-8) at which a run is emitted early
+            stats: Counters of this coalescer, created if not given
+            totals: Optional counters shared with other coalescers
+            max_pending: Source events read ahead at most before the
+                source is paused, e.g. the publisher's high_water
+            backlog: Events already waiting downstream (such as the
+                stream's subscriber backlog), counted against max_pending
+            clock: Monotonic time source
+        """
+        self.window = window
+        self.max_bytes = max_bytes
+        self.stats = stats if stats is not None else CoalescingStats()
+        self.totals = totals
+        self.max_pending = max_pending
+        self.backlog = backlog
+        self.clock = clock
+
+    async def coalesce(self, events: AsyncIterable[CagentEvent]) -> AsyncGenerator[CagentEvent, None]:
+        """
+        Yield events with runs of mergeable events merged.
+
+        The source is read by a helper task into a bounded queue that is
+        drained in batches, so holding a run costs no task or timer per
+        event. A held run is emitted when the window expires even if the
+        source produces nothing more, so a quiet agent is not delayed by
+        more than window seconds.
+
+        Args:
+            events: Source events, e.g. CagentRuntime.execute_agent()
+
+        Yields:
+            Events in source order; a merged event carries the last merged
+            event's timestamp and seq and data["coalesced"] = run length
+        """
+        loop = asyncio.get_running_loop()
+        pending: deque[CagentEvent] = deque()
+        ready = asyncio.Event()
+        space = asyncio.Event()
+        reader = asyncio.create_task(self._read(events, pending, ready, space))
+        run: list[CagentEvent] = []
+        run_bytes = 0
+        flush_at = 0.0
+
+        try:
+            while True:
+                if not pending:
+                    if reader.done():
+                        break
+                    ready.clear()
+                    if not run:
+                        await ready.wait()
+                        continue
+                    # Sleep until the next event or the end of the window
+                    timer = loop.call_at(loop.time() + max(0.0, flush_at - self.clock()), ready.set)
+                    try:
+                        await ready.wait()
+                    finally:
+                        timer.cancel()
+                    if not pending and self.clock() >= flush_at:
+                        self._count(window_flushes=1)
+                        yield self._release(run)
+                        run = []
+                    continue
+
+                event = pending.popleft()
+                space.set()
+                self._count(events_in=1)
+                size = self._text_size(event)
+                if run and size is not None and can_merge(run[0], event):
+                    run.append(event)
+                    run_bytes += size
+                    if run_bytes >= self.max_bytes:
+                        self._count(budget_flushes=1)
+                        yield self._release(run)
+                        run = []
+                    elif self.clock() >= flush_at:
+                        self._count(window_flushes=1)
+                        yield self._release(run)
+                        run = []
+                    continue
+
+                if run:
+                    yield self._release(run)
+                    run = []
+                if size is not None and size < self.max_bytes:
+                    run, run_bytes, flush_at = [event], size, self.clock() + self.window
+                    continue
+                self._count(events_out=1)
+                yield event
+
+            if run:
+                yield self._release(run)
+                run = []
+            reader.result()  # re-raise a source error
+
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+
+    async def _read(
+        self,
+        events: AsyncIterable[CagentEvent],
+        pending: deque,
+        ready: asyncio.Event,
+        space: asyncio.Event,
+    ) -> None:
+        """Move source events into pending, pausing while the read-ahead is used up."""
+        iterator = events.__aiter__()
+        try:
+            async for event in iterator:
+                pending.append(event)
+                ready.set()
+                while len(pending) >= self._read_ahead():
+                    space.clear()
+                    await space.wait()
+        finally:
+            ready.set()
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _read_ahead(self) -> int:
+        """Source events that may be queued now; at least one so the run can progress."""
+        downstream = self.backlog() if self.backlog is not None else 0
+        return max(1, self.max_pending - downstream)
+
+    def _count(self, **counters: int) -> None:
+        for stats in (self.stats, self.totals):
+            if stats is not None:
+                for name, value in counters.items():
+                    setattr(stats, name, getattr(stats, name) + value)
+
+    @staticmethod
+    def _text_size(event: CagentEvent) -> Optional[int]:
+        """UTF-8 size of a mergeable event's text, None if it is not mergeable."""
+        text = mergeable_text(event)
+        return len(text.encode("utf-8")) if text is not None else None
+
+    def _release(self, run: list[CagentEvent]) -> CagentEvent:
+        self._count(events_out=1)
+        return merge_run(run)
@@ -1,7 +1,26 @@
 """Configuration for Cagent sidecar server."""
 
+import os
+import sys
+from typing import Literal, Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
+# Electron's userData directory is named after the app's productName
+APP_NAME = "electron-svelte"
+
+
+def _default_app_data_dir() -> str:
+    """Per-user data directory of the desktop app, as Electron's app.getPath("userData")."""
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    elif sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~/AppData/Roaming")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, APP_NAME)
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment or defaults"""
@@ -9,7 +28,112 @@ class Settings(BaseSettings):
     HOST: str = "127.0.0.1"
     PORT: int = 8765
     LOG_LEVEL: str = "INFO"
+    # Where durable state lives (the desktop app passes its userData path)
+    APP_DATA_DIR: str = _default_app_data_dir()
+
+    # SSE replay buffer (per request) used for Last-Event-ID resume
+    STREAM_REPLAY_MAX_EVENTS: int = 1000
+    STREAM_REPLAY_MAX_AGE: float = 300.0
+    # Per-subscriber backlog bound and what happens to readers that exceed it
+    STREAM_SUBSCRIBER_MAX_LAG: int = 500
+    STREAM_SLOW_SUBSCRIBER_POLICY: Literal["lag", "drop"] = "lag"
+    # JSON encoder for event payloads ("auto" = orjson when installed)
+    JSON_BACKEND: Literal["auto", "orjson", "json"] = "auto"
+    # Per-request state is released after this many idle seconds
+    STREAM_IDLE_TIMEOUT: float = 300.0
+
+    # Cancel a run once its last subscriber has been gone this long (leaves
+    # room for EventSource reconnects). Off by default: the app's client does
+    # not reconnect, so a dropped socket would cancel the run
+    CANCEL_ON_DISCONNECT: bool = False
+    CANCEL_ON_DISCONNECT_GRACE: float = 10.0
+
+    # Admission control in front of CagentRuntime
+    SCHEDULER_MAX_CONCURRENT: int = 4
+    SCHEDULER_MAX_PER_AGENT: int = 2
+    SCHEDULER_MAX_QUEUE: int = 64
+    SCHEDULER_RETRY_AFTER: float = 5.0
+
+    # Opt-in result cache for deterministic executions
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    RESULT_CACHE_TTL: float = 3600.0
+    RESULT_CACHE_DB_PATH: Optional[str] = None  # enables the SQLite tier
+
+    # Workflow step checkpoints; a SQLite file lets runs resume after a restart
+    WORKFLOW_CHECKPOINT_DB_PATH: Optional[str] = None
+
+    # Journal of runs, events and outcomes behind /agent/result and /agent/runs.
+    # It is a SQLite file, APP_DATA_DIR/journal.db unless set, so results stay
+    # fetchable after a restart; ":memory:" keeps it in memory instead
+    JOURNAL_DB_PATH: Optional[str] = None
+    JOURNAL_FLUSH_INTERVAL: float = 0.05  # group-commit window in seconds
+    JOURNAL_MAX_BATCH: int = 256
+    JOURNAL_MAX_RUNS: int = 1000
+    # Finished runs whose events are kept; older runs keep only their outcome,
+    # so large tool results do not pile up on disk
+    JOURNAL_MAX_EVENT_RUNS: int = 50
+
+    # Warm pool of pre-spawned cagent processes (0 disables)
+    WORKER_POOL_SIZE: int = 0
+    WORKER_POOL_AGENTS: list[str] = ["orchestrator"]
+    WORKER_POOL_MAX_AGE: float = 600.0
+    WORKER_POOL_HEALTH_INTERVAL: float = 10.0
+
+    # Long-lived cagent sessions multiplexing conversations (empty disables)
+    SESSION_AGENTS: list[str] = []
+    SESSION_COMMAND: list[str] = ["cagent", "session", "{team_yaml}", "--agent", "{agent_id}", "--json"]
+    SESSION_RESTART_BACKOFF: float = 1.0
+
+    # Adaptive timeouts: p99 duration x multiplier, clamped to [MIN, MAX];
+    # MAX applies until an agent has LATENCY_MIN_SAMPLES runs in the window
+    LATENCY_WINDOW: int = 200
+    LATENCY_MIN_SAMPLES: int = 20
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = 3.0
+    ADAPTIVE_TIMEOUT_MIN: float = 30.0
+    ADAPTIVE_TIMEOUT_MAX: float = 300.0
+    # Retries of runs that exit before any output, and hedged duplicate runs
+    # once the first event is later than the agent's p95
+    RETRY_MAX_ATTEMPTS: int = 2
+    RETRY_BACKOFF: float = 0.5
+    HEDGE_ENABLED: bool = False
+
+    # Per-execution resource accounting (0 disables sampling) and optional
+    # per-agent limits, e.g. {"extraction": {"max_rss_mb": 2048, "max_cpu_seconds": 120}}
+    RESOURCE_SAMPLE_INTERVAL: float = 0.5
+    RESOURCE_LIMITS: dict[str, dict[str, float]] = {}
+
+    # Bounded output pipeline: subprocess lines buffered per run and the
+    # subscriber backlog at which the overflow policy applies
+    PIPELINE_LINE_QUEUE_SIZE: int = 256
+    PIPELINE_HIGH_WATER: int = 256
+    PIPELINE_OVERFLOW_POLICY: Literal["block", "drop-info", "coalesce"] = "block"
+    # Longest the producer waits on a subscriber that stopped reading before
+    # the slow-subscriber policy is applied to it
+    PIPELINE_MAX_BLOCK: float = 5.0
+    # Merge runs of thinking/plain info events for up to this many seconds
+    # (0 disables) or until their text reaches the byte budget
+    PIPELINE_COALESCE_WINDOW: float = 0.0
+    PIPELINE_COALESCE_MAX_BYTES: int = 16 * 1024
+
+    # Output lines longer than this are spilled to a temp file while read
+    PIPELINE_MAX_LINE_BYTES: int = 8 * 1024 * 1024
+    PIPELINE_SPILL_DIR: Optional[str] = None
+    # Parse stdout a pipe read at a time (one timestamp per chunk) instead of
+    # line by line
+    PIPELINE_CHUNKED_PARSING: bool = False
+
+    # Cassettes: "record" writes every execution to CASSETTE_DIR, "replay"
+    # serves executions from it without cagent (speed 0 = no delays)
+    CASSETTE_MODE: Literal["off", "record", "replay"] = "off"
+    CASSETTE_DIR: str = "cassettes"
+    CASSETTE_REPLAY_SPEED: float = 1.0
     
+    @model_validator(mode="after")
+    def _resolve_data_paths(self) -> "Settings":
+        if self.JOURNAL_DB_PATH is None:
+            self.JOURNAL_DB_PATH = os.path.join(self.APP_DATA_DIR, "journal.db")
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
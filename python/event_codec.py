@@ -0,0 +1,112 @@
+"""
+Event Codec: JSON and SSE frame encoding for streamed events.
+
+Events are encoded once, when they are published, into immutable bytes that
+every subscriber, replay and journal write reuses. The JSON backend is
+pluggable: orjson when it is installed, the standard library otherwise. Both
+produce compact UTF-8 JSON, so payloads look the same whichever is active.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Line separator of generated SSE frames (the sse_starlette default)
+SSE_SEPARATOR = b"\r\n"
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    """A JSON implementation producing UTF-8 bytes."""
+    name: str
+    dumps: Callable[[object], bytes]
+    loads: Callable[[object], object]
+
+
+def _stdlib_dumps(obj: object) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+BACKENDS: dict[str, JsonBackend] = {
+    "json": JsonBackend("json", _stdlib_dumps, json.loads),
+}
+if orjson is not None:
+    BACKENDS["orjson"] = JsonBackend(
+        "orjson",
+        lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+        orjson.loads,
+    )
+
+
+def get_backend(name: str = "auto") -> JsonBackend:
+    """
+    Look up a JSON backend.
+
+    Args:
+        name: "orjson", "json", or "auto" for orjson when it is installed
+
+    Returns:
+        The backend; "orjson" falls back to "json" when orjson is missing
+    """
+    if name == "auto":
+        name = "orjson" if "orjson" in BACKENDS else "json"
+    backend = BACKENDS.get(name)
+    if backend is None:
+        if name != "orjson":
+            raise ValueError(f"Unknown JSON backend: {name}")
+        logger.warning("orjson is not installed, encoding events with the json module")
+        backend = BACKENDS["json"]
+    return backend
+
+
+_backend = get_backend()
+
+
+def set_backend(name: str) -> JsonBackend:
+    """Select the backend used by dumps()/loads(); returns the active backend."""
+    global _backend
+    _backend = get_backend(name)
+    return _backend
+
+
+def backend_name() -> str:
+    """Name of the active JSON backend."""
+    return _backend.name
+
+
+def dumps(obj: object) -> bytes:
+    """Encode obj as compact UTF-8 JSON with the active backend."""
+    return _backend.dumps(obj)
+
+
+def loads(data: object) -> object:
+    """Decode JSON text or bytes with the active backend."""
+    return _backend.loads(data)
+
+
+def sse_frame(event_type: str, data: bytes, seq: Optional[int] = None) -> bytes:
+    """
+    Build a complete Server-Sent Events frame.
+
+    Args:
+        event_type: SSE event name
+        data: Single-line payload (compact JSON never contains newlines)
+        seq: Event id, omitted when None
+
+    Returns:
+        Frame bytes ready to be written to the response as-is
+    """
+    parts = []
+    if seq is not None:
+        parts.append(b"id: %d" % seq)
+    parts.append(b"event: " + str(getattr(event_type, "value", event_type)).encode("utf-8"))
+    parts.append(b"data: " + data)
+    return SSE_SEPARATOR.join(parts) + SSE_SEPARATOR + SSE_SEPARATOR
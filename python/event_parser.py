@@ -9,10 +9,11 @@ import json
 import logging
 import re
 import time
-from dataclasses import dataclass, asdict
 from typing import Generator, Optional, Union
 from enum import Enum
 
+import event_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,23 +25,346 @@ class EventType(str, Enum):
     RESULT = "result"
     ERROR = "error"
     KEEPALIVE = "keepalive"
+    LAGGED = "lagged"
+    QUEUED = "queued"
     INFO = "info"
+    BRANCH_RESULT = "branch_result"
+    BRANCH_ERROR = "branch_error"
+    CANCELLED = "cancelled"
 
 
-@dataclass
 class CagentEvent:
     """Normalized event from agent execution."""
-    event_type: str  # EventType
-    data: dict
-    timestamp: float
+
+    __slots__ = ("event_type", "data", "timestamp", "seq")
+
+    def __init__(self, event_type: str, data: dict, timestamp: float, seq: Optional[int] = None):
+        self.event_type = event_type  # EventType
+        self.data = data
+        self.timestamp = timestamp
+        self.seq = seq  # order within a chunk-parsed stream, None otherwise
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CagentEvent):
+            return NotImplemented
+        return (
+            self.event_type == other.event_type
+            and self.data == other.data
+            and self.timestamp == other.timestamp
+            and self.seq == other.seq
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CagentEvent(event_type={self.event_type!r}, data={self.data!r}, "
+            f"timestamp={self.timestamp!r}, seq={self.seq!r})"
+        )
 
     def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        """Convert to dictionary for JSON serialization (data is shared, not copied)."""
+        result = {"event_type": self.event_type, "data": self.data, "timestamp": self.timestamp}
+        if self.seq is not None:
+            result["seq"] = self.seq
+        return result
+
+    def to_json(self) -> bytes:
+        """Encode as compact UTF-8 JSON with the active event_codec backend."""
+        return event_codec.dumps(self.to_dict())
 
     def to_sse_line(self) -> str:
         """Convert to SSE event line for streaming."""
-        return f"data: {json.dumps(self.to_dict())}\n\n"
+        return f"data: {self.to_json().decode('utf-8')}\n\n"
+
+
+_DATA_SLOT = CagentEvent.__dict__["data"]
+
+
+class TypedEvent(CagentEvent):
+    """
+    Event for a known kind of cagent JSON object; data is the object itself.
+
+    An event built from raw bytes keeps them undecoded until data (or a
+    field property) is first read, and to_json() splices them into the
+    payload once they decode as a JSON object; that check runs on the first
+    to_json() only. Reading data decodes and drops the raw bytes, so a
+    consumer that changes data is always serialized from the decoded dict.
+    Raw bytes that are not a JSON object (truncated or malformed output)
+    make the event a plain INFO message.
+    """
+
+    __slots__ = ("raw", "validated")
+
+    EVENT_TYPE: EventType = EventType.INFO
+
+    def __init__(
+        self,
+        data: Optional[dict],
+        timestamp: float,
+        seq: Optional[int] = None,
+        raw: Optional[bytes] = None,
+    ):
+        super().__init__(self.EVENT_TYPE, data, timestamp, seq)
+        self.raw = raw  # undecoded JSON object, None once decoded
+        self.validated = False  # raw is known to decode as an object
+
+    @property
+    def data(self) -> dict:
+        raw = self.raw
+        if raw is not None:
+            obj = self._decode(raw)
+            self.data = obj if obj is not None else self._malformed(raw)
+        return _DATA_SLOT.__get__(self)
+
+    @data.setter
+    def data(self, value: dict) -> None:
+        _DATA_SLOT.__set__(self, value)
+        self.raw = None
+
+    @staticmethod
+    def _decode(raw: bytes) -> Optional[dict]:
+        try:
+            obj = event_codec.loads(raw)
+        except ValueError:
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    def _malformed(self, raw: bytes) -> dict:
+        """Reclassify raw bytes that are not a JSON object as an output line."""
+        self.event_type = EventType.INFO
+        return {"message": raw.decode("utf-8", errors="ignore")}
+
+    def to_json(self) -> bytes:
+        """Encode as compact JSON; valid raw bytes are passed through as they are."""
+        raw = self.raw
+        if raw is not None and not self.validated:
+            if self._decode(raw) is None:
+                # Never splice malformed or truncated output into a frame
+                self.data = self._malformed(raw)
+                raw = None
+            else:
+                self.validated = True
+        if raw is None:
+            return super().to_json()
+        parts = [
+            b'{"event_type":"',
+            self.event_type.value.encode("utf-8"),
+            b'","data":',
+            raw,
+            b',"timestamp":',
+            event_codec.dumps(self.timestamp),
+        ]
+        if self.seq is not None:
+            parts.append(b',"seq":%d' % self.seq)
+        parts.append(b"}")
+        return b"".join(parts)
+
+
+class ThinkingEvent(TypedEvent):
+    """Reasoning streamed by the model."""
+
+    __slots__ = ()
+
+    EVENT_TYPE = EventType.THINKING
+
+    @property
+    def content(self) -> str:
+        return self.data.get("content") or ""
+
+
+class ToolCallEvent(TypedEvent):
+    """A tool invocation requested by the agent."""
+
+    __slots__ = ()
+
+    EVENT_TYPE = EventType.TOOL_CALL
+
+    @property
+    def tool_call(self) -> dict:
+        call = self.data.get("tool_call")
+        return call if isinstance(call, dict) else self.data
+
+    @property
+    def name(self) -> Optional[str]:
+        call = self.tool_call
+        function = call.get("function")
+        return function.get("name") if isinstance(function, dict) else call.get("name")
+
+    @property
+    def arguments(self) -> object:
+        call = self.tool_call
+        function = call.get("function")
+        return function.get("arguments") if isinstance(function, dict) else call.get("arguments")
+
+
+class ToolResultEvent(TypedEvent):
+    """The output of a tool call; usually the largest payload of a run."""
+
+    __slots__ = ()
+
+    EVENT_TYPE = EventType.TOOL_RESULT
+
+    @property
+    def response(self) -> object:
+        data = self.data
+        return data["response"] if "response" in data else data.get("content")
+
+
+# cagent --json "type" values with a typed event class
+JSON_EVENT_KINDS: dict[str, type[TypedEvent]] = {
+    "agent_choice_reasoning": ThinkingEvent,
+    "thinking": ThinkingEvent,
+    "tool_call": ToolCallEvent,
+    "tool_call_response": ToolResultEvent,
+    "tool_result": ToolResultEvent,
+}
+
+# JSON lines from this size on are typed from their leading "type" field
+# and kept as raw bytes instead of being decoded up front
+DEFAULT_LAZY_PAYLOAD_BYTES = 16 * 1024
+
+_TYPE_SNIFF = re.compile(rb'\s*\{\s*"type"\s*:\s*"([A-Za-z_]+)"')
+
+# A "result" or "error" key at any depth. Finding the depth would take a
+# byte-level scan in Python, which costs several times a decode.
+_OUTCOME_KEY = re.compile(rb'(?<!\\)"(?:result|error)"\s*:')
+
+# Leading bytes inspected to decide whether a line may hold a JSON object
+_JSON_SNIFF_LENGTH = 64
+
+
+def _starts_object(line: Union[str, bytes]) -> bool:
+    """Whether the first non-whitespace character of a line is "{"."""
+    head = line[:_JSON_SNIFF_LENGTH].lstrip()
+    if not head:
+        head = line.lstrip()
+    return head[:1] == (b"{" if isinstance(line, bytes) else "{")
+
+
+# Largest JSON object assembled from several lines before falling back to
+# parsing its lines one by one
+DEFAULT_MAX_OBJECT_BYTES = 8 * 1024 * 1024
+
+# Outside strings: the next byte that is structural or cannot occur in JSON
+_JSON_TOKEN_SCAN = re.compile(rb"[^\s,:0-9.eE+\-truflasn]")
+# Inside strings: the next closing quote or escape
+_JSON_STRING_SCAN = re.compile(rb'["\\]')
+
+
+class JsonFramer:
+    """
+    Find where a JSON object spread over several output lines ends.
+
+    Lines are fed one at a time. Bracket depth and string/escape state carry
+    over between lines, so pretty-printed objects as well as long lines
+    wrapped in the middle of a string are assembled. Nothing is decoded here;
+    feed() only says what to do with the lines collected so far.
+    """
+
+    OPEN = "open"  # the object continues on a later line
+    COMPLETE = "complete"  # take() returns the lines of one whole object
+    TEXT = "text"  # take() returns lines to parse individually
+
+    def __init__(self, max_object_bytes: int = DEFAULT_MAX_OBJECT_BYTES):
+        """
+        Initialize framer.
+
+        Args:
+            max_object_bytes: Size above which an object's lines are handed
+                back as text; the rest of the object is skipped over as text
+        """
+        self.max_object_bytes = max_object_bytes
+        self.lines: list[bytes] = []
+        self.size = 0
+        self.overflowed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def active(self) -> bool:
+        """Whether an object started on an earlier line is still open."""
+        return bool(self.lines) or self.overflowed
+
+    def feed(self, line: bytes) -> str:
+        """
+        Add a line; the first line of an object must start with "{".
+
+        Returns:
+            OPEN, COMPLETE or TEXT
+        """
+        end = self._scan(line)
+        if self.overflowed:
+            self.lines.append(line)
+            if end is not None:
+                self.overflowed = False
+            return self.TEXT
+
+        self.lines.append(line)
+        self.size += len(line)
+        if end is None:
+            if self.size > self.max_object_bytes:
+                self.overflowed = True
+                return self.TEXT
+            return self.OPEN
+        if end < 0 or line[end:].strip():
+            return self.TEXT
+        return self.COMPLETE
+
+    def take(self) -> list[bytes]:
+        """Remove and return the collected lines."""
+        lines, self.lines, self.size = self.lines, [], 0
+        return lines
+
+    def reset(self) -> list[bytes]:
+        """Forget the open object; returns its lines."""
+        self.overflowed = False
+        self._depth, self._in_string, self._escape = 0, False, False
+        return self.take()
+
+    def _scan(self, line: bytes) -> Optional[int]:
+        """
+        Advance the bracket/string state over a line.
+
+        Returns:
+            Offset just past the bracket closing the object, -1 if the line
+            holds text that cannot be JSON, None while the object is open
+        """
+        depth, in_string = self._depth, self._in_string
+        pos, size = (1, len(line)) if self._escape else (0, len(line))
+        self._escape = False
+        while pos < size:
+            if in_string:
+                match = _JSON_STRING_SCAN.search(line, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if line[match.start()] == 0x5C:  # backslash escapes the next byte
+                    pos += 1
+                    self._escape = pos > size
+                else:
+                    in_string = False
+                continue
+
+            match = _JSON_TOKEN_SCAN.search(line, pos)
+            if match is None:
+                break
+            pos = match.end()
+            char = line[match.start()]
+            if char == 0x22:  # "
+                in_string = True
+            elif char in (0x7B, 0x5B):  # { [
+                depth += 1
+            elif char in (0x7D, 0x5D) and depth > 1:  # } ]
+                depth -= 1
+            elif char in (0x7D, 0x5D):
+                self._depth, self._in_string = 0, False
+                return pos
+            else:
+                self._depth, self._in_string = 0, False
+                return -1
+
+        self._depth, self._in_string = depth, in_string
+        return None
 
 
 class EventParser:
@@ -53,59 +377,241 @@ class EventParser:
     AGENT_OUTPUT_PATTERN = re.compile(r"\[OUTPUT\]|Output:", re.IGNORECASE)
     ERROR_PATTERN = re.compile(r"\[ERROR\]|Error:", re.IGNORECASE)
 
-    def __init__(self, json_mode: bool = True):
+    # The markers above as lowercase literals, in priority order. ASCII lines
+    # are classified with one lower() and plain substring searches.
+    _MARKER_LITERALS = (
+        ("thinking", ("[thinking]", "thinking:")),
+        ("tool_call", ("[tool]", "calling tool:")),
+        ("tool_result", ("[tool result]", "tool result:")),
+        ("output", ("[output]", "output:")),
+        ("error", ("[error]", "error:")),
+    )
+
+    # All markers in one alternation, for lines where case folding can change
+    # offsets or match non-ASCII characters. Group names follow priority order.
+    MARKER_PATTERN = re.compile(
+        "|".join(
+            f"(?P<{name}>{pattern.pattern})"
+            for name, pattern in (
+                ("thinking", THINKING_PATTERN),
+                ("tool_call", TOOL_CALL_PATTERN),
+                ("tool_result", TOOL_RESULT_PATTERN),
+                ("output", AGENT_OUTPUT_PATTERN),
+                ("error", ERROR_PATTERN),
+            )
+        ),
+        re.IGNORECASE,
+    )
+
+    # Marker kind -> (event type, data key of the content after the marker)
+    _MARKER_EVENTS = {
+        "thinking": (EventType.THINKING, "content"),
+        "tool_call": (EventType.TOOL_CALL, "content"),
+        "tool_result": (EventType.TOOL_RESULT, "content"),
+        "output": (EventType.RESULT, "result"),
+    }
+
+    def __init__(
+        self,
+        json_mode: bool = True,
+        max_object_bytes: int = DEFAULT_MAX_OBJECT_BYTES,
+        lazy_payload_bytes: int = DEFAULT_LAZY_PAYLOAD_BYTES,
+    ):
         """
         Initialize parser.
 
         Args:
             json_mode: If True, expect JSON output from cagent --json flag
+            max_object_bytes: Largest JSON object feed_line()/parse_chunk()
+                assemble from several lines
+            lazy_payload_bytes: Size from which typed JSON objects are kept
+                as raw bytes until their data is read
         """
         self.json_mode = json_mode
-        self.buffer = ""
+        self.lazy_payload_bytes = lazy_payload_bytes
+        self.framer = JsonFramer(max_object_bytes)
+        self.buffer = bytearray()  # partial line carried between parse_chunk calls
+        self.seq = 0  # sequence number of the next chunk-parsed event
+        self._last_timestamp = 0.0
 
-    def parse_line(self, line: str, is_stderr: bool = False) -> Optional[CagentEvent]:
+    def parse_line(self, line: Union[str, bytes], is_stderr: bool = False) -> Optional[CagentEvent]:
         """
         Parse a single line of output.
 
         Args:
-            line: Output line from subprocess
+            line: Output line from subprocess, as text or raw bytes
             is_stderr: Whether this is stderr (errors) or stdout
 
         Returns:
             CagentEvent if line represents a meaningful event, None otherwise
         """
-        if not line or not line.strip():
+        if not line or line.isspace():
+            return None
+        return self._parse(line, is_stderr, time.time())
+
+    def parse_chunk(self, buf: bytes, is_stderr: bool = False, final: bool = False) -> list[CagentEvent]:
+        """
+        Parse a chunk of raw output that may start or end mid-line.
+
+        The bytes after the last newline are kept in buffer and completed by
+        the next chunk. All events of a chunk share one timestamp, which
+        never goes backwards across chunks, and are numbered with seq.
+
+        Args:
+            buf: Bytes as read from the subprocess pipe
+            is_stderr: Whether the chunk comes from stderr
+            final: End of stream; the buffered partial line is parsed too
+
+        Returns:
+            Events of the complete lines in the chunk, in output order
+        """
+        if not final and b"\n" not in buf:
+            self.buffer += buf
+            return []
+        if self.buffer:
+            self.buffer += buf
+            buf = bytes(self.buffer)
+
+        lines = buf.split(b"\n")
+        self.buffer = bytearray() if final else bytearray(lines.pop())
+
+        timestamp = max(time.time(), self._last_timestamp)
+        self._last_timestamp = timestamp
+
+        events: list[CagentEvent] = []
+        for line in lines:
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            self._feed(line, is_stderr, timestamp, events)
+        if final:
+            self._flush(timestamp, events)
+
+        for event in events:
+            event.seq = self.seq
+            self.seq += 1
+        return events
+
+    def feed_line(self, line: Union[str, bytes], is_stderr: bool = False) -> list[CagentEvent]:
+        """
+        Parse the next line of a stream.
+
+        Unlike parse_line(), JSON objects spread over several lines (pretty
+        printed or wrapped) are assembled into a single event.
+
+        Args:
+            line: Output line without its terminator
+            is_stderr: Whether this is stderr (errors) or stdout
+
+        Returns:
+            Events completed by this line, usually zero or one
+        """
+        events: list[CagentEvent] = []
+        self._feed(line, is_stderr, time.time(), events)
+        return events
+
+    def flush(self) -> list[CagentEvent]:
+        """At end of stream, parse the lines of an unfinished JSON object as text."""
+        events: list[CagentEvent] = []
+        self._flush(time.time(), events)
+        return events
+
+    def _feed(self, line: Union[str, bytes], is_stderr: bool, timestamp: float, events: list[CagentEvent]) -> None:
+        """Parse a line of a stream into events, assembling multi-line JSON objects."""
+        if is_stderr or not self.json_mode:
+            if line and not line.isspace():
+                self._append(self._parse_text(line, is_stderr, timestamp), events)
+            return
+
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        framer = self.framer
+        if not framer.active:
+            if not line or line.isspace():
+                return
+            if not _starts_object(line):
+                self._append(self._parse_text(line, False, timestamp), events)
+                return
+            event = self._parse_json(line, timestamp)
+            if event is not None:
+                events.append(event)
+                return
+            # Incomplete, or not JSON at all
+
+        status = framer.feed(line)
+        if status == JsonFramer.COMPLETE:
+            lines = framer.take()
+            # Lines of pretty-printed objects break between tokens and
+            # wrapped lines anywhere, so they are rejoined without a separator
+            event = self._parse_json(b"".join(lines), timestamp)
+            if event is not None:
+                events.append(event)
+                return
+            self._parse_lines_as_text(lines, timestamp, events)
+        elif status == JsonFramer.TEXT:
+            self._parse_lines_as_text(framer.take(), timestamp, events)
+
+    def _flush(self, timestamp: float, events: list[CagentEvent]) -> None:
+        if self.framer.active:
+            self._parse_lines_as_text(self.framer.reset(), timestamp, events)
+
+    def _parse_lines_as_text(self, lines: list[bytes], timestamp: float, events: list[CagentEvent]) -> None:
+        for line in lines:
+            if line and not line.isspace():
+                self._append(self._parse_text(line, False, timestamp), events)
+
+    @staticmethod
+    def _append(event: Optional[CagentEvent], events: list[CagentEvent]) -> None:
+        if event is not None:
+            events.append(event)
+
+    def _parse(self, line: Union[str, bytes], is_stderr: bool, timestamp: float) -> Optional[CagentEvent]:
+        """Parse a non-blank line into an event stamped with timestamp."""
+        # Try JSON parsing first (for --json mode); json.loads decodes bytes
+        # itself. Only objects become events, so other lines skip the attempt.
+        if self.json_mode and not is_stderr and _starts_object(line):
+            event = self._parse_json(line, timestamp)
+            if event is not None:
+                return event
+            # Fall through to pattern matching
+        return self._parse_text(line, is_stderr, timestamp)
+
+    def _parse_json(self, text: Union[str, bytes], timestamp: float) -> Optional[CagentEvent]:
+        """Parse text starting with "{" as a JSON object; None if it is not one."""
+        if isinstance(text, bytes) and len(text) >= self.lazy_payload_bytes:
+            event = self._parse_raw(text, timestamp)
+            if event is not None:
+                return event
+        try:
+            obj = json.loads(text)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(obj, dict):
             return None
+        return self.parse_object(obj, timestamp)
 
-        timestamp = time.time()
-
-        # Try JSON parsing first (for --json mode)
-        if self.json_mode and not is_stderr:
-            try:
-                obj = json.loads(line)
-                if isinstance(obj, dict):
-                    # Check for result object
-                    if "result" in obj:
-                        return CagentEvent(
-                            event_type=EventType.RESULT,
-                            data={"result": obj["result"]},
-                            timestamp=timestamp,
-                        )
-                    # Check for error in JSON
-                    if "error" in obj:
-                        return CagentEvent(
-                            event_type=EventType.ERROR,
-                            data={"error": obj["error"]},
-                            timestamp=timestamp,
-                        )
-                    # Generic JSON object
-                    return CagentEvent(
-                        event_type=EventType.INFO,
-                        data=obj,
-                        timestamp=timestamp,
-                    )
-            except json.JSONDecodeError:
-                pass  # Fall through to pattern matching
+    @staticmethod
+    def _parse_raw(text: bytes, timestamp: float) -> Optional[TypedEvent]:
+        """Type a large object from its leading "type" field without decoding it."""
+        match = _TYPE_SNIFF.match(text)
+        if match is None:
+            return None
+        event_class = JSON_EVENT_KINDS.get(match.group(1).decode("ascii"))
+        raw = text.strip()
+        # The raw bytes become an SSE data line as they are
+        if event_class is None or not raw.endswith(b"}") or b"\r" in raw:
+            return None
+        # A top-level "result" or "error" key takes priority over the kind.
+        # Objects with such a key anywhere are decoded to find out, so tool
+        # results holding nested result/error objects take the decode path;
+        # the words inside string values do not.
+        if _OUTCOME_KEY.search(raw):
+            return None
+        return event_class(None, timestamp, raw=raw)
+
+    def _parse_text(self, line: Union[str, bytes], is_stderr: bool, timestamp: float) -> Optional[CagentEvent]:
+        """Parse a non-blank line that is not a JSON object."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="ignore")
 
         # stderr -> error event
         if is_stderr:
@@ -117,60 +623,102 @@ class EventParser:
 
         # Pattern matching on stdout
         stripped = line.strip()
+        if not stripped:
+            return None
 
-        # Thinking
-        if self.THINKING_PATTERN.search(stripped):
-            content = self.THINKING_PATTERN.split(stripped)[-1].strip()
+        kind, content_start = self._classify(stripped)
+        if kind is None:
+            # Generic info line
             return CagentEvent(
-                event_type=EventType.THINKING,
-                data={"content": content or stripped},
+                event_type=EventType.INFO,
+                data={"message": stripped},
                 timestamp=timestamp,
             )
-
-        # Tool call
-        if self.TOOL_CALL_PATTERN.search(stripped):
-            content = self.TOOL_CALL_PATTERN.split(stripped)[-1].strip()
+        if kind == "error":
             return CagentEvent(
-                event_type=EventType.TOOL_CALL,
-                data={"content": content or stripped},
+                event_type=EventType.ERROR,
+                data={"error": stripped},
                 timestamp=timestamp,
             )
 
-        # Tool result
-        if self.TOOL_RESULT_PATTERN.search(stripped):
-            content = self.TOOL_RESULT_PATTERN.split(stripped)[-1].strip()
-            return CagentEvent(
-                event_type=EventType.TOOL_RESULT,
-                data={"content": content or stripped},
-                timestamp=timestamp,
-            )
+        event_type, key = self._MARKER_EVENTS[kind]
+        content = stripped[content_start:].strip()
+        return CagentEvent(
+            event_type=event_type,
+            data={key: content or stripped},
+            timestamp=timestamp,
+        )
+
+    def _classify(self, stripped: str) -> tuple[Optional[str], int]:
+        """
+        Find the highest-priority marker kind in a line.
+
+        Returns:
+            (kind, offset just past its last marker), or (None, 0) for plain lines
+        """
+        # Every marker contains ":" or "["
+        if ":" not in stripped and "[" not in stripped:
+            return None, 0
+
+        if not stripped.isascii():
+            best, best_rank, content_start = None, len(self._MARKER_LITERALS), 0
+            for match in self.MARKER_PATTERN.finditer(stripped):
+                rank = self.MARKER_PATTERN.groupindex[match.lastgroup]
+                if rank <= best_rank:
+                    best, best_rank, content_start = match.lastgroup, rank, match.end()
+            return best, content_start
+
+        lowered = stripped.lower()
+        for kind, literals in self._MARKER_LITERALS:
+            content_start = -1
+            for literal in literals:
+                at = lowered.rfind(literal)
+                if at >= 0:
+                    content_start = max(content_start, at + len(literal))
+            if content_start >= 0:
+                return kind, content_start
+        return None, 0
+
+    def parse_object(self, obj: dict, timestamp: Optional[float] = None) -> CagentEvent:
+        """
+        Convert a decoded cagent JSON object into an event.
+
+        Args:
+            obj: JSON object emitted by cagent --json
+            timestamp: Event time, defaults to now
 
-        # Output/Result
-        if self.AGENT_OUTPUT_PATTERN.search(stripped):
-            content = self.AGENT_OUTPUT_PATTERN.split(stripped)[-1].strip()
+        Returns:
+            RESULT or ERROR when the object carries one, a typed event for
+            the kinds in JSON_EVENT_KINDS, INFO otherwise
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        # Check for result object
+        if "result" in obj:
             return CagentEvent(
                 event_type=EventType.RESULT,
-                data={"result": content or stripped},
+                data={"result": obj["result"]},
                 timestamp=timestamp,
             )
-
-        # Error detection by pattern
-        if self.ERROR_PATTERN.search(stripped):
+        # Check for error in JSON
+        if "error" in obj:
             return CagentEvent(
                 event_type=EventType.ERROR,
-                data={"error": stripped},
+                data={"error": obj["error"]},
                 timestamp=timestamp,
             )
-
-        # Generic info line
-        if stripped:
-            return CagentEvent(
-                event_type=EventType.INFO,
-                data={"message": stripped},
-                timestamp=timestamp,
-            )
-
-        return None
+        # Known cagent event kinds
+        kind = obj.get("type")
+        event_class = JSON_EVENT_KINDS.get(kind) if isinstance(kind, str) else None
+        if event_class is not None:
+            return event_class(obj, timestamp)
+        # Generic JSON object
+        return CagentEvent(
+            event_type=EventType.INFO,
+            data=obj,
+            timestamp=timestamp,
+        )
 
     def parse_stream(
         self, stdout_lines: list[str], stderr_lines: list[str]
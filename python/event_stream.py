@@ -0,0 +1,481 @@
+"""
+Event Stream Module: Per-request replay buffers and fan-out for SSE delivery.
+
+Keeps a bounded, sequence-numbered history of the events produced by an
+agent execution. Every event is serialized once at publish time, into its
+JSON payload and a complete SSE frame, and shared by all subscribers. Each
+subscriber reads through its own bounded cursor, so a reconnecting
+EventSource can resume from its Last-Event-ID and several windows can watch
+the same run without stealing events from each other.
+A StreamMultiplexer lets one connection follow many requests at once.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from event_codec import dumps, sse_frame
+from event_parser import CagentEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BufferedEvent:
+    """Event retained in a replay buffer together with its sequence number."""
+    seq: int
+    event: CagentEvent
+    payload: bytes  # JSON encoding of event.to_dict(), shared by all subscribers
+    frame: bytes  # SSE frame (id, event, data) written to every SSE response as-is
+    created_at: float  # time.monotonic() at append time
+
+
+class SlowSubscriberPolicy:
+    """What to do with a subscriber that falls more than max_lag events behind."""
+
+    LAG = "lag"  # skip ahead to the newest max_lag events and report the gap
+    DROP = "drop"  # detach the subscriber; it may reconnect with Last-Event-ID
+
+
+class EventStream:
+    """
+    Bounded replay ring buffer and broadcast hub for a single agent execution.
+
+    Events are numbered from 1 in publish order. Readers keep their own
+    cursor (the last sequence number they delivered) and ask for the tail
+    after it, so the buffer is never consumed destructively and publishing
+    never waits for a reader.
+    """
+
+    def __init__(self, max_events: int = 1000, max_age: float = 300.0):
+        """
+        Initialize an empty stream.
+
+        Args:
+            max_events: Maximum number of events retained for replay
+            max_age: Maximum age in seconds of a retained event
+        """
+        self.max_events = max_events
+        self.max_age = max_age
+        self.closed = False
+        self._entries: deque[BufferedEvent] = deque()
+        self._next_seq = 1
+        self._changed = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._subscriptions: set["Subscription"] = set()
+        # Called when the last subscriber of an open stream detaches
+        self.on_idle: Optional[Callable[[], None]] = None
+        # Called with every newly published event (e.g. to journal it)
+        self.on_publish: Optional[Callable[[BufferedEvent], None]] = None
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the most recently published event (0 if none)."""
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained event."""
+        if self._entries:
+            return self._entries[0].seq
+        return self._next_seq
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of currently attached subscribers."""
+        return len(self._subscriptions)
+
+    @property
+    def backlog(self) -> int:
+        """Unread events of the slowest non-stalled subscriber (0 without subscribers)."""
+        return max(
+            (subscription.lag for subscription in self._subscriptions if not subscription.stalled),
+            default=0,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def subscribe(
+        self,
+        last_seq: int = 0,
+        max_lag: Optional[int] = None,
+        policy: str = SlowSubscriberPolicy.LAG,
+        wakeup: Optional[asyncio.Event] = None,
+    ) -> "Subscription":
+        """
+        Attach a new subscriber positioned after last_seq.
+
+        Args:
+            last_seq: Last sequence number the subscriber has already seen
+            max_lag: Maximum unread events before the slow-subscriber policy
+                applies (defaults to max_events)
+            policy: SlowSubscriberPolicy value
+            wakeup: Optional event set on every publish/close, so a reader
+                following several streams can wait on a single event
+
+        Returns:
+            Subscription bound to this stream
+        """
+        subscription = Subscription(
+            self,
+            cursor=last_seq,
+            max_lag=max_lag if max_lag is not None else self.max_events,
+            policy=policy,
+            wakeup=wakeup,
+        )
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: "Subscription") -> None:
+        """Detach a subscriber. Safe to call more than once."""
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.discard(subscription)
+        self._notify_drained()
+        if not self._subscriptions and not self.closed and self.on_idle is not None:
+            self.on_idle()
+
+    def publish(self, event: CagentEvent) -> int:
+        """
+        Append an event to the buffer and wake up waiting readers.
+
+        Args:
+            event: Event to publish
+
+        Returns:
+            Sequence number assigned to the event
+        """
+        if self.closed:
+            raise RuntimeError("Cannot publish to a closed event stream")
+
+        seq = self._next_seq
+        self._next_seq += 1
+        payload = event.to_json()
+        entry = BufferedEvent(
+            seq=seq,
+            event=event,
+            payload=payload,
+            frame=sse_frame(event.event_type, payload, seq),
+            created_at=time.monotonic(),
+        )
+        self._entries.append(entry)
+        if self.on_publish is not None:
+            self.on_publish(entry)
+        self._evict()
+        self._notify()
+        return seq
+
+    def close(self) -> None:
+        """Mark the stream as complete; readers stop after draining the tail."""
+        if not self.closed:
+            self.closed = True
+            self._notify()
+            self._notify_drained()
+
+    def events_after(self, last_seq: int) -> list[BufferedEvent]:
+        """
+        Return retained events with a sequence number greater than last_seq.
+
+        Args:
+            last_seq: Last sequence number the reader has already seen
+
+        Returns:
+            Missing tail of the stream, oldest first
+        """
+        self._evict()
+        if not self._entries or last_seq >= self.last_seq:
+            return []
+
+        start = max(0, last_seq + 1 - self.first_seq)
+        return [self._entries[i] for i in range(start, len(self._entries))]
+
+    def has_gap(self, last_seq: int) -> bool:
+        """Whether events after last_seq were evicted before they could be replayed."""
+        return last_seq + 1 < self.first_seq and last_seq < self.last_seq
+
+    async def wait_for_events(self, last_seq: int) -> None:
+        """Wait until an event newer than last_seq is published or the stream closes."""
+        while not self.closed and self.last_seq <= last_seq:
+            changed = self._changed
+            await changed.wait()
+
+    async def wait_for_capacity(self, limit: int) -> None:
+        """Wait until every subscriber is fewer than limit events behind or the stream closes."""
+        while not self.closed and self.backlog >= limit:
+            drained = self._drained
+            await drained.wait()
+
+    def shed_stalled(self, limit: int) -> int:
+        """
+        Apply the slow-subscriber policy to subscribers limit or more events behind.
+
+        Used by a producer that has waited too long for capacity: such
+        subscribers are dropped (DROP) or no longer counted in backlog until
+        they poll again (LAG), where their max_lag applies as usual.
+
+        Args:
+            limit: Backlog at which a subscriber is considered stalled
+
+        Returns:
+            Number of subscribers shed
+        """
+        shed = 0
+        for subscription in list(self._subscriptions):
+            if not subscription.stalled and subscription.lag >= limit:
+                subscription.stall()
+                shed += 1
+        return shed
+
+    def _notify_drained(self) -> None:
+        drained = self._drained
+        self._drained = asyncio.Event()
+        drained.set()
+
+    def _notify(self) -> None:
+        # Swap the event before setting it so every current waiter wakes up
+        # while later waiters block on a fresh, unset event.
+        changed = self._changed
+        self._changed = asyncio.Event()
+        changed.set()
+        for subscription in self._subscriptions:
+            if subscription.wakeup is not None:
+                subscription.wakeup.set()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_events:
+            self._entries.popleft()
+
+        cutoff = time.monotonic() - self.max_age
+        while self._entries and self._entries[0].created_at < cutoff:
+            self._entries.popleft()
+
+
+class Subscription:
+    """A single reader attached to an EventStream with its own bounded cursor."""
+
+    def __init__(
+        self,
+        stream: EventStream,
+        cursor: int,
+        max_lag: int,
+        policy: str,
+        wakeup: Optional[asyncio.Event] = None,
+    ):
+        """
+        Initialize a subscription. Use EventStream.subscribe() instead.
+
+        Args:
+            stream: Stream being read
+            cursor: Last sequence number already delivered
+            max_lag: Maximum unread events tolerated before applying policy
+            policy: SlowSubscriberPolicy value
+            wakeup: Optional shared event set whenever the stream changes
+        """
+        self.stream = stream
+        self.wakeup = wakeup
+        self.cursor = cursor
+        self.max_lag = max(1, max_lag)
+        self.policy = policy
+        self.dropped = False
+        self.stalled = False
+        self.skipped_total = 0
+
+    @property
+    def lag(self) -> int:
+        """Number of published events this subscriber has not read yet."""
+        return max(0, self.stream.last_seq - self.cursor)
+
+    @property
+    def finished(self) -> bool:
+        """Whether there is nothing left to deliver to this subscriber."""
+        return self.dropped or (self.stream.closed and self.lag == 0)
+
+    def poll(self) -> Tuple[int, list[BufferedEvent]]:
+        """
+        Collect undelivered events and advance the cursor past them.
+
+        Returns:
+            Tuple of (number of events skipped since the last poll, events
+            to deliver). A subscriber dropped by the slow-subscriber policy
+            receives no further events.
+        """
+        if self.dropped:
+            return 0, []
+
+        self.stalled = False
+        skipped = 0
+        if self.lag > self.max_lag:
+            if self.policy == SlowSubscriberPolicy.DROP:
+                logger.warning(
+                    f"Dropping slow subscriber {self.lag} events behind (max {self.max_lag})"
+                )
+                self.dropped = True
+                self.stream.unsubscribe(self)
+                return 0, []
+            target = self.stream.last_seq - self.max_lag
+            skipped += target - self.cursor
+            self.cursor = target
+
+        if self.stream.has_gap(self.cursor):
+            skipped += self.stream.first_seq - 1 - self.cursor
+            self.cursor = self.stream.first_seq - 1
+
+        entries = self.stream.events_after(self.cursor)
+        if entries:
+            self.cursor = entries[-1].seq
+        if entries or skipped:
+            self.stream._notify_drained()
+        self.skipped_total += skipped
+        return skipped, entries
+
+    def stall(self) -> None:
+        """Apply the slow-subscriber policy on behalf of a producer that cannot wait any longer."""
+        if self.policy == SlowSubscriberPolicy.DROP:
+            logger.warning(f"Dropping stalled subscriber {self.lag} events behind")
+            self.dropped = True
+            self.stream.unsubscribe(self)
+            if self.wakeup is not None:
+                self.wakeup.set()
+            return
+        logger.warning(f"Subscriber stalled {self.lag} events behind; no longer holding the run back")
+        self.stalled = True
+
+    async def wait(self) -> None:
+        """Wait until there is something new to poll."""
+        await self.stream.wait_for_events(self.cursor)
+
+    def close(self) -> None:
+        """Detach from the stream."""
+        self.stream.unsubscribe(self)
+
+
+class StreamMultiplexer:
+    """
+    Follow many request streams over a single connection.
+
+    All subscriptions share one wakeup event, so a connection needs a single
+    waiter and a single keepalive timer no matter how many runs it watches.
+    Frames are JSON text tagged with request_id; event payloads are spliced
+    in as already-encoded JSON rather than re-serialized.
+    """
+
+    def __init__(
+        self,
+        resolve_stream: Callable[[str], EventStream],
+        max_lag: Optional[int] = None,
+        policy: str = SlowSubscriberPolicy.LAG,
+    ):
+        """
+        Initialize an empty multiplexer.
+
+        Args:
+            resolve_stream: Returns (creating if needed) the stream for a request_id
+            max_lag: Per-subscription backlog bound
+            policy: SlowSubscriberPolicy value
+        """
+        self._resolve_stream = resolve_stream
+        self.max_lag = max_lag
+        self.policy = policy
+        self.subscriptions: dict[str, Subscription] = {}
+        self._wakeup = asyncio.Event()
+        self._control: list[str] = []
+
+    def subscribe(self, request_id: str, last_seq: int = 0) -> None:
+        """Start following a request, replaying events after last_seq."""
+        if request_id in self.subscriptions:
+            return
+        stream = self._resolve_stream(request_id)
+        self.subscriptions[request_id] = stream.subscribe(
+            last_seq=last_seq,
+            max_lag=self.max_lag,
+            policy=self.policy,
+            wakeup=self._wakeup,
+        )
+        self.push_control(request_id, "subscribed", {"last_event_id": last_seq})
+
+    def unsubscribe(self, request_id: str, reason: str = "client") -> None:
+        """Stop following a request."""
+        subscription = self.subscriptions.pop(request_id, None)
+        if subscription is None:
+            return
+        subscription.close()
+        self.push_control(request_id, "unsubscribed", {"reason": reason})
+
+    def drain(self) -> list[str]:
+        """
+        Collect every frame ready to be sent, oldest first per request.
+
+        Subscriptions whose stream has finished (or that were dropped as
+        slow) are removed after their last frame.
+
+        Returns:
+            Encoded JSON text frames
+        """
+        frames = self._control
+        self._control = []
+
+        for request_id, subscription in list(self.subscriptions.items()):
+            skipped, entries = subscription.poll()
+            if skipped or subscription.dropped:
+                frames.append(self._encode(request_id, None, "lagged", dumps({
+                    "skipped": skipped,
+                    "dropped": subscription.dropped,
+                    "resume_from": subscription.cursor,
+                })))
+            for entry in entries:
+                frames.append(
+                    self._encode(request_id, entry.seq, entry.event.event_type, entry.payload)
+                )
+
+            if subscription.finished:
+                self.unsubscribe(
+                    request_id, reason="dropped" if subscription.dropped else "completed"
+                )
+                frames.extend(self._control)
+                self._control = []
+
+        return frames
+
+    async def wait(self) -> None:
+        """Wait until any followed stream changes or a control frame is queued."""
+        await self._wakeup.wait()
+        self._wakeup.clear()
+
+    def close(self) -> None:
+        """Detach every subscription."""
+        for subscription in self.subscriptions.values():
+            subscription.close()
+        self.subscriptions.clear()
+
+    def push_control(self, request_id: Optional[str], event_type: str, data: dict) -> None:
+        """Queue a connection-level frame (acknowledgements, errors) for sending."""
+        self._control.append(self._encode(request_id, None, event_type, dumps(data)))
+        self._wakeup.set()
+
+    @staticmethod
+    def _encode(request_id: Optional[str], seq: Optional[int], event_type: str, payload: bytes) -> str:
+        header = dumps({"request_id": request_id, "id": seq, "event": event_type})
+        return (header[:-1] + b',"data":' + payload + b"}").decode("utf-8")
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """
+    Parse a Last-Event-ID value into a sequence number.
+
+    Args:
+        value: Raw header or query value
+
+    Returns:
+        Sequence number, or 0 when missing or malformed
+    """
+    if not value:
+        return 0
+    try:
+        return max(0, int(value.strip()))
+    except ValueError:
+        logger.debug(f"Ignoring malformed Last-Event-ID: {value!r}")
+        return 0
@@ -0,0 +1,154 @@
+"""
+Expiry Module: Idle deadlines for per-request state.
+
+Replaces the periodic orphan sweep: each tracked request has a deadline on
+the monotonic clock, refreshed on activity by a single dict store. Deadlines
+live in a min-heap that is updated lazily - a refresh never touches the
+heap; when a stale entry reaches the top it is pushed back with the current
+deadline - and one event loop timer is armed for the earliest entry, so
+expiry fires at the deadline instead of at the next sweep.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineTracker:
+    """Idle deadlines for keys, expired by a single timer at the earliest deadline."""
+
+    def __init__(
+        self,
+        timeout: float,
+        on_expire: Callable[[str], None],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            timeout: Seconds a key may stay idle before it expires
+            on_expire: Called with each expired key; may touch() it again to re-arm
+            clock: Monotonic clock in seconds
+        """
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self._clock = clock
+        self._deadlines: dict[str, float] = {}
+        # Heap entries never lie after a key's real deadline; keys in _queued
+        # have exactly one entry, so refreshes never grow the heap
+        self._heap: list[tuple[float, str]] = []
+        self._queued: set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = math.inf
+        self.expired_total = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def touch(self, key: str) -> None:
+        """Start tracking a key, or push its deadline timeout seconds into the future."""
+        deadline = self._clock() + self.timeout
+        self._deadlines[key] = deadline
+        if key not in self._queued:
+            self._queued.add(key)
+            heapq.heappush(self._heap, (deadline, key))
+            if deadline < self._timer_at:
+                self._arm(deadline)
+
+    def discard(self, key: str) -> None:
+        """Stop tracking a key. Its heap entry is dropped when it reaches the top."""
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        """Current deadline of a key on the tracker's clock, or None if untracked."""
+        return self._deadlines.get(key)
+
+    def expire_due(self, now: Optional[float] = None) -> list[str]:
+        """
+        Expire every key whose deadline has passed.
+
+        Args:
+            now: Current clock value, defaults to the tracker's clock
+
+        Returns:
+            Expired keys, after on_expire was called for each
+        """
+        if now is None:
+            now = self._clock()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, key = heapq.heappop(self._heap)
+            deadline = self._deadlines.get(key)
+            if deadline is None:
+                self._queued.discard(key)
+            elif deadline > now:
+                heapq.heappush(self._heap, (deadline, key))
+            else:
+                del self._deadlines[key]
+                self._queued.discard(key)
+                expired.append(key)
+
+        self.expired_total += len(expired)
+        for key in expired:
+            try:
+                self.on_expire(key)
+            except Exception:
+                logger.exception(f"Expiry callback failed for {key}")
+        return expired
+
+    def start(self) -> None:
+        """Bind to the running event loop and arm the timer for the earliest deadline."""
+        self._loop = asyncio.get_running_loop()
+        if self._heap:
+            self._arm(self._heap[0][0])
+
+    def stop(self) -> None:
+        """Cancel the timer; keys stay tracked but no longer expire on their own."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_at = math.inf
+        self._loop = None
+
+    def clear(self) -> None:
+        """Forget every key."""
+        self._deadlines.clear()
+        self._heap.clear()
+        self._queued.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_at = math.inf
+
+    def stats(self) -> dict:
+        """Snapshot of tracker counters for the metrics endpoint."""
+        return {
+            "tracked": len(self._deadlines),
+            "heap_size": len(self._heap),
+            "expired_total": self.expired_total,
+        }
+
+    def _arm(self, deadline: float) -> None:
+        if self._loop is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = deadline
+        self._timer = self._loop.call_later(max(0.0, deadline - self._clock()), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._timer_at = math.inf
+        self.expire_due()
+        if self._heap and self._heap[0][0] < self._timer_at:
+            self._arm(self._heap[0][0])
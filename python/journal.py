@@ -0,0 +1,485 @@
+"""
+Execution Journal: Append-only record of agent runs that survives restarts.
+
+Every request started by the sidecar is journaled with its request body, the
+events published on its stream and its outcome, so finished results can be
+fetched again (GET /agent/result/{request_id}) without re-running the agent,
+even after the sidecar process was restarted. Writes are queued in memory and
+group-committed by a background flusher in one SQLite transaction per batch,
+keeping disk I/O off the event path; a batch whose commit fails is queued
+again and only dropped after COMMIT_ATTEMPTS failed commits. Runs still
+marked running when the journal is opened belonged to a previous process
+and are marked interrupted.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from event_stream import BufferedEvent
+
+logger = logging.getLogger(__name__)
+
+# Finished runs whose events are kept by default; event payloads (tool
+# results above all) dominate the journal's size
+DEFAULT_EVENT_RUNS = 50
+
+# Commits a queued write is part of before it is dropped
+COMMIT_ATTEMPTS = 3
+
+
+class RunStatus:
+    """Lifecycle states of a journaled run."""
+
+    RUNNING = "running"
+    COMPLETED = "completed"  # ended with a result event
+    FAILED = "failed"  # ended with an error event
+    CANCELLED = "cancelled"  # ended with a cancelled event
+    INTERRUPTED = "interrupted"  # stopped without an outcome (restart, shutdown)
+
+
+# Terminal event type -> final run status
+_TERMINAL_STATUS = {
+    "result": RunStatus.COMPLETED,
+    "error": RunStatus.FAILED,
+    "cancelled": RunStatus.CANCELLED,
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "request_id TEXT PRIMARY KEY, kind TEXT NOT NULL, agent_id TEXT, "
+    "request TEXT NOT NULL, status TEXT NOT NULL, coalesced_with TEXT, "
+    "started_at REAL NOT NULL, finished_at REAL, outcome TEXT, "
+    "event_count INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at)",
+    "CREATE INDEX IF NOT EXISTS runs_coalesced_with ON runs (coalesced_with)",
+    "CREATE TABLE IF NOT EXISTS run_events ("
+    "request_id TEXT NOT NULL, seq INTEGER NOT NULL, event_type TEXT NOT NULL, "
+    "payload TEXT NOT NULL, PRIMARY KEY (request_id, seq))",
+)
+
+_SUMMARY_COLUMNS = (
+    "request_id, kind, agent_id, status, coalesced_with, started_at, finished_at, event_count"
+)
+
+
+@dataclass
+class _OpenRun:
+    """In-memory bookkeeping of a run that has not ended yet."""
+    event_count: int = 0
+    outcome: Optional[BufferedEvent] = None
+
+
+class ExecutionJournal:
+    """SQLite-backed journal of runs, their events and outcomes."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        flush_interval: float = 0.05,
+        max_batch: int = 256,
+        max_runs: int = 1000,
+        max_event_runs: Optional[int] = None,
+    ):
+        """
+        Initialize journal.
+
+        Args:
+            db_path: SQLite file so runs survive restarts (in memory if None
+                or ":memory:"); missing parent directories are created
+            flush_interval: Seconds queued writes wait for a group commit
+            max_batch: Queued writes that trigger an immediate commit
+            max_runs: Finished runs retained; older ones are pruned
+            max_event_runs: Finished runs whose events are retained; older
+                ones keep only their outcome (default DEFAULT_EVENT_RUNS)
+        """
+        if db_path == ":memory:":
+            db_path = None
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.max_runs = max_runs
+        if max_event_runs is None:
+            max_event_runs = DEFAULT_EVENT_RUNS
+        self.max_event_runs = min(max_event_runs, max_runs)
+        self._open: dict[str, _OpenRun] = {}
+        self._pending: list[tuple[str, tuple]] = []
+        self._prune_pending = False
+        self._failed_commits = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+        self.commits = 0
+        self.writes = 0
+        self.failed_commits = 0
+        self.dropped_writes = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False)
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    async def open(self) -> int:
+        """
+        Start the group-commit flusher and mark runs of a previous process interrupted.
+
+        Returns:
+            Number of runs marked interrupted
+        """
+        live = list(self._open)
+        interrupted = await asyncio.to_thread(self._db_mark_interrupted, live, time.time())
+        if interrupted:
+            logger.warning(f"Marked {interrupted} run(s) interrupted by a restart")
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return interrupted
+
+    async def close(self) -> None:
+        """Stop the flusher and commit everything still queued."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+            self._wakeup = None
+        await self.flush()
+
+    def begin_run(
+        self,
+        request_id: str,
+        kind: str,
+        request: dict,
+        agent_id: Optional[str] = None,
+        coalesced_with: Optional[str] = None,
+    ) -> None:
+        """
+        Journal a newly started request.
+
+        Args:
+            request_id: Request identifier
+            kind: "agent", "group" or "workflow"
+            request: Request body as received
+            agent_id: Agent executed, for single-agent runs
+            coalesced_with: Leader request a coalesced request follows; its
+                events and outcome are read from the leader's run
+        """
+        if coalesced_with is None:
+            self._open[request_id] = _OpenRun()
+        self._enqueue(
+            "INSERT OR REPLACE INTO runs "
+            "(request_id, kind, agent_id, request, status, coalesced_with, started_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (request_id, kind, agent_id, json.dumps(request), RunStatus.RUNNING,
+             coalesced_with, time.time()),
+        )
+
+    def record_event(self, request_id: str, entry: BufferedEvent) -> None:
+        """
+        Journal an event published on a run's stream.
+
+        Events of requests without an open run are ignored.
+
+        Args:
+            request_id: Request that owns the stream
+            entry: Published event with its sequence number and encoded payload
+        """
+        run = self._open.get(request_id)
+        if run is None:
+            return
+        event_type = entry.event.event_type
+        run.event_count += 1
+        if event_type in _TERMINAL_STATUS:
+            run.outcome = entry
+        self._enqueue(
+            "INSERT OR REPLACE INTO run_events (request_id, seq, event_type, payload) "
+            "VALUES (?, ?, ?, ?)",
+            (request_id, entry.seq, getattr(event_type, "value", event_type), entry.payload),
+        )
+
+    def end_run(self, request_id: str, status: Optional[str] = None) -> None:
+        """
+        Journal the end of a run. Safe to call more than once.
+
+        Args:
+            request_id: Request identifier
+            status: Final RunStatus; defaults to the one implied by the last
+                terminal event, or interrupted without one
+        """
+        finished_at = time.time()
+        run = self._open.pop(request_id, None)
+        if run is None:
+            if status is not None:
+                # A coalesced request detached from the run it followed
+                self._enqueue(
+                    "UPDATE runs SET status = ?, finished_at = ? "
+                    "WHERE request_id = ? AND status = ?",
+                    (status, finished_at, request_id, RunStatus.RUNNING),
+                )
+            return
+
+        outcome = run.outcome
+        if status is None:
+            status = (
+                _TERMINAL_STATUS[outcome.event.event_type] if outcome is not None
+                else RunStatus.INTERRUPTED
+            )
+        self._enqueue(
+            "UPDATE runs SET status = ?, finished_at = ?, outcome = ?, event_count = ? "
+            "WHERE request_id = ?",
+            (status, finished_at, outcome.payload if outcome is not None else None,
+             run.event_count, request_id),
+        )
+        self._enqueue(
+            "UPDATE runs SET status = ?, finished_at = ? WHERE coalesced_with = ? AND status = ?",
+            (status, finished_at, request_id, RunStatus.RUNNING),
+        )
+        self._prune_pending = True
+
+    async def flush(self) -> None:
+        """
+        Commit every queued write in a single transaction.
+
+        Raises:
+            sqlite3.Error: If the commit failed; the writes stay queued
+        """
+        async with self._flush_lock:
+            batch = self._take_batch()
+            if batch:
+                try:
+                    await asyncio.to_thread(self._db_write, *batch)
+                except sqlite3.Error:
+                    self._requeue(*batch)
+                    raise
+
+    async def get(self, request_id: str, include_events: bool = False) -> Optional[dict]:
+        """
+        Look up a journaled run.
+
+        Args:
+            request_id: Request identifier
+            include_events: Also return the run's recorded events
+
+        Returns:
+            Run record with its decoded outcome, or None if the request is unknown
+        """
+        await self.flush()
+        run = await asyncio.to_thread(self._db_get, request_id, include_events)
+        if run is not None:
+            self._overlay_live_count(run)
+        return run
+
+    async def list_runs(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: Optional[str] = None,
+        agent_id: Optional[str] = None,
+    ) -> dict:
+        """
+        List journaled runs, newest first.
+
+        Args:
+            limit: Page size
+            offset: Runs to skip
+            status: Only runs in this RunStatus
+            agent_id: Only runs of this agent
+
+        Returns:
+            {"runs": [...summaries], "total", "limit", "offset"}
+        """
+        await self.flush()
+        runs, total = await asyncio.to_thread(self._db_list, limit, offset, status, agent_id)
+        for run in runs:
+            self._overlay_live_count(run)
+        return {"runs": runs, "total": total, "limit": limit, "offset": offset}
+
+    def stats(self) -> dict:
+        """Snapshot of journal counters for the metrics endpoint."""
+        return {
+            "open_runs": len(self._open),
+            "pending_writes": len(self._pending),
+            "writes": self.writes,
+            "commits": self.commits,
+            "failed_commits": self.failed_commits,
+            "dropped_writes": self.dropped_writes,
+            "persistent": self.db_path is not None,
+        }
+
+    def _overlay_live_count(self, run: dict) -> None:
+        # Event counts are only written when a run ends
+        live = self._open.get(run["coalesced_with"] or run["request_id"])
+        if live is not None:
+            run["event_count"] = live.event_count
+
+    def _enqueue(self, statement: str, params: tuple) -> None:
+        self._pending.append((statement, params))
+        if len(self._pending) < self.max_batch:
+            return
+        if self._wakeup is not None:
+            self._wakeup.set()
+        elif not self._flush_lock.locked():
+            # No flusher running: commit inline rather than grow without bound
+            batch = self._take_batch()
+            try:
+                self._db_write(*batch)
+            except sqlite3.Error:
+                logger.exception("Execution journal commit failed")
+                self._requeue(*batch)
+
+    def _take_batch(self) -> Optional[tuple[list[tuple[str, tuple]], bool]]:
+        if not self._pending and not self._prune_pending:
+            return None
+        batch = (self._pending, self._prune_pending)
+        self._pending = []
+        self._prune_pending = False
+        return batch
+
+    def _requeue(self, statements: list[tuple[str, tuple]], prune: bool) -> None:
+        """Put the writes of a failed commit back in front of the queue."""
+        self.failed_commits += 1
+        self._failed_commits += 1
+        if self._failed_commits >= COMMIT_ATTEMPTS:
+            # Most likely a write that can never succeed; stop retrying it
+            logger.error(
+                f"Execution journal dropped {len(statements)} write(s) "
+                f"after {COMMIT_ATTEMPTS} failed commits"
+            )
+            self.dropped_writes += len(statements)
+            self._failed_commits = 0
+            return
+        self._pending[:0] = statements
+        self._prune_pending = self._prune_pending or prune
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error:
+                logger.exception("Execution journal commit failed")
+
+    def _db_write(self, statements: list[tuple[str, tuple]], prune: bool) -> None:
+        with self._db_lock:
+            with self._db:
+                for statement, params in statements:
+                    self._db.execute(statement, params)
+                if prune:
+                    self._db_prune()
+            self.writes += len(statements)
+            self.commits += 1
+            self._failed_commits = 0
+
+    def _db_prune(self) -> None:
+        finished = [
+            row[0] for row in self._db.execute(
+                "SELECT request_id FROM runs WHERE status != ? "
+                "ORDER BY started_at DESC, rowid DESC LIMIT -1 OFFSET ?",
+                (RunStatus.RUNNING, self.max_event_runs),
+            )
+        ]
+        if not finished:
+            return
+        stale = finished[self.max_runs - self.max_event_runs:]
+        self._db.executemany("DELETE FROM runs WHERE request_id = ?", [(rid,) for rid in stale])
+        self._db.executemany("DELETE FROM run_events WHERE request_id = ?", [(rid,) for rid in finished])
+
+    def _db_mark_interrupted(self, live: list[str], now: float) -> int:
+        placeholders = ", ".join("?" for _ in live)
+        condition = f" AND request_id NOT IN ({placeholders})" if live else ""
+        with self._db_lock:
+            with self._db:
+                cursor = self._db.execute(
+                    f"UPDATE runs SET status = ?, finished_at = ? WHERE status = ?{condition}",
+                    (RunStatus.INTERRUPTED, now, RunStatus.RUNNING, *live),
+                )
+        return cursor.rowcount
+
+    def _db_get(self, request_id: str, include_events: bool) -> Optional[dict]:
+        with self._db_lock:
+            row = self._db.execute(
+                f"SELECT {_SUMMARY_COLUMNS}, request, outcome FROM runs WHERE request_id = ?",
+                (request_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            run = _summary(row)
+            run["request"] = json.loads(row[8])
+            outcome = row[9]
+
+            # A coalesced request's events and outcome are those of its leader
+            source_id = request_id
+            leader_id = run["coalesced_with"]
+            if leader_id is not None and run["status"] != RunStatus.CANCELLED:
+                leader = self._db.execute(
+                    "SELECT outcome, event_count FROM runs WHERE request_id = ?", (leader_id,)
+                ).fetchone()
+                if leader is not None:
+                    source_id = leader_id
+                    outcome, run["event_count"] = leader
+
+            events = None
+            if include_events:
+                events = self._db.execute(
+                    "SELECT seq, payload FROM run_events WHERE request_id = ? ORDER BY seq",
+                    (source_id,),
+                ).fetchall()
+
+        outcome = json.loads(outcome) if outcome is not None else None
+        run["outcome"] = outcome
+        data = outcome["data"] if outcome is not None else {}
+        run["result"] = data.get("result") if run["status"] == RunStatus.COMPLETED else None
+        run["error"] = data.get("error") if run["status"] == RunStatus.FAILED else None
+        if events is not None:
+            run["events"] = [{"id": seq, **json.loads(payload)} for seq, payload in events]
+        return run
+
+    def _db_list(
+        self, limit: int, offset: int, status: Optional[str], agent_id: Optional[str]
+    ) -> tuple[list[dict], int]:
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if agent_id is not None:
+            conditions.append("agent_id = ?")
+            params.append(agent_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._db_lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM runs{where} "
+                "ORDER BY started_at DESC, rowid DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [_summary(row) for row in rows], total
+
+
+def _summary(row: tuple) -> dict:
+    request_id, kind, agent_id, status, coalesced_with, started_at, finished_at, event_count = row[:8]
+    return {
+        "request_id": request_id,
+        "kind": kind,
+        "agent_id": agent_id,
+        "status": status,
+        "coalesced_with": coalesced_with,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "event_count": event_count,
+    }
@@ -0,0 +1,132 @@
+"""
+Latency Tracker: Rolling per-agent latency percentiles.
+
+Agents differ by orders of magnitude in how long they run (a haiku
+scheduling call vs. a creative planning run), so a single flat timeout is
+either too tight for the slow ones or far too loose for the fast ones.
+The tracker keeps a sliding window of recent executions per agent_id and
+derives from it the execution timeout (a multiple of the p99 duration)
+and the hedging delay (the p95 time to first event). Until an agent has
+enough samples the configured maximum timeout applies and no hedging
+happens. Runs stopped by a timeout or resource limit are recorded at the
+time they were stopped, a lower bound of their real duration; otherwise the
+derived timeout would only learn from runs that beat the previous one and
+drift down until it cuts off legitimately slow runs.
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+FIRST_EVENT = "first_event"
+TOTAL = "total"
+
+
+class LatencyTracker:
+    """Sliding-window latency percentiles and derived deadlines per agent."""
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        timeout_multiplier: float = 3.0,
+        min_timeout: float = 30.0,
+        max_timeout: float = 300.0,
+    ):
+        """
+        Initialize tracker.
+
+        Args:
+            window: Executions remembered per agent
+            min_samples: Samples needed before percentiles are used
+            timeout_multiplier: Timeout as a multiple of the p99 duration
+            min_timeout: Lower bound for derived timeouts (seconds)
+            max_timeout: Upper bound, and the timeout while samples are scarce
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._samples: dict[str, dict[str, deque]] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self.stopped_runs = 0
+
+    def record(
+        self,
+        agent_id: str,
+        first_event: Optional[float],
+        total: Optional[float],
+        stopped: bool = False,
+    ) -> None:
+        """
+        Add one execution's timings.
+
+        Args:
+            agent_id: Agent that ran
+            first_event: Seconds until its first event, None if there was none
+            total: Seconds until it completed successfully or was stopped,
+                None if it failed otherwise
+            stopped: The run was stopped at a timeout or resource limit, so
+                total is a lower bound of its duration
+        """
+        samples = self._samples.setdefault(
+            agent_id,
+            {FIRST_EVENT: deque(maxlen=self.window), TOTAL: deque(maxlen=self.window)},
+        )
+        if first_event is not None:
+            samples[FIRST_EVENT].append(first_event)
+        if total is not None:
+            samples[TOTAL].append(total)
+            if stopped:
+                self.stopped_runs += 1
+
+    def percentile(self, agent_id: str, metric: str, q: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of an agent's recent timings.
+
+        Args:
+            agent_id: Agent to look up
+            metric: FIRST_EVENT or TOTAL
+            q: Percentile in (0, 100]
+
+        Returns:
+            Seconds, or None while fewer than min_samples are recorded
+        """
+        samples = self._samples.get(agent_id, {}).get(metric)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    def timeout_for(self, agent_id: str) -> float:
+        """Execution timeout for an agent derived from its p99 duration."""
+        p99 = self.percentile(agent_id, TOTAL, 99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def hedge_delay(self, agent_id: str) -> Optional[float]:
+        """Wait for a first event after which a hedged run is started, if known."""
+        return self.percentile(agent_id, FIRST_EVENT, 95)
+
+    def stats(self) -> dict:
+        """Per-agent percentiles, derived timeouts and retry/hedge counters."""
+        agents = {}
+        for agent_id, samples in self._samples.items():
+            entry = {"samples": len(samples[TOTAL]), "timeout": self.timeout_for(agent_id)}
+            for metric in (FIRST_EVENT, TOTAL):
+                for q in (50, 95, 99):
+                    entry[f"{metric}_p{q}"] = self.percentile(agent_id, metric, q)
+            agents[agent_id] = entry
+        return {
+            "agents": agents,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "stopped_runs": self.stopped_runs,
+        }
@@ -0,0 +1,167 @@
+"""
+Line Reader: Chunked, long-line-safe splitting of cagent output streams.
+
+StreamReader.readline() raises once a line exceeds the reader's 64 KiB limit,
+which large JSON tool results (a 500-photo get_photos payload) regularly do.
+ChunkedLineReader reads fixed-size chunks into one reusable bytearray, splits
+lines incrementally without rescanning bytes it has already searched, and
+yields raw bytes for EventParser to decode. Lines longer than max_line_bytes
+are spilled to a temporary file as they arrive so the in-memory buffer stays
+bounded and the pipe keeps draining.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+from typing import AsyncGenerator, BinaryIO, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_LINE_BYTES = 8 * 1024 * 1024
+
+
+class SpilledLine:
+    """An output line too long to buffer in memory, stored in a temporary file."""
+
+    def __init__(self, path: str, size: int):
+        """
+        Initialize spilled line.
+
+        Args:
+            path: Temporary file holding the line without its terminator
+            size: Line length in bytes
+        """
+        self.path = path
+        self.size = size
+
+    def read(self) -> bytes:
+        """Load the line back from disk."""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def discard(self) -> None:
+        """Delete the temporary file."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ChunkedLineReader:
+    """Split an asyncio stream into lines of bytes, spilling oversized lines to disk."""
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        spill_dir: Optional[str] = None,
+    ):
+        """
+        Initialize reader.
+
+        Args:
+            stream: Stream to read from (subprocess stdout/stderr)
+            chunk_size: Bytes requested per read
+            max_line_bytes: Line length above which the line is spilled to disk
+            spill_dir: Directory for spill files (system temp dir by default)
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        self.spill_dir = spill_dir
+
+        self.lines = 0
+        self.spilled = 0
+        self.longest_line = 0
+
+    def __aiter__(self) -> AsyncGenerator[Union[bytes, SpilledLine], None]:
+        return self._lines()
+
+    async def _lines(self) -> AsyncGenerator[Union[bytes, SpilledLine], None]:
+        """
+        Yield complete lines until EOF.
+
+        Lines are bytes without the trailing "\\n" or "\\r\\n"; lines longer
+        than max_line_bytes are yielded as SpilledLine and the caller owns
+        (and must discard) the file. A final line without terminator is
+        yielded at EOF.
+        """
+        buffer = bytearray()
+        start = 0  # first byte of the current line
+        scanned = 0  # bytes before this offset hold no newline
+        spill: Optional[BinaryIO] = None
+        spill_size = 0
+
+        try:
+            while True:
+                chunk = await self.stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                buffer += chunk
+
+                while True:
+                    newline = buffer.find(b"\n", scanned)
+                    if newline < 0:
+                        scanned = len(buffer)
+                        break
+
+                    if spill is not None:
+                        spill.write(memoryview(buffer)[start:newline])
+                        yield self._finish_spill(spill, spill_size + newline - start)
+                        spill = None
+                        spill_size = 0
+                    else:
+                        yield self._take(buffer, start, newline)
+                    start = scanned = newline + 1
+
+                pending = len(buffer) - start
+                if spill is not None or pending > self.max_line_bytes:
+                    if spill is None:
+                        spill = tempfile.NamedTemporaryFile(
+                            prefix="cagent-line-", dir=self.spill_dir, delete=False
+                        )
+                    spill.write(memoryview(buffer)[start:])
+                    spill_size += pending
+                    start = scanned = len(buffer)
+
+                # Compact once per chunk instead of once per line
+                if start:
+                    del buffer[:start]
+                    scanned -= start
+                    start = 0
+
+            if spill is not None:
+                spill.write(buffer)
+                yield self._finish_spill(spill, spill_size + len(buffer))
+                spill = None
+            elif buffer:
+                yield self._take(buffer, 0, len(buffer))
+
+        finally:
+            if spill is not None:
+                spill.close()
+                SpilledLine(spill.name, spill_size).discard()
+
+    def _take(self, buffer: bytearray, start: int, end: int) -> bytes:
+        if end > start and buffer[end - 1] == 0x0D:
+            end -= 1
+        self.lines += 1
+        self.longest_line = max(self.longest_line, end - start)
+        return bytes(memoryview(buffer)[start:end])
+
+    def _finish_spill(self, spill: BinaryIO, size: int) -> SpilledLine:
+        if size:
+            spill.seek(-1, os.SEEK_END)
+            if spill.read(1) == b"\r":
+                size -= 1
+                spill.truncate(size)
+        spill.close()
+
+        self.lines += 1
+        self.spilled += 1
+        self.longest_line = max(self.longest_line, size)
+        logger.debug(f"Spilled {size} byte output line to {spill.name}")
+        return SpilledLine(spill.name, size)
@@ -2,28 +2,44 @@
 FastAPI sidecar server for Cagent engine.
 
 This server handles:
-- Agent execution requests via Cagent subprocess
-- Real-time event streaming via SSE
+- Agent execution requests via Cagent subprocess, behind admission control
+- Real-time event streaming via SSE (per request) or WebSocket (multiplexed)
+- A durable journal of runs, so results can be fetched after a restart
 - Health checks for lifecycle management
 """
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import logging
+import math
 import sys
 import asyncio
 import uuid
 import time
 import json
-from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, AsyncIterable, Literal, Optional, Union
 from sse_starlette.sse import EventSourceResponse
 
 from config import Settings
-from runtime import CagentRuntime, CagentRuntimeError
+from runtime import KILL_GRACE_SECONDS, CagentRuntime, CagentRuntimeError, GroupBranch, ReplayRuntime
+from resource_monitor import ResourceLimits, ResourceStats
+from latency import LatencyTracker
 from event_parser import CagentEvent, EventType
+from expiry import DeadlineTracker
+import event_codec
+from event_codec import sse_frame
+from event_stream import EventStream, StreamMultiplexer, parse_last_event_id
+from journal import ExecutionJournal, RunStatus
+from backpressure import BackpressuredPublisher, PipelineStats
+from coalescing import CoalescingStats, EventCoalescer
+from result_cache import ResultCache, request_digest
+from scheduler import AdmissionScheduler, AdmissionTicket, SchedulerQueueFullError
+from singleflight import Singleflight
+from session import SessionManager
+from worker_pool import WorkerPool
+from workflow import CheckpointStore, Workflow, WorkflowError, WorkflowExecutor, WorkflowStep
 
 # Configure logging
 logging.basicConfig(
@@ -36,11 +52,11 @@ settings = Settings()
 
 
 # Localhost-only security helper
-def _check_localhost(request: Request) -> None:
+def _check_localhost(request: Union[Request, WebSocket]) -> None:
     """Verify that request originates from localhost.
     
     Args:
-        request: FastAPI Request object
+        request: FastAPI Request or WebSocket object
         
     Raises:
         HTTPException: If request is not from localhost
@@ -61,6 +77,44 @@ class AgentRequest(BaseModel):
     agent_id: str
     input: dict
     context: Optional[dict] = None
+    priority: Literal["interactive", "batch"] = "interactive"
+    cache: bool = False  # reuse a recorded result of an identical request
+    coalesce: bool = True  # follow an identical run already in flight
+
+
+class AgentGroupBranch(BaseModel):
+    """One branch of a fan-out group"""
+    agent_id: str
+    branch_id: Optional[str] = None  # defaults to agent_id (suffixed when repeated)
+    context: Optional[dict] = None  # merged over the group context
+
+
+class AgentGroupRequest(BaseModel):
+    """Request to execute several agents concurrently on one input"""
+    branches: list[AgentGroupBranch]
+    input: dict
+    context: Optional[dict] = None
+    priority: Literal["interactive", "batch"] = "interactive"
+    policy: Literal["all", "fail-fast"] = "all"
+
+
+class WorkflowStepModel(BaseModel):
+    """One agent step of a workflow DAG"""
+    id: str
+    agent_id: str
+    depends_on: list[str] = []
+    input: Optional[str] = None  # template with {input} and {<dependency id>}
+    context: Optional[dict] = None
+
+
+class WorkflowRequest(BaseModel):
+    """Request to execute (or resume) a workflow DAG"""
+    steps: list[WorkflowStepModel]
+    name: str = "workflow"
+    input: dict
+    context: Optional[dict] = None
+    priority: Literal["interactive", "batch"] = "interactive"
+    run_id: Optional[str] = None  # resume this run from its checkpoints
 
 
 class AgentStartResponse(BaseModel):
@@ -68,6 +122,8 @@ class AgentStartResponse(BaseModel):
     request_id: str
     status: str
     message: str
+    coalesced_with: Optional[str] = None
+    run_id: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -78,25 +134,76 @@ class HealthResponse(BaseModel):
 
 class StreamEvent(BaseModel):
     """Event streamed via SSE"""
-    event_type: str  # 'thinking', 'tool_call', 'result', 'error', 'keepalive'
+    event_type: str  # 'thinking', 'tool_call', 'result', 'error', 'keepalive', 'queued', 'cancelled'
     data: dict
     timestamp: float
 
 
 # Global state
-event_queues: dict[str, asyncio.Queue] = {}
-event_queues_timestamps: dict[str, datetime] = {}
+event_queues: dict[str, EventStream] = {}
+pipeline_stats: dict[str, PipelineStats] = {}
+coalescing_stats = CoalescingStats()  # totals over all runs
 background_tasks: set[asyncio.Task] = set()
+request_tasks: dict[str, asyncio.Task] = {}
+idle_cancel_timers: dict[str, asyncio.TimerHandle] = {}
 active_request_ids: set[str] = set()
 cagent_runtime: Optional[CagentRuntime] = None
+# Idle deadlines of per-request state; expired requests are released
+request_expiry = DeadlineTracker(
+    timeout=settings.STREAM_IDLE_TIMEOUT,
+    on_expire=lambda request_id: _expire_request(request_id),
+)
+
+
+def _create_scheduler() -> AdmissionScheduler:
+    return AdmissionScheduler(
+        max_concurrent=settings.SCHEDULER_MAX_CONCURRENT,
+        max_per_agent=settings.SCHEDULER_MAX_PER_AGENT,
+        max_queue=settings.SCHEDULER_MAX_QUEUE,
+        retry_after=settings.SCHEDULER_RETRY_AFTER,
+    )
+
+
+scheduler: AdmissionScheduler = _create_scheduler()
+singleflight = Singleflight()
+worker_pool: Optional[WorkerPool] = None
+session_manager: Optional[SessionManager] = None
+resource_stats = ResourceStats()
+latency_tracker = LatencyTracker(
+    window=settings.LATENCY_WINDOW,
+    min_samples=settings.LATENCY_MIN_SAMPLES,
+    timeout_multiplier=settings.ADAPTIVE_TIMEOUT_MULTIPLIER,
+    min_timeout=settings.ADAPTIVE_TIMEOUT_MIN,
+    max_timeout=settings.ADAPTIVE_TIMEOUT_MAX,
+)
+result_cache = ResultCache(
+    team_yaml_path="team.yaml",
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl=settings.RESULT_CACHE_TTL,
+    db_path=settings.RESULT_CACHE_DB_PATH,
+)
+workflow_checkpoints = CheckpointStore(db_path=settings.WORKFLOW_CHECKPOINT_DB_PATH)
+journal = ExecutionJournal(
+    db_path=settings.JOURNAL_DB_PATH,
+    flush_interval=settings.JOURNAL_FLUSH_INTERVAL,
+    max_batch=settings.JOURNAL_MAX_BATCH,
+    max_runs=settings.JOURNAL_MAX_RUNS,
+    max_event_runs=settings.JOURNAL_MAX_EVENT_RUNS,
+)
 
 
 def _register_background_task(task: asyncio.Task, request_id: str) -> None:
     """Track background tasks and surface unhandled exceptions."""
     background_tasks.add(task)
+    request_tasks[request_id] = task
 
     def _on_done(done_task: asyncio.Task) -> None:
         background_tasks.discard(done_task)
+        if request_tasks.get(request_id) is done_task:
+            del request_tasks[request_id]
+        timer = idle_cancel_timers.pop(request_id, None)
+        if timer is not None:
+            timer.cancel()
 
         if done_task.cancelled():
             logger.info(f"[{request_id}] Background task cancelled")
@@ -112,51 +219,228 @@ def _register_background_task(task: asyncio.Task, request_id: str) -> None:
     task.add_done_callback(_on_done)
 
 
+def _get_event_stream(request_id: str) -> EventStream:
+    """Get or create the replay stream for a request."""
+    stream = event_queues.get(request_id)
+    if stream is None:
+        stream = EventStream(
+            max_events=settings.STREAM_REPLAY_MAX_EVENTS,
+            max_age=settings.STREAM_REPLAY_MAX_AGE,
+        )
+        if settings.CANCEL_ON_DISCONNECT:
+            stream.on_idle = lambda: _on_stream_idle(request_id, stream)
+        stream.on_publish = lambda entry: journal.record_event(request_id, entry)
+        event_queues[request_id] = stream
+    return stream
+
+
+def _coalesced(
+    events: AsyncIterable[CagentEvent], publisher: BackpressuredPublisher
+) -> AsyncIterable[CagentEvent]:
+    """Merge a run's thinking/info bursts before publishing when coalescing is enabled."""
+    if settings.PIPELINE_COALESCE_WINDOW <= 0:
+        return events
+    # Read ahead only as far as the publisher's backlog bound still allows
+    coalescer = EventCoalescer(
+        window=settings.PIPELINE_COALESCE_WINDOW,
+        max_bytes=settings.PIPELINE_COALESCE_MAX_BYTES,
+        stats=publisher.stats.coalescing,
+        totals=coalescing_stats,
+        max_pending=publisher.high_water,
+        backlog=lambda: publisher.stream.backlog,
+    )
+    return coalescer.coalesce(events)
+
+
+def _release_request(request_id: str) -> None:
+    """Drop every piece of per-request bookkeeping."""
+    event_queues.pop(request_id, None)
+    request_expiry.discard(request_id)
+    pipeline_stats.pop(request_id, None)
+    active_request_ids.discard(request_id)
+    timer = idle_cancel_timers.pop(request_id, None)
+    if timer is not None:
+        timer.cancel()
+
+
+def _requests_sharing(stream: EventStream) -> list[str]:
+    """Requests bound to a run's stream: its leader and coalesced followers."""
+    return [request_id for request_id, shared in event_queues.items() if shared is stream]
+
+
+def _detach_request(request_id: str) -> None:
+    """
+    Release a request from a run other requests still share.
+
+    A detached follower stops following the run; a detached leader's run
+    goes on (and stays journaled under its id) for the followers left.
+    """
+    owns_run = request_id in request_tasks
+    singleflight.leave(request_id)
+    _release_request(request_id)
+    if not owns_run:
+        journal.end_run(request_id, status=RunStatus.CANCELLED)
+
+
+async def _cancel_run(request_id: str, reason: str, stream: Optional[EventStream] = None) -> bool:
+    """
+    Cancel the run a request started or follows and free its state.
+
+    Remaining subscribers receive a terminal "cancelled" event. Cancelling
+    the task unwinds the runtime, which kills the cagent process group and
+    releases the admission ticket; every request still bound to the run's
+    stream is released with it. Callers that must not affect other requests
+    sharing the run check _requests_sharing() first.
+
+    Args:
+        request_id: Request whose run is cancelled
+        reason: Why, reported in the cancelled event ("client", "disconnected")
+        stream: The run's stream, when request_id may be detached from it
+
+    Returns:
+        False if the request has no run in progress
+    """
+    task = request_tasks.get(singleflight.leader_of(request_id) or request_id)
+    if task is None or task.done():
+        return False
+
+    logger.info(f"[{request_id}] Cancelling run ({reason})")
+    if stream is None:
+        stream = event_queues.get(request_id)
+    if stream is not None and not stream.closed:
+        stream.publish(CagentEvent(
+            event_type=EventType.CANCELLED,
+            data={"reason": reason},
+            timestamp=time.time(),
+        ))
+    task.cancel()
+    await asyncio.wait({task}, timeout=KILL_GRACE_SECONDS + 1.0)
+
+    released = [request_id, *(_requests_sharing(stream) if stream is not None else [])]
+    for released_id in released:
+        singleflight.leave(released_id)
+        _release_request(released_id)
+    return True
+
+
+def _on_stream_idle(request_id: str, stream: EventStream) -> None:
+    """Start the grace timer after the last subscriber of a running request left."""
+    if request_id not in request_tasks:
+        return
+    timer = idle_cancel_timers.pop(request_id, None)
+    if timer is not None:
+        timer.cancel()
+    idle_cancel_timers[request_id] = asyncio.get_running_loop().call_later(
+        settings.CANCEL_ON_DISCONNECT_GRACE, _cancel_if_idle, request_id, stream
+    )
+
+
+def _cancel_if_idle(request_id: str, stream: EventStream) -> None:
+    """Cancel a run nobody (leader or follower) has resubscribed to during the grace period."""
+    idle_cancel_timers.pop(request_id, None)
+    if stream.closed or stream.subscriber_count > 0:
+        return
+    task = asyncio.create_task(_cancel_run(request_id, reason="disconnected", stream=stream))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+def _expire_request(request_id: str) -> None:
+    """Release a request idle for STREAM_IDLE_TIMEOUT (abandoned connections)."""
+    if request_id in active_request_ids:
+        # Still running or following a run; check again one timeout later
+        request_expiry.touch(request_id)
+        return
+    _release_request(request_id)
+    logger.warning(f"Cleaned up orphaned queue: {request_id}")
+
+
 # Lifecycle handlers
-async def cleanup_orphaned_queues():
-    """Remove queues older than 5 minutes (abandoned connections)"""
-    while True:
-        await asyncio.sleep(60)  # Check every minute
-        now = datetime.now()
-        to_delete = [
-            req_id
-            for req_id, ts in list(event_queues_timestamps.items())
-            if req_id not in active_request_ids and now - ts > timedelta(minutes=5)
-        ]
-        for req_id in to_delete:
-            event_queues.pop(req_id, None)
-            event_queues_timestamps.pop(req_id, None)
-            logger.warning(f"Cleaned up orphaned queue: {req_id}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown"""
-    global cagent_runtime
+    global cagent_runtime, scheduler, singleflight, worker_pool, session_manager
     logger.info("Cagent Sidecar starting up")
+    scheduler = _create_scheduler()
+    singleflight = Singleflight()
+    event_codec.set_backend(settings.JSON_BACKEND)
+    logger.info(f"Encoding events with {event_codec.backend_name()}")
+    await journal.open()
 
     # Initialize runtime
+    runtime_options = dict(
+        team_yaml_path="team.yaml",
+        resource_limits={
+            agent_id: ResourceLimits(**limits)
+            for agent_id, limits in settings.RESOURCE_LIMITS.items()
+        },
+        resource_sample_interval=settings.RESOURCE_SAMPLE_INTERVAL,
+        resource_stats=resource_stats,
+        line_queue_size=settings.PIPELINE_LINE_QUEUE_SIZE,
+        max_line_bytes=settings.PIPELINE_MAX_LINE_BYTES,
+        spill_dir=settings.PIPELINE_SPILL_DIR,
+        latency=latency_tracker,
+        max_retries=settings.RETRY_MAX_ATTEMPTS,
+        retry_backoff=settings.RETRY_BACKOFF,
+        hedge=settings.HEDGE_ENABLED,
+        chunked_parsing=settings.PIPELINE_CHUNKED_PARSING,
+        scheduler=scheduler,
+    )
+    replaying = settings.CASSETTE_MODE == "replay"
     try:
-        cagent_runtime = CagentRuntime(team_yaml_path="team.yaml")
+        if replaying:
+            cagent_runtime = ReplayRuntime(
+                settings.CASSETTE_DIR, speed=settings.CASSETTE_REPLAY_SPEED, **runtime_options
+            )
+        else:
+            cagent_runtime = CagentRuntime(**runtime_options)
+            if settings.CASSETTE_MODE == "record":
+                cagent_runtime.enable_recording(settings.CASSETTE_DIR)
         logger.info("CagentRuntime initialized successfully")
     except CagentRuntimeError as e:
         logger.error(f"Failed to initialize CagentRuntime: {e}")
         raise
 
-    # Start cleanup task
-    cleanup_task = asyncio.create_task(cleanup_orphaned_queues())
+    if replaying and (settings.WORKER_POOL_SIZE > 0 or settings.SESSION_AGENTS):
+        logger.warning("Worker pool and session mode are disabled while replaying cassettes")
+    elif settings.WORKER_POOL_SIZE > 0:
+        worker_pool = await cagent_runtime.enable_worker_pool(
+            agent_ids=settings.WORKER_POOL_AGENTS,
+            size_per_agent=settings.WORKER_POOL_SIZE,
+            max_age=settings.WORKER_POOL_MAX_AGE,
+            health_interval=settings.WORKER_POOL_HEALTH_INTERVAL,
+        )
+    if settings.SESSION_AGENTS and not replaying:
+        session_manager = await cagent_runtime.enable_sessions(
+            agent_ids=settings.SESSION_AGENTS,
+            command_template=settings.SESSION_COMMAND,
+            restart_backoff=settings.SESSION_RESTART_BACKOFF,
+        )
+
+    # Expire idle request state at its deadline
+    request_expiry.start()
 
     yield
 
     logger.info("Cagent Sidecar shutting down")
-    cleanup_task.cancel()  # Stop cleanup task
+    request_expiry.stop()
     
     if cagent_runtime:
         await cagent_runtime.shutdown()
+    worker_pool = None
+    session_manager = None
+    await journal.close()
 
     # Clear event queues
+    for timer in idle_cancel_timers.values():
+        timer.cancel()
+    idle_cancel_timers.clear()
+    request_tasks.clear()
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
+    pipeline_stats.clear()
     active_request_ids.clear()
 
 
@@ -186,17 +470,98 @@ async def health_check():
     return HealthResponse(status=status, version="1.0.0")
 
 
+def _extract_user_input(request_input: object) -> str:
+    """
+    Get the prompt string from a request's input field.
+
+    Args:
+        request_input: AgentRequest.input as received
+
+    Returns:
+        The user input string
+
+    Raises:
+        ValueError: If the input has an unexpected shape
+    """
+    if isinstance(request_input, dict):
+        if "input" not in request_input:
+            raise ValueError(
+                "Invalid request.input: expected an object with an 'input' string field"
+            )
+        user_input = request_input["input"]
+    elif isinstance(request_input, str):
+        user_input = request_input
+    else:
+        raise ValueError(
+            "Invalid request.input: expected a string or an object with an 'input' string field"
+        )
+
+    if not isinstance(user_input, str):
+        raise ValueError(
+            "Invalid request.input: expected 'input' to be a string"
+        )
+    return user_input
+
+
+def _parse_deadline(request: Request) -> Optional[float]:
+    """
+    Read the caller's deadline from the X-Request-Deadline header.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Absolute deadline as Unix time in seconds, or None without the header
+
+    Raises:
+        HTTPException: If the header is not a number
+    """
+    value = request.headers.get("x-request-deadline")
+    if not value:
+        return None
+    try:
+        deadline = float(value.strip())
+    except ValueError:
+        deadline = math.nan
+    if not math.isfinite(deadline):
+        raise HTTPException(
+            status_code=400,
+            detail="X-Request-Deadline must be a Unix timestamp in seconds",
+        )
+    return deadline
+
+
 # Background task for agent execution
-async def _execute_agent_background(request_id: str, request: AgentRequest) -> None:
+async def _execute_agent_background(
+    request_id: str,
+    request: AgentRequest,
+    ticket: Optional[AdmissionTicket] = None,
+    cache_key: Optional[str] = None,
+    flight_key: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> None:
     """
-    Execute agent in background and push events to SSE queue.
+    Execute agent in background and publish events to the request's replay stream.
 
     Args:
         request_id: Unique request identifier
         request: Agent execution request
+        ticket: Admission ticket to wait on before spawning cagent, released
+            when the run finishes
+        cache_key: Result cache key; successful runs are recorded under it
+        flight_key: Singleflight key this run leads, released when it finishes
+        deadline: Caller's absolute deadline (Unix time), including queueing
     """
-    event_queue = event_queues.setdefault(request_id, asyncio.Queue())
-    event_queues_timestamps.setdefault(request_id, datetime.now())
+    event_stream = _get_event_stream(request_id)
+    stats = pipeline_stats.setdefault(request_id, PipelineStats())
+    publisher = BackpressuredPublisher(
+        event_stream,
+        policy=settings.PIPELINE_OVERFLOW_POLICY,
+        high_water=settings.PIPELINE_HIGH_WATER,
+        max_block=settings.PIPELINE_MAX_BLOCK,
+        stats=stats,
+    )
+    request_expiry.touch(request_id)
     active_request_ids.add(request_id)
 
     try:
@@ -205,39 +570,39 @@ async def _execute_agent_background(request_id: str, request: AgentRequest) -> N
         )
         logger.debug(f"[{request_id}] Starting background execution of {request.agent_id}")
 
-        request_input = request.input
-        if isinstance(request_input, dict):
-            if "input" not in request_input:
-                raise ValueError(
-                    "Invalid request.input: expected an object with an 'input' string field"
-                )
-            user_input = request_input["input"]
-        elif isinstance(request_input, str):
-            user_input = request_input
-        else:
-            raise ValueError(
-                "Invalid request.input: expected a string or an object with an 'input' string field"
-            )
+        user_input = _extract_user_input(request.input)
 
-        if not isinstance(user_input, str):
-            raise ValueError(
-                "Invalid request.input: expected 'input' to be a string"
-            )
+        if ticket is not None and not ticket.admitted:
+            logger.info(f"[{request_id}] Waiting for admission (position {ticket.position})")
+            await ticket.wait()
 
         last_event = None
-
-        async for event in cagent_runtime.execute_agent(
-            agent_id=request.agent_id,
-            user_input=user_input,
-            context=request.context,
+        recorded: list[dict] = []
+
+        async for event in _coalesced(
+            cagent_runtime.execute_agent(
+                agent_id=request.agent_id,
+                user_input=user_input,
+                context=request.context,
+                pipeline_stats=stats,
+                deadline=deadline,
+            ),
+            publisher,
         ):
-            await event_queue.put(event)
-            event_queues_timestamps[request_id] = datetime.now()
+            if cache_key is not None:
+                # Before publishing: a raw payload decoded here is encoded
+                # from the dict rather than decoded again to be validated
+                recorded.append(event.to_dict())
+            await publisher.publish(event)
             last_event = event
 
             if event.event_type in ("result", "error"):
                 break
 
+        await publisher.flush()
+        if cache_key is not None and last_event is not None and last_event.event_type == "result":
+            await result_cache.put(cache_key, recorded)
+
         logger.debug(f"[{request_id}] Background execution completed")
         logger.info(
             f"[{request_id}] Execution completed: agent={request.agent_id}, "
@@ -254,8 +619,9 @@ async def _execute_agent_background(request_id: str, request: AgentRequest) -> N
             },
             timestamp=time.time(),
         )
-        await event_queue.put(error_event)
-        event_queues_timestamps[request_id] = datetime.now()
+        await publisher.flush()
+        event_stream.publish(error_event)
+        request_expiry.touch(request_id)
     except Exception:
         logger.exception(f"[{request_id}] Background execution failed")
         # Push generic error event to client (full error logged above)
@@ -267,15 +633,45 @@ async def _execute_agent_background(request_id: str, request: AgentRequest) -> N
             },
             timestamp=time.time(),
         )
-        await event_queue.put(error_event)
-        event_queues_timestamps[request_id] = datetime.now()
+        await publisher.flush()
+        event_stream.publish(error_event)
+        request_expiry.touch(request_id)
     finally:
+        if ticket is not None:
+            ticket.release()
+        if flight_key is not None:
+            for follower_id in singleflight.done(flight_key, request_id):
+                active_request_ids.discard(follower_id)
+                request_expiry.touch(follower_id)
         # Signal end of stream
-        await event_queue.put(None)
-        event_queues_timestamps[request_id] = datetime.now()
+        event_stream.close()
+        journal.end_run(request_id)
+        request_expiry.touch(request_id)
         active_request_ids.discard(request_id)
 
 
+async def _replay_cached_result(request_id: str, events: list[dict]) -> None:
+    """
+    Publish a recorded event sequence as if the agent had just produced it.
+
+    Args:
+        request_id: Unique request identifier
+        events: Events recorded by a previous identical run
+    """
+    event_stream = _get_event_stream(request_id)
+    try:
+        for recorded in events:
+            event_stream.publish(CagentEvent(
+                event_type=recorded["event_type"],
+                data=recorded["data"],
+                timestamp=time.time(),
+            ))
+    finally:
+        event_stream.close()
+        journal.end_run(request_id)
+        request_expiry.touch(request_id)
+
+
 # Agent execution endpoint
 @app.post("/agent/execute", response_model=AgentStartResponse)
 async def execute_agent(agent_request: AgentRequest, request: Request):
@@ -284,91 +680,647 @@ async def execute_agent(agent_request: AgentRequest, request: Request):
 
     Returns immediately with a request_id.
     Client should connect to /agent/stream/{request_id} to receive events.
+    Runs beyond the concurrency caps are queued (status "queued", with
+    "queued" events carrying their position); when the queue is full the
+    request is rejected with 429 and a Retry-After header. With "cache"
+    set, a recorded result of an identical request is replayed instead.
+    Unless "coalesce" is false, a request identical to a run already in
+    flight follows that run's event stream instead of starting cagent.
+    An X-Request-Deadline header (Unix time in seconds) caps the run's
+    adaptive timeout, time spent queued included.
     """
     _check_localhost(request)
     
     if not cagent_runtime:
         raise HTTPException(status_code=503, detail="Cagent runtime not initialized")
+    deadline = _parse_deadline(request)
 
     request_id = str(uuid.uuid4())
     logger.info(f"[{request_id}] Execution request: {agent_request.agent_id}")
 
+    cache_key = None
+    if agent_request.cache:
+        cache_key = result_cache.key_for(
+            agent_request.agent_id, agent_request.input, agent_request.context
+        )
+        cached_events = await result_cache.get(cache_key)
+        if cached_events is not None:
+            logger.info(f"[{request_id}] Result cache hit, replaying {len(cached_events)} events")
+            journal.begin_run(request_id, "agent", agent_request.model_dump(), agent_id=agent_request.agent_id)
+            task = asyncio.create_task(_replay_cached_result(request_id, cached_events))
+            _register_background_task(task, request_id)
+            return AgentStartResponse(
+                request_id=request_id,
+                status="started",
+                message=f"Connect to /agent/stream/{request_id} to receive events",
+            )
+
+    flight_key = None
+    if agent_request.coalesce:
+        flight_key = request_digest(
+            agent_request.agent_id, agent_request.input, agent_request.context
+        )
+        leader_id = singleflight.join(flight_key, request_id)
+        if leader_id is not None:
+            event_queues[request_id] = _get_event_stream(leader_id)
+            request_expiry.touch(request_id)
+            active_request_ids.add(request_id)
+            journal.begin_run(
+                request_id,
+                "agent",
+                agent_request.model_dump(),
+                agent_id=agent_request.agent_id,
+                coalesced_with=leader_id,
+            )
+            return AgentStartResponse(
+                request_id=request_id,
+                status="coalesced",
+                message=f"Connect to /agent/stream/{request_id} to receive events",
+                coalesced_with=leader_id,
+            )
+
+    def _on_queue_position(position: int) -> None:
+        stream = _get_event_stream(request_id)
+        if not stream.closed:
+            stream.publish(CagentEvent(
+                event_type=EventType.QUEUED,
+                data={"position": position, "priority": agent_request.priority},
+                timestamp=time.time(),
+            ))
+            request_expiry.touch(request_id)
+
+    try:
+        ticket = scheduler.submit(
+            agent_request.agent_id,
+            priority=agent_request.priority,
+            on_position=_on_queue_position,
+        )
+    except SchedulerQueueFullError as e:
+        logger.warning(f"[{request_id}] Rejected: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    if flight_key is not None:
+        singleflight.lead(flight_key, request_id)
+    journal.begin_run(request_id, "agent", agent_request.model_dump(), agent_id=agent_request.agent_id)
+
     # Start background task
-    task = asyncio.create_task(_execute_agent_background(request_id, agent_request))
+    task = asyncio.create_task(
+        _execute_agent_background(request_id, agent_request, ticket, cache_key, flight_key, deadline)
+    )
+    _register_background_task(task, request_id)
+
+    return AgentStartResponse(
+        request_id=request_id,
+        status="started" if ticket.admitted else "queued",
+        message=f"Connect to /agent/stream/{request_id} to receive events",
+    )
+
+
+async def _execute_group_background(
+    request_id: str,
+    group_request: AgentGroupRequest,
+    branches: list[GroupBranch],
+    tickets: dict[str, AdmissionTicket],
+) -> None:
+    """
+    Execute a fan-out group and publish its merged events to the request's stream.
+
+    Args:
+        request_id: Unique request identifier
+        group_request: Group execution request
+        branches: Branches with resolved branch ids
+        tickets: Admission tickets by branch_id, released when the group finishes
+    """
+    event_stream = _get_event_stream(request_id)
+    stats = pipeline_stats.setdefault(request_id, PipelineStats())
+    publisher = BackpressuredPublisher(
+        event_stream,
+        policy=settings.PIPELINE_OVERFLOW_POLICY,
+        high_water=settings.PIPELINE_HIGH_WATER,
+        max_block=settings.PIPELINE_MAX_BLOCK,
+        stats=stats,
+    )
+    request_expiry.touch(request_id)
+    active_request_ids.add(request_id)
+
+    try:
+        user_input = _extract_user_input(group_request.input)
+        logger.info(
+            f"[{request_id}] Group execution: "
+            f"{', '.join(f'{b.branch_id}={b.agent_id}' for b in branches)}"
+        )
+
+        last_event = None
+        async for event in _coalesced(
+            cagent_runtime.execute_many(
+                branches,
+                user_input=user_input,
+                context=group_request.context,
+                policy=group_request.policy,
+                tickets=tickets,
+                pipeline_stats=stats,
+            ),
+            publisher,
+        ):
+            await publisher.publish(event)
+            last_event = event
+
+        await publisher.flush()
+        logger.info(
+            f"[{request_id}] Group completed: "
+            f"outcome={'success' if last_event and last_event.event_type == 'result' else 'error'}"
+        )
+
+    except ValueError as e:
+        logger.warning(f"[{request_id}] Invalid group input: {e}")
+        await publisher.flush()
+        event_stream.publish(CagentEvent(
+            event_type=EventType.ERROR,
+            data={"error": str(e), "error_code": "INVALID_INPUT"},
+            timestamp=time.time(),
+        ))
+    except Exception:
+        logger.exception(f"[{request_id}] Group execution failed")
+        await publisher.flush()
+        event_stream.publish(CagentEvent(
+            event_type=EventType.ERROR,
+            data={"error": "Agent execution failed", "error_code": "EXEC_ERROR"},
+            timestamp=time.time(),
+        ))
+    finally:
+        for ticket in tickets.values():
+            ticket.release()
+        event_stream.close()
+        journal.end_run(request_id)
+        request_expiry.touch(request_id)
+        active_request_ids.discard(request_id)
+
+
+@app.post("/agent/execute_group", response_model=AgentStartResponse)
+async def execute_group(group_request: AgentGroupRequest, request: Request):
+    """
+    Execute several agents concurrently on one input as a single request.
+
+    Returns immediately with a request_id whose stream carries the merged
+    events of all branches, each tagged with data.branch. A branch's own
+    outcome arrives as "branch_result"/"branch_error"; the stream ends with
+    one group "result" (data.result maps branch ids to results, data.errors
+    to errors) once every branch finished, or with policy "fail-fast" an
+    "error" as soon as one branch fails. Every branch takes its own
+    admission slot; 429 is returned when they cannot all be queued.
+    """
+    _check_localhost(request)
+
+    if not cagent_runtime:
+        raise HTTPException(status_code=503, detail="Cagent runtime not initialized")
+    if not group_request.branches:
+        raise HTTPException(status_code=422, detail="A group needs at least one branch")
+
+    branches: list[GroupBranch] = []
+    agent_counts: dict[str, int] = {}
+    for branch in group_request.branches:
+        agent_counts[branch.agent_id] = agent_counts.get(branch.agent_id, 0) + 1
+        branch_id = branch.branch_id
+        if branch_id is None:
+            repeats = agent_counts[branch.agent_id]
+            branch_id = branch.agent_id if repeats == 1 else f"{branch.agent_id}-{repeats}"
+        branches.append(GroupBranch(branch_id, branch.agent_id, branch.context))
+    if len({branch.branch_id for branch in branches}) != len(branches):
+        raise HTTPException(status_code=422, detail="Branch ids must be unique")
+
+    request_id = str(uuid.uuid4())
+    tickets: dict[str, AdmissionTicket] = {}
+    try:
+        for branch in branches:
+            tickets[branch.branch_id] = scheduler.submit(
+                branch.agent_id, priority=group_request.priority
+            )
+    except SchedulerQueueFullError as e:
+        for ticket in tickets.values():
+            ticket.release()
+        logger.warning(f"[{request_id}] Group rejected: {e}")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    journal.begin_run(request_id, "group", group_request.model_dump())
+    task = asyncio.create_task(
+        _execute_group_background(request_id, group_request, branches, tickets)
+    )
+    _register_background_task(task, request_id)
+
+    admitted = all(ticket.admitted for ticket in tickets.values())
+    return AgentStartResponse(
+        request_id=request_id,
+        status="started" if admitted else "queued",
+        message=f"Connect to /agent/stream/{request_id} to receive events",
+    )
+
+
+async def _execute_workflow_background(
+    request_id: str,
+    workflow_request: WorkflowRequest,
+    workflow: Workflow,
+    run_id: str,
+) -> None:
+    """
+    Execute a workflow DAG and publish its events to the request's stream.
+
+    Args:
+        request_id: Unique request identifier
+        workflow_request: Workflow execution request
+        workflow: Validated workflow definition
+        run_id: Checkpoint run id (new or resumed)
+    """
+    event_stream = _get_event_stream(request_id)
+    stats = pipeline_stats.setdefault(request_id, PipelineStats())
+    publisher = BackpressuredPublisher(
+        event_stream,
+        policy=settings.PIPELINE_OVERFLOW_POLICY,
+        high_water=settings.PIPELINE_HIGH_WATER,
+        max_block=settings.PIPELINE_MAX_BLOCK,
+        stats=stats,
+    )
+    request_expiry.touch(request_id)
+    active_request_ids.add(request_id)
+    executor = WorkflowExecutor(
+        cagent_runtime,
+        workflow_checkpoints,
+        admit=lambda agent_id: scheduler.submit(agent_id, priority=workflow_request.priority),
+    )
+
+    try:
+        user_input = _extract_user_input(workflow_request.input)
+        async for event in _coalesced(
+            executor.run(
+                workflow,
+                user_input=user_input,
+                context=workflow_request.context,
+                run_id=run_id,
+            ),
+            publisher,
+        ):
+            await publisher.publish(event)
+        await publisher.flush()
+
+    except (ValueError, WorkflowError) as e:
+        logger.warning(f"[{request_id}] Invalid workflow run: {e}")
+        await publisher.flush()
+        event_stream.publish(CagentEvent(
+            event_type=EventType.ERROR,
+            data={"error": str(e), "error_code": "INVALID_INPUT", "run_id": run_id},
+            timestamp=time.time(),
+        ))
+    except Exception:
+        logger.exception(f"[{request_id}] Workflow execution failed")
+        await publisher.flush()
+        event_stream.publish(CagentEvent(
+            event_type=EventType.ERROR,
+            data={"error": "Agent execution failed", "error_code": "EXEC_ERROR", "run_id": run_id},
+            timestamp=time.time(),
+        ))
+    finally:
+        event_stream.close()
+        journal.end_run(request_id)
+        request_expiry.touch(request_id)
+        active_request_ids.discard(request_id)
+
+
+@app.post("/workflow/execute", response_model=AgentStartResponse)
+async def execute_workflow(workflow_request: WorkflowRequest, request: Request):
+    """
+    Execute a DAG of agent steps, or resume a failed run.
+
+    Steps run as soon as their dependencies have completed, independent
+    steps in parallel, each under its own admission slot. The stream
+    carries step events tagged with data.branch (the step id),
+    "branch_result"/"branch_error" per step, and ends with a "result"
+    (data.result holds the sink steps' results) or an "error" naming the
+    failed step. Pass the returned run_id back to resume after the last
+    checkpointed steps.
+    """
+    _check_localhost(request)
+
+    if not cagent_runtime:
+        raise HTTPException(status_code=503, detail="Cagent runtime not initialized")
+
+    workflow = Workflow(
+        steps=[WorkflowStep(**step.model_dump()) for step in workflow_request.steps],
+        name=workflow_request.name,
+    )
+    try:
+        workflow.validate()
+    except WorkflowError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    request_id = str(uuid.uuid4())
+    run_id = workflow_request.run_id or request_id
+    logger.info(f"[{request_id}] Workflow request: {workflow.name} (run {run_id})")
+
+    journal.begin_run(request_id, "workflow", workflow_request.model_dump())
+    task = asyncio.create_task(
+        _execute_workflow_background(request_id, workflow_request, workflow, run_id)
+    )
     _register_background_task(task, request_id)
 
     return AgentStartResponse(
         request_id=request_id,
         status="started",
         message=f"Connect to /agent/stream/{request_id} to receive events",
+        run_id=run_id,
     )
 
 
+@app.get("/workflow/runs/{run_id}")
+async def workflow_run(run_id: str, request: Request):
+    """Checkpointed step results of a workflow run - localhost only"""
+    _check_localhost(request)
+
+    completed = await workflow_checkpoints.get(run_id)
+    if completed is None:
+        raise HTTPException(status_code=404, detail=f"Unknown workflow run: {run_id}")
+    return {"run_id": run_id, "completed": completed}
+
+
+@app.delete("/agent/{request_id}")
+async def cancel_agent(request_id: str, request: Request):
+    """
+    Cancel a run - localhost only.
+
+    Kills the run's cagent process tree, frees its admission slot and
+    stream state, and ends every open stream of the run with a
+    "cancelled" event. While other coalesced requests (the leader or
+    followers) still share the run, the request is only detached and the
+    run keeps going for the others.
+    """
+    _check_localhost(request)
+
+    stream = event_queues.get(request_id)
+    shared = stream is not None and _requests_sharing(stream) != [request_id]
+    if not shared and await _cancel_run(request_id, reason="client"):
+        return {"request_id": request_id, "status": "cancelled"}
+
+    if stream is None:
+        raise HTTPException(status_code=404, detail=f"Unknown request: {request_id}")
+    if stream.closed:
+        raise HTTPException(status_code=409, detail=f"Run already finished: {request_id}")
+    _detach_request(request_id)
+    return {"request_id": request_id, "status": "detached"}
+
+
+@app.get("/agent/result/{request_id}")
+async def agent_result(request_id: str, request: Request, events: bool = False):
+    """
+    Journaled outcome of a run - localhost only.
+
+    Works for runs in progress, finished runs and runs of a previous
+    sidecar process (those interrupted by a restart have status
+    "interrupted"). "result" holds the result of a completed run, "error"
+    the error of a failed one; with ?events=true the recorded events are
+    included, each with its stream id.
+    """
+    _check_localhost(request)
+
+    run = await journal.get(request_id, include_events=events)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown request: {request_id}")
+    return run
+
+
+@app.get("/agent/runs")
+async def agent_runs(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    status: Optional[str] = None,
+    agent_id: Optional[str] = None,
+):
+    """Journaled runs, newest first, optionally filtered - localhost only"""
+    _check_localhost(request)
+
+    return await journal.list_runs(limit=limit, offset=offset, status=status, agent_id=agent_id)
+
+
 # SSE streaming endpoint
-async def agent_event_generator(request_id: str) -> AsyncGenerator:
-    """Generate events from the agent event queue for SSE streaming"""
-    # Get or create queue (use setdefault to avoid race conditions)
-    queue = event_queues.setdefault(request_id, asyncio.Queue())
-    event_queues_timestamps.setdefault(request_id, datetime.now())
+KEEPALIVE_FRAME = sse_frame(EventType.KEEPALIVE, b'{"message":"keepalive"}')
+
+
+async def agent_event_generator(request_id: str, last_event_id: int = 0) -> AsyncGenerator:
+    """
+    Generate events from the agent replay stream for SSE streaming.
+
+    Each connection is an independent subscriber of the request's stream, so
+    several clients can watch the same run. Every event carries its sequence
+    number as the SSE id. Events after last_event_id are replayed first, so a
+    reconnecting EventSource only receives the tail it missed. Frames are the
+    bytes encoded once when the event was published.
+    """
+    stream = _get_event_stream(request_id)
+    request_expiry.touch(request_id)
+    subscription = stream.subscribe(
+        last_seq=last_event_id,
+        max_lag=settings.STREAM_SUBSCRIBER_MAX_LAG,
+        policy=settings.STREAM_SLOW_SUBSCRIBER_POLICY,
+    )
 
     try:
         while True:
-            try:
-                # Wait for event with timeout (30s keepalive)
-                event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                event_queues_timestamps[request_id] = datetime.now()
-
-                # Check for end-of-stream marker
-                if event is None:
-                    logger.debug(f"[{request_id}] Stream ended (None marker)")
+            skipped, entries = subscription.poll()
+            if skipped or subscription.dropped:
+                logger.warning(
+                    f"[{request_id}] Subscriber lagging: skipped={skipped}, "
+                    f"dropped={subscription.dropped}"
+                )
+                yield sse_frame(EventType.LAGGED, event_codec.dumps({
+                    "skipped": skipped,
+                    "dropped": subscription.dropped,
+                    "resume_from": subscription.cursor,
+                }))
+                if subscription.dropped:
                     break
 
-                logger.debug(f"[{request_id}] Streaming event: {event.event_type}")
-                yield {
-                    "event": event.event_type,
-                    "data": json.dumps(event.to_dict()),
-                }
+            for entry in entries:
+                event = entry.event
+                logger.debug(f"[{request_id}] Streaming event #{entry.seq}: {event.event_type}")
+                yield entry.frame
 
                 # Stop streaming on terminal events
-                if event.event_type in ("result", "error"):
-                    break
+                if event.event_type in ("result", "error", "cancelled"):
+                    return
 
+            if subscription.finished:
+                logger.debug(f"[{request_id}] Stream ended (stream closed)")
+                break
+
+            try:
+                # Wait for new events with timeout (30s keepalive)
+                await asyncio.wait_for(subscription.wait(), timeout=30.0)
             except asyncio.TimeoutError:
                 # Send keepalive event to prevent connection timeout
                 logger.debug(f"[{request_id}] SSE keepalive")
-                event_queues_timestamps[request_id] = datetime.now()
-                yield {
-                    "event": "keepalive",
-                    "data": json.dumps({"message": "keepalive"}),
-                }
+                request_expiry.touch(request_id)
+                yield KEEPALIVE_FRAME
     except asyncio.CancelledError:
         logger.info(f"[{request_id}] SSE stream cancelled")
     finally:
-        # Cleanup queue
-        event_queues.pop(request_id, None)
-        event_queues_timestamps.pop(request_id, None)
-        logger.debug(f"[{request_id}] SSE stream cleanup complete")
+        # The replay buffer is kept for reconnects; it is released once the
+        # request has been idle for STREAM_IDLE_TIMEOUT.
+        subscription.close()
+        request_expiry.touch(request_id)
+        logger.debug(f"[{request_id}] SSE stream detached at event #{subscription.cursor}")
 
 
 @app.get("/agent/stream/{request_id}")
-async def stream_events(request_id: str, request: Request):
+async def stream_events(
+    request_id: str,
+    request: Request,
+    last_event_id: Optional[str] = None,
+):
     """
     Stream real-time events from agent execution via Server-Sent Events.
     
     Usage:
     - Client connects to /agent/stream/{request_id}
-    - Server sends events as they occur
+    - Server sends events as they occur, each tagged with a sequence id
+    - On reconnect, the Last-Event-ID header (or ?last_event_id=) resumes
+      the stream after that id instead of replaying it from the start
     - Stream ends when terminal event (result/error) is sent
     """
     _check_localhost(request)
-    
-    logger.info(f"SSE stream started for request {request_id}")
+
+    resume_from = parse_last_event_id(
+        request.headers.get("last-event-id") or last_event_id
+    )
+    logger.info(f"SSE stream started for request {request_id} (resume after #{resume_from})")
     return EventSourceResponse(
-        agent_event_generator(request_id),
+        agent_event_generator(request_id, resume_from),
         media_type="text/event-stream",
     )
 
 
+# Multiplexed event channel
+@app.websocket("/agent/events")
+async def multiplexed_events(websocket: WebSocket):
+    """
+    Stream events from many agent executions over a single WebSocket.
+
+    Client messages (JSON text):
+    - {"action": "subscribe", "request_id": "...", "last_event_id": 0}
+    - {"action": "unsubscribe", "request_id": "..."}
+
+    Server frames are JSON objects {"request_id", "id", "event", "data"}
+    where "data" is the same payload sent on /agent/stream. Subscribing and
+    unsubscribing never requires a reconnect, and one keepalive timer serves
+    the whole connection.
+    """
+    try:
+        _check_localhost(websocket)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    multiplexer = StreamMultiplexer(
+        _get_event_stream,
+        max_lag=settings.STREAM_SUBSCRIBER_MAX_LAG,
+        policy=settings.STREAM_SLOW_SUBSCRIBER_POLICY,
+    )
+    logger.info("Multiplexed event channel opened")
+
+    async def _read_commands() -> None:
+        while True:
+            raw_message = await websocket.receive_text()
+            try:
+                message = json.loads(raw_message)
+                action = message["action"]
+                request_id = message["request_id"]
+                if not isinstance(request_id, str):
+                    raise TypeError("request_id must be a string")
+            except (ValueError, KeyError, TypeError) as e:
+                multiplexer.push_control(None, EventType.ERROR, {
+                    "error": f"Invalid command: {e}",
+                    "error_code": "INVALID_COMMAND",
+                })
+                continue
+
+            if action == "subscribe":
+                last_event_id = parse_last_event_id(str(message.get("last_event_id") or ""))
+                request_expiry.touch(request_id)
+                multiplexer.subscribe(request_id, last_seq=last_event_id)
+                logger.debug(f"[{request_id}] Multiplexed subscribe (resume after #{last_event_id})")
+            elif action == "unsubscribe":
+                multiplexer.unsubscribe(request_id)
+                logger.debug(f"[{request_id}] Multiplexed unsubscribe")
+            else:
+                multiplexer.push_control(request_id, EventType.ERROR, {
+                    "error": f"Unknown action: {action}",
+                    "error_code": "INVALID_COMMAND",
+                })
+
+    async def _write_frames() -> None:
+        while True:
+            for frame in multiplexer.drain():
+                await websocket.send_text(frame)
+
+            try:
+                await asyncio.wait_for(multiplexer.wait(), timeout=30.0)
+            except asyncio.TimeoutError:
+                for request_id in multiplexer.subscriptions:
+                    request_expiry.touch(request_id)
+                multiplexer.push_control(None, EventType.KEEPALIVE, {"message": "keepalive"})
+
+    tasks = [
+        asyncio.create_task(_read_commands()),
+        asyncio.create_task(_write_frames()),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                logger.error(
+                    f"Multiplexed event channel failed: {exc}",
+                    exc_info=(type(exc), exc, exc.__traceback__),
+                )
+    finally:
+        multiplexer.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Multiplexed event channel closed")
+
+
+# Metrics endpoint
+@app.get("/metrics")
+async def metrics(request: Request):
+    """Runtime counters for capacity planning - localhost only"""
+    _check_localhost(request)
+
+    return {
+        "scheduler": scheduler.stats(),
+        "result_cache": result_cache.stats(),
+        "singleflight": singleflight.stats(),
+        "worker_pool": worker_pool.stats() if worker_pool is not None else None,
+        "sessions": session_manager.stats() if session_manager is not None else None,
+        "resources": resource_stats.stats(),
+        "latency": latency_tracker.stats(),
+        "expiry": request_expiry.stats(),
+        "journal": journal.stats(),
+        "pipeline": {request_id: stats.to_dict() for request_id, stats in pipeline_stats.items()},
+        "coalescing": coalescing_stats.to_dict(),
+        "streams": {
+            "tracked": len(event_queues),
+            "active_requests": len(active_request_ids),
+        },
+    }
+
+
 # Shutdown endpoint
 @app.post("/shutdown")
 async def shutdown(request: Request):
@@ -377,15 +1329,23 @@ async def shutdown(request: Request):
     
     logger.info("Shutdown requested, preparing cleanup")
 
-    global cagent_runtime
+    global cagent_runtime, worker_pool, session_manager
 
     if cagent_runtime:
         await cagent_runtime.shutdown()
         cagent_runtime = None
+    worker_pool = None
+    session_manager = None
+    await journal.flush()
 
     # Clean up any remaining event queues
+    for timer in idle_cancel_timers.values():
+        timer.cancel()
+    idle_cancel_timers.clear()
+    request_tasks.clear()
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
+    pipeline_stats.clear()
     active_request_ids.clear()
 
     return {"status": "shutting down"}
@@ -0,0 +1,218 @@
+"""
+Resource Monitor: Per-execution resource accounting and limits for cagent.
+
+Samples CPU time, RSS, open file descriptors and child-process count of an
+execution's whole process tree (cagent plus the MCP servers it starts),
+keeps the peaks, and aborts executions that exceed per-agent limits instead
+of letting them run into the execution timeout.
+"""
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+class ResourceLimitExceeded(Exception):
+    """Raised when an execution exceeds one of its agent's resource limits."""
+
+    pass
+
+
+@dataclass
+class ResourceUsage:
+    """Resource peaks of one execution's process tree."""
+    cpu_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    peak_open_fds: int = 0
+    peak_children: int = 0
+    samples: int = 0
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+@dataclass
+class ResourceLimits:
+    """Optional per-agent ceilings; None disables a limit."""
+    max_rss_mb: Optional[float] = None
+    max_cpu_seconds: Optional[float] = None
+    max_children: Optional[int] = None
+
+    def check(self, usage: ResourceUsage) -> Optional[str]:
+        """
+        Compare usage against the limits.
+
+        Args:
+            usage: Current usage of the execution
+
+        Returns:
+            Description of the first exceeded limit, or None
+        """
+        if self.max_rss_mb is not None and usage.peak_rss_bytes > self.max_rss_mb * _MB:
+            return f"RSS {usage.peak_rss_bytes / _MB:.0f}MB exceeds {self.max_rss_mb:.0f}MB"
+        if self.max_cpu_seconds is not None and usage.cpu_seconds > self.max_cpu_seconds:
+            return f"CPU time {usage.cpu_seconds:.1f}s exceeds {self.max_cpu_seconds:.1f}s"
+        if self.max_children is not None and usage.peak_children > self.max_children:
+            return f"{usage.peak_children} child processes exceed {self.max_children}"
+        return None
+
+
+def sample_process_tree(pid: int) -> Optional[tuple[float, int, int, int]]:
+    """
+    Take one sample of a process and all its descendants.
+
+    Args:
+        pid: Root process id
+
+    Returns:
+        (cpu_seconds, rss_bytes, open_fds, children) or None if the root is gone
+    """
+    try:
+        root = psutil.Process(pid)
+        children = root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+
+    cpu_seconds = 0.0
+    rss_bytes = 0
+    open_fds = 0
+    for proc in [root, *children]:
+        try:
+            with proc.oneshot():
+                cpu_times = proc.cpu_times()
+                cpu_seconds += cpu_times.user + cpu_times.system
+                rss_bytes += proc.memory_info().rss
+                if hasattr(proc, "num_fds"):
+                    open_fds += proc.num_fds()
+                else:
+                    open_fds += proc.num_handles()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    return cpu_seconds, rss_bytes, open_fds, len(children)
+
+
+class ResourceMonitor:
+    """Periodically sample one execution's process tree and enforce limits."""
+
+    def __init__(
+        self,
+        pid: int,
+        limits: Optional[ResourceLimits] = None,
+        interval: float = 0.5,
+        on_exceeded: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Initialize monitor.
+
+        Args:
+            pid: Root pid of the execution
+            limits: Limits to enforce, if any
+            interval: Seconds between samples
+            on_exceeded: Called once with the reason when a limit is exceeded
+        """
+        self.pid = pid
+        self.limits = limits
+        self.interval = interval
+        self.on_exceeded = on_exceeded
+        self.usage = ResourceUsage()
+        self.violation: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> ResourceUsage:
+        """Stop sampling and return the usage seen so far."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        return self.usage
+
+    async def sample(self) -> bool:
+        """
+        Take one sample, update peaks and check limits.
+
+        Returns:
+            False once the process tree is gone
+        """
+        sample = await asyncio.to_thread(sample_process_tree, self.pid)
+        if sample is None:
+            return False
+
+        cpu_seconds, rss_bytes, open_fds, children = sample
+        usage = self.usage
+        usage.cpu_seconds = max(usage.cpu_seconds, cpu_seconds)
+        usage.peak_rss_bytes = max(usage.peak_rss_bytes, rss_bytes)
+        usage.peak_open_fds = max(usage.peak_open_fds, open_fds)
+        usage.peak_children = max(usage.peak_children, children)
+        usage.samples += 1
+
+        if self.limits is not None and self.violation is None:
+            violation = self.limits.check(usage)
+            if violation is not None:
+                self.violation = violation
+                logger.warning(f"PID {self.pid} exceeded resource limit: {violation}")
+                if self.on_exceeded is not None:
+                    self.on_exceeded(violation)
+        return True
+
+    async def _run(self) -> None:
+        while await self.sample():
+            await asyncio.sleep(self.interval)
+
+
+class ResourceStats:
+    """Aggregate per-agent resource usage across executions."""
+
+    def __init__(self):
+        """Initialize with no recorded executions."""
+        self._agents: dict[str, dict] = {}
+
+    def record(self, agent_id: str, usage: ResourceUsage, violation: Optional[str] = None) -> None:
+        """
+        Add one finished execution.
+
+        Args:
+            agent_id: Agent that ran
+            usage: Usage collected by its monitor
+            violation: Limit it was aborted for, if any
+        """
+        stats = self._agents.setdefault(
+            agent_id,
+            {
+                "executions": 0,
+                "cpu_seconds_total": 0.0,
+                "peak_rss_bytes_max": 0,
+                "peak_rss_bytes_sum": 0,
+                "peak_open_fds_max": 0,
+                "peak_children_max": 0,
+                "limit_violations": 0,
+            },
+        )
+        stats["executions"] += 1
+        stats["cpu_seconds_total"] += usage.cpu_seconds
+        stats["peak_rss_bytes_max"] = max(stats["peak_rss_bytes_max"], usage.peak_rss_bytes)
+        stats["peak_rss_bytes_sum"] += usage.peak_rss_bytes
+        stats["peak_open_fds_max"] = max(stats["peak_open_fds_max"], usage.peak_open_fds)
+        stats["peak_children_max"] = max(stats["peak_children_max"], usage.peak_children)
+        if violation is not None:
+            stats["limit_violations"] += 1
+
+    def stats(self) -> dict:
+        """Per-agent aggregates for the metrics endpoint."""
+        result = {}
+        for agent_id, stats in self._agents.items():
+            entry = {key: value for key, value in stats.items() if key != "peak_rss_bytes_sum"}
+            entry["peak_rss_bytes_mean"] = stats["peak_rss_bytes_sum"] // stats["executions"]
+            result[agent_id] = entry
+        return result
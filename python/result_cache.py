@@ -0,0 +1,258 @@
+"""
+Result Cache: Content-addressed cache of completed agent executions.
+
+Keys are a stable hash of the request (agent_id, input, context) plus the
+content of team.yaml and every prompt or knowledge file it references, so
+editing any of those files invalidates affected entries automatically.
+Values are the recorded event sequence of a successful run, replayed through
+the normal SSE path on a hit. Entries live in an in-memory LRU with an
+optional SQLite tier, both bounded by a TTL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Relative file references in team.yaml, optionally wrapped in ${VAR:-default}
+_FILE_REFERENCE_PATTERN = re.compile(
+    r"""(?P<ref>(?:\$\{[A-Za-z_][A-Za-z0-9_]*:-[^}]*\}|\.{1,2})/[^\s"'\],}]*)"""
+)
+_ENV_DEFAULT_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*):-([^}]*)\}")
+
+# Files that are runtime state rather than configuration
+_IGNORED_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def request_digest(agent_id: str, user_input: object, context: Optional[dict]) -> str:
+    """
+    Hash a request independently of dict key order.
+
+    Args:
+        agent_id: Agent to execute
+        user_input: Request input as received
+        context: Optional request context
+
+    Returns:
+        Hex digest of the normalized request
+    """
+    request_json = json.dumps(
+        {"agent_id": agent_id, "input": user_input, "context": context or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(request_json.encode("utf-8")).hexdigest()
+
+
+class TeamFingerprint:
+    """Hash of team.yaml and the files it references, re-hashed only on change."""
+
+    def __init__(self, team_yaml_path: str):
+        """
+        Initialize fingerprint tracker.
+
+        Args:
+            team_yaml_path: Path to team.yaml; references resolve relative to its directory
+        """
+        self.team_yaml_path = pathlib.Path(team_yaml_path)
+        self._file_hashes: dict[pathlib.Path, tuple[tuple[int, int], str]] = {}
+
+    def referenced_files(self) -> list[pathlib.Path]:
+        """List existing, non-state files referenced by team.yaml (including itself)."""
+        try:
+            text = self.team_yaml_path.read_text(encoding="utf-8")
+        except OSError:
+            return []
+
+        base_dir = self.team_yaml_path.parent
+        files = {self.team_yaml_path.resolve()}
+        for match in _FILE_REFERENCE_PATTERN.finditer(text):
+            reference = _ENV_DEFAULT_PATTERN.sub(
+                lambda m: os.environ.get(m.group(1), m.group(2)), match.group("ref")
+            )
+            path = (base_dir / reference).resolve()
+            if path.suffix in _IGNORED_SUFFIXES or not path.is_file():
+                continue
+            files.add(path)
+        return sorted(files)
+
+    def compute(self) -> str:
+        """Return a digest covering the current content of every referenced file."""
+        digest = hashlib.sha256()
+        for path in self.referenced_files():
+            digest.update(str(path).encode("utf-8"))
+            digest.update(self._hash_file(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def _hash_file(self, path: pathlib.Path) -> str:
+        try:
+            stat = path.stat()
+        except OSError:
+            return "missing"
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._file_hashes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        file_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+        self._file_hashes[path] = (signature, file_hash)
+        return file_hash
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional SQLite) cache of recorded event sequences."""
+
+    def __init__(
+        self,
+        team_yaml_path: str = "team.yaml",
+        max_entries: int = 256,
+        ttl: float = 3600.0,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            team_yaml_path: Path to team.yaml used for fingerprinting
+            max_entries: Maximum entries kept in memory
+            ttl: Seconds an entry stays valid
+            db_path: Optional SQLite file for the persistent tier
+        """
+        self.fingerprint = TeamFingerprint(team_yaml_path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, events TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def key_for(self, agent_id: str, user_input: object, context: Optional[dict]) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            agent_id: Agent to execute
+            user_input: Request input as received
+            context: Optional request context
+
+        Returns:
+            Hex digest identifying the request and the current team configuration
+        """
+        digest = hashlib.sha256(request_digest(agent_id, user_input, context).encode("ascii"))
+        digest.update(self.fingerprint.compute().encode("ascii"))
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[list[dict]]:
+        """
+        Look up a recorded event sequence.
+
+        Args:
+            key: Cache key from key_for()
+
+        Returns:
+            Recorded events (as dicts) or None on a miss
+        """
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            expires_at, events = cached
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return events
+            del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                expires_at, events = row
+                self._remember(key, expires_at, events)
+                self.hits += 1
+                return events
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, events: list[dict]) -> None:
+        """
+        Store the recorded event sequence of a successful run.
+
+        Args:
+            key: Cache key from key_for()
+            events: Events as dicts (CagentEvent.to_dict())
+        """
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, events)
+        self.stores += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._db_put, key, expires_at, events)
+
+    def stats(self) -> dict:
+        """Snapshot of cache counters for the metrics endpoint."""
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "persistent": self._db is not None,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite tier, if any."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, expires_at: float, events: list[dict]) -> None:
+        self._memory[key] = (expires_at, events)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple[float, list[dict]]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, events FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= now:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+        return row[0], json.loads(row[1])
+
+    def _db_put(self, key: str, expires_at: float, events: list[dict]) -> None:
+        payload = json.dumps(events)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, events, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
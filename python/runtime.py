@@ -8,18 +8,33 @@ and provides async generators for event streaming.
 import asyncio
 import json
 import logging
+import os
 import pathlib
+import signal
 import subprocess
 import time
 import uuid
-from typing import AsyncGenerator, Optional
+import weakref
+from dataclasses import dataclass
+from typing import AsyncGenerator, Optional, Union
 
 import psutil
 
+from backpressure import PipelineStats
+from cassette import CassetteLibrary, CassetteRecorder, ReplayProcess
 from event_parser import CagentEvent, EventParser, EventType
+from latency import LatencyTracker
+from line_reader import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_LINE_BYTES, ChunkedLineReader, SpilledLine
+from resource_monitor import ResourceLimitExceeded, ResourceLimits, ResourceMonitor, ResourceStats
+from scheduler import AdmissionScheduler, AdmissionTicket, Priority
+from session import SessionManager
+from worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
+# Seconds a terminated process tree gets to exit before SIGKILL
+KILL_GRACE_SECONDS = 2.0
+
 
 class CagentRuntimeError(Exception):
     """Cagent runtime execution error."""
@@ -27,15 +42,67 @@ class CagentRuntimeError(Exception):
     pass
 
 
+class GroupPolicy:
+    """When a fan-out group emits its group-level event."""
+
+    ALL = "all"  # wait for every branch, report each outcome
+    FAIL_FAST = "fail-fast"  # stop at the first failed branch, cancel the rest
+
+    ALL_POLICIES = (ALL, FAIL_FAST)
+
+
+@dataclass
+class GroupBranch:
+    """One agent execution of a fan-out group."""
+    branch_id: str
+    agent_id: str
+    context: Optional[dict] = None  # merged over the group context
+
+
 class CagentRuntime:
     """Manage cagent agent execution via subprocess."""
 
-    def __init__(self, team_yaml_path: str = "team.yaml"):
+    def __init__(
+        self,
+        team_yaml_path: str = "team.yaml",
+        resource_limits: Optional[dict[str, ResourceLimits]] = None,
+        resource_sample_interval: float = 0.5,
+        resource_stats: Optional[ResourceStats] = None,
+        line_queue_size: int = 256,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        spill_dir: Optional[str] = None,
+        latency: Optional[LatencyTracker] = None,
+        max_retries: int = 0,
+        retry_backoff: float = 0.5,
+        hedge: bool = False,
+        chunked_parsing: bool = False,
+        scheduler: Optional[AdmissionScheduler] = None,
+    ):
         """
         Initialize runtime with team configuration.
 
         Args:
             team_yaml_path: Path to team.yaml configuration file
+            resource_limits: Optional per-agent resource limits
+            resource_sample_interval: Seconds between resource samples (0 disables)
+            resource_stats: Aggregator for per-agent resource usage
+            line_queue_size: Subprocess output lines buffered before reading
+                from the pipe pauses
+            max_line_bytes: Output line length above which the line is
+                spilled to a temporary file while it is read, and the
+                largest JSON object assembled from several stdout lines
+            spill_dir: Directory for spilled lines (system temp dir by default)
+            latency: Per-agent latency percentiles deriving default timeouts
+            max_retries: Retries of runs that exit before producing output
+                (execute_resilient only)
+            retry_backoff: Seconds before the first retry, doubled per retry
+            hedge: Start a duplicate run when the first event is later than
+                the agent's p95 (execute_resilient only)
+            chunked_parsing: Parse stdout a pipe read at a time with
+                EventParser.parse_chunk instead of line by line; partial
+                lines are held in memory, so max_line_bytes does not apply
+            scheduler: Admission scheduler hedged runs take a batch-lane
+                slot from; a hedge is skipped when no slot is free
 
         Raises:
             CagentRuntimeError: If team.yaml doesn't exist or cagent is not available
@@ -43,8 +110,33 @@ class CagentRuntime:
         self.team_yaml_path = team_yaml_path
         self.parser = EventParser(json_mode=True)
         self.active_processes: dict[str, asyncio.subprocess.Process] = {}
+        self.worker_pool: Optional[WorkerPool] = None
+        self.sessions: Optional[SessionManager] = None
+        self.resource_limits = resource_limits or {}
+        self.resource_sample_interval = resource_sample_interval
+        self.resource_stats = resource_stats if resource_stats is not None else ResourceStats()
+        self.line_queue_size = line_queue_size
+        self.max_line_bytes = max_line_bytes
+        self.spill_dir = spill_dir
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.hedge = hedge
+        self.chunked_parsing = chunked_parsing
+        self.scheduler = scheduler
+        self.recorder: Optional[CassetteRecorder] = None
         self.shutdown_flag = False
 
+        self._verify_environment()
+        logger.info(f"{type(self).__name__} initialized with {team_yaml_path}")
+
+    def _verify_environment(self) -> None:
+        """
+        Check that cagent and team.yaml are available.
+
+        Raises:
+            CagentRuntimeError: If team.yaml doesn't exist or cagent is not available
+        """
         # Verify cagent is available
         try:
             result = subprocess.run(
@@ -60,11 +152,117 @@ class CagentRuntime:
             raise CagentRuntimeError(f"Cannot execute cagent: {e}") from e
 
         # Verify team.yaml exists
-        team_path = pathlib.Path(team_yaml_path)
+        team_path = pathlib.Path(self.team_yaml_path)
         if not team_path.exists():
-            raise CagentRuntimeError(f"team.yaml not found: {team_yaml_path}")
+            raise CagentRuntimeError(f"team.yaml not found: {self.team_yaml_path}")
+
+    def build_command(self, agent_id: str) -> list[str]:
+        """Build the cagent command line for an agent reading its input from stdin."""
+        return [
+            "cagent",
+            "exec",
+            self.team_yaml_path,
+            "--agent",
+            agent_id,
+            "--json",
+            "-",
+        ]
+
+    async def spawn_process(self, agent_id: str) -> asyncio.subprocess.Process:
+        """
+        Start a cagent process that waits for its input on stdin.
 
-        logger.info(f"CagentRuntime initialized with {team_yaml_path}")
+        Args:
+            agent_id: ID of agent to start
+
+        Returns:
+            Process with stdin, stdout and stderr pipes
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *self.build_command(agent_id),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # Own process group so the whole tree can be signalled at once
+            start_new_session=True,
+        )
+        if self.recorder is not None:
+            return self.recorder.wrap(agent_id, proc)
+        return proc
+
+    def enable_recording(self, cassette_dir: str) -> CassetteRecorder:
+        """
+        Record every execution started from now on into cassette_dir.
+
+        Args:
+            cassette_dir: Directory receiving one cassette per request
+
+        Returns:
+            The recorder
+        """
+        self.recorder = CassetteRecorder(cassette_dir)
+        logger.info(f"Recording cagent executions to {cassette_dir}")
+        return self.recorder
+
+    async def enable_worker_pool(
+        self,
+        agent_ids: list[str],
+        size_per_agent: int = 1,
+        max_age: float = 600.0,
+        health_interval: float = 10.0,
+    ) -> WorkerPool:
+        """
+        Pre-spawn parked cagent processes that execute_agent() hands out first.
+
+        Args:
+            agent_ids: Agents to keep warm processes for
+            size_per_agent: Parked processes kept per agent
+            max_age: Seconds after which a parked process is recycled
+            health_interval: Seconds between background health checks
+
+        Returns:
+            The started pool
+        """
+        self.worker_pool = WorkerPool(
+            spawn=self.spawn_process,
+            terminate=self._kill_process_tree_async,
+            agent_ids=agent_ids,
+            size_per_agent=size_per_agent,
+            max_age=max_age,
+            health_interval=health_interval,
+        )
+        await self.worker_pool.start()
+        return self.worker_pool
+
+    async def enable_sessions(
+        self,
+        agent_ids: list[str],
+        command_template: list[str],
+        restart_backoff: float = 1.0,
+    ) -> SessionManager:
+        """
+        Serve agent_ids from long-lived cagent sessions instead of one exec per request.
+
+        Args:
+            agent_ids: Agents to run in session mode
+            command_template: Session command; "{team_yaml}" and "{agent_id}" are substituted
+            restart_backoff: Initial restart delay for crashed sessions
+
+        Returns:
+            The started session manager
+        """
+        self.sessions = SessionManager(
+            command_template,
+            self.team_yaml_path,
+            agent_ids,
+            terminate=self._kill_process_tree_async,
+            restart_backoff=restart_backoff,
+            queue_size=self.line_queue_size,
+            max_line_bytes=self.max_line_bytes,
+            spill_dir=self.spill_dir,
+        )
+        await self.sessions.start()
+        return self.sessions
 
     @staticmethod
     def _decode_output(raw_data: object) -> str:
@@ -85,8 +283,18 @@ class CagentRuntime:
         if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
             await result
 
-    async def _stream_lines(self, stream: object) -> AsyncGenerator[str, None]:
+    async def _stream_lines(
+        self, stream: object
+    ) -> AsyncGenerator[Union[str, bytes, SpilledLine], None]:
         """Read subprocess stream incrementally when possible."""
+        if isinstance(stream, asyncio.StreamReader):
+            reader = ChunkedLineReader(
+                stream, max_line_bytes=self.max_line_bytes, spill_dir=self.spill_dir
+            )
+            async for line in reader:
+                yield line
+            return
+
         readline = getattr(stream, "readline", None)
         if callable(readline) and asyncio.iscoroutinefunction(readline):
             while True:
@@ -104,26 +312,46 @@ class CagentRuntime:
             for line in text.splitlines():
                 yield line
 
+    @staticmethod
+    async def _attach_resources(event: CagentEvent, monitor: Optional[ResourceMonitor]) -> CagentEvent:
+        """Add the execution's resource usage to a terminal (result/error) event."""
+        if monitor is None or event.event_type not in (EventType.RESULT, EventType.ERROR):
+            return event
+        if event.event_type == EventType.RESULT:
+            await monitor.sample()
+        if monitor.usage.samples:
+            event.data["resources"] = monitor.usage.to_dict()
+        return event
+
     @staticmethod
     def _remaining_timeout(deadline: float) -> float:
         """Return remaining timeout budget in seconds."""
         return max(0.0, deadline - asyncio.get_running_loop().time())
 
-    async def execute_agent(
+    async def _execute_once(
         self,
         agent_id: str,
         user_input: str,
         context: Optional[dict] = None,
-        timeout: float = 300.0,
+        timeout: Optional[float] = None,
+        pipeline_stats: Optional[PipelineStats] = None,
     ) -> AsyncGenerator[CagentEvent, None]:
         """
-        Execute a cagent agent and stream events.
+        Run a single cagent execution and stream its events.
+
+        Output lines are buffered in a bounded queue; while the consumer of
+        this generator is not pulling events, reading from the subprocess
+        pipes pauses once the queue is full. Time to first event and
+        duration of successful runs feed the latency tracker. A process
+        that exits non-zero without any stdout event ends with an error
+        carrying error_code EXIT_BEFORE_OUTPUT.
 
         Args:
             agent_id: ID of agent to execute (e.g., "orchestrator")
             user_input: User input/prompt for the agent
             context: Optional context dictionary
-            timeout: Execution timeout in seconds (default 300s = 5min)
+            timeout: Execution timeout in seconds (default: the agent's adaptive timeout)
+            pipeline_stats: Optional stats receiving the line queue high-water mark
 
         Yields:
             CagentEvent objects as agent executes
@@ -135,24 +363,47 @@ class CagentRuntime:
             raise CagentRuntimeError("Runtime is shutting down")
 
         process_id = f"{agent_id}_{uuid.uuid4().hex[:8]}"
+        if timeout is None:
+            timeout = self.latency.timeout_for(agent_id)
+        loop = asyncio.get_running_loop()
+
+        session = self.sessions.get(agent_id) if self.sessions is not None else None
+        if session is not None:
+            logger.info(f"[{process_id}] Starting execution of agent in session: {agent_id}")
+            started = loop.time()
+            first_event: Optional[float] = None
+            succeeded = timed_out = False
+            async for event in session.execute(process_id, user_input, context, timeout):
+                if first_event is None:
+                    first_event = loop.time() - started
+                succeeded = event.event_type == EventType.RESULT
+                timed_out = event.data.get("error_code") == "TIMEOUT"
+                yield event
+            if timed_out:
+                self.latency.record(agent_id, first_event, timeout, stopped=True)
+            else:
+                self.latency.record(agent_id, first_event, loop.time() - started if succeeded else None)
+            return
+
         logger.info(f"[{process_id}] Starting execution of agent: {agent_id}")
 
         proc: Optional[asyncio.subprocess.Process] = None
         reader_tasks: list[asyncio.Task] = []
+        monitor: Optional[ResourceMonitor] = None
+        abort_tasks: list[asyncio.Task] = []
+        started: Optional[float] = None
+        first_event: Optional[float] = None
+        stdout_events = 0
+        last_stderr: Optional[str] = None
+        succeeded = False
+        stopped_at: Optional[float] = None  # run time when a timeout or limit stopped it
+        # Lines, or lists of events already parsed from a stdout chunk
+        line_queue: asyncio.Queue[
+            tuple[bool, Optional[Union[str, bytes, SpilledLine, list[CagentEvent]]]]
+        ] = asyncio.Queue(maxsize=self.line_queue_size)
 
         try:
-            # Build command
-            cmd = [
-                "cagent",
-                "exec",
-                self.team_yaml_path,
-                "--agent",
-                agent_id,
-                "--json",
-                "-",
-            ]
-
-            logger.debug(f"[{process_id}] Command: {' '.join(cmd)}")
+            logger.debug(f"[{process_id}] Command: {' '.join(self.build_command(agent_id))}")
 
             # Prepare input
             stdin_input = json.dumps(
@@ -162,17 +413,30 @@ class CagentRuntime:
                 }
             )
 
-            # Spawn subprocess
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+            # Take a parked process if one is warm, otherwise spawn
+            worker = None
+            if self.worker_pool is not None:
+                worker = await self.worker_pool.acquire(agent_id)
+            if worker is not None:
+                proc = worker.proc
+                logger.debug(f"[{process_id}] Using pooled worker: PID={proc.pid}")
+            else:
+                proc = await self.spawn_process(agent_id)
+                logger.debug(f"[{process_id}] Subprocess spawned: PID={proc.pid}")
 
             self.active_processes[process_id] = proc
 
-            logger.debug(f"[{process_id}] Subprocess spawned: PID={proc.pid}")
+            if self.resource_sample_interval > 0:
+                pid = proc.pid
+                monitor = ResourceMonitor(
+                    pid,
+                    limits=self.resource_limits.get(agent_id),
+                    interval=self.resource_sample_interval,
+                    on_exceeded=lambda reason: abort_tasks.append(
+                        asyncio.create_task(self._kill_process_tree_async(pid))
+                    ),
+                )
+                monitor.start()
 
             # Send input and close stdin
             if proc.stdin:
@@ -181,18 +445,41 @@ class CagentRuntime:
                 proc.stdin.close()
                 await self._await_stream_method(proc.stdin, "wait_closed")
 
-            deadline = asyncio.get_running_loop().time() + timeout
-            line_queue: asyncio.Queue[tuple[bool, Optional[str]]] = asyncio.Queue()
+            started = loop.time()
+            deadline = started + timeout
 
             async def _pump_stream(stream: object, is_stderr: bool) -> None:
                 try:
                     async for line in self._stream_lines(stream):
                         await line_queue.put((is_stderr, line))
+                        if pipeline_stats is not None:
+                            pipeline_stats.observe_line_queue(line_queue.qsize())
                 finally:
                     await line_queue.put((is_stderr, None))
 
+            # Per-run stdout parser: it holds partial lines and JSON objects
+            # spread over several lines
+            stdout_parser = EventParser(json_mode=True, max_object_bytes=self.max_line_bytes)
+
+            async def _pump_chunks(stream: asyncio.StreamReader) -> None:
+                try:
+                    while True:
+                        chunk = await stream.read(DEFAULT_CHUNK_SIZE)
+                        events = stdout_parser.parse_chunk(chunk, final=not chunk)
+                        if events:
+                            await line_queue.put((False, events))
+                            if pipeline_stats is not None:
+                                pipeline_stats.observe_line_queue(line_queue.qsize())
+                        if not chunk:
+                            break
+                finally:
+                    await line_queue.put((False, None))
+
             if proc.stdout:
-                reader_tasks.append(asyncio.create_task(_pump_stream(proc.stdout, False)))
+                if self.chunked_parsing and isinstance(proc.stdout, asyncio.StreamReader):
+                    reader_tasks.append(asyncio.create_task(_pump_chunks(proc.stdout)))
+                else:
+                    reader_tasks.append(asyncio.create_task(_pump_stream(proc.stdout, False)))
             if proc.stderr:
                 reader_tasks.append(asyncio.create_task(_pump_stream(proc.stderr, True)))
 
@@ -205,11 +492,32 @@ class CagentRuntime:
                 is_stderr, line = await asyncio.wait_for(line_queue.get(), timeout=remaining)
                 if line is None:
                     closed_streams += 1
-                    continue
+                    if is_stderr:
+                        continue
+                    events = stdout_parser.flush()
+                elif isinstance(line, list):
+                    events = line
+                else:
+                    if isinstance(line, SpilledLine):
+                        spilled = line
+                        try:
+                            line = await asyncio.to_thread(spilled.read)
+                        finally:
+                            spilled.discard()
+                    if is_stderr:
+                        event = self.parser.parse_line(line, is_stderr=True)
+                        events = [event] if event is not None else []
+                    else:
+                        events = stdout_parser.feed_line(line)
 
-                event = self.parser.parse_line(line, is_stderr=is_stderr)
-                if event is not None:
-                    yield event
+                for event in events:
+                    if first_event is None:
+                        first_event = loop.time() - started
+                    if is_stderr:
+                        last_stderr = event.data.get("error")
+                    else:
+                        stdout_events += 1
+                    yield await self._attach_resources(event, monitor)
 
             reader_results = await asyncio.gather(*reader_tasks, return_exceptions=True)
             for result in reader_results:
@@ -221,30 +529,69 @@ class CagentRuntime:
                 raise asyncio.TimeoutError
             await asyncio.wait_for(proc.wait(), timeout=remaining)
 
+            if monitor is not None and monitor.violation is not None:
+                raise ResourceLimitExceeded(f"Resource limit exceeded: {monitor.violation}")
+
             if proc.returncode == 0:
+                succeeded = True
                 logger.info(f"[{process_id}] Execution completed successfully")
             else:
                 logger.warning(
                     f"[{process_id}] Execution completed with exit code {proc.returncode}"
                 )
+                if stdout_events == 0:
+                    message = f"Agent exited with code {proc.returncode} before producing output"
+                    if last_stderr:
+                        message += f": {last_stderr.strip()}"
+                    yield await self._attach_resources(
+                        CagentEvent(
+                            event_type=EventType.ERROR,
+                            data={
+                                "error": message,
+                                "error_code": "EXIT_BEFORE_OUTPUT",
+                                "exit_code": proc.returncode,
+                            },
+                            timestamp=time.time(),
+                        ),
+                        monitor,
+                    )
 
         except asyncio.TimeoutError:
-            logger.warning(f"[{process_id}] Execution timeout ({timeout}s)")
+            logger.warning(f"[{process_id}] Execution timeout ({timeout:.1f}s)")
+            stopped_at = timeout
             if proc:
                 await self._kill_process_tree_async(proc.pid)
-            yield CagentEvent(
-                event_type=EventType.ERROR,
-                data={"error": f"Execution timeout after {timeout}s"},
-                timestamp=time.time(),
+            yield await self._attach_resources(
+                CagentEvent(
+                    event_type=EventType.ERROR,
+                    data={"error": f"Execution timeout after {timeout:.1f}s", "error_code": "TIMEOUT"},
+                    timestamp=time.time(),
+                ),
+                monitor,
             )
             return
 
+        except ResourceLimitExceeded as e:
+            logger.warning(f"[{process_id}] {e}")
+            stopped_at = loop.time() - started
+            yield await self._attach_resources(
+                CagentEvent(
+                    event_type=EventType.ERROR,
+                    data={"error": str(e), "error_code": "RESOURCE_LIMIT"},
+                    timestamp=time.time(),
+                ),
+                monitor,
+            )
+
         except Exception as e:
             logger.exception(f"[{process_id}] Execution error")
-            yield CagentEvent(
-                event_type=EventType.ERROR,
-                data={"error": str(e)},
-                timestamp=time.time(),
+            yield await self._attach_resources(
+                CagentEvent(
+                    event_type=EventType.ERROR,
+                    data={"error": str(e)},
+                    timestamp=time.time(),
+                ),
+                monitor,
             )
 
         finally:
@@ -257,68 +604,537 @@ class CagentRuntime:
                     task.cancel()
             if reader_tasks:
                 await asyncio.gather(*reader_tasks, return_exceptions=True)
+            while not line_queue.empty():
+                _, line = line_queue.get_nowait()
+                if isinstance(line, SpilledLine):
+                    line.discard()
 
             if proc and proc.returncode is None:
                 await self._kill_process_tree_async(proc.pid)
 
+            if abort_tasks:
+                await asyncio.gather(*abort_tasks, return_exceptions=True)
+            if monitor is not None:
+                usage = await monitor.stop()
+                if usage.samples:
+                    self.resource_stats.record(agent_id, usage, monitor.violation)
+            if started is not None and stopped_at is not None:
+                self.latency.record(agent_id, first_event, stopped_at, stopped=True)
+            elif started is not None:
+                self.latency.record(agent_id, first_event, loop.time() - started if succeeded else None)
+
             logger.debug(f"[{process_id}] Cleanup complete")
 
-    def _kill_process_tree(self, pid: int) -> None:
+    @staticmethod
+    async def _release_when_done(
+        run: AsyncGenerator[CagentEvent, None], ticket: Optional[AdmissionTicket]
+    ) -> AsyncGenerator[CagentEvent, None]:
+        """Stream run's events and release its admission ticket once it ends or is closed."""
+        try:
+            async for event in run:
+                yield event
+        finally:
+            await run.aclose()
+            if ticket is not None:
+                ticket.release()
+
+    def _start_hedge(
+        self,
+        agent_id: str,
+        user_input: str,
+        context: Optional[dict],
+        deadline: float,
+        pipeline_stats: Optional[PipelineStats],
+        hedge_after: float,
+    ) -> Optional[AsyncGenerator[CagentEvent, None]]:
+        """Start a duplicate run in a free batch-lane slot, None when the scheduler has none."""
+        ticket = None
+        if self.scheduler is not None:
+            ticket = self.scheduler.try_submit(agent_id, Priority.BATCH)
+            if ticket is None:
+                self.latency.hedges_skipped += 1
+                logger.info(f"No event from {agent_id} after {hedge_after:.2f}s (p95), no slot free to hedge")
+                return None
+        self.latency.hedges += 1
+        logger.info(f"No event from {agent_id} after {hedge_after:.2f}s (p95), starting hedged run")
+        return self._release_when_done(
+            self._execute_once(agent_id, user_input, context, self._remaining_timeout(deadline), pipeline_stats),
+            ticket,
+        )
+
+    async def _start_attempt(
+        self,
+        agent_id: str,
+        user_input: str,
+        context: Optional[dict],
+        timeout: float,
+        pipeline_stats: Optional[PipelineStats],
+        hedge_after: Optional[float],
+    ) -> tuple[Optional[AsyncGenerator[CagentEvent, None]], Optional[CagentEvent]]:
+        """
+        Start an execution and wait for its first event, hedging a late one.
+
+        When hedge_after elapses without a first event a duplicate run is
+        started, if the scheduler has a batch-lane slot free for it;
+        whichever produces an event first is kept and the other is cancelled
+        (which kills its process tree).
+
+        Returns:
+            The winning run's generator and its first event, or (None, None)
+            if every run ended without producing an event
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        primary = self._execute_once(agent_id, user_input, context, timeout, pipeline_stats)
+        pending: dict[asyncio.Future, AsyncGenerator[CagentEvent, None]] = {
+            asyncio.ensure_future(primary.__anext__()): primary
+        }
+        try:
+            if hedge_after is not None and hedge_after < timeout:
+                done, _ = await asyncio.wait(pending, timeout=hedge_after)
+                hedged = None if done else self._start_hedge(
+                    agent_id, user_input, context, deadline, pipeline_stats, hedge_after
+                )
+                if hedged is not None:
+                    pending[asyncio.ensure_future(hedged.__anext__())] = hedged
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    run = pending.pop(future)
+                    try:
+                        event = future.result()
+                    except StopAsyncIteration:
+                        continue  # ended silently; the other run may still answer
+                    if run is not primary:
+                        self.latency.hedge_wins += 1
+                    return run, event
+            return None, None
+        finally:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for run in pending.values():
+                await run.aclose()
+
+    async def execute_agent(
+        self,
+        agent_id: str,
+        user_input: str,
+        context: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        pipeline_stats: Optional[PipelineStats] = None,
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[CagentEvent, None]:
+        """
+        Execute a cagent agent and stream events.
+
+        The time budget is timeout, by default the agent's adaptive timeout,
+        cut short by the caller's deadline. A run that exits before producing output
+        (EXIT_BEFORE_OUTPUT) is retried with exponential backoff, up to
+        max_retries times and while budget remains; stderr errors are
+        forwarded as they arrive, also from attempts that are retried. With
+        hedging enabled, a run whose first event is later than the agent's
+        p95 time to first event races a duplicate run.
+
+        Args:
+            agent_id: ID of agent to execute (e.g., "orchestrator")
+            user_input: User input/prompt for the agent
+            context: Optional context dictionary
+            timeout: Execution timeout in seconds shared by retries (default:
+                derived from the agent's latency percentiles, at most 300s)
+            pipeline_stats: Optional stats receiving the line queue high-water mark
+            deadline: Optional absolute deadline (Unix time in seconds)
+
+        Yields:
+            CagentEvent objects of the run that is kept, after INFO events
+            announcing retries
+
+        Raises:
+            CagentRuntimeError: If the runtime is shutting down
         """
-        Kill a process and all its children.
+        budget = timeout if timeout is not None else self.latency.timeout_for(agent_id)
+        if deadline is not None:
+            budget = min(budget, deadline - time.time())
+        if budget <= 0:
+            yield CagentEvent(
+                event_type=EventType.ERROR,
+                data={"error": "Deadline exceeded before execution started", "error_code": "DEADLINE_EXCEEDED"},
+                timestamp=time.time(),
+            )
+            return
+
+        end = asyncio.get_running_loop().time() + budget
+        hedge_after = None
+        if self.hedge and (self.sessions is None or self.sessions.get(agent_id) is None):
+            hedge_after = self.latency.hedge_delay(agent_id)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            run, event = await self._start_attempt(
+                agent_id, user_input, context, self._remaining_timeout(end), pipeline_stats, hedge_after
+            )
+            retryable = attempt <= self.max_retries
+            try:
+                # stderr lines precede the exit status that decides on a retry
+                while (
+                    retryable
+                    and event is not None
+                    and event.event_type == EventType.ERROR
+                    and "error_code" not in event.data
+                ):
+                    yield event
+                    event = await anext(run, None)
+                if event is None or event.data.get("error_code") != "EXIT_BEFORE_OUTPUT":
+                    if event is not None:
+                        yield event
+                        async for event in run:
+                            yield event
+                    return
+            finally:
+                if run is not None:
+                    await run.aclose()
+
+            backoff = self.retry_backoff * 2 ** (attempt - 1)
+            if not retryable or self._remaining_timeout(end) <= backoff:
+                yield event
+                return
+
+            self.latency.retries += 1
+            logger.warning(f"{agent_id} exited before producing output, retry {attempt} in {backoff:.2f}s")
+            yield CagentEvent(
+                event_type=EventType.INFO,
+                data={"message": f"Retrying {agent_id}: {event.data['error']}", "retry": attempt},
+                timestamp=time.time(),
+            )
+            await asyncio.sleep(backoff)
+
+    async def execute_many(
+        self,
+        branches: list[GroupBranch],
+        user_input: str,
+        context: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        policy: str = GroupPolicy.ALL,
+        tickets: Optional[dict[str, AdmissionTicket]] = None,
+        pipeline_stats: Optional[PipelineStats] = None,
+    ) -> AsyncGenerator[CagentEvent, None]:
+        """
+        Execute several agents concurrently on one input and merge their events.
+
+        Events are yielded in arrival order with data["branch"] set. A
+        branch's own result/error is yielded as BRANCH_RESULT/BRANCH_ERROR so
+        only the final group event is terminal: a RESULT carrying every
+        branch outcome, or with GroupPolicy.FAIL_FAST an ERROR as soon as a
+        branch fails (the remaining branches are cancelled).
 
         Args:
-            pid: Process ID to kill
+            branches: Branches to run; branch_ids must be unique
+            user_input: User input/prompt sent to every branch
+            context: Optional context shared by all branches
+            timeout: Execution timeout in seconds per branch (default: per agent)
+            policy: GroupPolicy value
+            tickets: Admission tickets by branch_id, awaited before each branch
+                starts and released when it ends
+            pipeline_stats: Optional stats receiving line queue high-water marks
+
+        Yields:
+            Branch-tagged CagentEvent objects, then one group RESULT or ERROR
+
+        Raises:
+            CagentRuntimeError: If the runtime is shutting down or the group is invalid
         """
+        if self.shutdown_flag:
+            raise CagentRuntimeError("Runtime is shutting down")
+        if policy not in GroupPolicy.ALL_POLICIES:
+            raise CagentRuntimeError(f"Unknown group policy: {policy}")
+        branch_ids = [branch.branch_id for branch in branches]
+        if not branches or len(set(branch_ids)) != len(branch_ids):
+            raise CagentRuntimeError("A group needs at least one branch and unique branch ids")
+
+        group_id = f"group_{uuid.uuid4().hex[:8]}"
+        logger.info(f"[{group_id}] Starting {len(branches)} branches ({policy}): {', '.join(branch_ids)}")
+
+        merged: asyncio.Queue[tuple[str, Optional[CagentEvent]]] = asyncio.Queue(
+            maxsize=self.line_queue_size
+        )
+
+        async def _run_branch(branch: GroupBranch) -> None:
+            ticket = tickets.get(branch.branch_id) if tickets else None
+            events = None
+            try:
+                if ticket is not None:
+                    await ticket.wait()
+                events = self.execute_agent(
+                    agent_id=branch.agent_id,
+                    user_input=user_input,
+                    context={**(context or {}), **(branch.context or {})},
+                    timeout=timeout,
+                    pipeline_stats=pipeline_stats,
+                )
+                async for event in events:
+                    await merged.put((branch.branch_id, event))
+            except Exception as e:
+                logger.exception(f"[{group_id}] Branch {branch.branch_id} failed")
+                await merged.put((
+                    branch.branch_id,
+                    CagentEvent(event_type=EventType.ERROR, data={"error": str(e)}, timestamp=time.time()),
+                ))
+            finally:
+                if events is not None:
+                    await events.aclose()
+                if ticket is not None:
+                    ticket.release()
+            await merged.put((branch.branch_id, None))
+
+        tasks = [asyncio.create_task(_run_branch(branch)) for branch in branches]
+        outcomes: dict[str, CagentEvent] = {}
+        running = set(branch_ids)
+        failed_branch: Optional[str] = None
+
         try:
-            parent = psutil.Process(pid)
-            children = parent.children(recursive=True)
+            while running:
+                branch_id, event = await merged.get()
+                if event is None:
+                    running.discard(branch_id)
+                    if branch_id not in outcomes:
+                        event = CagentEvent(
+                            event_type=EventType.ERROR,
+                            data={"error": "Agent finished without a result"},
+                            timestamp=time.time(),
+                        )
+                    else:
+                        continue
+                elif branch_id in outcomes:
+                    continue  # output after the branch's terminal event
 
-            # Kill children first
-            for child in children:
-                try:
-                    logger.debug(f"Killing child process: {child.pid}")
-                    child.terminate()
-                except psutil.NoSuchProcess:
-                    pass
+                if event.event_type in (EventType.RESULT, EventType.ERROR):
+                    outcomes[branch_id] = event
+                    is_result = event.event_type == EventType.RESULT
+                    yield CagentEvent(
+                        event_type=EventType.BRANCH_RESULT if is_result else EventType.BRANCH_ERROR,
+                        data={**event.data, "branch": branch_id},
+                        timestamp=event.timestamp,
+                    )
+                    if not is_result and policy == GroupPolicy.FAIL_FAST:
+                        failed_branch = branch_id
+                        break
+                else:
+                    event.data = {**event.data, "branch": branch_id}
+                    yield event
+
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = {
+            branch_id: event.data.get("result")
+            for branch_id, event in outcomes.items()
+            if event.event_type == EventType.RESULT
+        }
+        errors = {
+            branch_id: event.data.get("error")
+            for branch_id, event in outcomes.items()
+            if event.event_type == EventType.ERROR
+        }
+
+        if failed_branch is not None:
+            cancelled = [branch_id for branch_id in branch_ids if branch_id not in outcomes]
+            logger.warning(f"[{group_id}] Branch {failed_branch} failed, cancelled {cancelled}")
+            yield CagentEvent(
+                event_type=EventType.ERROR,
+                data={
+                    "error": f"Branch {failed_branch} failed: {errors[failed_branch]}",
+                    "failed_branch": failed_branch,
+                    "results": results,
+                    "errors": errors,
+                    "cancelled": cancelled,
+                },
+                timestamp=time.time(),
+            )
+            return
+
+        logger.info(f"[{group_id}] Group completed: {len(results)} succeeded, {len(errors)} failed")
+        yield CagentEvent(
+            event_type=EventType.RESULT,
+            data={"result": results, "errors": errors, "branches": branch_ids},
+            timestamp=time.time(),
+        )
+
+    @staticmethod
+    def _owns_process_group(pid: int) -> bool:
+        """Whether pid leads its own process group (started with start_new_session)."""
+        if not hasattr(os, "killpg"):
+            return False
+        try:
+            return os.getpgid(pid) == pid
+        except (ProcessLookupError, PermissionError):
+            return False
+
+    @staticmethod
+    def _process_group_alive(pgid: int) -> bool:
+        """Whether any process of the group still exists."""
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _kill_process_tree(self, *pids: int, grace: float = KILL_GRACE_SECONDS) -> None:
+        """
+        Kill processes and all their children under one shared grace deadline.
+
+        Process group leaders are signalled with one killpg() per tree; other
+        processes fall back to walking their children with psutil. Everything
+        gets SIGTERM first, then whatever is still alive after grace seconds is
+        killed in bulk; process groups get the same grace even when their
+        leader exits early.
 
-            # Kill parent
+        Args:
+            *pids: Process IDs to kill
+            grace: Seconds to wait for a clean exit before force killing
+        """
+        groups: list[int] = []
+        waited: list[psutil.Process] = []
+
+        for pid in pids:
             try:
-                logger.debug(f"Killing parent process: {pid}")
-                parent.terminate()
-            except psutil.NoSuchProcess:
-                pass
+                parent = psutil.Process(pid)
+                if self._owns_process_group(pid):
+                    logger.debug(f"Terminating process group: {pid}")
+                    os.killpg(pid, signal.SIGTERM)
+                    groups.append(pid)
+                    waited.append(parent)
+                    continue
 
-            # Wait a bit and force kill if still alive
-            _, alive = psutil.wait_procs([*children, parent], timeout=2)
-            for proc in alive:
-                try:
-                    logger.warning(f"Force killing process: {proc.pid}")
-                    proc.kill()
-                except psutil.NoSuchProcess:
-                    pass
+                children = parent.children(recursive=True)
+                # Kill children first
+                for proc in [*children, parent]:
+                    try:
+                        logger.debug(f"Killing process: {proc.pid}")
+                        proc.terminate()
+                    except psutil.NoSuchProcess:
+                        pass
+                waited.extend([*children, parent])
+
+            except (psutil.NoSuchProcess, ProcessLookupError):
+                logger.debug(f"Process {pid} already terminated")
+            except Exception:
+                logger.exception(f"Error killing process tree {pid}")
 
-        except psutil.NoSuchProcess:
-            logger.debug(f"Process {pid} already terminated")
-        except Exception:
-            logger.exception(f"Error killing process tree {pid}")
+        if not waited:
+            return
 
-    async def _kill_process_tree_async(self, pid: int) -> None:
+        # Wait once for everything and force kill the rest together
+        deadline = time.monotonic() + grace
+        _, alive = psutil.wait_procs(waited, timeout=grace)
+        # Children may still be shutting down after their group leader exited
+        while groups and time.monotonic() < deadline:
+            groups = [pgid for pgid in groups if self._process_group_alive(pgid)]
+            if groups:
+                time.sleep(0.05)
+        for pgid in groups:
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        for proc in alive:
+            try:
+                logger.warning(f"Force killing process: {proc.pid}")
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+    async def _kill_process_tree_async(self, *pids: int) -> None:
         """Run potentially blocking process tree cleanup off the event loop."""
-        await asyncio.to_thread(self._kill_process_tree, pid)
+        await asyncio.to_thread(self._kill_process_tree, *pids)
 
     async def shutdown(self) -> None:
-        """Shutdown runtime and kill all active processes."""
+        """Shutdown runtime and kill all active processes concurrently."""
         logger.info("CagentRuntime shutdown initiated")
         self.shutdown_flag = True
 
-        # Kill all active processes
+        pids = []
         for process_id, proc in list(self.active_processes.items()):
-            logger.info(f"Killing process: {process_id}")
             if proc.returncode is None:
-                await self._kill_process_tree_async(proc.pid)
+                logger.info(f"Killing process: {process_id}")
+                pids.append(proc.pid)
 
-        # Wait for all processes to finish
-        await asyncio.sleep(0.1)
+        cleanups = []
+        if pids:
+            cleanups.append(self._kill_process_tree_async(*pids))
+        if self.worker_pool is not None:
+            cleanups.append(self.worker_pool.close())
+        if self.sessions is not None:
+            cleanups.append(self.sessions.close())
+        await asyncio.gather(*cleanups)
 
         logger.info("CagentRuntime shutdown complete")
+
+
+class ReplayRuntime(CagentRuntime):
+    """Serve execute_agent() from recorded cassettes instead of cagent processes."""
+
+    def __init__(self, cassette_dir: str, speed: float = 1.0, **kwargs):
+        """
+        Initialize replay runtime.
+
+        Args:
+            cassette_dir: Directory of cassettes recorded with enable_recording()
+            speed: Playback speed multiplier; 0 replays without delays
+            **kwargs: CagentRuntime options; resource sampling is disabled
+
+        Raises:
+            CagentRuntimeError: If cassette_dir doesn't exist
+        """
+        self.cassette_dir = cassette_dir
+        self.speed = speed
+        self.cassettes = CassetteLibrary(cassette_dir)
+        self.replays: weakref.WeakValueDictionary[int, ReplayProcess] = weakref.WeakValueDictionary()
+        self._next_pid = 0
+        kwargs["resource_sample_interval"] = 0
+        super().__init__(**kwargs)
+
+    def _verify_environment(self) -> None:
+        """Replay needs neither cagent nor team.yaml, only the cassettes."""
+        if not pathlib.Path(self.cassette_dir).is_dir():
+            raise CagentRuntimeError(f"Cassette directory not found: {self.cassette_dir}")
+
+    async def spawn_process(self, agent_id: str) -> ReplayProcess:
+        """
+        Start a replay that picks its cassette once the input is written.
+
+        Args:
+            agent_id: ID of agent to replay
+
+        Returns:
+            Process stand-in with stdin, stdout and stderr
+        """
+        # Negative pids can never collide with (and signal) real processes
+        self._next_pid -= 1
+        proc = ReplayProcess(self._next_pid, agent_id, self.cassettes, speed=self.speed)
+        self.replays[proc.pid] = proc
+        return proc
+
+    def enable_recording(self, cassette_dir: str) -> CassetteRecorder:
+        """Recording is not available while replaying."""
+        raise CagentRuntimeError("Cannot record while replaying cassettes")
+
+    async def enable_sessions(self, *args, **kwargs) -> SessionManager:
+        """Session mode needs a live cagent process."""
+        raise CagentRuntimeError("Session mode is not available when replaying cassettes")
+
+    def _kill_process_tree(self, *pids: int, grace: float = KILL_GRACE_SECONDS) -> None:
+        """Stop the replays with the given synthetic pids."""
+        for pid in pids:
+            proc = self.replays.get(pid)
+            if proc is not None:
+                proc.kill()
+
+    async def _kill_process_tree_async(self, *pids: int) -> None:
+        """Stop replays on the event loop; they own no OS processes."""
+        self._kill_process_tree(*pids)
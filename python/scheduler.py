@@ -0,0 +1,261 @@
+"""
+Admission Scheduler: Concurrency caps and priority lanes for agent runs.
+
+Every cagent execution forks a full subprocess tree, so the sidecar admits
+only a bounded number of runs at once (globally and per agent_id). Runs
+beyond the caps wait in a bounded queue with an interactive and a batch
+lane; interactive runs are always admitted first.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority:
+    """Scheduling lanes, highest priority first."""
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+    ALL = (INTERACTIVE, BATCH)
+
+
+class SchedulerQueueFullError(Exception):
+    """Raised when a run cannot be admitted or queued."""
+
+    def __init__(self, message: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class AdmissionTicket:
+    """A run's place in the scheduler, from submission until release."""
+
+    def __init__(
+        self,
+        scheduler: "AdmissionScheduler",
+        agent_id: str,
+        priority: str,
+        on_position: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        Initialize a ticket. Use AdmissionScheduler.submit() instead.
+
+        Args:
+            scheduler: Owning scheduler
+            agent_id: Agent the run belongs to
+            priority: Priority lane
+            on_position: Called with the 1-based queue position whenever it changes
+        """
+        self.scheduler = scheduler
+        self.agent_id = agent_id
+        self.priority = priority
+        self.on_position = on_position
+        self.position = 0
+        self.admitted = False
+        self.released = False
+        self._admitted_event = asyncio.Event()
+
+    async def wait(self) -> None:
+        """Wait until the run is admitted. Cancelling leaves the queue."""
+        try:
+            await self._admitted_event.wait()
+        except asyncio.CancelledError:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Give back the run's slot (or queue position). Safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self.scheduler._release(self)
+
+    def _admit(self) -> None:
+        self.admitted = True
+        self.position = 0
+        self._admitted_event.set()
+
+    def _set_position(self, position: int) -> None:
+        if position == self.position:
+            return
+        self.position = position
+        if self.on_position is not None:
+            try:
+                self.on_position(position)
+            except Exception:
+                logger.exception(f"Queue position callback failed for {self.agent_id}")
+
+
+class AdmissionScheduler:
+    """Admit agent runs under global and per-agent concurrency caps."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_per_agent: int = 2,
+        max_queue: int = 64,
+        retry_after: float = 5.0,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_concurrent: Maximum runs executing at once
+            max_per_agent: Maximum runs of the same agent_id executing at once
+            max_queue: Maximum runs waiting across all lanes
+            retry_after: Seconds suggested to clients when the queue is full
+        """
+        self.max_concurrent = max_concurrent
+        self.max_per_agent = max_per_agent
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        self.running = 0
+        self.running_by_agent: dict[str, int] = {}
+        self.lanes: dict[str, deque[AdmissionTicket]] = {
+            priority: deque() for priority in Priority.ALL
+        }
+
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.rejected_total = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of runs waiting for a slot."""
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def submit(
+        self,
+        agent_id: str,
+        priority: str = Priority.INTERACTIVE,
+        on_position: Optional[Callable[[int], None]] = None,
+    ) -> AdmissionTicket:
+        """
+        Request a slot for a run, admitting it immediately when possible.
+
+        Args:
+            agent_id: Agent to execute
+            priority: Priority lane (Priority.INTERACTIVE or Priority.BATCH)
+            on_position: Called with the queue position while the run waits
+
+        Returns:
+            Ticket to await and release
+
+        Raises:
+            ValueError: If priority is not a known lane
+            SchedulerQueueFullError: If the wait queue is full
+        """
+        if priority not in self.lanes:
+            raise ValueError(f"Unknown priority lane: {priority}")
+
+        ticket = AdmissionTicket(self, agent_id, priority, on_position)
+        # Dispatch is eager, so when this agent has capacity nobody queued can
+        # use the slot and admitting immediately cannot overtake a waiter.
+        if self._has_capacity(agent_id):
+            self._start(ticket)
+            return ticket
+
+        if self.queued >= self.max_queue:
+            self.rejected_total += 1
+            raise SchedulerQueueFullError(
+                f"Admission queue full ({self.max_queue} runs waiting)",
+                retry_after=self.retry_after,
+            )
+
+        self.lanes[priority].append(ticket)
+        self.queued_total += 1
+        logger.info(f"Queued run for {agent_id} in {priority} lane")
+        self._publish_positions()
+        return ticket
+
+    def try_submit(self, agent_id: str, priority: str = Priority.BATCH) -> Optional[AdmissionTicket]:
+        """
+        Admit a run only if a slot is free right now, never queueing it.
+
+        Used for optional extra work (e.g. hedged duplicate runs) that is not
+        worth waiting for.
+
+        Args:
+            agent_id: Agent to execute
+            priority: Priority lane the ticket is accounted to
+
+        Returns:
+            Admitted ticket to release, or None when the caps are reached
+        """
+        if priority not in self.lanes:
+            raise ValueError(f"Unknown priority lane: {priority}")
+        if not self._has_capacity(agent_id):
+            return None
+        ticket = AdmissionTicket(self, agent_id, priority)
+        self._start(ticket)
+        return ticket
+
+    def stats(self) -> dict:
+        """Snapshot of scheduler state for the metrics endpoint."""
+        return {
+            "running": self.running,
+            "running_by_agent": dict(self.running_by_agent),
+            "queued": {priority: len(lane) for priority, lane in self.lanes.items()},
+            "max_concurrent": self.max_concurrent,
+            "max_per_agent": self.max_per_agent,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "queued_total": self.queued_total,
+            "rejected_total": self.rejected_total,
+        }
+
+    def _has_capacity(self, agent_id: str) -> bool:
+        return (
+            self.running < self.max_concurrent
+            and self.running_by_agent.get(agent_id, 0) < self.max_per_agent
+        )
+
+    def _start(self, ticket: AdmissionTicket) -> None:
+        self.running += 1
+        self.running_by_agent[ticket.agent_id] = self.running_by_agent.get(ticket.agent_id, 0) + 1
+        self.admitted_total += 1
+        ticket._admit()
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        if ticket.admitted:
+            self.running -= 1
+            remaining = self.running_by_agent.get(ticket.agent_id, 1) - 1
+            if remaining > 0:
+                self.running_by_agent[ticket.agent_id] = remaining
+            else:
+                self.running_by_agent.pop(ticket.agent_id, None)
+        else:
+            try:
+                self.lanes[ticket.priority].remove(ticket)
+            except ValueError:
+                pass
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrent:
+            ticket = self._next_admissible()
+            if ticket is None:
+                break
+            self._start(ticket)
+        self._publish_positions()
+
+    def _next_admissible(self) -> Optional[AdmissionTicket]:
+        for priority in Priority.ALL:
+            lane = self.lanes[priority]
+            for ticket in lane:
+                if self._has_capacity(ticket.agent_id):
+                    lane.remove(ticket)
+                    return ticket
+        return None
+
+    def _publish_positions(self) -> None:
+        position = 0
+        for priority in Priority.ALL:
+            for ticket in self.lanes[priority]:
+                position += 1
+                ticket._set_position(position)
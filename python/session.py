@@ -0,0 +1,379 @@
+"""
+Session Module: Long-lived cagent sessions shared by many conversations.
+
+Instead of one `cagent exec` process per request, a session keeps a single
+process per agent running so toolsets, memory DB handles and RAG indexes are
+opened once. Conversations are multiplexed over a line-delimited JSON
+protocol on the session's stdin/stdout:
+
+    request:  {"id": "<conversation>", "input": ..., "context": {...}}
+    cancel:   {"id": "<conversation>", "cancel": true}
+    output:   {"id": "<conversation>", ...cagent --json object...}
+    end:      {"id": "<conversation>", "done": true}
+
+A conversation also ends at its first result or error object. Output is
+read with ChunkedLineReader, so long tool results do not break the reader,
+and routed into bounded per-conversation queues: a conversation that stops
+reading pauses the session's stdout like a full line queue pauses an exec
+run. The session process is supervised and restarted with exponential
+backoff when it exits or its output cannot be read; conversations in flight
+at that moment receive an error event.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Union
+
+from event_parser import CagentEvent, EventParser, EventType
+from line_reader import DEFAULT_MAX_LINE_BYTES, ChunkedLineReader, SpilledLine
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL_EVENTS = (EventType.RESULT, EventType.ERROR)
+
+
+class SessionError(Exception):
+    """Session is closed or cannot accept conversations."""
+
+    pass
+
+
+class AgentSession:
+    """One supervised cagent process serving many conversations for an agent."""
+
+    def __init__(
+        self,
+        agent_id: str,
+        command: list[str],
+        terminate: Callable[[int], Awaitable[None]],
+        restart_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        queue_size: int = 256,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        spill_dir: Optional[str] = None,
+    ):
+        """
+        Initialize session.
+
+        Args:
+            agent_id: Agent served by this session
+            command: Command line starting the session process
+            terminate: Kills a process tree by pid
+            restart_backoff: Seconds before the first restart, doubled per consecutive crash
+            max_backoff: Upper bound for the restart delay
+            queue_size: Events buffered per conversation before reading the
+                session's stdout pauses (at least 2)
+            max_line_bytes: Output line length above which the line is
+                spilled to a temporary file while it is read
+            spill_dir: Directory for spilled lines (system temp dir by default)
+        """
+        self.agent_id = agent_id
+        self.command = command
+        self.terminate = terminate
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.queue_size = max(2, queue_size)
+        self.max_line_bytes = max_line_bytes
+        self.spill_dir = spill_dir
+
+        self.parser = EventParser(json_mode=True)
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.closed = False
+        self._conversations: dict[str, asyncio.Queue[Optional[CagentEvent]]] = {}
+        self._readers: list[asyncio.Task] = []
+        self._supervisor: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._consecutive_crashes = 0
+
+        self.restarts = 0
+        self.conversations_total = 0
+
+    async def start(self) -> None:
+        """Start the session process and its supervisor."""
+        await self._spawn()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def execute(
+        self,
+        conversation_id: str,
+        user_input: str,
+        context: Optional[dict] = None,
+        timeout: float = 300.0,
+    ) -> AsyncGenerator[CagentEvent, None]:
+        """
+        Run one conversation on the session and stream its events.
+
+        Args:
+            conversation_id: Unique id routing output back to this caller
+            user_input: User input/prompt for the agent
+            context: Optional context dictionary
+            timeout: Execution timeout in seconds
+
+        Yields:
+            CagentEvent objects for this conversation only
+
+        Raises:
+            SessionError: If the session is closed
+        """
+        if self.closed:
+            raise SessionError(f"Session for {self.agent_id} is closed")
+
+        queue: asyncio.Queue[Optional[CagentEvent]] = asyncio.Queue(maxsize=self.queue_size)
+        self._conversations[conversation_id] = queue
+        self.conversations_total += 1
+        deadline = asyncio.get_running_loop().time() + timeout
+        finished = False
+
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=self._remaining(deadline))
+            await self._send({"id": conversation_id, "input": user_input, "context": context or {}})
+
+            while True:
+                event = await asyncio.wait_for(queue.get(), timeout=self._remaining(deadline))
+                if event is None:
+                    finished = True
+                    self._consecutive_crashes = 0
+                    return
+                yield event
+
+        except asyncio.TimeoutError:
+            logger.warning(f"[{conversation_id}] Session execution timeout ({timeout}s)")
+            yield CagentEvent(
+                event_type=EventType.ERROR,
+                data={"error": f"Execution timeout after {timeout}s", "error_code": "TIMEOUT"},
+                timestamp=time.time(),
+            )
+
+        except (BrokenPipeError, ConnectionResetError) as e:
+            finished = True
+            yield CagentEvent(
+                event_type=EventType.ERROR,
+                data={"error": f"cagent session unavailable: {e}"},
+                timestamp=time.time(),
+            )
+
+        finally:
+            self._conversations.pop(conversation_id, None)
+            # Unblock the stdout reader if it is waiting on this queue
+            while not queue.empty():
+                queue.get_nowait()
+            if not finished:
+                self._write_nowait({"id": conversation_id, "cancel": True})
+
+    async def close(self) -> None:
+        """Stop supervision and kill the session process."""
+        self.closed = True
+        self._fail_all("cagent session closed")
+        tasks = list(self._readers)
+        if self._supervisor is not None:
+            tasks.append(self._supervisor)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.proc is not None and self.proc.returncode is None:
+            await self.terminate(self.proc.pid)
+            try:
+                await asyncio.wait_for(self.proc.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"Session for {self.agent_id} did not exit after terminate")
+
+    def stats(self) -> dict:
+        """Snapshot of session state for the metrics endpoint."""
+        return {
+            "pid": self.proc.pid if self.proc is not None else None,
+            "running": self._ready.is_set(),
+            "in_flight": len(self._conversations),
+            "conversations_total": self.conversations_total,
+            "restarts": self.restarts,
+        }
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        return remaining
+
+    async def _spawn(self) -> None:
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        self._readers = [
+            asyncio.create_task(self._read_stdout(self.proc)),
+            asyncio.create_task(self._read_stderr(self.proc)),
+        ]
+        self._ready.set()
+        logger.info(f"Session for {self.agent_id} started: PID={self.proc.pid}")
+
+    async def _supervise(self) -> None:
+        while not self.closed:
+            proc = self.proc
+            await proc.wait()
+            await asyncio.gather(*self._readers, return_exceptions=True)
+            self._ready.clear()
+            if self.closed:
+                return
+
+            self._fail_all(f"cagent session exited with code {proc.returncode}")
+            self._consecutive_crashes += 1
+            backoff = min(
+                self.restart_backoff * 2 ** (self._consecutive_crashes - 1), self.max_backoff
+            )
+            logger.warning(
+                f"Session for {self.agent_id} exited with code {proc.returncode}, "
+                f"restarting in {backoff:.1f}s"
+            )
+            await asyncio.sleep(backoff)
+
+            try:
+                await self._spawn()
+                self.restarts += 1
+            except Exception:
+                logger.exception(f"Failed to restart session for {self.agent_id}")
+
+    async def _read_stdout(self, proc: asyncio.subprocess.Process) -> None:
+        try:
+            async for line in self._lines(proc.stdout):
+                if isinstance(line, SpilledLine):
+                    spilled = line
+                    try:
+                        line = await asyncio.to_thread(spilled.read)
+                    finally:
+                        spilled.discard()
+                await self._route(line)
+        except Exception:
+            # The pipe would fill up with nobody reading it; restart instead
+            logger.exception(f"Session {self.agent_id} stdout reader failed")
+            if proc.returncode is None:
+                await self.terminate(proc.pid)
+
+    async def _read_stderr(self, proc: asyncio.subprocess.Process) -> None:
+        async for line in self._lines(proc.stderr):
+            if isinstance(line, SpilledLine):
+                line.discard()
+                logger.warning(f"Session {self.agent_id} stderr: <{line.size} bytes>")
+                continue
+            logger.warning(
+                f"Session {self.agent_id} stderr: {line.decode('utf-8', errors='ignore').rstrip()}"
+            )
+
+    def _lines(self, stream: asyncio.StreamReader) -> ChunkedLineReader:
+        return ChunkedLineReader(stream, max_line_bytes=self.max_line_bytes, spill_dir=self.spill_dir)
+
+    async def _route(self, line: Union[str, bytes]) -> None:
+        try:
+            obj = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            obj = None
+
+        conversation_id = obj.get("id") if isinstance(obj, dict) else None
+        queue = self._conversations.get(conversation_id)
+        if queue is None:
+            logger.debug(f"Session {self.agent_id} output outside a conversation: {line[:200]!r}")
+            return
+
+        del obj["id"]
+        done = bool(obj.pop("done", False))
+        if obj:
+            event = self.parser.parse_object(obj)
+            await queue.put(event)
+            done = done or event.event_type in _TERMINAL_EVENTS
+        # The conversation may have ended while its queue was full
+        if done and self._conversations.get(conversation_id) is queue:
+            await queue.put(None)
+
+    def _fail_all(self, reason: str) -> None:
+        for queue in self._conversations.values():
+            # A failed conversation only needs the failure; make room for it
+            while queue.qsize() > queue.maxsize - 2:
+                queue.get_nowait()
+            queue.put_nowait(
+                CagentEvent(event_type=EventType.ERROR, data={"error": reason}, timestamp=time.time())
+            )
+            queue.put_nowait(None)
+
+    async def _send(self, message: dict) -> None:
+        async with self._write_lock:
+            self._write_nowait(message, raise_errors=True)
+            await self.proc.stdin.drain()
+
+    def _write_nowait(self, message: dict, raise_errors: bool = False) -> None:
+        if self.proc is None or self.proc.stdin is None or self.proc.returncode is not None:
+            if raise_errors:
+                raise BrokenPipeError("session process is not running")
+            return
+        try:
+            self.proc.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError, RuntimeError):
+            if raise_errors:
+                raise
+
+
+class SessionManager:
+    """Start and hold one AgentSession per configured agent."""
+
+    def __init__(
+        self,
+        command_template: list[str],
+        team_yaml_path: str,
+        agent_ids: list[str],
+        terminate: Callable[[int], Awaitable[None]],
+        restart_backoff: float = 1.0,
+        queue_size: int = 256,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        spill_dir: Optional[str] = None,
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            command_template: Session command; "{team_yaml}" and "{agent_id}" are substituted
+            team_yaml_path: Path to team.yaml
+            agent_ids: Agents to run in session mode
+            terminate: Kills a process tree by pid
+            restart_backoff: Initial restart delay for crashed sessions
+            queue_size: Events buffered per conversation
+            max_line_bytes: Output line length above which a line is spilled to disk
+            spill_dir: Directory for spilled lines (system temp dir by default)
+        """
+        self.sessions: dict[str, AgentSession] = {
+            agent_id: AgentSession(
+                agent_id,
+                [part.format(team_yaml=team_yaml_path, agent_id=agent_id) for part in command_template],
+                terminate,
+                restart_backoff=restart_backoff,
+                queue_size=queue_size,
+                max_line_bytes=max_line_bytes,
+                spill_dir=spill_dir,
+            )
+            for agent_id in agent_ids
+        }
+
+    async def start(self) -> None:
+        """Start every session; agents whose session fails to start fall back to exec."""
+        for agent_id, session in list(self.sessions.items()):
+            try:
+                await session.start()
+            except Exception:
+                logger.exception(f"Failed to start session for {agent_id}")
+                del self.sessions[agent_id]
+
+    def get(self, agent_id: str) -> Optional[AgentSession]:
+        """Return the session serving agent_id, if any."""
+        return self.sessions.get(agent_id)
+
+    async def close(self) -> None:
+        """Close every session."""
+        await asyncio.gather(*(session.close() for session in self.sessions.values()))
+
+    def stats(self) -> dict:
+        """Per-agent session state for the metrics endpoint."""
+        return {agent_id: session.stats() for agent_id, session in self.sessions.items()}
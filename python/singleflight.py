@@ -0,0 +1,108 @@
+"""
+Singleflight: Coalesce identical in-flight agent executions.
+
+When the same normalized request arrives while an identical run is still in
+flight, the newcomer becomes a follower: it gets its own request_id, but
+that id is bound to the leader's event stream instead of spawning another
+cagent process.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Singleflight:
+    """Track leader runs by request key and the followers attached to them."""
+
+    def __init__(self):
+        """Initialize with no runs in flight."""
+        self._leaders: dict[str, str] = {}  # key -> leader accepting followers
+        self._followers: dict[str, list[str]] = {}  # leader -> its followers
+        self._leader_of: dict[str, str] = {}  # follower -> leader
+
+        self.leaders_total = 0
+        self.coalesced_total = 0
+
+    def join(self, key: str, request_id: str) -> Optional[str]:
+        """
+        Attach request_id to an identical run in flight, if there is one.
+
+        Args:
+            key: Normalized request key
+            request_id: Id of the incoming request
+
+        Returns:
+            Leader request_id to follow, or None if the caller must run itself
+        """
+        leader_id = self._leaders.get(key)
+        if leader_id is None:
+            return None
+
+        self._followers[leader_id].append(request_id)
+        self._leader_of[request_id] = leader_id
+        self.coalesced_total += 1
+        logger.info(f"[{request_id}] Coalesced with in-flight run {leader_id}")
+        return leader_id
+
+    def lead(self, key: str, request_id: str) -> None:
+        """
+        Register request_id as the run that identical requests should follow.
+
+        Args:
+            key: Normalized request key
+            request_id: Id of the leader request
+        """
+        self._leaders[key] = request_id
+        self._followers[request_id] = []
+        self.leaders_total += 1
+
+    def done(self, key: str, request_id: str) -> list[str]:
+        """
+        Mark a leader run as finished so later requests start a fresh run.
+
+        Args:
+            key: Normalized request key
+            request_id: Id of the finishing leader
+
+        Returns:
+            Request ids that followed this leader
+        """
+        if self._leaders.get(key) == request_id:
+            del self._leaders[key]
+        followers = self._followers.pop(request_id, [])
+        for follower_id in followers:
+            self._leader_of.pop(follower_id, None)
+        return followers
+
+    def leader_of(self, request_id: str) -> Optional[str]:
+        """Leader request_id a follower is attached to, None for anything else."""
+        return self._leader_of.get(request_id)
+
+    def leave(self, request_id: str) -> None:
+        """
+        Detach a request from the run it leads or follows.
+
+        A follower is forgotten. A leader's run goes on for its followers
+        but accepts no new ones, so identical requests start a fresh run.
+
+        Args:
+            request_id: Id of the detaching request
+        """
+        leader_id = self._leader_of.pop(request_id, None)
+        if leader_id is not None:
+            self._followers[leader_id].remove(request_id)
+            return
+        for key, leading_id in list(self._leaders.items()):
+            if leading_id == request_id:
+                del self._leaders[key]
+
+    def stats(self) -> dict:
+        """Snapshot of coalescing counters for the metrics endpoint."""
+        return {
+            "in_flight": len(self._followers),
+            "followers": sum(len(followers) for followers in self._followers.values()),
+            "leaders_total": self.leaders_total,
+            "coalesced_total": self.coalesced_total,
+        }
@@ -0,0 +1,8 @@
+"""Shared test setup."""
+
+import os
+import tempfile
+
+# Keep durable sidecar state (e.g. the execution journal) out of the real
+# app data directory; set before config.settings is first imported
+os.environ.setdefault("APP_DATA_DIR", tempfile.mkdtemp(prefix="cagent-sidecar-tests-"))
@@ -0,0 +1,246 @@
+"""Unit tests for backpressure module."""
+
+import asyncio
+import time
+import pytest
+
+from backpressure import BackpressuredPublisher, OverflowPolicy, PipelineStats, merge_events
+from event_parser import CagentEvent, EventType, ThinkingEvent
+from event_stream import EventStream, SlowSubscriberPolicy
+
+
+def _event(event_type: str, **data) -> CagentEvent:
+    return CagentEvent(event_type=event_type, data=data, timestamp=time.time())
+
+
+class TestMergeEvents:
+    """Tests for coalescing rules."""
+
+    def test_thinking_content_is_concatenated(self):
+        """Test consecutive thinking events keep all their text."""
+        merged = merge_events(_event(EventType.THINKING, content="a"), _event(EventType.THINKING, content="b"))
+        assert merged.data == {"content": "a\nb", "coalesced": 2}
+
+    def test_status_keeps_newest(self):
+        """Test consecutive status updates of one kind are superseded by the latest."""
+        first = _event(EventType.INFO, type="token_usage", total=10)
+        merged = merge_events(
+            merge_events(first, _event(EventType.INFO, type="token_usage", total=20)),
+            _event(EventType.INFO, type="token_usage", total=30),
+        )
+        assert merged.data == {"type": "token_usage", "total": 30, "coalesced": 3}
+
+    def test_other_objects_are_not_superseded(self):
+        """Test INFO objects outside STATUS_KINDS are never merged away."""
+        assert merge_events(_event(EventType.INFO, status="10%"), _event(EventType.INFO, status="20%")) is None
+        assert merge_events(
+            _event(EventType.INFO, type="token_usage", total=10), _event(EventType.INFO, type="session_title")
+        ) is None
+
+    def test_info_lines_are_concatenated(self):
+        """Test plain output lines are kept rather than superseded."""
+        merged = merge_events(_event(EventType.INFO, message="one"), _event(EventType.INFO, message="two"))
+        merged = merge_events(merged, _event(EventType.INFO, message="three"))
+        assert merged.data == {"message": "one\ntwo\nthree", "coalesced": 3}
+
+    def test_merges_like_coalescer(self):
+        """Test reasoning deltas join without a separator and branches stay apart."""
+        first, second = (
+            ThinkingEvent({"type": "agent_choice_reasoning", "content": token}, 1.0, seq)
+            for seq, token in enumerate(["Look", "ing"])
+        )
+        merged = merge_events(first, second)
+        assert isinstance(merged, ThinkingEvent)
+        assert merged.content == "Looking"
+        assert merge_events(
+            _event(EventType.INFO, message="one", branch="a"), _event(EventType.INFO, message="two", branch="b")
+        ) is None
+
+    def test_info_line_and_status_do_not_merge(self):
+        """Test an output line is never superseded by a status object."""
+        assert merge_events(_event(EventType.INFO, message="line"), _event(EventType.INFO, status="10%")) is None
+        assert merge_events(_event(EventType.INFO, status="10%"), _event(EventType.INFO, message="line")) is None
+
+    def test_different_types_do_not_merge(self):
+        """Test only runs of the same type are merged."""
+        assert merge_events(_event(EventType.THINKING, content="a"), _event(EventType.INFO)) is None
+        assert merge_events(_event(EventType.TOOL_CALL), _event(EventType.TOOL_CALL)) is None
+
+
+class TestBackpressuredPublisher:
+    """Tests for overflow policies."""
+
+    @pytest.mark.asyncio
+    async def test_no_subscribers_never_blocks(self):
+        """Test unattended runs only fill the bounded replay buffer."""
+        stream = EventStream(max_events=10)
+        publisher = BackpressuredPublisher(stream, high_water=2)
+        for i in range(20):
+            await asyncio.wait_for(publisher.publish(_event(EventType.INFO, n=i)), timeout=1.0)
+        assert stream.last_seq == 20
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_slow_subscriber(self):
+        """Test the producer pauses until the subscriber drains its backlog."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.BLOCK, high_water=2)
+        await publisher.publish(_event(EventType.INFO, n=1))
+        await publisher.publish(_event(EventType.INFO, n=2))
+
+        blocked = asyncio.create_task(publisher.publish(_event(EventType.INFO, n=3)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert stream.last_seq == 2
+
+        subscription.poll()
+        await asyncio.wait_for(blocked, timeout=1.0)
+        assert stream.last_seq == 3
+        assert publisher.stats.blocked_seconds > 0
+        assert publisher.stats.backlog_high_water == 2
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_releases_blocked_producer(self):
+        """Test a disconnecting subscriber no longer holds the run back."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        publisher = BackpressuredPublisher(stream, high_water=1)
+        await publisher.publish(_event(EventType.INFO))
+
+        blocked = asyncio.create_task(publisher.publish(_event(EventType.INFO)))
+        await asyncio.sleep(0.01)
+        subscription.close()
+        await asyncio.wait_for(blocked, timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_stalled_subscriber_does_not_block_live_one(self):
+        """Test a subscriber that stopped reading is shed after max_block, not waited on forever."""
+        stream = EventStream()
+        stalled = stream.subscribe(max_lag=500)
+        live = stream.subscribe(max_lag=500)
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.BLOCK, high_water=4, max_block=0.05)
+        received = []
+
+        async def read():
+            while not live.finished:
+                received.extend(entry.event.data["n"] for entry in live.poll()[1])
+                await live.wait()
+
+        reader = asyncio.create_task(read())
+        for i in range(20):
+            await asyncio.wait_for(publisher.publish(_event(EventType.INFO, n=i)), timeout=1.0)
+        stream.close()
+        await asyncio.wait_for(reader, timeout=1.0)
+
+        assert received == list(range(20))
+        assert stalled.stalled and publisher.stats.stalled_subscribers == 1
+        # Reading again makes it count towards the backlog again
+        assert stalled.poll()[1]
+        assert not stalled.stalled
+
+    @pytest.mark.asyncio
+    async def test_stalled_subscriber_dropped_under_drop_policy(self):
+        """Test a stalled subscriber with the drop policy is detached."""
+        stream = EventStream()
+        stalled = stream.subscribe(policy=SlowSubscriberPolicy.DROP)
+        publisher = BackpressuredPublisher(stream, high_water=2, max_block=0.01)
+        for i in range(5):
+            await asyncio.wait_for(publisher.publish(_event(EventType.INFO, n=i)), timeout=1.0)
+
+        assert stalled.dropped and stalled.finished
+        assert stream.subscriber_count == 0
+
+    @pytest.mark.asyncio
+    async def test_drop_info_discards_only_info(self):
+        """Test INFO events are dropped while over high water, others wait."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.DROP_INFO, high_water=1)
+        await publisher.publish(_event(EventType.THINKING, content="kept"))
+        await publisher.publish(_event(EventType.INFO, n=1))
+        assert publisher.stats.dropped == 1
+
+        blocked = asyncio.create_task(publisher.publish(_event(EventType.RESULT, result="done")))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        subscription.poll()
+        await asyncio.wait_for(blocked, timeout=1.0)
+
+        assert [entry.event.event_type for entry in stream.events_after(0)] == [
+            EventType.THINKING,
+            EventType.RESULT,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_coalesce_merges_runs_and_preserves_order(self):
+        """Test merged events are flushed before the next distinct event."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.COALESCE, high_water=2)
+        await publisher.publish(_event(EventType.TOOL_CALL, n=0))
+        await publisher.publish(_event(EventType.TOOL_CALL, n=1))
+        for i in range(3):
+            await publisher.publish(_event(EventType.THINKING, content=str(i)))
+        assert publisher.stats.coalesced == 2
+        assert stream.last_seq == 2
+
+        subscription.poll()
+        await asyncio.wait_for(publisher.publish(_event(EventType.RESULT, result="done")), timeout=1.0)
+        events = [entry.event for entry in stream.events_after(0)]
+        assert [event.event_type for event in events] == [
+            EventType.TOOL_CALL,
+            EventType.TOOL_CALL,
+            EventType.THINKING,
+            EventType.RESULT,
+        ]
+        assert events[2].data["content"] == "0\n1\n2"
+
+    @pytest.mark.asyncio
+    async def test_coalesce_keeps_output_objects(self):
+        """Test consecutive non-status JSON INFO events all survive the coalesce policy."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.COALESCE, high_water=1)
+        await publisher.publish(_event(EventType.TOOL_CALL))
+        deltas = [_event(EventType.INFO, type="agent_choice", content=text) for text in ("Hel", "lo")]
+        await publisher.publish(deltas[0])  # held back while the subscriber lags
+        publishing = asyncio.create_task(publisher.publish(deltas[1]))
+        while not publishing.done():
+            subscription.poll()
+            await asyncio.sleep(0.001)
+        subscription.poll()
+        await asyncio.wait_for(publisher.flush(), timeout=1.0)
+
+        events = [entry.event for entry in stream.events_after(0)]
+        assert [event.data.get("content") for event in events[1:]] == ["Hel", "lo"]
+        assert publisher.stats.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_publishes_pending(self):
+        """Test flush() emits an event still held back at the end of a run."""
+        stream = EventStream()
+        stream.subscribe(last_seq=0)
+        publisher = BackpressuredPublisher(stream, OverflowPolicy.COALESCE, high_water=1)
+        stream.publish(_event(EventType.INFO))
+        await publisher.publish(_event(EventType.THINKING, content="late"))
+        assert stream.last_seq == 1
+
+        stream.close()
+        await publisher.flush()
+        assert stream.last_seq == 1
+
+    def test_unknown_policy_rejected(self):
+        """Test invalid policies fail fast."""
+        with pytest.raises(ValueError):
+            BackpressuredPublisher(EventStream(), policy="spill")
+
+
+class TestPipelineStats:
+    """Tests for high-water instrumentation."""
+
+    def test_line_queue_high_water(self):
+        """Test only the maximum observed depth is kept."""
+        stats = PipelineStats()
+        for depth in (1, 5, 3):
+            stats.observe_line_queue(depth)
+        assert stats.to_dict()["line_queue_high_water"] == 5
@@ -0,0 +1,142 @@
+"""Unit tests for cassette module and cassette replay."""
+
+import asyncio
+import json
+import sys
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from cassette import Cassette, CassetteLibrary, CassetteNotFoundError, cassette_key
+from event_parser import EventType
+from runtime import CagentRuntime, CagentRuntimeError, ReplayRuntime
+
+
+def stdin_for(user_input: str, context: dict = None) -> bytes:
+    """Build the stdin payload CagentRuntime sends for a request."""
+    return json.dumps({"input": user_input, "context": context or {}}).encode("utf-8")
+
+
+class TestCassette:
+    """Tests for the cassette file format."""
+
+    def test_key_ignores_context_key_order(self):
+        """Test identical requests map to the same cassette."""
+        a = json.dumps({"input": "hi", "context": {"a": 1, "b": 2}}).encode()
+        b = json.dumps({"context": {"b": 2, "a": 1}, "input": "hi"}).encode()
+        assert cassette_key("orchestrator", a) == cassette_key("orchestrator", b)
+        assert cassette_key("orchestrator", a) != cassette_key("extraction", a)
+
+    def test_save_load_roundtrip(self, tmp_path):
+        """Test chunks, including non-UTF-8 ones, survive a round trip."""
+        cassette = Cassette(
+            agent_id="orchestrator",
+            stdin=stdin_for("hello"),
+            chunks=[(0.0, "stdout", b'{"thinking": "hm"}\n'), (0.25, "stderr", b"\xff\xfe warn\n")],
+            exit_code=3,
+            duration=0.5,
+        )
+        path = cassette.save(tmp_path)
+        loaded = Cassette.load(path)
+
+        assert path.name == cassette.filename()
+        assert loaded.chunks == cassette.chunks
+        assert loaded.exit_code == 3
+        assert loaded.duration == 0.5
+        assert loaded.key == cassette.key
+
+    def test_library_missing_cassette(self, tmp_path):
+        """Test looking up an unrecorded request raises."""
+        with pytest.raises(CassetteNotFoundError):
+            CassetteLibrary(str(tmp_path)).find("orchestrator", stdin_for("nope"))
+
+
+class TestRecordReplay:
+    """Tests for recording executions and replaying them offline."""
+
+    @pytest.mark.asyncio
+    async def test_recorded_run_replays_identically(self, tmp_path):
+        """Test replay yields the events of the recorded execution without cagent."""
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        cassettes = tmp_path / "cassettes"
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml), resource_sample_interval=0)
+        recorder = runtime.enable_recording(str(cassettes))
+
+        script = (
+            "import json, sys, time\n"
+            "request = json.loads(sys.stdin.read())\n"
+            "print(json.dumps({'thinking': 'about ' + request['input']}), flush=True)\n"
+            "time.sleep(0.1)\n"
+            "print('warning: slow', file=sys.stderr, flush=True)\n"
+            "print(json.dumps({'result': 'done'}), flush=True)\n"
+        )
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            recorded = [e async for e in runtime.execute_agent("orchestrator", "photos")]
+        assert recorder.recorded == 1
+
+        with patch("subprocess.run", side_effect=FileNotFoundError("cagent")):
+            replay = ReplayRuntime(str(cassettes), speed=0)
+        started = time.monotonic()
+        replayed = [e async for e in replay.execute_agent("orchestrator", "photos")]
+
+        assert time.monotonic() - started < 0.1
+
+        # stdout and stderr are read concurrently, so only per-stream order is fixed
+        def by_type(events):
+            return sorted((e.event_type.value, json.dumps(e.data)) for e in events)
+
+        assert by_type(replayed) == by_type(recorded)
+        assert {e.event_type for e in replayed} == {EventType.INFO, EventType.ERROR, EventType.RESULT}
+
+    @pytest.mark.asyncio
+    async def test_replay_honors_speed(self, tmp_path):
+        """Test playback waits for recorded offsets divided by speed."""
+        Cassette(
+            agent_id="orchestrator",
+            stdin=stdin_for("slow"),
+            chunks=[(0.0, "stdout", b'{"thinking": "a"}\n'), (0.4, "stdout", b'{"result": "b"}\n')],
+            duration=0.4,
+        ).save(tmp_path)
+        replay = ReplayRuntime(str(tmp_path), speed=4.0)
+
+        started = time.monotonic()
+        events = [e async for e in replay.execute_agent("orchestrator", "slow")]
+
+        assert 0.09 <= time.monotonic() - started < 0.4
+        assert [e.event_type for e in events] == [EventType.INFO, EventType.RESULT]
+
+    @pytest.mark.asyncio
+    async def test_replay_without_cassette_reports_error(self, tmp_path):
+        """Test an unrecorded request ends with an error event."""
+        replay = ReplayRuntime(str(tmp_path), speed=0)
+        events = [e async for e in replay.execute_agent("orchestrator", "unknown")]
+
+        assert events[-1].event_type == EventType.ERROR
+        assert "No cassette" in events[-1].data["error"]
+
+    @pytest.mark.asyncio
+    async def test_replay_timeout_stops_playback(self, tmp_path):
+        """Test the execution timeout stops a replay like it kills a process."""
+        Cassette(
+            agent_id="orchestrator",
+            stdin=stdin_for("hang"),
+            chunks=[(5.0, "stdout", b'{"result": "late"}\n')],
+            duration=5.0,
+        ).save(tmp_path)
+        replay = ReplayRuntime(str(tmp_path), speed=1.0)
+
+        events = [e async for e in replay.execute_agent("orchestrator", "hang", timeout=0.1)]
+
+        assert events[-1].event_type == EventType.ERROR
+        assert "timeout" in events[-1].data["error"].lower()
+        assert not replay.active_processes
+        await asyncio.sleep(0)
+        assert all(proc.returncode is not None for proc in replay.replays.values())
+
+    def test_replay_requires_cassette_dir(self, tmp_path):
+        """Test a missing cassette directory fails like a missing cagent binary."""
+        with pytest.raises(CagentRuntimeError, match="Cassette directory"):
+            ReplayRuntime(str(tmp_path / "missing"))
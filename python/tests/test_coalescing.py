@@ -0,0 +1,205 @@
+"""Unit tests for coalescing module."""
+
+import asyncio
+import time
+import pytest
+
+from coalescing import CoalescingStats, EventCoalescer
+from event_parser import CagentEvent, EventType, ThinkingEvent
+
+
+def _event(event_type: str, **data) -> CagentEvent:
+    return CagentEvent(event_type=event_type, data=data, timestamp=time.time())
+
+
+async def _source(*items, delays=None):
+    for i, item in enumerate(items):
+        if delays and delays.get(i):
+            await asyncio.sleep(delays[i])
+        yield item
+
+
+async def _collect(coalescer, source):
+    return [event async for event in coalescer.coalesce(source)]
+
+
+class TestEventCoalescer:
+    """Tests for windowed merging of thinking/info runs."""
+
+    @pytest.mark.asyncio
+    async def test_merges_runs_between_boundaries(self):
+        """Test thinking runs merge while tool calls and results stay in place."""
+        coalescer = EventCoalescer(window=10.0)
+        source = _source(
+            _event(EventType.THINKING, content="a"),
+            _event(EventType.THINKING, content="b"),
+            _event(EventType.THINKING, content="c"),
+            _event(EventType.TOOL_CALL, content="search"),
+            _event(EventType.THINKING, content="d"),
+            _event(EventType.RESULT, result="done"),
+        )
+
+        events = await _collect(coalescer, source)
+
+        assert [(e.event_type, e.data) for e in events] == [
+            (EventType.THINKING, {"content": "a\nb\nc", "coalesced": 3}),
+            (EventType.TOOL_CALL, {"content": "search"}),
+            (EventType.THINKING, {"content": "d"}),
+            (EventType.RESULT, {"result": "done"}),
+        ]
+        assert coalescer.stats.to_dict()["merge_ratio"] == 1.5
+
+    @pytest.mark.asyncio
+    async def test_reasoning_deltas_joined_without_separator(self):
+        """Test streamed reasoning tokens are concatenated as they are."""
+        coalescer = EventCoalescer(window=10.0)
+        tokens = [
+            ThinkingEvent({"type": "agent_choice_reasoning", "content": token}, 1.0, seq)
+            for seq, token in enumerate(["Look", "ing", " at"])
+        ]
+
+        events = await _collect(coalescer, _source(*tokens))
+
+        assert len(events) == 1
+        assert isinstance(events[0], ThinkingEvent)
+        assert events[0].content == "Looking at"
+        assert events[0].seq == 2
+
+    @pytest.mark.asyncio
+    async def test_only_plain_info_lines_merge(self):
+        """Test structured INFO objects and other branches end a run."""
+        coalescer = EventCoalescer(window=10.0)
+        source = _source(
+            _event(EventType.INFO, message="one", branch="a"),
+            _event(EventType.INFO, message="two", branch="a"),
+            _event(EventType.INFO, message="three", branch="b"),
+            _event(EventType.INFO, tool_result=[1, 2]),
+            _event(EventType.INFO, tool_result=[3]),
+        )
+
+        events = await _collect(coalescer, source)
+
+        assert [e.data for e in events] == [
+            {"message": "one\ntwo", "branch": "a", "coalesced": 2},
+            {"message": "three", "branch": "b"},
+            {"tool_result": [1, 2]},
+            {"tool_result": [3]},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_structured_info_with_message_passes_through(self):
+        """Test status objects that carry a message are not merged as lines."""
+        coalescer = EventCoalescer(window=10.0)
+        source = _source(
+            _event(EventType.INFO, message="indexing", progress=1),
+            _event(EventType.INFO, message="indexing", progress=2),
+        )
+
+        events = await _collect(coalescer, source)
+
+        assert [e.data for e in events] == [
+            {"message": "indexing", "progress": 1},
+            {"message": "indexing", "progress": 2},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_emits_early(self):
+        """Test a run is emitted once its text reaches max_bytes."""
+        coalescer = EventCoalescer(window=10.0, max_bytes=6)
+        source = _source(*[_event(EventType.THINKING, content="abc") for _ in range(5)])
+
+        events = await _collect(coalescer, source)
+
+        assert [e.data["content"] for e in events] == ["abc\nabc", "abc\nabc", "abc"]
+        assert coalescer.stats.budget_flushes == 2
+
+    @pytest.mark.asyncio
+    async def test_window_flushes_while_source_is_quiet(self):
+        """Test a held run is emitted when the window closes, not at the next event."""
+        coalescer = EventCoalescer(window=0.02)
+        source = _source(
+            _event(EventType.THINKING, content="early"),
+            _event(EventType.RESULT, result="done"),
+            delays={1: 0.3},
+        )
+
+        received = []
+        started = time.monotonic()
+        async for event in coalescer.coalesce(source):
+            received.append((event.event_type, time.monotonic() - started))
+
+        assert [event_type for event_type, _ in received] == [EventType.THINKING, EventType.RESULT]
+        assert received[0][1] < 0.2
+        assert coalescer.stats.window_flushes == 1
+
+    @pytest.mark.asyncio
+    async def test_closing_closes_source(self):
+        """Test abandoning the coalesced stream finalizes the source generator."""
+        closed = []
+
+        async def source():
+            try:
+                yield _event(EventType.THINKING, content="a")
+                await asyncio.sleep(10)
+                yield _event(EventType.RESULT, result="late")
+            finally:
+                closed.append(True)
+
+        totals = CoalescingStats()
+        events = EventCoalescer(window=0.01, totals=totals).coalesce(source())
+        assert (await events.__anext__()).data == {"content": "a"}
+        await events.aclose()
+
+        assert closed == [True]
+        assert totals.events_in == totals.events_out == 1
+
+    @pytest.mark.asyncio
+    async def test_source_error_propagates_after_held_run(self):
+        """Test a failing source still delivers the held run, then raises."""
+
+        async def source():
+            yield _event(EventType.THINKING, content="a")
+            raise RuntimeError("boom")
+
+        received = []
+        with pytest.raises(RuntimeError, match="boom"):
+            async for event in EventCoalescer(window=10.0).coalesce(source()):
+                received.append(event.data)
+
+        assert received == [{"content": "a"}]
+
+    @pytest.mark.asyncio
+    async def test_read_ahead_is_bounded(self):
+        """Test the source is paused once max_pending events are queued."""
+        produced = []
+
+        async def source():
+            for i in range(10):
+                produced.append(i)
+                yield _event(EventType.RESULT, result=i)
+
+        events = EventCoalescer(window=10.0, max_pending=3).coalesce(source())
+        await events.__anext__()
+        await asyncio.sleep(0)
+
+        assert len(produced) <= 4
+        assert len([e async for e in events]) == 9
+
+    @pytest.mark.asyncio
+    async def test_read_ahead_counts_downstream_backlog(self):
+        """Test events waiting downstream use up the read-ahead."""
+        produced = []
+        backlog = 3
+
+        async def source():
+            for i in range(10):
+                produced.append(i)
+                yield _event(EventType.RESULT, result=i)
+
+        events = EventCoalescer(window=10.0, max_pending=4, backlog=lambda: backlog).coalesce(source())
+        await events.__anext__()
+        await asyncio.sleep(0)
+
+        assert len(produced) <= 2
+        backlog = 0
+        assert len([e async for e in events]) == 9
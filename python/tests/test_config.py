@@ -28,6 +28,15 @@ class TestSettingsDefaults:
             settings = Settings()
             assert settings.LOG_LEVEL == "INFO"
 
+    def test_journal_defaults_to_app_data_file(self):
+        """Test the journal is a SQLite file under the app data directory unless overridden."""
+        with patch.dict(os.environ, {"APP_DATA_DIR": "/data/app"}, clear=True):
+            settings = Settings()
+            assert settings.JOURNAL_DB_PATH == os.path.join("/data/app", "journal.db")
+            assert settings.JOURNAL_MAX_EVENT_RUNS == 50
+        with patch.dict(os.environ, {"JOURNAL_DB_PATH": ":memory:"}, clear=True):
+            assert Settings().JOURNAL_DB_PATH == ":memory:"
+
 
 class TestSettingsEnvironmentOverrides:
     """Tests for environment variable overrides."""
@@ -96,6 +105,12 @@ class TestSettingsValidation:
             with pytest.raises(ValidationError):
                 Settings()
 
+    def test_invalid_slow_subscriber_policy_raises_error(self):
+        """Test an unknown slow-subscriber policy is rejected at startup."""
+        with patch.dict(os.environ, {"STREAM_SLOW_SUBSCRIBER_POLICY": "dorp"}):
+            with pytest.raises(ValidationError):
+                Settings()
+
     def test_host_type_validation(self):
         """Test HOST is string."""
         with patch.dict(os.environ, {}, clear=True):
@@ -0,0 +1,120 @@
+"""Unit tests for event_codec module."""
+
+import json
+import pytest
+from unittest.mock import patch
+
+import event_codec
+from event_codec import get_backend, sse_frame
+from event_parser import CagentEvent, EventType, ToolResultEvent
+from event_stream import EventStream
+
+
+@pytest.fixture(params=sorted(event_codec.BACKENDS))
+def backend(request):
+    """Every installed JSON backend, restoring the active one afterwards."""
+    previous = event_codec.backend_name()
+    yield event_codec.set_backend(request.param)
+    event_codec.set_backend(previous)
+
+
+class TestJsonBackends:
+    """Tests for the pluggable JSON encoders."""
+
+    def test_backends_encode_identically(self, backend):
+        """Test every backend yields the same compact UTF-8 JSON."""
+        event = CagentEvent(EventType.THINKING, {"content": "caffè", "n": [1, 2]}, 1.5)
+
+        encoded = event.to_json()
+
+        assert encoded == '{"event_type":"thinking","data":{"content":"caffè","n":[1,2]},"timestamp":1.5}'.encode("utf-8")
+        assert json.loads(encoded) == event.to_dict()
+
+    def test_non_string_keys_are_stringified(self, backend):
+        """Test int keys encode as with the json module."""
+        assert json.loads(event_codec.dumps({1: "a"})) == {"1": "a"}
+
+    def test_auto_prefers_orjson(self):
+        """Test auto selects orjson only when it is installed."""
+        expected = "orjson" if "orjson" in event_codec.BACKENDS else "json"
+        assert get_backend("auto").name == expected
+
+    def test_unknown_backend_rejected(self):
+        """Test a misspelled backend name is an error."""
+        with pytest.raises(ValueError):
+            get_backend("simplejson")
+
+
+class TestSseFrame:
+    """Tests for SSE frame construction."""
+
+    def test_frame_fields(self):
+        """Test a frame carries id, event name and data, terminated by a blank line."""
+        frame = sse_frame(EventType.RESULT, b'{"result":"done"}', seq=7)
+
+        assert frame == b'id: 7\r\nevent: result\r\ndata: {"result":"done"}\r\n\r\n'
+
+    def test_frame_without_id(self):
+        """Test control frames omit the id field."""
+        assert sse_frame("keepalive", b"{}") == b"event: keepalive\r\ndata: {}\r\n\r\n"
+
+
+class TestSlottedEvent:
+    """Tests for the __slots__ CagentEvent."""
+
+    def test_no_instance_dict(self):
+        """Test events carry no per-instance __dict__."""
+        event = CagentEvent(EventType.INFO, {}, 0.0)
+        assert not hasattr(event, "__dict__")
+
+    def test_to_dict_is_shallow(self):
+        """Test to_dict shares the data dict instead of deep-copying it."""
+        data = {"nested": {"big": "x" * 10}}
+        event = CagentEvent(EventType.TOOL_RESULT, data, 0.0)
+        assert event.to_dict()["data"] is data
+
+
+class TestRawPayloadEvents:
+    """Tests for serializing typed events that still hold raw bytes."""
+
+    RAW = b'{"type":"tool_call_response","response":"caff\xc3\xa8 \\"ok\\""}'
+
+    def test_raw_bytes_passed_through(self, backend):
+        """Test to_json splices the raw object in without decoding it."""
+        event = ToolResultEvent(None, 1.5, seq=3, raw=self.RAW)
+
+        encoded = event.to_json()
+
+        assert encoded == b'{"event_type":"tool_result","data":' + self.RAW + b',"timestamp":1.5,"seq":3}'
+        assert event.raw is not None
+        assert json.loads(encoded)["data"] == json.loads(self.RAW)
+
+    def test_raw_bytes_validated_once(self):
+        """Test only the first to_json decodes the raw bytes to check them."""
+        event = ToolResultEvent(None, 1.5, raw=self.RAW)
+
+        with patch.object(event_codec, "loads", wraps=event_codec.loads) as loads:
+            first = event.to_json()
+            second = event.to_json()
+
+        assert loads.call_count == 1
+        assert first == second
+        assert event.raw is not None
+
+    def test_changed_data_is_reencoded(self):
+        """Test a consumer's change to data wins over the raw bytes."""
+        event = ToolResultEvent(None, 1.5, raw=self.RAW)
+        event.data["branch"] = "a"
+
+        assert json.loads(event.to_json())["data"]["branch"] == "a"
+
+    def test_publish_keeps_payload_raw(self):
+        """Test publishing to a stream frames the raw bytes without decoding."""
+        stream = EventStream()
+        event = ToolResultEvent(None, 1.5, raw=self.RAW)
+
+        seq = stream.publish(event)
+
+        entry = stream.events_after(seq - 1)[0]
+        assert self.RAW in entry.frame
+        assert event.raw is not None
@@ -2,7 +2,7 @@
 
 import json
 import pytest
-from event_parser import EventParser, EventType, CagentEvent
+from event_parser import EventParser, EventType, CagentEvent, ThinkingEvent, ToolCallEvent, ToolResultEvent
 
 
 @pytest.fixture
@@ -139,6 +139,13 @@ class TestEventParserJSON:
         assert event is not None
         assert event.event_type == EventType.THINKING
 
+    def test_parse_object_matches_parse_line(self, parser):
+        """Test already-decoded objects map to the same events as JSON lines."""
+        event = parser.parse_object({"result": "done"}, timestamp=1.0)
+        assert event.event_type == EventType.RESULT
+        assert event.data == {"result": "done"}
+        assert event.timestamp == 1.0
+
 
 class TestEventParserStderr:
     """Tests for stderr handling."""
@@ -338,7 +345,7 @@ class TestEventParserEdgeCases:
     def test_buffer_field_exists(self, parser):
         """Test that parser has buffer field for potential buffering."""
         assert hasattr(parser, 'buffer')
-        assert parser.buffer == ""
+        assert parser.buffer == b""
 
 
 class TestEventParserPatternPriority:
@@ -368,6 +375,260 @@ class TestEventParserPatternPriority:
         # With json_mode=False, should fall to INFO for valid JSON string
         assert event.event_type == EventType.INFO
 
+    def test_priority_independent_of_position(self, parser):
+        """Test a higher-priority marker wins even when it appears later."""
+        event = parser.parse_line("Error: retrying [THINKING] next step")
+        assert event.event_type == EventType.THINKING
+        assert event.data["content"] == "next step"
+
+    def test_content_follows_last_marker_of_kind(self, parser):
+        """Test content is the text after the last marker of the chosen kind."""
+        event = parser.parse_line("[TOOL] search Calling tool: fetch")
+        assert event.event_type == EventType.TOOL_CALL
+        assert event.data["content"] == "fetch"
+
+    def test_tool_result_not_mistaken_for_tool_call(self, parser):
+        """Test "[TOOL RESULT]" is not read as a "[TOOL]" marker."""
+        event = parser.parse_line("[TOOL RESULT] 3 photos")
+        assert event.event_type == EventType.TOOL_RESULT
+        assert event.data["content"] == "3 photos"
+
+    def test_non_ascii_line_classified_like_ascii(self, parser):
+        """Test lines with non-ASCII text follow the same priority rules."""
+        event = parser.parse_line("Erreur: échec — Thinking: réessayer")
+        assert event.event_type == EventType.THINKING
+        assert event.data["content"] == "réessayer"
+
+
+class TestEventParserJsonSniffing:
+    """Tests for skipping the JSON attempt on lines that cannot be objects."""
+
+    def test_non_object_lines_skip_json(self, parser, monkeypatch):
+        """Test json.loads only runs for lines starting with "{"."""
+        calls = []
+        real_loads = json.loads
+        monkeypatch.setattr("event_parser.json.loads", lambda s: calls.append(s) or real_loads(s))
+
+        parser.parse_line("Thinking: plain text")
+        parser.parse_line('["not", "an", "object"]')
+        assert calls == []
+
+        event = parser.parse_line('  {"result": "ok"}')
+        assert calls == ['  {"result": "ok"}']
+        assert event.event_type == EventType.RESULT
+
+    def test_bytes_object_line(self, parser):
+        """Test a JSON object given as bytes is parsed."""
+        event = parser.parse_line(b'{"error": "boom"}')
+        assert event.event_type == EventType.ERROR
+        assert event.data["error"] == "boom"
+
+
+class TestEventParserChunks:
+    """Tests for parsing raw output chunks with parse_chunk."""
+
+    def test_partial_line_carried_to_next_chunk(self, parser):
+        """Test a line split across chunks is parsed once it is complete."""
+        assert parser.parse_chunk(b'[THINKING] first\n{"res') == [
+            CagentEvent(EventType.THINKING, {"content": "first"}, parser._last_timestamp, seq=0)
+        ]
+        assert parser.buffer == b'{"res'
+
+        assert parser.parse_chunk(b'ult": ') == []
+        events = parser.parse_chunk(b'"done"}\r\nplain\n')
+
+        assert [(e.event_type, e.data) for e in events] == [
+            (EventType.RESULT, {"result": "done"}),
+            (EventType.INFO, {"message": "plain"}),
+        ]
+        assert parser.buffer == b""
+
+    def test_chunk_shares_timestamp_and_numbers_events(self, parser, monkeypatch):
+        """Test events of a chunk share one timestamp and get consecutive seq."""
+        clock = iter([100.0, 99.0])
+        monkeypatch.setattr("event_parser.time.time", lambda: next(clock))
+
+        first = parser.parse_chunk(b"a\n\nb\n")
+        second = parser.parse_chunk(b"c\n")
+
+        assert [(e.timestamp, e.seq) for e in first] == [(100.0, 0), (100.0, 1)]
+        # The clock stepped back; chunk timestamps do not
+        assert [(e.timestamp, e.seq) for e in second] == [(100.0, 2)]
+        assert second[0].to_dict()["seq"] == 2
+
+    def test_final_flushes_unterminated_line(self, parser):
+        """Test the last line without a newline is parsed at end of stream."""
+        assert parser.parse_chunk(b"Error: boom") == []
+        events = parser.parse_chunk(b"", final=True)
+
+        assert [(e.event_type, e.data) for e in events] == [(EventType.ERROR, {"error": "Error: boom"})]
+        assert parser.buffer == b""
+
+    def test_multibyte_character_split_across_chunks(self, parser):
+        """Test UTF-8 sequences cut by a chunk boundary decode intact."""
+        line = "Thinking: caffè\n".encode("utf-8")
+        cut = line.index(b"\xa8")
+
+        assert parser.parse_chunk(line[:cut]) == []
+        events = parser.parse_chunk(line[cut:])
+        assert events[0].data == {"content": "caffè"}
+
+    def test_matches_line_parsing(self, parser):
+        """Test chunked parsing yields the same events as parse_line."""
+        output = b'[TOOL] search\n{"error": "x"}\n[1, 2]\nOutput: done\n'
+        expected = [parser.parse_line(line) for line in output.splitlines()]
+
+        events = []
+        for i in range(0, len(output), 7):
+            events += parser.parse_chunk(output[i:i + 7])
+
+        assert [(e.event_type, e.data) for e in events] == [(e.event_type, e.data) for e in expected]
+
+
+class TestEventParserMultilineJson:
+    """Tests for assembling JSON objects spread over several lines."""
+
+    @staticmethod
+    def feed(parser, lines):
+        events = []
+        for line in lines:
+            events += parser.feed_line(line)
+        return events + parser.flush()
+
+    def test_pretty_printed_object_is_one_event(self, parser):
+        """Test an indented object becomes a single event with intact data."""
+        obj = {"tool_result": [{"uuid": str(i), "name": "a \\\"quoted\\\" {brace}"} for i in range(20)]}
+
+        events = self.feed(parser, json.dumps(obj, indent=2).splitlines())
+
+        assert len(events) == 1
+        assert events[0].event_type == EventType.INFO
+        assert events[0].data == obj
+
+    def test_line_wrapped_inside_string(self, parser):
+        """Test a long line hard-wrapped mid-string is rejoined without separators."""
+        line = json.dumps({"result": "x" * 50 + "\\" + "y" * 50})
+        pieces = [line[i:i + 10] for i in range(0, len(line), 10)]
+
+        events = self.feed(parser, pieces)
+
+        assert [(e.event_type, e.data) for e in events] == [(EventType.RESULT, json.loads(line))]
+
+    def test_text_after_open_brace_falls_back(self, parser):
+        """Test lines are parsed one by one once they cannot be JSON."""
+        events = self.feed(parser, ["{", "Thinking: not json", "Output: done"])
+
+        assert [e.event_type for e in events] == [EventType.INFO, EventType.THINKING, EventType.RESULT]
+
+    def test_unfinished_object_flushed_as_text(self, parser):
+        """Test an object still open at end of stream is parsed as text lines."""
+        events = self.feed(parser, ['{"result":', '  "partial"'])
+
+        assert [e.data for e in events] == [{"message": '{"result":'}, {"message": '"partial"'}]
+
+    def test_oversized_object_falls_back_to_lines(self):
+        """Test objects above max_object_bytes are parsed line by line."""
+        parser = EventParser(max_object_bytes=64)
+        lines = json.dumps({"photos": list(range(40))}, indent=1).splitlines()
+
+        events = self.feed(parser, lines + ['{"result": "next"}'])
+
+        assert len(events) == len(lines) + 1
+        assert events[-1].event_type == EventType.RESULT
+        assert not parser.framer.active
+
+    def test_chunks_assemble_objects(self, parser):
+        """Test parse_chunk assembles objects across chunk and line boundaries."""
+        obj = {"result": {"photos": [1, 2, 3]}}
+        output = json.dumps(obj, indent=2).encode() + b"\n[THINKING] next\n"
+
+        events = []
+        for i in range(0, len(output), 5):
+            events += parser.parse_chunk(output[i:i + 5])
+
+        assert [(e.event_type, e.seq) for e in events] == [(EventType.RESULT, 0), (EventType.THINKING, 1)]
+        assert events[0].data == obj
+
+
+class TestTypedJsonEvents:
+    """Tests for mapping cagent JSON kinds onto typed events."""
+
+    def test_kinds_map_to_typed_events(self, parser):
+        """Test known "type" values produce typed events carrying the object."""
+        call = {"type": "tool_call", "tool_call": {"function": {"name": "search", "arguments": "{}"}}}
+        reasoning = {"type": "agent_choice_reasoning", "content": "look at albums"}
+        response = {"type": "tool_call_response", "response": "3 photos"}
+
+        events = [parser.parse_line(json.dumps(obj)) for obj in (call, reasoning, response)]
+
+        assert [type(e) for e in events] == [ToolCallEvent, ThinkingEvent, ToolResultEvent]
+        assert [e.event_type for e in events] == [EventType.TOOL_CALL, EventType.THINKING, EventType.TOOL_RESULT]
+        assert (events[0].name, events[0].arguments) == ("search", "{}")
+        assert events[1].content == "look at albums"
+        assert events[2].response == "3 photos"
+        assert events[2].data == response
+
+    @pytest.mark.parametrize("lazy_payload_bytes", [16 * 1024, 1])
+    def test_result_and_error_keys_win_over_kind(self, lazy_payload_bytes):
+        """Test a result or error key keeps priority over a known kind, also for raw payloads."""
+        parser = EventParser(lazy_payload_bytes=lazy_payload_bytes)
+        result = parser.parse_line(json.dumps({"type": "tool_result", "result": "done"}).encode())
+        error = parser.parse_line(json.dumps({"type": "tool_call", "error": "denied"}).encode())
+
+        assert (result.event_type, result.data) == (EventType.RESULT, {"result": "done"})
+        assert (error.event_type, error.data) == (EventType.ERROR, {"error": "denied"})
+
+    def test_outcome_words_in_values_keep_payload_raw(self):
+        """Test only result/error keys, not the words inside strings, force a decode."""
+        parser = EventParser(lazy_payload_bytes=16)
+        in_text = parser.parse_line(json.dumps({"type": "tool_result", "content": 'no "error": found'}).encode())
+        nested = parser.parse_line(json.dumps({"type": "tool_result", "content": {"error": "x"}}).encode())
+
+        assert isinstance(in_text, ToolResultEvent) and in_text.raw is not None
+        # Nested keys take the decode path but keep the kind
+        assert isinstance(nested, ToolResultEvent) and nested.raw is None
+
+    def test_malformed_raw_payload_is_not_spliced(self):
+        """Test a truncated object typed from its prefix is encoded as an INFO message."""
+        parser = EventParser(lazy_payload_bytes=16)
+        line = b'{"type": "tool_result", "content": ["a", "b}'
+
+        event = parser.parse_line(line)
+        encoded = event.to_json()
+
+        assert isinstance(event, ToolResultEvent) and event.raw is None
+        assert json.loads(encoded)["event_type"] == EventType.INFO
+        assert json.loads(encoded)["data"] == {"message": line.decode()}
+
+    def test_unknown_kind_stays_info(self, parser):
+        """Test objects of other kinds keep the generic handling."""
+        event = parser.parse_line(json.dumps({"type": "stream_started"}))
+        assert type(event) is CagentEvent
+        assert event.event_type == EventType.INFO
+
+    def test_large_payload_decoded_on_first_read(self):
+        """Test large typed objects stay raw bytes until data is read."""
+        parser = EventParser(lazy_payload_bytes=64)
+        obj = {"type": "tool_result", "content": ["photo"] * 50}
+        line = json.dumps(obj).encode()
+
+        event = parser.parse_line(line)
+
+        assert isinstance(event, ToolResultEvent)
+        assert event.raw == line
+        assert event.response == obj["content"]
+        assert event.raw is None
+
+    def test_large_payload_without_leading_type_is_decoded(self):
+        """Test objects whose first key is not "type" are decoded up front."""
+        parser = EventParser(lazy_payload_bytes=64)
+        line = json.dumps({"content": ["photo"] * 50, "type": "tool_result"}).encode()
+
+        event = parser.parse_line(line)
+
+        assert isinstance(event, ToolResultEvent)
+        assert event.raw is None
+
 
 class TestEventParserConcurrency:
     """Tests for concurrent parsing scenarios."""
@@ -0,0 +1,355 @@
+"""Unit tests for event_stream module."""
+
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch
+
+from event_parser import CagentEvent, EventType
+from event_stream import (
+    EventStream,
+    SlowSubscriberPolicy,
+    StreamMultiplexer,
+    parse_last_event_id,
+)
+
+
+def _event(content: str, event_type: str = EventType.THINKING) -> CagentEvent:
+    return CagentEvent(event_type=event_type, data={"content": content}, timestamp=time.time())
+
+
+class TestEventStreamReplay:
+    """Tests for sequence numbering and tail replay."""
+
+    def test_publish_assigns_increasing_sequence_numbers(self):
+        """Test events are numbered from 1 in publish order."""
+        stream = EventStream()
+        assert stream.publish(_event("a")) == 1
+        assert stream.publish(_event("b")) == 2
+        assert stream.last_seq == 2
+
+    def test_events_after_returns_missing_tail(self):
+        """Test replay only returns events after the given id."""
+        stream = EventStream()
+        for i in range(5):
+            stream.publish(_event(str(i)))
+
+        tail = stream.events_after(3)
+        assert [entry.seq for entry in tail] == [4, 5]
+        assert tail[0].event.data["content"] == "3"
+
+    def test_events_after_is_not_destructive(self):
+        """Test two readers can replay the same events."""
+        stream = EventStream()
+        stream.publish(_event("a"))
+        assert len(stream.events_after(0)) == 1
+        assert len(stream.events_after(0)) == 1
+
+    def test_events_after_up_to_date_cursor(self):
+        """Test replay is empty when the reader is caught up."""
+        stream = EventStream()
+        stream.publish(_event("a"))
+        assert stream.events_after(1) == []
+        assert stream.events_after(10) == []
+
+    def test_publish_after_close_fails(self):
+        """Test closed streams reject new events."""
+        stream = EventStream()
+        stream.close()
+        with pytest.raises(RuntimeError):
+            stream.publish(_event("late"))
+
+
+class TestEventStreamEviction:
+    """Tests for size and age based eviction."""
+
+    def test_eviction_by_size(self):
+        """Test oldest events are dropped beyond max_events."""
+        stream = EventStream(max_events=3)
+        for i in range(5):
+            stream.publish(_event(str(i)))
+
+        assert len(stream) == 3
+        assert stream.first_seq == 3
+        assert [entry.seq for entry in stream.events_after(0)] == [3, 4, 5]
+
+    def test_eviction_by_age(self):
+        """Test events older than max_age are dropped."""
+        stream = EventStream(max_age=10.0)
+        with patch("event_stream.time.monotonic", return_value=100.0):
+            stream.publish(_event("old"))
+        with patch("event_stream.time.monotonic", return_value=105.0):
+            stream.publish(_event("new"))
+        with patch("event_stream.time.monotonic", return_value=112.0):
+            tail = stream.events_after(0)
+
+        assert [entry.event.data["content"] for entry in tail] == ["new"]
+
+    def test_has_gap_after_eviction(self):
+        """Test gap detection when a resume point was evicted."""
+        stream = EventStream(max_events=2)
+        for i in range(5):
+            stream.publish(_event(str(i)))
+
+        assert stream.has_gap(1)
+        assert not stream.has_gap(3)
+        assert not stream.has_gap(5)
+
+
+class TestEventStreamWaiting:
+    """Tests for reader wakeups."""
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_on_publish(self):
+        """Test waiting readers wake up when an event is published."""
+        stream = EventStream()
+        waiter = asyncio.create_task(stream.wait_for_events(0))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        stream.publish(_event("a"))
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_all_readers(self):
+        """Test every waiting reader is woken, not just the first."""
+        stream = EventStream()
+        waiters = [asyncio.create_task(stream.wait_for_events(0)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        stream.publish(_event("a"))
+        await asyncio.wait_for(asyncio.gather(*waiters), timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_on_close(self):
+        """Test waiting readers wake up when the stream closes."""
+        stream = EventStream()
+        waiter = asyncio.create_task(stream.wait_for_events(0))
+        await asyncio.sleep(0)
+
+        stream.close()
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+
+class TestSubscriptions:
+    """Tests for multi-subscriber fan-out."""
+
+    def test_payload_serialized_once_and_shared(self):
+        """Test every subscriber receives the same pre-encoded payload."""
+        stream = EventStream()
+        first = stream.subscribe()
+        second = stream.subscribe()
+        stream.publish(_event("shared"))
+
+        _, first_entries = first.poll()
+        _, second_entries = second.poll()
+        assert first_entries[0].payload is second_entries[0].payload
+        assert b'"shared"' in first_entries[0].payload
+        assert first_entries[0].frame is second_entries[0].frame
+
+    def test_subscribers_do_not_steal_events(self):
+        """Test each subscriber sees every event independently."""
+        stream = EventStream()
+        first = stream.subscribe()
+        second = stream.subscribe()
+        for i in range(3):
+            stream.publish(_event(str(i)))
+
+        assert [entry.seq for entry in first.poll()[1]] == [1, 2, 3]
+        assert [entry.seq for entry in second.poll()[1]] == [1, 2, 3]
+        assert first.poll() == (0, [])
+
+    def test_subscriber_count_tracks_attach_and_detach(self):
+        """Test subscriber bookkeeping."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        assert stream.subscriber_count == 1
+        subscription.close()
+        subscription.close()
+        assert stream.subscriber_count == 0
+
+    def test_slow_subscriber_lags(self):
+        """Test a slow subscriber skips ahead instead of holding back the stream."""
+        stream = EventStream()
+        slow = stream.subscribe(max_lag=2)
+        for i in range(5):
+            stream.publish(_event(str(i)))
+
+        skipped, entries = slow.poll()
+        assert skipped == 3
+        assert [entry.seq for entry in entries] == [4, 5]
+        assert slow.skipped_total == 3
+
+    def test_slow_subscriber_dropped(self):
+        """Test the drop policy detaches a slow subscriber."""
+        stream = EventStream()
+        slow = stream.subscribe(max_lag=2, policy=SlowSubscriberPolicy.DROP)
+        fast = stream.subscribe(max_lag=2, policy=SlowSubscriberPolicy.DROP)
+        stream.publish(_event("a"))
+        fast.poll()
+        stream.publish(_event("b"))
+        fast.poll()
+        stream.publish(_event("c"))
+
+        assert slow.poll() == (0, [])
+        assert slow.dropped and slow.finished
+        assert stream.subscriber_count == 1
+        assert [entry.seq for entry in fast.poll()[1]] == [3]
+
+    def test_resume_gap_reported_as_skipped(self):
+        """Test resuming behind the evicted window reports the gap."""
+        stream = EventStream(max_events=2)
+        for i in range(5):
+            stream.publish(_event(str(i)))
+
+        subscription = stream.subscribe(last_seq=1)
+        skipped, entries = subscription.poll()
+        assert skipped == 2
+        assert [entry.seq for entry in entries] == [4, 5]
+
+    def test_finished_after_close_and_drain(self):
+        """Test a subscription finishes once the closed stream is drained."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        stream.publish(_event("a"))
+        stream.close()
+
+        assert not subscription.finished
+        subscription.poll()
+        assert subscription.finished
+
+    def test_on_idle_when_last_subscriber_leaves_open_stream(self):
+        """Test the idle hook fires once per transition to zero subscribers of a running stream."""
+        stream = EventStream()
+        idle = []
+        stream.on_idle = lambda: idle.append(stream.subscriber_count)
+        first = stream.subscribe()
+        second = stream.subscribe()
+
+        first.close()
+        assert idle == []
+        second.close()
+        second.close()
+        assert idle == [0]
+
+        third = stream.subscribe()
+        stream.close()
+        third.close()
+        assert idle == [0]
+
+
+class TestStreamMultiplexer:
+    """Tests for following many streams over one connection."""
+
+    @pytest.fixture
+    def streams(self):
+        return {}
+
+    @pytest.fixture
+    def multiplexer(self, streams):
+        return StreamMultiplexer(lambda request_id: streams.setdefault(request_id, EventStream()))
+
+    def test_frames_tagged_with_request_id(self, streams, multiplexer):
+        """Test events from several requests are tagged and interleaved."""
+        multiplexer.subscribe("a")
+        multiplexer.subscribe("b")
+        streams["a"].publish(_event("from a"))
+        streams["b"].publish(_event("from b"))
+
+        frames = [json.loads(frame) for frame in multiplexer.drain()]
+        events = [frame for frame in frames if frame["event"] == "thinking"]
+        assert [(frame["request_id"], frame["id"]) for frame in events] == [("a", 1), ("b", 1)]
+        assert events[0]["data"]["data"]["content"] == "from a"
+        assert [frame["event"] for frame in frames[:2]] == ["subscribed", "subscribed"]
+
+    def test_unsubscribe_stops_delivery(self, streams, multiplexer):
+        """Test unsubscribed requests no longer produce frames."""
+        multiplexer.subscribe("a")
+        multiplexer.drain()
+        multiplexer.unsubscribe("a")
+        streams["a"].publish(_event("late"))
+
+        frames = [json.loads(frame) for frame in multiplexer.drain()]
+        assert [frame["event"] for frame in frames] == ["unsubscribed"]
+        assert streams["a"].subscriber_count == 0
+
+    def test_completed_stream_is_released(self, streams, multiplexer):
+        """Test finished streams are unsubscribed after their last event."""
+        multiplexer.subscribe("a")
+        streams["a"].publish(_event("done", EventType.RESULT))
+        streams["a"].close()
+
+        frames = [json.loads(frame) for frame in multiplexer.drain()]
+        assert frames[-1]["event"] == "unsubscribed"
+        assert frames[-1]["data"] == {"reason": "completed"}
+        assert multiplexer.subscriptions == {}
+
+    def test_resume_after_last_event_id(self, streams, multiplexer):
+        """Test subscribe honours a resume point."""
+        streams["a"] = EventStream()
+        for i in range(3):
+            streams["a"].publish(_event(str(i)))
+        multiplexer.subscribe("a", last_seq=2)
+
+        ids = [json.loads(frame)["id"] for frame in multiplexer.drain()]
+        assert ids == [None, 3]
+
+    @pytest.mark.asyncio
+    async def test_single_wakeup_for_all_streams(self, streams, multiplexer):
+        """Test one waiter is woken by a publish on any followed stream."""
+        multiplexer.subscribe("a")
+        multiplexer.subscribe("b")
+        multiplexer.drain()
+        await asyncio.wait_for(multiplexer.wait(), timeout=1.0)
+
+        waiter = asyncio.create_task(multiplexer.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        streams["b"].publish(_event("wake"))
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+
+class TestParseLastEventId:
+    """Tests for Last-Event-ID parsing."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [(None, 0), ("", 0), ("7", 7), (" 12 ", 12), ("abc", 0), ("-3", 0)],
+    )
+    def test_parse_last_event_id(self, value, expected):
+        """Test header values are parsed leniently."""
+        assert parse_last_event_id(value) == expected
+
+
+class TestBacklog:
+    """Tests for subscriber backlog tracking used by backpressure."""
+
+    def test_backlog_is_slowest_subscriber_lag(self):
+        """Test backlog follows the subscriber furthest behind."""
+        stream = EventStream()
+        assert stream.backlog == 0
+        fast = stream.subscribe()
+        slow = stream.subscribe()
+        for i in range(3):
+            stream.publish(_event(str(i)))
+        fast.poll()
+
+        assert stream.backlog == 3
+        slow.close()
+        assert stream.backlog == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_capacity_wakes_on_poll(self):
+        """Test producers waiting for capacity resume once a subscriber reads."""
+        stream = EventStream()
+        subscription = stream.subscribe()
+        stream.publish(_event("a"))
+
+        waiter = asyncio.create_task(stream.wait_for_capacity(1))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        subscription.poll()
+        await asyncio.wait_for(waiter, timeout=1.0)
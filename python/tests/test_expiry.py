@@ -0,0 +1,95 @@
+"""Unit tests for expiry module."""
+
+import asyncio
+import pytest
+
+from expiry import DeadlineTracker
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDeadlineTracker:
+    """Tests for idle deadlines and their expiry."""
+
+    def test_expires_only_idle_keys(self):
+        """Test a refreshed key outlives its original deadline."""
+        clock = FakeClock()
+        expired = []
+        tracker = DeadlineTracker(10.0, expired.append, clock=clock)
+        tracker.touch("idle")
+        tracker.touch("busy")
+
+        clock.now = 8.0
+        tracker.touch("busy")
+        clock.now = 10.0
+        assert tracker.expire_due() == ["idle"]
+        assert expired == ["idle"]
+        assert "busy" in tracker
+
+        clock.now = 18.0
+        assert tracker.expire_due() == ["busy"]
+        assert len(tracker) == 0
+
+    def test_refresh_does_not_grow_heap(self):
+        """Test touching a tracked key keeps a single heap entry."""
+        clock = FakeClock()
+        tracker = DeadlineTracker(10.0, lambda key: None, clock=clock)
+        for i in range(100):
+            clock.now = float(i)
+            tracker.touch("key")
+
+        assert tracker.stats()["heap_size"] == 1
+        assert tracker.deadline("key") == 109.0
+
+    def test_discarded_key_never_expires(self):
+        """Test discard stops tracking, and a re-touch starts a fresh deadline."""
+        clock = FakeClock()
+        tracker = DeadlineTracker(10.0, lambda key: None, clock=clock)
+        tracker.touch("key")
+        tracker.discard("key")
+        clock.now = 20.0
+        assert tracker.expire_due() == []
+
+        tracker.touch("key")
+        tracker.discard("key")
+        tracker.touch("key")
+        clock.now = 29.0
+        assert tracker.expire_due() == []
+        assert tracker.stats()["heap_size"] == 1
+        clock.now = 30.0
+        assert tracker.expire_due() == ["key"]
+
+    def test_callback_can_rearm(self):
+        """Test on_expire may touch the key again to keep it tracked."""
+        clock = FakeClock()
+        tracker = DeadlineTracker(10.0, lambda key: tracker.touch(key), clock=clock)
+        tracker.touch("pinned")
+        clock.now = 10.0
+
+        assert tracker.expire_due() == ["pinned"]
+        assert tracker.deadline("pinned") == 20.0
+
+    @pytest.mark.asyncio
+    async def test_timer_fires_at_deadline(self):
+        """Test the loop timer expires keys without an explicit sweep."""
+        expired = []
+        tracker = DeadlineTracker(0.05, expired.append)
+        tracker.start()
+        tracker.touch("a")
+        await asyncio.sleep(0.03)
+        tracker.touch("a")
+        tracker.touch("b")
+        await asyncio.sleep(0.04)
+        assert expired == []
+
+        await asyncio.sleep(0.05)
+        assert sorted(expired) == ["a", "b"]
+        tracker.stop()
@@ -10,14 +10,14 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from main import app, event_queues, event_queues_timestamps, active_request_ids
+from main import app, event_queues, request_expiry, active_request_ids
 
 
 @pytest.fixture
 def client():
     """FastAPI test client with mocked runtime lifecycle."""
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
     active_request_ids.clear()
 
     mock_runtime = MagicMock()
@@ -28,7 +28,7 @@ def client():
             yield test_client
 
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
     active_request_ids.clear()
 
 
@@ -2,7 +2,6 @@
 
 import pytest
 import asyncio
-from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from pathlib import Path
@@ -15,20 +14,32 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from main import (
     app,
     event_queues,
-    event_queues_timestamps,
+    request_expiry,
     active_request_ids,
-    cleanup_orphaned_queues,
     _execute_agent_background,
     agent_event_generator,
 )
 from event_parser import CagentEvent, EventType
+from event_stream import EventStream
+from scheduler import AdmissionScheduler
+from workflow import CheckpointStore
+
+
+def sse_fields(frame: bytes) -> dict:
+    """Parse a frame yielded by agent_event_generator into its SSE fields."""
+    fields = {}
+    for line in frame.decode("utf-8").splitlines():
+        if line:
+            name, _, value = line.partition(": ")
+            fields[name] = value
+    return fields
 
 
 @pytest.fixture
 def client():
     """FastAPI test client with mocked runtime lifecycle."""
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
     active_request_ids.clear()
 
     mock_runtime = MagicMock()
@@ -39,7 +50,7 @@ def client():
             yield test_client
 
     event_queues.clear()
-    event_queues_timestamps.clear()
+    request_expiry.clear()
     active_request_ids.clear()
 
 
@@ -50,30 +61,30 @@ class TestSSEStreamingBehavior:
     async def test_stream_with_immediate_result(self):
         """Test SSE stream with immediate result event."""
         request_id = "test-immediate"
-        queue = asyncio.Queue()
-        event_queues[request_id] = queue
+        stream = EventStream()
+        event_queues[request_id] = stream
 
-        await queue.put(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
-        await queue.put(None)
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        stream.close()
 
-        received = [event async for event in agent_event_generator(request_id)]
+        received = [sse_fields(frame) async for frame in agent_event_generator(request_id)]
         assert any(event["event"] == "result" for event in received)
 
     @pytest.mark.asyncio
     async def test_stream_with_delayed_events(self):
         """Test SSE stream handles delayed events."""
         request_id = "test-delayed"
-        queue = asyncio.Queue()
-        event_queues[request_id] = queue
+        stream = EventStream()
+        event_queues[request_id] = stream
 
         async def producer():
             await asyncio.sleep(0.01)
-            await queue.put(CagentEvent(EventType.THINKING, {"content": "thinking"}, time.time()))
-            await queue.put(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
-            await queue.put(None)
+            stream.publish(CagentEvent(EventType.THINKING, {"content": "thinking"}, time.time()))
+            stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+            stream.close()
 
         producer_task = asyncio.create_task(producer())
-        received = [event async for event in agent_event_generator(request_id)]
+        received = [sse_fields(frame) async for frame in agent_event_generator(request_id)]
         await producer_task
 
         emitted_events = [event["event"] for event in received]
@@ -81,11 +92,11 @@ class TestSSEStreamingBehavior:
         assert "result" in emitted_events
 
     @pytest.mark.asyncio
-    async def test_event_queue_cleanup_after_stream_ends(self):
-        """Test that event queue is cleaned up after stream ends."""
+    async def test_event_stream_retained_after_stream_ends(self):
+        """Test that the replay stream survives the SSE connection for resume."""
         request_id = "test-cleanup"
-        queue = asyncio.Queue()
-        event_queues[request_id] = queue
+        stream = EventStream()
+        event_queues[request_id] = stream
 
         # Create a result event to end the stream
         result_event = CagentEvent(
@@ -93,23 +104,24 @@ class TestSSEStreamingBehavior:
             data={"result": "done"},
             timestamp=time.time()
         )
-        await queue.put(result_event)
-        await queue.put(None)  # End marker
+        stream.publish(result_event)
+        stream.close()
 
         # Consume the generator
         events = []
         async for event in agent_event_generator(request_id):
             events.append(event)
 
-        # Queue should be cleaned up
-        assert request_id not in event_queues
+        # Stream is left for idle expiry so reconnects can replay it
+        assert event_queues[request_id] is stream
+        event_queues.pop(request_id, None)
 
     @pytest.mark.asyncio
     async def test_event_generator_with_multiple_events(self):
         """Test event generator yields multiple events."""
         request_id = "test-multi"
-        queue = asyncio.Queue()
-        event_queues[request_id] = queue
+        stream = EventStream()
+        event_queues[request_id] = stream
 
         # Add multiple events
         events_to_send = [
@@ -119,17 +131,83 @@ class TestSSEStreamingBehavior:
         ]
 
         for event in events_to_send:
-            await queue.put(event)
+            stream.publish(event)
 
         # Collect events
         received = []
-        async for event in agent_event_generator(request_id):
+        async for frame in agent_event_generator(request_id):
+            event = sse_fields(frame)
             received.append(event)
             if event["event"] == "result":
                 break
 
         assert len(received) == 3
 
+    @pytest.mark.asyncio
+    async def test_stream_resumes_after_last_event_id(self):
+        """Test a reconnect with Last-Event-ID only receives the missing tail."""
+        request_id = "test-resume"
+        stream = EventStream()
+        event_queues[request_id] = stream
+
+        stream.publish(CagentEvent(EventType.THINKING, {"content": "one"}, time.time()))
+        stream.publish(CagentEvent(EventType.TOOL_CALL, {"content": "two"}, time.time()))
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        stream.close()
+
+        first = [sse_fields(frame) async for frame in agent_event_generator(request_id)]
+        assert [event["id"] for event in first] == ["1", "2", "3"]
+
+        resumed = [sse_fields(frame) async for frame in agent_event_generator(request_id, last_event_id=1)]
+        assert [event["id"] for event in resumed] == ["2", "3"]
+        assert resumed[-1]["event"] == "result"
+
+        event_queues.pop(request_id, None)
+
+    @pytest.mark.asyncio
+    async def test_multiple_subscribers_receive_all_events(self):
+        """Test two clients on the same request both receive every event."""
+        request_id = "test-fanout"
+        stream = EventStream()
+        event_queues[request_id] = stream
+
+        async def consume():
+            return [sse_fields(frame) async for frame in agent_event_generator(request_id)]
+
+        consumers = [asyncio.create_task(consume()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert stream.subscriber_count == 2
+
+        stream.publish(CagentEvent(EventType.THINKING, {"content": "one"}, time.time()))
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        stream.close()
+
+        first, second = await asyncio.wait_for(asyncio.gather(*consumers), timeout=1.0)
+        assert [event["event"] for event in first] == ["thinking", "result"]
+        assert first == second
+        assert stream.subscriber_count == 0
+
+        event_queues.pop(request_id, None)
+
+    def test_stream_endpoint_honors_last_event_id_header(self, client):
+        """Test /agent/stream replays only events after the Last-Event-ID header."""
+        request_id = "test-resume-header"
+        stream = EventStream()
+        event_queues[request_id] = stream
+        stream.publish(CagentEvent(EventType.THINKING, {"content": "one"}, time.time()))
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        stream.close()
+
+        response = client.get(
+            f"/agent/stream/{request_id}",
+            headers={"Last-Event-ID": "1"},
+        )
+
+        assert response.status_code == 200
+        assert "id: 2" in response.text
+        assert "id: 1\r\n" not in response.text
+        assert "event: result" in response.text
+
     @pytest.mark.asyncio
     async def test_keepalive_on_timeout(self):
         """Test keepalive event sent on timeout."""
@@ -142,11 +220,61 @@ class TestSSEStreamingBehavior:
 
         with patch("main.asyncio.wait_for", side_effect=immediate_timeout):
             generator = agent_event_generator(request_id)
-            keepalive = await generator.__anext__()
+            keepalive = sse_fields(await generator.__anext__())
             assert keepalive["event"] == "keepalive"
             await generator.aclose()
 
 
+class TestMultiplexedEventChannel:
+    """Tests for the /agent/events WebSocket."""
+
+    def test_subscribe_receives_tagged_events(self, client):
+        """Test a subscription replays a finished run tagged by request_id."""
+        stream = EventStream()
+        event_queues["mux-done"] = stream
+        stream.publish(CagentEvent(EventType.THINKING, {"content": "one"}, time.time()))
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        stream.close()
+
+        with client.websocket_connect("/agent/events") as websocket:
+            websocket.send_json({"action": "subscribe", "request_id": "mux-done"})
+            frames = [websocket.receive_json() for _ in range(4)]
+
+        assert [frame["event"] for frame in frames] == [
+            "subscribed", "thinking", "result", "unsubscribed",
+        ]
+        assert all(frame["request_id"] == "mux-done" for frame in frames)
+        assert frames[2]["id"] == 2
+        assert frames[2]["data"]["data"] == {"result": "done"}
+
+    def test_subscribe_and_unsubscribe_without_reconnect(self, client):
+        """Test several requests can be followed and released on one connection."""
+        with client.websocket_connect("/agent/events") as websocket:
+            websocket.send_json({"action": "subscribe", "request_id": "mux-a"})
+            websocket.send_json({"action": "subscribe", "request_id": "mux-b"})
+            acks = [websocket.receive_json() for _ in range(2)]
+            websocket.send_json({"action": "unsubscribe", "request_id": "mux-a"})
+            release = websocket.receive_json()
+
+        assert {(ack["request_id"], ack["event"]) for ack in acks} == {
+            ("mux-a", "subscribed"), ("mux-b", "subscribed"),
+        }
+        assert (release["request_id"], release["event"]) == ("mux-a", "unsubscribed")
+        assert event_queues["mux-b"].subscriber_count == 0
+
+    def test_invalid_command_reports_error(self, client):
+        """Test malformed commands produce an error frame, not a disconnect."""
+        with client.websocket_connect("/agent/events") as websocket:
+            websocket.send_text("not json")
+            error = websocket.receive_json()
+            websocket.send_json({"action": "bogus", "request_id": "x"})
+            unknown = websocket.receive_json()
+
+        assert error["event"] == "error"
+        assert error["data"]["error_code"] == "INVALID_COMMAND"
+        assert unknown["event"] == "error"
+
+
 class TestBackgroundTaskExecution:
     """Tests for background task execution."""
 
@@ -176,13 +304,12 @@ class TestBackgroundTaskExecution:
             # Execute background task
             await _execute_agent_background(request_id, request)
 
-            # Queue should have error event
+            # Stream should have error event
             assert request_id in event_queues
-            queue = event_queues[request_id]
+            stream = event_queues[request_id]
 
             # Get the error event
-            event = await asyncio.wait_for(queue.get(), timeout=1.0)
-            assert event is not None
+            event = stream.events_after(0)[0].event
             assert event.event_type == EventType.ERROR
 
     @pytest.mark.asyncio
@@ -229,9 +356,8 @@ class TestBackgroundTaskExecution:
         with patch("main.cagent_runtime", MagicMock()):
             await _execute_agent_background(request_id, request)
 
-        queue = event_queues[request_id]
-        event = await asyncio.wait_for(queue.get(), timeout=1.0)
-        assert event is not None
+        stream = event_queues[request_id]
+        event = stream.events_after(0)[0].event
         assert event.event_type == EventType.ERROR
         assert event.data["error_code"] == "INVALID_INPUT"
         assert "request.input" in event.data["error"]
@@ -259,13 +385,8 @@ class TestBackgroundTaskExecution:
             await _execute_agent_background(request_id, request)
 
             # Collect all events
-            queue = event_queues[request_id]
-            events = []
-            while not queue.empty():
-                event = await queue.get()
-                if event is None:
-                    break
-                events.append(event)
+            stream = event_queues[request_id]
+            events = [entry.event for entry in stream.events_after(0)]
 
             # Should have thinking and result, but not the info after result
             assert len(events) == 2
@@ -274,62 +395,57 @@ class TestBackgroundTaskExecution:
 
 
 class TestQueueCleanupBehavior:
-    """Tests for periodic queue cleanup behavior."""
+    """Tests for idle expiry of per-request state."""
 
     @pytest.mark.asyncio
-    async def test_cleanup_keeps_active_stale_queue(self):
-        """Active requests must not be removed even if their queue timestamp is stale."""
+    async def test_expiry_keeps_active_stale_queue(self):
+        """Active requests must not be removed even if their deadline has passed."""
         request_id = "active-stale-queue"
-        event_queues[request_id] = asyncio.Queue()
-        event_queues_timestamps[request_id] = datetime.now() - timedelta(minutes=10)
+        event_queues[request_id] = EventStream()
+        request_expiry.touch(request_id)
         active_request_ids.add(request_id)
 
-        real_sleep = asyncio.sleep
-        sleep_calls = 0
-
-        async def fast_sleep(_seconds):
-            nonlocal sleep_calls
-            sleep_calls += 1
-            if sleep_calls > 1:
-                raise asyncio.CancelledError
-            await real_sleep(0)
-
         try:
-            with patch("main.asyncio.sleep", side_effect=fast_sleep):
-                with pytest.raises(asyncio.CancelledError):
-                    await cleanup_orphaned_queues()
+            expired = request_expiry.expire_due(request_expiry.deadline(request_id))
 
+            assert request_id in expired
             assert request_id in event_queues
-            assert request_id in event_queues_timestamps
+            assert request_id in request_expiry
         finally:
             active_request_ids.discard(request_id)
             event_queues.pop(request_id, None)
-            event_queues_timestamps.pop(request_id, None)
+            request_expiry.discard(request_id)
 
     @pytest.mark.asyncio
-    async def test_cleanup_removes_inactive_stale_queue(self):
-        """Inactive stale queues should still be removed by cleanup."""
+    async def test_expiry_removes_inactive_stale_queue(self):
+        """Inactive queues are released once their deadline passes."""
         request_id = "inactive-stale-queue"
-        event_queues[request_id] = asyncio.Queue()
-        event_queues_timestamps[request_id] = datetime.now() - timedelta(minutes=10)
+        event_queues[request_id] = EventStream()
+        request_expiry.touch(request_id)
         active_request_ids.discard(request_id)
 
-        real_sleep = asyncio.sleep
-        sleep_calls = 0
+        request_expiry.expire_due(request_expiry.deadline(request_id))
+
+        assert request_id not in event_queues
+        assert request_id not in request_expiry
 
-        async def fast_sleep(_seconds):
-            nonlocal sleep_calls
-            sleep_calls += 1
-            if sleep_calls > 1:
-                raise asyncio.CancelledError
-            await real_sleep(0)
+    @pytest.mark.asyncio
+    async def test_expiry_fires_at_deadline(self):
+        """Idle requests are released by the timer, not by a periodic sweep."""
+        request_id = "timer-expired-queue"
+        event_queues[request_id] = EventStream()
 
-        with patch("main.asyncio.sleep", side_effect=fast_sleep):
-            with pytest.raises(asyncio.CancelledError):
-                await cleanup_orphaned_queues()
+        with patch.object(request_expiry, "timeout", 0.05):
+            request_expiry.start()
+            try:
+                request_expiry.touch(request_id)
+                await asyncio.sleep(0.02)
+                assert request_id in event_queues
+                await asyncio.sleep(0.06)
+            finally:
+                request_expiry.stop()
 
         assert request_id not in event_queues
-        assert request_id not in event_queues_timestamps
 
 
 class TestErrorPropagation:
@@ -374,6 +490,611 @@ class TestErrorPropagation:
         assert response.status_code == 404
 
 
+class TestAdmissionControl:
+    """Tests for scheduler integration in /agent/execute."""
+
+    def test_queue_full_returns_429_with_retry_after(self, client):
+        """Test a saturated scheduler rejects with Retry-After."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1, max_queue=0, retry_after=2.5)
+        scheduler.submit("busy")
+
+        with patch("main.cagent_runtime", MagicMock()), patch("main.scheduler", scheduler):
+            response = client.post(
+                "/agent/execute",
+                json={"agent_id": "test", "input": {"input": "query"}},
+            )
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "3"
+
+    def test_queued_run_gets_queued_event(self, client):
+        """Test a run waiting for a slot reports status and queue position."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1, max_queue=4)
+        scheduler.submit("busy")
+
+        with patch("main.cagent_runtime", MagicMock()), patch("main.scheduler", scheduler):
+            response = client.post(
+                "/agent/execute",
+                json={"agent_id": "test", "input": {"input": "query"}, "priority": "batch"},
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "queued"
+
+        events = [entry.event for entry in event_queues[data["request_id"]].events_after(0)]
+        assert events[0].event_type == EventType.QUEUED
+        assert events[0].data == {"position": 1, "priority": "batch"}
+
+    def test_invalid_priority_returns_422(self, client):
+        """Test unknown priority lanes fail validation."""
+        response = client.post(
+            "/agent/execute",
+            json={"agent_id": "test", "input": {"input": "query"}, "priority": "urgent"},
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_background_task_waits_for_admission_and_releases(self):
+        """Test the background task holds its slot only while running."""
+        from main import AgentRequest
+
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        blocker = scheduler.submit("busy")
+        ticket = scheduler.submit("test")
+        request = AgentRequest(agent_id="test", input={"input": "test"})
+
+        with patch("main.cagent_runtime") as mock_runtime:
+            async def result_generator():
+                yield CagentEvent(EventType.RESULT, {"result": "done"}, time.time())
+
+            mock_runtime.execute_agent = MagicMock(return_value=result_generator())
+            task = asyncio.create_task(_execute_agent_background("test-admission", request, ticket))
+            await asyncio.sleep(0.01)
+            assert not mock_runtime.execute_agent.called
+
+            blocker.release()
+            await asyncio.wait_for(task, timeout=1.0)
+
+        assert mock_runtime.execute_agent.called
+        assert scheduler.running == 0
+        event_queues.pop("test-admission", None)
+
+    def test_metrics_reports_scheduler_state(self, client):
+        """Test /metrics exposes scheduler counters."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "running" in response.json()["scheduler"]
+
+
+class TestRequestDeadline:
+    """Tests for the X-Request-Deadline header."""
+
+    def test_deadline_header_reaches_runtime(self, client):
+        """Test the caller's deadline is passed to the runtime."""
+        async def fake_execute_agent(agent_id, user_input, **kwargs):
+            yield CagentEvent(EventType.RESULT, {"result": "ok"}, time.time())
+
+        mock_runtime = MagicMock()
+        mock_runtime.execute_agent = MagicMock(side_effect=fake_execute_agent)
+        deadline = time.time() + 30
+        with patch("main.cagent_runtime", mock_runtime):
+            response = client.post(
+                "/agent/execute",
+                json={"agent_id": "scheduling", "input": {"input": "x"}},
+                headers={"X-Request-Deadline": str(deadline)},
+            )
+            with client.stream("GET", f"/agent/stream/{response.json()['request_id']}") as stream:
+                "".join(stream.iter_text())
+
+        assert mock_runtime.execute_agent.call_args.kwargs["deadline"] == deadline
+
+    @pytest.mark.parametrize("value", ["soon", "nan", "inf"])
+    def test_malformed_deadline_returns_400(self, client, value):
+        """Test a deadline that is not a finite timestamp is rejected."""
+        with patch("main.cagent_runtime", MagicMock()):
+            response = client.post(
+                "/agent/execute",
+                json={"agent_id": "scheduling", "input": {"input": "x"}},
+                headers={"X-Request-Deadline": value},
+            )
+        assert response.status_code == 400
+
+
+class TestGroupExecution:
+    """Tests for /agent/execute_group."""
+
+    def test_group_streams_branches_then_group_result(self, client):
+        """Test a group request merges branch events into one stream."""
+        async def fake_execute_many(branches, user_input, **kwargs):
+            for branch in branches:
+                yield CagentEvent(EventType.THINKING, {"content": user_input, "branch": branch.branch_id}, time.time())
+                yield CagentEvent(EventType.BRANCH_RESULT, {"result": "ok", "branch": branch.branch_id}, time.time())
+            yield CagentEvent(EventType.RESULT, {"result": {b.branch_id: "ok" for b in branches}, "errors": {}}, time.time())
+
+        mock_runtime = MagicMock()
+        mock_runtime.execute_many = MagicMock(side_effect=fake_execute_many)
+        with patch("main.cagent_runtime", mock_runtime):
+            response = client.post(
+                "/agent/execute_group",
+                json={
+                    "input": {"input": "caption this"},
+                    "branches": [
+                        {"agent_id": "captioning", "context": {"platform": "instagram"}},
+                        {"agent_id": "captioning", "context": {"platform": "tiktok"}},
+                        {"agent_id": "idea_validator", "branch_id": "ideas"},
+                    ],
+                },
+            )
+            assert response.status_code == 200
+            request_id = response.json()["request_id"]
+            with client.stream("GET", f"/agent/stream/{request_id}") as stream:
+                body = "".join(stream.iter_text())
+
+        branches = mock_runtime.execute_many.call_args.args[0]
+        assert [b.branch_id for b in branches] == ["captioning", "captioning-2", "ideas"]
+        assert mock_runtime.execute_many.call_args.kwargs["policy"] == "all"
+        assert body.count("event: branch_result") == 3
+        assert body.rstrip().splitlines()[-1].startswith("data:")
+        assert '"captioning-2":"ok"' in body
+
+    def test_duplicate_branch_ids_return_422(self, client):
+        """Test explicit branch ids must be unique."""
+        with patch("main.cagent_runtime", MagicMock()):
+            response = client.post(
+                "/agent/execute_group",
+                json={
+                    "input": {"input": "x"},
+                    "branches": [{"agent_id": "a", "branch_id": "same"}, {"agent_id": "b", "branch_id": "same"}],
+                },
+            )
+        assert response.status_code == 422
+
+    def test_group_rejected_when_queue_full_releases_tickets(self, client):
+        """Test a group that cannot be queued whole gets 429 and leaves no tickets behind."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1, max_queue=1)
+
+        with patch("main.cagent_runtime", MagicMock()), patch("main.scheduler", scheduler):
+            response = client.post(
+                "/agent/execute_group",
+                json={"input": {"input": "x"}, "branches": [{"agent_id": "a"}, {"agent_id": "b"}, {"agent_id": "c"}]},
+            )
+
+        assert response.status_code == 429
+        assert scheduler.running == 0
+        assert scheduler.queued == 0
+
+
+class TestWorkflowExecution:
+    """Tests for /workflow/execute and /workflow/runs."""
+
+    def test_workflow_runs_and_checkpoints_are_queryable(self, client):
+        """Test a workflow streams to completion and its step results can be fetched by run_id."""
+        async def fake_execute_agent(agent_id, user_input, **kwargs):
+            yield CagentEvent(EventType.RESULT, {"result": f"{agent_id}:{user_input}"}, time.time())
+
+        mock_runtime = MagicMock()
+        mock_runtime.execute_agent = MagicMock(side_effect=fake_execute_agent)
+        mock_runtime.line_queue_size = 16
+        with patch("main.cagent_runtime", mock_runtime), patch("main.workflow_checkpoints", CheckpointStore()):
+            response = client.post(
+                "/workflow/execute",
+                json={
+                    "input": {"input": "photos"},
+                    "run_id": "wf-1",
+                    "steps": [
+                        {"id": "extract", "agent_id": "extraction"},
+                        {"id": "caption", "agent_id": "captioning", "depends_on": ["extract"]},
+                    ],
+                },
+            )
+            assert response.status_code == 200
+            assert response.json()["run_id"] == "wf-1"
+            with client.stream("GET", f"/agent/stream/{response.json()['request_id']}") as stream:
+                body = "".join(stream.iter_text())
+
+            runs = client.get("/workflow/runs/wf-1")
+            missing = client.get("/workflow/runs/unknown")
+
+        assert body.count("event: branch_result") == 2
+        assert '"caption":"captioning:extraction:photos"' in body
+        assert runs.status_code == 200
+        assert runs.json()["completed"] == {"extract": "extraction:photos", "caption": "captioning:extraction:photos"}
+        assert missing.status_code == 404
+
+    def test_cyclic_workflow_returns_422(self, client):
+        """Test invalid DAGs are rejected before anything runs."""
+        with patch("main.cagent_runtime", MagicMock()):
+            response = client.post(
+                "/workflow/execute",
+                json={
+                    "input": {"input": "x"},
+                    "steps": [
+                        {"id": "a", "agent_id": "x", "depends_on": ["b"]},
+                        {"id": "b", "agent_id": "x", "depends_on": ["a"]},
+                    ],
+                },
+            )
+        assert response.status_code == 422
+        assert "cycle" in response.json()["detail"]
+
+
+class TestResultCacheIntegration:
+    """Tests for opt-in result caching in /agent/execute."""
+
+    @pytest.mark.asyncio
+    async def test_successful_run_is_recorded(self):
+        """Test a run with a cache key stores its event sequence."""
+        from main import AgentRequest
+        from result_cache import ResultCache
+
+        cache = ResultCache("team.yaml")
+        request = AgentRequest(agent_id="test", input={"input": "test"}, cache=True)
+
+        with patch("main.cagent_runtime") as mock_runtime, patch("main.result_cache", cache):
+            async def result_generator():
+                yield CagentEvent(EventType.THINKING, {"content": "hmm"}, time.time())
+                yield CagentEvent(EventType.RESULT, {"result": "done"}, time.time())
+
+            mock_runtime.execute_agent = MagicMock(return_value=result_generator())
+            await _execute_agent_background("test-cache-record", request, cache_key="k")
+
+        recorded = await cache.get("k")
+        assert [event["event_type"] for event in recorded] == ["thinking", "result"]
+        event_queues.pop("test-cache-record", None)
+
+    @pytest.mark.asyncio
+    async def test_failed_run_is_not_recorded(self):
+        """Test error outcomes are never cached."""
+        from main import AgentRequest
+        from result_cache import ResultCache
+
+        cache = ResultCache("team.yaml")
+        request = AgentRequest(agent_id="test", input={"input": "test"}, cache=True)
+
+        with patch("main.cagent_runtime") as mock_runtime, patch("main.result_cache", cache):
+            async def error_generator():
+                yield CagentEvent(EventType.ERROR, {"error": "boom"}, time.time())
+
+            mock_runtime.execute_agent = MagicMock(return_value=error_generator())
+            await _execute_agent_background("test-cache-error", request, cache_key="k")
+
+        assert await cache.get("k") is None
+        event_queues.pop("test-cache-error", None)
+
+    def test_cache_hit_replays_without_runtime(self, client):
+        """Test a hit replays the recorded events through the normal stream."""
+        from result_cache import ResultCache
+
+        cache = ResultCache("team.yaml")
+        body = {"agent_id": "test", "input": {"input": "cached"}, "cache": True}
+        key = cache.key_for(body["agent_id"], body["input"], None)
+        cache._remember(key, time.time() + 60, [
+            {"event_type": "thinking", "data": {"content": "hmm"}, "timestamp": 1.0},
+            {"event_type": "result", "data": {"result": "cached answer"}, "timestamp": 2.0},
+        ])
+
+        runtime = MagicMock()
+        with patch("main.cagent_runtime", runtime), patch("main.result_cache", cache):
+            response = client.post("/agent/execute", json=body)
+            request_id = response.json()["request_id"]
+            stream_response = client.get(f"/agent/stream/{request_id}")
+
+        assert response.status_code == 200
+        assert not runtime.execute_agent.called
+        assert "event: thinking" in stream_response.text
+        assert "cached answer" in stream_response.text
+        assert cache.stats()["hits"] == 1
+
+
+class TestSingleflightIntegration:
+    """Tests for coalescing identical in-flight requests in /agent/execute."""
+
+    BODY = {"agent_id": "test", "input": {"input": "same question"}}
+
+    def test_identical_request_follows_leader_stream(self, client):
+        """Test a duplicate request shares the leader's stream instead of a new run."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        scheduler.submit("busy")
+
+        with patch("main.cagent_runtime", MagicMock()), patch("main.scheduler", scheduler):
+            leader = client.post("/agent/execute", json=self.BODY).json()
+            follower = client.post("/agent/execute", json=self.BODY).json()
+
+        assert follower["status"] == "coalesced"
+        assert follower["coalesced_with"] == leader["request_id"]
+        assert follower["request_id"] != leader["request_id"]
+        assert event_queues[follower["request_id"]] is event_queues[leader["request_id"]]
+        assert scheduler.queued == 1
+
+        metrics = client.get("/metrics").json()["singleflight"]
+        assert metrics["in_flight"] == 1
+        assert metrics["coalesced_total"] == 1
+
+    def test_coalesce_opt_out_starts_separate_run(self, client):
+        """Test coalesce=false always starts its own run."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        scheduler.submit("busy")
+
+        with patch("main.cagent_runtime", MagicMock()), patch("main.scheduler", scheduler):
+            leader = client.post("/agent/execute", json=self.BODY).json()
+            other = client.post("/agent/execute", json={**self.BODY, "coalesce": False}).json()
+
+        assert other["status"] == "queued"
+        assert other["coalesced_with"] is None
+        assert event_queues[other["request_id"]] is not event_queues[leader["request_id"]]
+        assert scheduler.queued == 2
+
+    @pytest.mark.asyncio
+    async def test_leader_completion_releases_followers(self):
+        """Test followers are released and later requests run fresh."""
+        from main import AgentRequest, singleflight
+
+        request = AgentRequest(agent_id="test", input={"input": "test"})
+        singleflight.lead("flight-key", "test-leader")
+        singleflight.join("flight-key", "test-follower")
+        active_request_ids.add("test-follower")
+
+        with patch("main.cagent_runtime") as mock_runtime:
+            async def result_generator():
+                yield CagentEvent(EventType.RESULT, {"result": "done"}, time.time())
+
+            mock_runtime.execute_agent = MagicMock(return_value=result_generator())
+            await _execute_agent_background("test-leader", request, flight_key="flight-key")
+
+        assert "test-follower" not in active_request_ids
+        assert singleflight.join("flight-key", "test-late") is None
+        event_queues.pop("test-leader", None)
+
+
+class TestPipelineBackpressure:
+    """Tests for the bounded publish path in the background task."""
+
+    @pytest.mark.asyncio
+    async def test_background_task_waits_for_slow_subscriber(self):
+        """Test a lagging subscriber pauses the run instead of buffering without bound."""
+        from main import AgentRequest, pipeline_stats
+
+        request = AgentRequest(agent_id="test", input={"input": "test"})
+        stream = EventStream()
+        event_queues["test-backpressure"] = stream
+        subscription = stream.subscribe()
+
+        with patch("main.cagent_runtime") as mock_runtime, patch("main.settings.PIPELINE_HIGH_WATER", 2):
+            async def chatty_generator(**kwargs):
+                for i in range(5):
+                    yield CagentEvent(EventType.THINKING, {"content": str(i)}, time.time())
+                yield CagentEvent(EventType.RESULT, {"result": "done"}, time.time())
+
+            mock_runtime.execute_agent = chatty_generator
+            task = asyncio.create_task(_execute_agent_background("test-backpressure", request))
+            await asyncio.sleep(0.01)
+            assert stream.last_seq == 2
+            assert not task.done()
+
+            delivered = []
+            while not subscription.finished:
+                delivered.extend(entry.event.event_type for entry in subscription.poll()[1])
+                await asyncio.sleep(0.001)
+            await asyncio.wait_for(task, timeout=1.0)
+
+        assert delivered[-1] == EventType.RESULT
+        assert len(delivered) == 6
+        assert pipeline_stats["test-backpressure"].backlog_high_water == 2
+        event_queues.pop("test-backpressure", None)
+
+    @pytest.mark.asyncio
+    async def test_coalescing_window_merges_thinking(self):
+        """Test the coalescing stage publishes a thinking burst as one event."""
+        from main import AgentRequest, coalescing_stats, pipeline_stats
+
+        request = AgentRequest(agent_id="test", input={"input": "test"})
+        stream = EventStream()
+        event_queues["test-coalescing"] = stream
+        events_in_before = coalescing_stats.events_in
+
+        with patch("main.cagent_runtime") as mock_runtime, patch("main.settings.PIPELINE_COALESCE_WINDOW", 10.0):
+            async def chatty_generator(**kwargs):
+                for i in range(50):
+                    yield CagentEvent(EventType.THINKING, {"content": str(i)}, time.time())
+                yield CagentEvent(EventType.TOOL_CALL, {"content": "search"}, time.time())
+                yield CagentEvent(EventType.RESULT, {"result": "done"}, time.time())
+
+            mock_runtime.execute_agent = chatty_generator
+            await asyncio.wait_for(_execute_agent_background("test-coalescing", request), timeout=1.0)
+
+        events = [entry.event for entry in stream.events_after(0)]
+        assert [event.event_type for event in events] == [EventType.THINKING, EventType.TOOL_CALL, EventType.RESULT]
+        assert events[0].data["coalesced"] == 50
+        assert pipeline_stats["test-coalescing"].to_dict()["coalescing"]["merge_ratio"] == round(52 / 3, 3)
+        assert coalescing_stats.events_in - events_in_before == 52
+        event_queues.pop("test-coalescing", None)
+        pipeline_stats.pop("test-coalescing", None)
+
+
+class TestCancellation:
+    """Tests for DELETE /agent/{request_id} and cancel-on-disconnect."""
+
+    @staticmethod
+    def _endless_runtime(closed: list):
+        """Runtime whose execute_agent thinks once and then runs until cancelled."""
+        async def endless_generator(**kwargs):
+            try:
+                yield CagentEvent(EventType.THINKING, {"content": "working"}, time.time())
+                await asyncio.sleep(3600)
+            finally:
+                closed.append(kwargs["agent_id"])
+
+        mock_runtime = MagicMock()
+        mock_runtime.execute_agent = endless_generator
+        return mock_runtime
+
+    @pytest.mark.asyncio
+    async def test_cancel_run_tears_down_and_notifies_subscribers(self):
+        """Test cancelling stops the run, frees its slot and state, and ends streams with cancelled."""
+        from main import AgentRequest, _cancel_run, _get_event_stream, _register_background_task, request_tasks
+
+        closed = []
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        ticket = scheduler.submit("test")
+        with patch("main.cagent_runtime", self._endless_runtime(closed)):
+            subscription = _get_event_stream("test-cancel").subscribe()
+            request = AgentRequest(agent_id="test", input={"input": "x"})
+            task = asyncio.create_task(_execute_agent_background("test-cancel", request, ticket))
+            _register_background_task(task, "test-cancel")
+            await asyncio.sleep(0.01)
+
+            assert await _cancel_run("test-cancel", reason="client")
+
+        delivered = [entry.event.event_type for entry in subscription.poll()[1]]
+        assert delivered == [EventType.THINKING, EventType.CANCELLED]
+        assert subscription.finished
+        assert closed == ["test"]
+        assert task.cancelled()
+        assert scheduler.running == 0
+        assert "test-cancel" not in event_queues
+        assert "test-cancel" not in request_expiry
+        assert "test-cancel" not in active_request_ids
+        assert "test-cancel" not in request_tasks
+        assert not await _cancel_run("test-cancel", reason="client")
+
+    @pytest.mark.asyncio
+    async def test_last_subscriber_leaving_cancels_after_grace(self):
+        """Test a run nobody watches any more is cancelled once the grace period passes."""
+        from main import AgentRequest, _get_event_stream, _register_background_task
+
+        closed = []
+        with patch("main.cagent_runtime", self._endless_runtime(closed)), \
+                patch("main.settings.CANCEL_ON_DISCONNECT", True), \
+                patch("main.settings.CANCEL_ON_DISCONNECT_GRACE", 0.05):
+            subscription = _get_event_stream("test-idle").subscribe()
+            request = AgentRequest(agent_id="test", input={"input": "x"})
+            task = asyncio.create_task(_execute_agent_background("test-idle", request))
+            _register_background_task(task, "test-idle")
+            await asyncio.sleep(0.01)
+
+            # A reconnect within the grace period keeps the run alive
+            subscription.close()
+            resubscribed = _get_event_stream("test-idle").subscribe()
+            await asyncio.sleep(0.1)
+            assert not task.done()
+
+            resubscribed.close()
+            await asyncio.sleep(0.2)
+
+        assert task.cancelled()
+        assert closed == ["test"]
+        assert "test-idle" not in event_queues
+
+    def test_delete_unknown_and_finished_requests(self, client):
+        """Test DELETE reports unknown ids and runs that already finished."""
+        finished = EventStream()
+        finished.close()
+        event_queues["finished-run"] = finished
+
+        assert client.delete("/agent/unknown").status_code == 404
+        assert client.delete("/agent/finished-run").status_code == 409
+
+    def test_delete_coalesced_request_detaches_it(self, client):
+        """Test cancelling a follower leaves the shared run running."""
+        event_queues["leader"] = event_queues["follower"] = EventStream()
+        active_request_ids.add("follower")
+
+        response = client.delete("/agent/follower")
+
+        assert response.json()["status"] == "detached"
+        assert "follower" not in event_queues
+        assert "follower" not in active_request_ids
+        assert not event_queues["leader"].closed
+
+
+    @pytest.mark.asyncio
+    async def test_cancelling_shared_run_detaches_until_last_request(self):
+        """Test a leader's DELETE only detaches it while a follower shares the run."""
+        import main
+        from main import AgentRequest, _register_background_task, cancel_agent
+
+        closed = []
+        local = MagicMock(client=MagicMock(host="127.0.0.1"))
+        with patch("main.cagent_runtime", self._endless_runtime(closed)):
+            stream = main._get_event_stream("test-lead")
+            subscription = stream.subscribe()
+            main.singleflight.lead("shared-key", "test-lead")
+            assert main.singleflight.join("shared-key", "test-follow") == "test-lead"
+            event_queues["test-follow"] = stream
+            request = AgentRequest(agent_id="test", input={"input": "x"})
+            task = asyncio.create_task(
+                _execute_agent_background("test-lead", request, flight_key="shared-key")
+            )
+            _register_background_task(task, "test-lead")
+            await asyncio.sleep(0.01)
+
+            assert (await cancel_agent("test-lead", local))["status"] == "detached"
+            await asyncio.sleep(0.01)
+            assert not task.done()
+            assert "test-lead" not in event_queues
+            assert main.singleflight.join("shared-key", "test-late") is None
+
+            assert (await cancel_agent("test-follow", local))["status"] == "cancelled"
+
+        assert task.cancelled()
+        assert closed == ["test"]
+        delivered = [entry.event.event_type for entry in subscription.poll()[1]]
+        assert delivered == [EventType.THINKING, EventType.CANCELLED]
+        assert "test-follow" not in event_queues
+        assert "test-follow" not in request_expiry
+        assert main.singleflight.leader_of("test-follow") is None
+
+    def test_detached_follower_leaves_singleflight(self, client):
+        """Test a detached follower is not touched again when its leader finishes."""
+        import main
+
+        main.singleflight.lead("detach-key", "leader")
+        main.singleflight.join("detach-key", "follower")
+        event_queues["leader"] = event_queues["follower"] = EventStream()
+
+        assert client.delete("/agent/follower").json()["status"] == "detached"
+        assert main.singleflight.done("detach-key", "leader") == []
+        event_queues.pop("leader", None)
+
+
+class TestExecutionJournal:
+    """Tests for GET /agent/result and GET /agent/runs."""
+
+    def test_finished_run_result_is_fetchable(self, client):
+        """Test a run's outcome and events can be fetched after its stream ended."""
+        from journal import ExecutionJournal
+
+        async def result_generator(**kwargs):
+            yield CagentEvent(EventType.THINKING, {"content": "hmm"}, time.time())
+            yield CagentEvent(EventType.RESULT, {"result": "journaled"}, time.time())
+
+        runtime = MagicMock()
+        runtime.execute_agent = result_generator
+        with patch("main.cagent_runtime", runtime), patch("main.journal", ExecutionJournal()):
+            request_id = client.post(
+                "/agent/execute", json={"agent_id": "writer", "input": {"input": "x"}}
+            ).json()["request_id"]
+            client.get(f"/agent/stream/{request_id}")
+
+            run = client.get(f"/agent/result/{request_id}?events=true").json()
+            listing = client.get("/agent/runs?limit=1").json()
+            missing = client.get("/agent/result/unknown")
+
+        assert run["status"] == "completed"
+        assert run["result"] == "journaled"
+        assert run["agent_id"] == "writer"
+        assert [event["event_type"] for event in run["events"]] == ["thinking", "result"]
+        assert listing["total"] == 1
+        assert listing["runs"][0]["request_id"] == request_id
+        assert missing.status_code == 404
+
+    def test_runs_listing_validates_page_size(self, client):
+        """Test out-of-range pagination parameters are rejected."""
+        assert client.get("/agent/runs?limit=0").status_code == 422
+        assert client.get("/agent/runs?offset=-1").status_code == 422
+
+
 class TestConcurrentRequests:
     """Tests for concurrent request handling."""
 
@@ -401,7 +1122,7 @@ class TestConcurrentRequests:
         # Create multiple request IDs with queues
         request_ids = [f"concurrent-{i}" for i in range(3)]
         for request_id in request_ids:
-            event_queues[request_id] = asyncio.Queue()
+            event_queues[request_id] = EventStream()
 
         for request_id in request_ids:
             assert request_id in event_queues
@@ -414,7 +1135,7 @@ class TestLifecycleEdgeCases:
         """Test health check works during high load."""
         # Simulate load with many queues
         for i in range(100):
-            event_queues[f"load-test-{i}"] = asyncio.Queue()
+            event_queues[f"load-test-{i}"] = EventStream()
 
         response = client.get("/health")
         assert response.status_code == 200
@@ -426,7 +1147,7 @@ class TestLifecycleEdgeCases:
         """Test shutdown with pending event queues."""
         # Add pending queues
         for i in range(5):
-            event_queues[f"pending-{i}"] = asyncio.Queue()
+            event_queues[f"pending-{i}"] = EventStream()
 
         with patch("main.cagent_runtime") as mock_runtime:
             mock_runtime.shutdown = AsyncMock()
@@ -559,7 +1280,7 @@ class TestRegressionTests:
 
     @pytest.mark.asyncio
     async def test_end_marker_always_sent(self):
-        """Regression: Ensure None marker always sent to end stream."""
+        """Regression: Ensure the stream is always closed to end SSE delivery."""
         from main import AgentRequest
 
         request_id = "regression-marker"
@@ -577,11 +1298,7 @@ class TestRegressionTests:
 
             await _execute_agent_background(request_id, request)
 
-            # Get all items from queue
-            queue = event_queues[request_id]
-            items = []
-            while not queue.empty():
-                items.append(await queue.get())
-
-            # Last item should be None
-            assert items[-1] is None
\ No newline at end of file
+            # Stream should be closed after the last event
+            stream = event_queues[request_id]
+            assert stream.events_after(0)[-1].event.event_type == EventType.RESULT
+            assert stream.closed
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Unit tests for journal module."""
+
+import asyncio
+import sqlite3
+import time
+import pytest
+
+from event_parser import CagentEvent, EventType
+from event_stream import EventStream
+from journal import COMMIT_ATTEMPTS, DEFAULT_EVENT_RUNS, ExecutionJournal, RunStatus
+
+
+def journaled_stream(journal: ExecutionJournal, request_id: str) -> EventStream:
+    """Stream whose published events are recorded in the journal."""
+    stream = EventStream()
+    stream.on_publish = lambda entry: journal.record_event(request_id, entry)
+    return stream
+
+
+class FailingConnection:
+    """Connection wrapper whose next `failures` statements raise."""
+
+    def __init__(self, db: sqlite3.Connection, failures: int):
+        self.db = db
+        self.failures = failures
+
+    def execute(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.db.execute(*args)
+
+    def __enter__(self):
+        return self.db.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.db.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+class TestExecutionJournal:
+    """Tests for run recording, outcomes and listing."""
+
+    @pytest.mark.asyncio
+    async def test_completed_run_keeps_result_and_events(self):
+        """Test a run's events and result are retrievable once it ended."""
+        journal = ExecutionJournal()
+        journal.begin_run("r1", "agent", {"agent_id": "writer"}, agent_id="writer")
+        stream = journaled_stream(journal, "r1")
+        stream.publish(CagentEvent(EventType.THINKING, {"content": "hmm"}, time.time()))
+        stream.publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        journal.end_run("r1")
+
+        run = await journal.get("r1", include_events=True)
+
+        assert run["status"] == RunStatus.COMPLETED
+        assert run["result"] == "done"
+        assert run["error"] is None
+        assert run["request"] == {"agent_id": "writer"}
+        assert run["event_count"] == 2
+        assert [(event["id"], event["event_type"]) for event in run["events"]] == [
+            (1, "thinking"), (2, "result")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_outcome_follows_terminal_event(self):
+        """Test error and cancelled events set the final status, no event means interrupted."""
+        journal = ExecutionJournal()
+        for request_id, event_type in (("failed", EventType.ERROR), ("cancelled", EventType.CANCELLED)):
+            journal.begin_run(request_id, "agent", {})
+            journaled_stream(journal, request_id).publish(
+                CagentEvent(event_type, {"error": "boom"}, time.time())
+            )
+            journal.end_run(request_id)
+        journal.begin_run("silent", "agent", {})
+        journal.end_run("silent")
+
+        assert (await journal.get("failed"))["error"] == "boom"
+        assert (await journal.get("cancelled"))["status"] == RunStatus.CANCELLED
+        assert (await journal.get("silent"))["status"] == RunStatus.INTERRUPTED
+        assert await journal.get("unknown") is None
+
+    @pytest.mark.asyncio
+    async def test_coalesced_request_reads_leader_outcome(self):
+        """Test a follower reports its leader's result; a detached one stays cancelled."""
+        journal = ExecutionJournal()
+        journal.begin_run("leader", "agent", {})
+        journal.begin_run("follower", "agent", {}, coalesced_with="leader")
+        journal.begin_run("detached", "agent", {}, coalesced_with="leader")
+        journal.end_run("detached", status=RunStatus.CANCELLED)
+        journaled_stream(journal, "leader").publish(
+            CagentEvent(EventType.RESULT, {"result": "shared"}, time.time())
+        )
+        journal.end_run("leader")
+
+        follower = await journal.get("follower", include_events=True)
+        assert follower["status"] == RunStatus.COMPLETED
+        assert follower["result"] == "shared"
+        assert len(follower["events"]) == 1
+        assert (await journal.get("detached"))["status"] == RunStatus.CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_list_runs_paginates_newest_first(self):
+        """Test listing pages through runs and filters by status and agent."""
+        journal = ExecutionJournal()
+        for i in range(5):
+            journal.begin_run(f"r{i}", "agent", {}, agent_id="a" if i % 2 else "b")
+            journal.end_run(f"r{i}", status=RunStatus.COMPLETED if i < 4 else RunStatus.FAILED)
+
+        page = await journal.list_runs(limit=2, offset=1)
+        assert [run["request_id"] for run in page["runs"]] == ["r3", "r2"]
+        assert page["total"] == 5
+        assert (await journal.list_runs(agent_id="a"))["total"] == 2
+        assert [run["request_id"] for run in (await journal.list_runs(status="failed"))["runs"]] == ["r4"]
+
+    @pytest.mark.asyncio
+    async def test_old_finished_runs_are_pruned(self):
+        """Test only max_runs finished runs are retained."""
+        journal = ExecutionJournal(max_runs=2)
+        for i in range(4):
+            journal.begin_run(f"r{i}", "agent", {})
+            journal.end_run(f"r{i}")
+
+        listing = await journal.list_runs()
+        assert [run["request_id"] for run in listing["runs"]] == ["r3", "r2"]
+
+    @pytest.mark.asyncio
+    async def test_events_of_older_runs_are_pruned_first(self):
+        """Test only max_event_runs finished runs keep their events; outcomes stay for max_runs."""
+        journal = ExecutionJournal(max_runs=3, max_event_runs=1)
+        for i in range(4):
+            journal.begin_run(f"r{i}", "agent", {})
+            journaled_stream(journal, f"r{i}").publish(CagentEvent(EventType.RESULT, {"result": i}, time.time()))
+            journal.end_run(f"r{i}")
+
+        newest = await journal.get("r3", include_events=True)
+        older = await journal.get("r2", include_events=True)
+        assert len(newest["events"]) == 1
+        assert older["events"] == [] and older["result"] == 2
+        assert await journal.get("r0") is None
+
+    def test_event_retention_default(self, tmp_path):
+        """Test both in-memory and file-backed journals keep events of few runs by default."""
+        assert ExecutionJournal(db_path=":memory:").max_event_runs == DEFAULT_EVENT_RUNS
+        on_disk = ExecutionJournal(db_path=str(tmp_path / "nested" / "journal.db"))
+        assert on_disk.max_event_runs == DEFAULT_EVENT_RUNS < on_disk.max_runs
+        assert (tmp_path / "nested" / "journal.db").exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_is_retried(self):
+        """Test writes of a failed commit stay queued and land with the next one."""
+        journal = ExecutionJournal()
+        journal._db = FailingConnection(journal._db, failures=1)
+        journal.begin_run("r1", "agent", {})
+        journaled_stream(journal, "r1").publish(CagentEvent(EventType.RESULT, {"result": "done"}, time.time()))
+        journal.end_run("r1")
+
+        with pytest.raises(sqlite3.Error):
+            await journal.flush()
+        run = await journal.get("r1")
+
+        assert run["status"] == RunStatus.COMPLETED
+        assert run["result"] == "done"
+        assert journal.stats()["failed_commits"] == 1
+        assert journal.stats()["dropped_writes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_writes_dropped_after_commit_attempts(self):
+        """Test a batch that keeps failing is dropped instead of queued forever."""
+        journal = ExecutionJournal()
+        journal._db = FailingConnection(journal._db, failures=COMMIT_ATTEMPTS)
+        journal.begin_run("r1", "agent", {})
+
+        for _ in range(COMMIT_ATTEMPTS):
+            with pytest.raises(sqlite3.Error):
+                await journal.flush()
+
+        assert journal.stats()["pending_writes"] == 0
+        assert journal.stats()["dropped_writes"] == 1
+        assert await journal.get("r1") is None
+
+    @pytest.mark.asyncio
+    async def test_flusher_group_commits(self):
+        """Test queued writes are committed together by the background flusher."""
+        journal = ExecutionJournal(flush_interval=0.01)
+        await journal.open()
+        journal.begin_run("r1", "agent", {})
+        stream = journaled_stream(journal, "r1")
+        for i in range(10):
+            stream.publish(CagentEvent(EventType.THINKING, {"content": str(i)}, time.time()))
+        await asyncio.sleep(0.05)
+
+        stats = journal.stats()
+        assert stats["pending_writes"] == 0
+        assert stats["writes"] == 11
+        assert stats["commits"] == 1
+        await journal.close()
+
+    @pytest.mark.asyncio
+    async def test_restart_marks_running_runs_interrupted(self, tmp_path):
+        """Test results survive a restart and runs cut off by it are marked interrupted."""
+        db_path = str(tmp_path / "journal.db")
+        journal = ExecutionJournal(db_path=db_path)
+        await journal.open()
+        journal.begin_run("finished", "agent", {})
+        journaled_stream(journal, "finished").publish(
+            CagentEvent(EventType.RESULT, {"result": "kept"}, time.time())
+        )
+        journal.end_run("finished")
+        journal.begin_run("in-flight", "agent", {})
+        await journal.close()
+
+        # A fresh journal on the same file, as after a sidecar restart
+        restarted = ExecutionJournal(db_path=db_path)
+        assert await restarted.open() == 1
+        assert (await restarted.get("finished"))["result"] == "kept"
+        assert (await restarted.get("in-flight"))["status"] == RunStatus.INTERRUPTED
+        await restarted.close()
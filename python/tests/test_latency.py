@@ -0,0 +1,63 @@
+"""Unit tests for latency module."""
+
+import pytest
+
+from latency import FIRST_EVENT, TOTAL, LatencyTracker
+
+
+class TestLatencyTracker:
+    """Tests for rolling percentiles and derived deadlines."""
+
+    def test_no_percentiles_until_min_samples(self):
+        """Test the maximum timeout applies and hedging is off while samples are scarce."""
+        tracker = LatencyTracker(min_samples=5, max_timeout=300.0)
+        for _ in range(4):
+            tracker.record("planner", 1.0, 10.0)
+
+        assert tracker.percentile("planner", TOTAL, 99) is None
+        assert tracker.timeout_for("planner") == 300.0
+        assert tracker.hedge_delay("planner") is None
+        assert tracker.timeout_for("unknown") == 300.0
+
+    def test_percentiles_over_window(self):
+        """Test nearest-rank percentiles use only the most recent window."""
+        tracker = LatencyTracker(window=100, min_samples=1)
+        for value in range(1, 201):
+            tracker.record("planner", value / 100, None)
+
+        assert tracker.percentile("planner", FIRST_EVENT, 50) == 1.5
+        assert tracker.percentile("planner", FIRST_EVENT, 95) == 1.95
+        assert tracker.hedge_delay("planner") == 1.95
+        assert tracker.percentile("planner", TOTAL, 50) is None
+
+    @pytest.mark.parametrize("duration,expected", [(0.5, 30.0), (20.0, 60.0), (500.0, 300.0)])
+    def test_timeout_is_clamped_multiple_of_p99(self, duration, expected):
+        """Test derived timeouts stay within the configured bounds."""
+        tracker = LatencyTracker(min_samples=3, timeout_multiplier=3.0, min_timeout=30.0, max_timeout=300.0)
+        for _ in range(3):
+            tracker.record("scheduling", None, duration)
+
+        assert tracker.timeout_for("scheduling") == expected
+
+    def test_stopped_runs_raise_timeout(self):
+        """Test runs stopped at the timeout push the derived timeout back up."""
+        tracker = LatencyTracker(min_samples=20, timeout_multiplier=2.0, min_timeout=1.0)
+        for _ in range(20):
+            tracker.record("planner", None, 10.0)
+        assert tracker.timeout_for("planner") == 20.0
+
+        tracker.record("planner", None, 20.0, stopped=True)
+
+        assert tracker.timeout_for("planner") == 40.0
+        assert tracker.stats()["stopped_runs"] == 1
+
+    def test_stats(self):
+        """Test stats report per-agent percentiles and counters."""
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("scheduling", 0.1, 2.0)
+        tracker.retries += 1
+
+        stats = tracker.stats()
+        assert stats["agents"]["scheduling"]["total_p99"] == 2.0
+        assert stats["agents"]["scheduling"]["samples"] == 1
+        assert stats["retries"] == 1
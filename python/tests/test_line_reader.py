@@ -0,0 +1,90 @@
+"""Unit tests for line_reader module."""
+
+import asyncio
+import os
+import pytest
+
+from line_reader import ChunkedLineReader, SpilledLine
+
+
+def make_stream(*chunks: bytes) -> asyncio.StreamReader:
+    """Build a StreamReader that returns the given data, then EOF."""
+    stream = asyncio.StreamReader()
+    for chunk in chunks:
+        stream.feed_data(chunk)
+    stream.feed_eof()
+    return stream
+
+
+async def collect(reader: ChunkedLineReader) -> list:
+    """Read every line, loading spilled lines back from disk."""
+    lines = []
+    async for line in reader:
+        if isinstance(line, SpilledLine):
+            lines.append(("spilled", line.read()))
+            line.discard()
+        else:
+            lines.append(line)
+    return lines
+
+
+class TestChunkedLineReader:
+    """Tests for incremental line splitting."""
+
+    @pytest.mark.asyncio
+    async def test_splits_lines_across_chunks(self):
+        """Test lines split over chunk boundaries, CRLF and a final partial line."""
+        stream = make_stream(b'{"a": 1}\n{"b"', b': 2}\r\n\nlast')
+        reader = ChunkedLineReader(stream, chunk_size=5)
+
+        assert await collect(reader) == [b'{"a": 1}', b'{"b": 2}', b"", b"last"]
+        assert reader.lines == 4
+        assert reader.spilled == 0
+
+    @pytest.mark.asyncio
+    async def test_line_longer_than_readline_limit(self):
+        """Test a line beyond StreamReader's 64 KiB readline limit is returned intact."""
+        payload = b"x" * (1024 * 1024)
+        reader = ChunkedLineReader(make_stream(payload + b"\nnext\n"))
+
+        assert await collect(reader) == [payload, b"next"]
+        assert reader.longest_line == len(payload)
+
+    @pytest.mark.asyncio
+    async def test_oversized_line_is_spilled(self, tmp_path):
+        """Test lines above max_line_bytes go through a temp file."""
+        payload = b"y" * 10_000
+        stream = make_stream(b"short\n", payload[:3000], payload[3000:] + b"\r", b"\ntail\n")
+        reader = ChunkedLineReader(stream, chunk_size=1024, max_line_bytes=2048, spill_dir=str(tmp_path))
+
+        assert await collect(reader) == [b"short", ("spilled", payload), b"tail"]
+        assert reader.spilled == 1
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_spill_file_removed_when_abandoned(self, tmp_path):
+        """Test a partially spilled line is deleted if reading stops early."""
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"z" * 5000)
+        reader = ChunkedLineReader(stream, chunk_size=1024, max_line_bytes=100, spill_dir=str(tmp_path))
+
+        lines = reader.__aiter__()
+        pending = asyncio.create_task(lines.__anext__())
+        await asyncio.sleep(0.01)
+        assert len(list(tmp_path.iterdir())) == 1
+
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert list(tmp_path.iterdir()) == []
+
+    def test_spilled_line_discard_is_idempotent(self, tmp_path):
+        """Test discarding an already deleted spill file is a no-op."""
+        path = tmp_path / "line"
+        path.write_bytes(b"data")
+        line = SpilledLine(str(path), 4)
+
+        assert line.read() == b"data"
+        line.discard()
+        line.discard()
+        assert not os.path.exists(path)
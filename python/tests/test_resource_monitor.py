@@ -0,0 +1,118 @@
+"""Unit tests for resource_monitor module."""
+
+import os
+import subprocess
+import sys
+import pytest
+
+from resource_monitor import (
+    ResourceLimits,
+    ResourceMonitor,
+    ResourceStats,
+    ResourceUsage,
+    sample_process_tree,
+)
+
+
+class TestResourceLimits:
+    """Tests for limit checks."""
+
+    def test_no_limits(self):
+        """Test an unconfigured limit never triggers."""
+        usage = ResourceUsage(cpu_seconds=1e6, peak_rss_bytes=10**12, peak_children=1000)
+        assert ResourceLimits().check(usage) is None
+
+    @pytest.mark.parametrize(
+        "limits,usage,fragment",
+        [
+            (ResourceLimits(max_rss_mb=100), ResourceUsage(peak_rss_bytes=200 * 1024 * 1024), "RSS"),
+            (ResourceLimits(max_cpu_seconds=5), ResourceUsage(cpu_seconds=6.0), "CPU time"),
+            (ResourceLimits(max_children=2), ResourceUsage(peak_children=3), "child processes"),
+        ],
+    )
+    def test_exceeded_limit_is_described(self, limits, usage, fragment):
+        """Test each limit reports what was exceeded."""
+        assert fragment in limits.check(usage)
+
+    def test_within_limits(self):
+        """Test usage at the limit is allowed."""
+        limits = ResourceLimits(max_rss_mb=100, max_cpu_seconds=5, max_children=2)
+        usage = ResourceUsage(cpu_seconds=5.0, peak_rss_bytes=100 * 1024 * 1024, peak_children=2)
+        assert limits.check(usage) is None
+
+
+class TestSampling:
+    """Tests for process tree sampling."""
+
+    def test_sample_current_process(self):
+        """Test a live process reports non-zero usage."""
+        cpu_seconds, rss_bytes, open_fds, children = sample_process_tree(os.getpid())
+        assert rss_bytes > 0
+        assert open_fds > 0
+        assert cpu_seconds >= 0
+
+    def test_sample_includes_children(self):
+        """Test descendants are counted."""
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            _, _, _, children = sample_process_tree(os.getpid())
+            assert children >= 1
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_sample_missing_process(self):
+        """Test a vanished root yields None."""
+        child = subprocess.Popen([sys.executable, "-c", "pass"])
+        child.wait()
+        assert sample_process_tree(child.pid) is None
+
+
+class TestResourceMonitor:
+    """Tests for peak tracking and enforcement."""
+
+    @pytest.mark.asyncio
+    async def test_sample_tracks_peaks(self):
+        """Test samples update the usage peaks."""
+        monitor = ResourceMonitor(os.getpid())
+        assert await monitor.sample()
+        assert monitor.usage.samples == 1
+        assert monitor.usage.peak_rss_bytes > 0
+
+    @pytest.mark.asyncio
+    async def test_exceeded_callback_fires_once(self):
+        """Test on_exceeded is called a single time with the reason."""
+        reasons = []
+        monitor = ResourceMonitor(os.getpid(), ResourceLimits(max_rss_mb=0.001), on_exceeded=reasons.append)
+        await monitor.sample()
+        await monitor.sample()
+
+        assert len(reasons) == 1
+        assert monitor.violation == reasons[0]
+
+    @pytest.mark.asyncio
+    async def test_stop_returns_usage(self):
+        """Test the background loop can be stopped."""
+        monitor = ResourceMonitor(os.getpid(), interval=0.01)
+        monitor.start()
+        usage = await monitor.stop()
+        assert usage is monitor.usage
+
+
+class TestResourceStats:
+    """Tests for per-agent aggregation."""
+
+    def test_record_aggregates_per_agent(self):
+        """Test totals, maxima and means per agent."""
+        stats = ResourceStats()
+        stats.record("a", ResourceUsage(cpu_seconds=1.0, peak_rss_bytes=100, samples=1))
+        stats.record("a", ResourceUsage(cpu_seconds=2.0, peak_rss_bytes=300, samples=1), "RSS")
+        stats.record("b", ResourceUsage(peak_children=4, samples=1))
+
+        snapshot = stats.stats()
+        assert snapshot["a"]["executions"] == 2
+        assert snapshot["a"]["cpu_seconds_total"] == 3.0
+        assert snapshot["a"]["peak_rss_bytes_max"] == 300
+        assert snapshot["a"]["peak_rss_bytes_mean"] == 200
+        assert snapshot["a"]["limit_violations"] == 1
+        assert snapshot["b"]["peak_children_max"] == 4
@@ -0,0 +1,153 @@
+"""Unit tests for result_cache module."""
+
+import os
+import pytest
+from unittest.mock import patch
+
+from result_cache import ResultCache, TeamFingerprint
+
+
+@pytest.fixture
+def team_dir(tmp_path):
+    """Minimal team.yaml referencing a prompt file, a brand doc and a memory DB."""
+    (tmp_path / "prompts").mkdir()
+    (tmp_path / "prompts" / "instruction.md").write_text("Be helpful.\n")
+    (tmp_path / "brands" / "acme" / "knowledge").mkdir(parents=True)
+    (tmp_path / "brands" / "acme" / "knowledge" / "guidelines.md").write_text("Use blue.\n")
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "agent.db").write_bytes(b"state")
+    (tmp_path / "team.yaml").write_text(
+        "agents:\n"
+        "  writer:\n"
+        "    add_prompt_files:\n"
+        "      - ./prompts/instruction.md\n"
+        "    toolsets:\n"
+        "      - type: memory\n"
+        "        path: ./memory/agent.db\n"
+        "rag:\n"
+        "  guidelines:\n"
+        '    docs: ["${BRAND_DIR:-./brands/acme}/knowledge/guidelines.md"]\n'
+    )
+    return tmp_path
+
+
+class TestTeamFingerprint:
+    """Tests for team.yaml reference discovery and hashing."""
+
+    def test_referenced_files(self, team_dir):
+        """Test prompt and knowledge files are found and state DBs ignored."""
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("BRAND_DIR", None)
+            files = TeamFingerprint(str(team_dir / "team.yaml")).referenced_files()
+
+        names = {path.name for path in files}
+        assert names == {"team.yaml", "instruction.md", "guidelines.md"}
+
+    def test_env_default_override(self, team_dir, tmp_path_factory):
+        """Test ${VAR:-default} references follow the environment."""
+        other = tmp_path_factory.mktemp("brand")
+        (other / "knowledge").mkdir()
+        (other / "knowledge" / "guidelines.md").write_text("Use red.\n")
+
+        with patch.dict(os.environ, {"BRAND_DIR": str(other)}):
+            files = TeamFingerprint(str(team_dir / "team.yaml")).referenced_files()
+
+        assert other / "knowledge" / "guidelines.md" in files
+
+    def test_fingerprint_changes_with_prompt_content(self, team_dir):
+        """Test editing a referenced file changes the fingerprint."""
+        fingerprint = TeamFingerprint(str(team_dir / "team.yaml"))
+        before = fingerprint.compute()
+        assert fingerprint.compute() == before
+
+        (team_dir / "prompts" / "instruction.md").write_text("Be terse, please.\n")
+        assert fingerprint.compute() != before
+
+    def test_fingerprint_ignores_memory_db(self, team_dir):
+        """Test runtime state files do not invalidate the cache."""
+        fingerprint = TeamFingerprint(str(team_dir / "team.yaml"))
+        before = fingerprint.compute()
+        (team_dir / "memory" / "agent.db").write_bytes(b"new state")
+        assert fingerprint.compute() == before
+
+
+class TestResultCache:
+    """Tests for the memory and SQLite tiers."""
+
+    EVENTS = [
+        {"event_type": "thinking", "data": {"content": "hmm"}, "timestamp": 1.0},
+        {"event_type": "result", "data": {"result": "ok"}, "timestamp": 2.0},
+    ]
+
+    def test_key_is_stable_and_order_independent(self, team_dir):
+        """Test equal requests produce equal keys regardless of dict order."""
+        cache = ResultCache(str(team_dir / "team.yaml"))
+        first = cache.key_for("writer", {"input": "x", "n": 1}, {"a": 1, "b": 2})
+        second = cache.key_for("writer", {"n": 1, "input": "x"}, {"b": 2, "a": 1})
+        assert first == second
+        assert first != cache.key_for("writer", {"input": "y", "n": 1}, {"a": 1, "b": 2})
+
+    def test_key_changes_when_prompt_changes(self, team_dir):
+        """Test prompt edits invalidate existing keys."""
+        cache = ResultCache(str(team_dir / "team.yaml"))
+        before = cache.key_for("writer", {"input": "x"}, None)
+        (team_dir / "brands" / "acme" / "knowledge" / "guidelines.md").write_text("Use green.\n")
+        assert cache.key_for("writer", {"input": "x"}, None) != before
+
+    @pytest.mark.asyncio
+    async def test_put_then_get(self, team_dir):
+        """Test stored events are returned on a hit."""
+        cache = ResultCache(str(team_dir / "team.yaml"))
+        assert await cache.get("k") is None
+        await cache.put("k", self.EVENTS)
+
+        assert await cache.get("k") == self.EVENTS
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, team_dir):
+        """Test entries expire after ttl."""
+        cache = ResultCache(str(team_dir / "team.yaml"), ttl=10.0)
+        with patch("result_cache.time.time", return_value=100.0):
+            await cache.put("k", self.EVENTS)
+        with patch("result_cache.time.time", return_value=111.0):
+            assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, team_dir):
+        """Test least recently used entries are evicted first."""
+        cache = ResultCache(str(team_dir / "team.yaml"), max_entries=2)
+        await cache.put("a", self.EVENTS)
+        await cache.put("b", self.EVENTS)
+        await cache.get("a")
+        await cache.put("c", self.EVENTS)
+
+        assert await cache.get("a") is not None
+        assert await cache.get("b") is None
+
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_survives_new_instance(self, team_dir, tmp_path_factory):
+        """Test the on-disk tier serves entries to a fresh cache."""
+        db_path = str(tmp_path_factory.mktemp("cache") / "results.db")
+        first = ResultCache(str(team_dir / "team.yaml"), db_path=db_path)
+        await first.put("k", self.EVENTS)
+        first.close()
+
+        second = ResultCache(str(team_dir / "team.yaml"), db_path=db_path)
+        assert await second.get("k") == self.EVENTS
+        second.close()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_tier_honours_ttl(self, team_dir, tmp_path_factory):
+        """Test expired rows are not served from disk."""
+        db_path = str(tmp_path_factory.mktemp("cache") / "results.db")
+        first = ResultCache(str(team_dir / "team.yaml"), db_path=db_path, ttl=10.0)
+        with patch("result_cache.time.time", return_value=100.0):
+            await first.put("k", self.EVENTS)
+        first.close()
+
+        second = ResultCache(str(team_dir / "team.yaml"), db_path=db_path, ttl=10.0)
+        with patch("result_cache.time.time", return_value=111.0):
+            assert await second.get("k") is None
+        second.close()
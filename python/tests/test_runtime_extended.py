@@ -1,11 +1,13 @@
 """Extended unit tests for runtime module - edge cases and regressions."""
 
 import asyncio
+import time
 import pytest
 import pathlib
+import sys
 from unittest.mock import Mock, patch, MagicMock
 
-from runtime import CagentRuntime, CagentRuntimeError, EventType
+from runtime import CagentEvent, CagentRuntime, CagentRuntimeError, EventType
 
 
 class TestRuntimeEdgeCases:
@@ -422,4 +424,660 @@ class TestRuntimeStressTests:
                 events.append(event)
 
             # Should handle special characters
-            mock_proc.stdin.write.assert_called()
\ No newline at end of file
+            mock_proc.stdin.write.assert_called()
+
+class TestWorkerPoolIntegration:
+    """Tests for execute_agent taking parked processes from the worker pool."""
+
+    @staticmethod
+    def _finished_proc():
+        mock_proc = MagicMock()
+        mock_proc.pid = 12345
+        mock_proc.returncode = 0
+        mock_proc.stdin = MagicMock()
+
+        async def mock_stdout_read():
+            return '{"result": "pooled"}'
+        async def mock_stderr_read():
+            return ""
+        async def mock_wait():
+            return 0
+
+        mock_proc.stdout.read = mock_stdout_read
+        mock_proc.stderr.read = mock_stderr_read
+        mock_proc.wait = mock_wait
+        return mock_proc
+
+    @pytest.mark.asyncio
+    async def test_pooled_process_used_instead_of_spawn(self, tmp_path):
+        """Test a warm worker is fed the input and no new process is spawned."""
+        from worker_pool import PooledWorker
+
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml))
+
+        pooled_proc = self._finished_proc()
+        runtime.worker_pool = MagicMock()
+
+        async def acquire(agent_id):
+            return PooledWorker(agent_id, pooled_proc)
+
+        runtime.worker_pool.acquire = acquire
+
+        with patch("asyncio.create_subprocess_exec") as mock_exec:
+            events = [event async for event in runtime.execute_agent("orchestrator", "input")]
+
+        assert not mock_exec.called
+        pooled_proc.stdin.write.assert_called()
+        assert events[-1].data == {"result": "pooled"}
+
+    @pytest.mark.asyncio
+    async def test_pool_miss_falls_back_to_spawn(self, tmp_path):
+        """Test execution spawns a process when the pool has none ready."""
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml))
+
+        runtime.worker_pool = MagicMock()
+
+        async def acquire(agent_id):
+            return None
+
+        runtime.worker_pool.acquire = acquire
+
+        with patch("asyncio.create_subprocess_exec") as mock_exec:
+            mock_exec.return_value = self._finished_proc()
+            events = [event async for event in runtime.execute_agent("orchestrator", "input")]
+
+        assert mock_exec.called
+        assert mock_exec.call_args.args[:2] == ("cagent", "exec")
+        assert events[-1].data == {"result": "pooled"}
+
+
+class TestResourceAccounting:
+    """Tests for per-execution resource sampling and limits."""
+
+    @staticmethod
+    def _runtime(tmp_path, **kwargs):
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            return CagentRuntime(str(team_yaml), **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_result_event_reports_resources(self, tmp_path):
+        """Test the terminal result carries the execution's resource peaks."""
+        import sys
+
+        runtime = self._runtime(tmp_path, resource_sample_interval=0.01)
+        script = "import sys, json; sys.stdin.read(); print(json.dumps({'result': 'ok'}))"
+
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            events = [event async for event in runtime.execute_agent("extraction", "input")]
+
+        result = events[-1]
+        assert result.event_type == EventType.RESULT
+        assert result.data["resources"]["peak_rss_bytes"] > 0
+        assert runtime.resource_stats.stats()["extraction"]["executions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_limit_aborts_runaway_execution(self, tmp_path):
+        """Test exceeding a limit kills the execution long before its timeout."""
+        import sys
+        from resource_monitor import ResourceLimits
+
+        runtime = self._runtime(
+            tmp_path,
+            resource_limits={"extraction": ResourceLimits(max_rss_mb=1)},
+            resource_sample_interval=0.01,
+        )
+        script = "import time; time.sleep(30)"
+
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            events = await asyncio.wait_for(
+                _collect_events(runtime.execute_agent("extraction", "input", timeout=60)),
+                timeout=10,
+            )
+
+        assert events[-1].event_type == EventType.ERROR
+        assert "Resource limit exceeded" in events[-1].data["error"]
+        assert "resources" in events[-1].data
+        assert runtime.resource_stats.stats()["extraction"]["limit_violations"] == 1
+
+
+async def _collect_events(generator):
+    return [event async for event in generator]
+
+
+@pytest.mark.skipif(not hasattr(__import__("os"), "killpg"), reason="process groups are POSIX only")
+class TestProcessGroupLifecycle:
+    """Tests for process-group signalling and parallel shutdown."""
+
+    # Ignores SIGTERM (inherited by its children) so only the SIGKILL escalation ends it
+    STUBBORN_TREE = (
+        "import signal, subprocess, sys, time\n"
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+        "children = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])"
+        " for _ in range(2)]\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+
+    @staticmethod
+    def _runtime(tmp_path):
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            return CagentRuntime(str(team_yaml))
+
+    @pytest.mark.asyncio
+    async def test_spawned_process_leads_its_own_group(self, tmp_path):
+        """Test cagent is started in a new session/process group."""
+        import os
+        import sys
+
+        runtime = self._runtime(tmp_path)
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", "input()"]):
+            proc = await runtime.spawn_process("test")
+
+        assert os.getpgid(proc.pid) == proc.pid != os.getpgid(0)
+        runtime._kill_process_tree(proc.pid, grace=0.5)
+        await proc.wait()
+
+    @pytest.mark.asyncio
+    async def test_children_get_grace_after_leader_exits(self, tmp_path):
+        """Test children still shutting down are not killed as soon as their leader exits."""
+        import sys
+
+        marker = tmp_path / "child-finished"
+        child = (
+            "import pathlib, signal, sys, time\n"
+            "def stop(*_):\n"
+            "    time.sleep(0.3)\n"
+            f"    pathlib.Path({str(marker)!r}).write_text('done')\n"
+            "    sys.exit(0)\n"
+            "signal.signal(signal.SIGTERM, stop)\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(60)\n"
+        )
+        leader = (
+            "import subprocess, sys, time\n"
+            f"child = subprocess.Popen([sys.executable, '-c', {child!r}], stdout=subprocess.PIPE)\n"
+            "child.stdout.readline()\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(60)\n"
+        )
+        runtime = self._runtime(tmp_path)
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", leader]):
+            proc = await runtime.spawn_process("test")
+        await proc.stdout.readline()
+
+        await runtime._kill_process_tree_async(proc.pid)
+
+        assert marker.read_text() == "done"
+        await proc.wait()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_kills_many_trees_under_one_deadline(self, tmp_path):
+        """Test shutdown of many stubborn trees costs one grace period, not one each."""
+        import psutil
+        import sys
+
+        runtime = self._runtime(tmp_path)
+        runs = 12
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", self.STUBBORN_TREE]):
+            procs = [await runtime.spawn_process("test") for _ in range(runs)]
+        for i, proc in enumerate(procs):
+            await proc.stdout.readline()
+            runtime.active_processes[f"run-{i}"] = proc
+
+        tree = [p for proc in procs for p in [psutil.Process(proc.pid), *psutil.Process(proc.pid).children()]]
+        assert len(tree) == runs * 3
+
+        started = time.monotonic()
+        await runtime.shutdown()
+        elapsed = time.monotonic() - started
+
+        # Sequential kills with a 2s grace each would take runs * 2s
+        assert elapsed < 2.0 * 3
+        _, alive = psutil.wait_procs(tree, timeout=2)
+        assert alive == []
+
+    @pytest.mark.asyncio
+    async def test_cancelling_consumer_kills_process_tree(self, tmp_path):
+        """Test cancelling the task reading a run kills its whole process group."""
+        import psutil
+
+        runtime = self._runtime(tmp_path)
+        tree = []
+
+        async def consume():
+            async for event in runtime.execute_agent("test", "x"):
+                if not tree:
+                    proc = next(iter(runtime.active_processes.values()))
+                    tree.extend([psutil.Process(proc.pid), *psutil.Process(proc.pid).children()])
+
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", self.STUBBORN_TREE]):
+            task = asyncio.create_task(consume())
+            while not tree:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert len(tree) == 3
+        _, alive = psutil.wait_procs(tree, timeout=2)
+        assert alive == []
+        assert not runtime.active_processes
+
+
+class TestBoundedLinePipeline:
+    """Tests for the bounded subprocess output queue."""
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_pauses_pipe_reading(self, tmp_path):
+        """Test buffered lines never exceed line_queue_size while the consumer lags."""
+        import sys
+        from backpressure import PipelineStats
+
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml), line_queue_size=4, resource_sample_interval=0)
+
+        script = "import sys\nsys.stdin.read()\nfor i in range(500): print('[THINKING] step', i)\n"
+        stats = PipelineStats()
+        events = []
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            async for event in runtime.execute_agent("chatty", "input", pipeline_stats=stats):
+                events.append(event)
+                if len(events) % 100 == 0:
+                    await asyncio.sleep(0.05)
+
+        assert len(events) == 500
+        assert stats.line_queue_high_water == 4
+
+
+    @pytest.mark.asyncio
+    async def test_chunked_parsing(self, tmp_path):
+        """Test chunked stdout parsing yields every event in order with seq numbers."""
+        import sys
+
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml), resource_sample_interval=0, chunked_parsing=True)
+
+        script = (
+            "import json, sys\n"
+            "sys.stdin.read()\n"
+            "for i in range(2000): print('[THINKING] step', i)\n"
+            "sys.stdout.write(json.dumps({'result': 'done'}))\n"
+        )
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            events = [event async for event in runtime.execute_agent("chatty", "input")]
+
+        assert len(events) == 2001
+        assert [event.seq for event in events] == list(range(2001))
+        assert events[1999].data == {"content": "step 1999"}
+        assert events[-1].event_type == EventType.RESULT
+        assert all(a.timestamp <= b.timestamp for a, b in zip(events, events[1:]))
+
+
+class TestLongOutputLines:
+    """Tests for output lines beyond the StreamReader readline limit."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("max_line_bytes", [8 * 1024 * 1024, 64 * 1024])
+    async def test_multi_megabyte_json_line(self, tmp_path, max_line_bytes):
+        """Test a large tool result is parsed whether it is buffered or spilled."""
+        import sys
+
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        spill_dir = tmp_path / "spill"
+        spill_dir.mkdir()
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(
+                str(team_yaml),
+                resource_sample_interval=0,
+                max_line_bytes=max_line_bytes,
+                spill_dir=str(spill_dir),
+            )
+
+        script = (
+            "import json, sys\n"
+            "sys.stdin.read()\n"
+            "photos = [{'uuid': str(i), 'path': '/p/' + 'x' * 4000} for i in range(500)]\n"
+            "print(json.dumps({'tool_result': photos}))\n"
+            "print(json.dumps({'result': 'done'}))\n"
+        )
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            events = [event async for event in runtime.execute_agent("photos", "input")]
+
+        assert [event.event_type for event in events] == [EventType.INFO, EventType.RESULT]
+        assert len(events[0].data["tool_result"]) == 500
+        assert list(spill_dir.iterdir()) == []
+
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunked_parsing", [False, True])
+    async def test_pretty_printed_json_is_one_event(self, tmp_path, chunked_parsing):
+        """Test an indented tool result yields one event instead of one per line."""
+        import sys
+
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            runtime = CagentRuntime(str(team_yaml), resource_sample_interval=0, chunked_parsing=chunked_parsing)
+
+        script = (
+            "import json, sys\n"
+            "sys.stdin.read()\n"
+            "photos = [{'uuid': str(i), 'keywords': ['a', 'b']} for i in range(300)]\n"
+            "print(json.dumps({'tool_result': photos}, indent=2))\n"
+            "print(json.dumps({'result': 'done'}))\n"
+        )
+        with patch.object(runtime, "build_command", return_value=[sys.executable, "-c", script]):
+            events = [event async for event in runtime.execute_agent("photos", "input")]
+
+        assert [event.event_type for event in events] == [EventType.INFO, EventType.RESULT]
+        assert len(events[0].data["tool_result"]) == 300
+
+
+class TestExecuteMany:
+    """Tests for fan-out execution of several agents."""
+
+    @staticmethod
+    def _runtime(tmp_path):
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            return CagentRuntime(str(team_yaml), resource_sample_interval=0)
+
+    @staticmethod
+    def _fake_agents(delays, failures=()):
+        """execute_agent stand-in: each agent thinks, sleeps its delay, then finishes."""
+        started = []
+        closed = []
+
+        async def fake_execute_agent(agent_id, user_input, context=None, timeout=300.0, pipeline_stats=None):
+            started.append((agent_id, context))
+            try:
+                yield CagentEvent(EventType.THINKING, {"content": f"{agent_id} on {user_input}"}, 0.0)
+                await asyncio.sleep(delays[agent_id])
+                if agent_id in failures:
+                    yield CagentEvent(EventType.ERROR, {"error": f"{agent_id} broke"}, 0.0)
+                else:
+                    yield CagentEvent(EventType.RESULT, {"result": f"{agent_id} done"}, 0.0)
+            finally:
+                closed.append(agent_id)
+
+        return fake_execute_agent, started, closed
+
+    @pytest.mark.asyncio
+    async def test_branches_run_concurrently_and_merge(self, tmp_path):
+        """Test branch events are tagged and the group result collects every branch."""
+        from runtime import GroupBranch
+
+        runtime = self._runtime(tmp_path)
+        fake, started, _ = self._fake_agents({"idea_validator": 0.1, "captioning": 0.1})
+        branches = [
+            GroupBranch("idea", "idea_validator"),
+            GroupBranch("caption-ig", "captioning", {"platform": "instagram"}),
+        ]
+
+        with patch.object(runtime, "execute_agent", fake):
+            began = time.monotonic()
+            events = [e async for e in runtime.execute_many(branches, "photo", context={"lang": "it"})]
+            elapsed = time.monotonic() - began
+
+        assert elapsed < 0.18
+        assert ("captioning", {"lang": "it", "platform": "instagram"}) in started
+        assert [e.event_type for e in events[:2]] == [EventType.THINKING, EventType.THINKING]
+        assert {e.data["branch"] for e in events[:4]} == {"idea", "caption-ig"}
+        assert sorted(e.event_type for e in events[2:4]) == [EventType.BRANCH_RESULT] * 2
+        assert events[-1].event_type == EventType.RESULT
+        assert events[-1].data["result"] == {"idea": "idea_validator done", "caption-ig": "captioning done"}
+        assert events[-1].data["errors"] == {}
+
+    @pytest.mark.asyncio
+    async def test_all_policy_reports_failures(self, tmp_path):
+        """Test the default policy waits for every branch and lists failures."""
+        from runtime import GroupBranch
+
+        runtime = self._runtime(tmp_path)
+        fake, _, _ = self._fake_agents({"a": 0.01, "b": 0.05}, failures={"a"})
+
+        with patch.object(runtime, "execute_agent", fake):
+            events = [e async for e in runtime.execute_many([GroupBranch("a", "a"), GroupBranch("b", "b")], "x")]
+
+        assert EventType.BRANCH_ERROR in [e.event_type for e in events]
+        assert events[-1].event_type == EventType.RESULT
+        assert events[-1].data["result"] == {"b": "b done"}
+        assert events[-1].data["errors"] == {"a": "a broke"}
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_cancels_remaining_branches(self, tmp_path):
+        """Test the first failure ends the group and closes the other branches."""
+        from runtime import GroupBranch, GroupPolicy
+
+        runtime = self._runtime(tmp_path)
+        fake, _, closed = self._fake_agents({"a": 0.01, "slow": 5.0}, failures={"a"})
+
+        with patch.object(runtime, "execute_agent", fake):
+            events = [
+                e async for e in runtime.execute_many(
+                    [GroupBranch("a", "a"), GroupBranch("slow", "slow")], "x", policy=GroupPolicy.FAIL_FAST
+                )
+            ]
+
+        assert events[-1].event_type == EventType.ERROR
+        assert events[-1].data["failed_branch"] == "a"
+        assert events[-1].data["cancelled"] == ["slow"]
+        assert sorted(closed) == ["a", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_branches_wait_for_admission(self, tmp_path):
+        """Test each branch holds its admission ticket only while it runs."""
+        from runtime import GroupBranch
+        from scheduler import AdmissionScheduler
+
+        runtime = self._runtime(tmp_path)
+        fake, started, _ = self._fake_agents({"a": 0.05, "b": 0.05})
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        tickets = {"a": scheduler.submit("a"), "b": scheduler.submit("b")}
+
+        with patch.object(runtime, "execute_agent", fake):
+            events = runtime.execute_many([GroupBranch("a", "a"), GroupBranch("b", "b")], "x", tickets=tickets)
+            first = await events.__anext__()
+            assert [agent for agent, _ in started] == ["a"]
+            rest = [e async for e in events]
+
+        assert first.data["branch"] == "a"
+        assert rest[-1].data["result"] == {"a": "a done", "b": "b done"}
+        assert scheduler.running == 0
+
+    @pytest.mark.asyncio
+    async def test_duplicate_branch_ids_rejected(self, tmp_path):
+        """Test branch ids must be unique."""
+        from runtime import GroupBranch
+
+        runtime = self._runtime(tmp_path)
+        with pytest.raises(CagentRuntimeError):
+            async for _ in runtime.execute_many([GroupBranch("a", "x"), GroupBranch("a", "y")], "x"):
+                pass
+
+
+class TestResilientExecution:
+    """Tests for adaptive timeouts, retries and hedged runs."""
+
+    @staticmethod
+    def _runtime(tmp_path, **kwargs):
+        team_yaml = tmp_path / "team.yaml"
+        team_yaml.write_text("metadata:\n  author: test\n")
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+            return CagentRuntime(str(team_yaml), resource_sample_interval=0, **kwargs)
+
+    @staticmethod
+    def _script(tmp_path, first_run: str, later_runs: str) -> list[str]:
+        """Command running first_run on its first invocation and later_runs afterwards."""
+        marker = tmp_path / "ran-before"
+        script = (
+            "import json, pathlib, sys, time\n"
+            f"marker = pathlib.Path({str(marker)!r})\n"
+            "first = not marker.exists()\n"
+            "marker.touch()\n"
+            f"exec({first_run!r} if first else {later_runs!r})\n"
+        )
+        return [sys.executable, "-c", script]
+
+    @pytest.mark.asyncio
+    async def test_exit_before_output_is_retried(self, tmp_path):
+        """Test a run that dies before any output is retried, its stderr forwarded as it arrives."""
+        runtime = self._runtime(tmp_path, max_retries=2, retry_backoff=0.01)
+        command = self._script(
+            tmp_path,
+            "print('connection reset', file=sys.stderr); sys.exit(3)",
+            "print(json.dumps({'result': 'ok'}))",
+        )
+
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+
+        assert [e.event_type for e in events] == [EventType.ERROR, EventType.INFO, EventType.RESULT]
+        assert events[0].data == {"error": "connection reset"}
+        assert "connection reset" in events[1].data["message"]
+        assert runtime.latency.retries == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted_surface_failure(self, tmp_path):
+        """Test the last attempt's errors are reported once retries run out."""
+        runtime = self._runtime(tmp_path, max_retries=1, retry_backoff=0.01)
+        command = [sys.executable, "-c", "import sys; print('boom', file=sys.stderr); sys.exit(2)"]
+
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+
+        assert [e.event_type for e in events] == [EventType.ERROR, EventType.INFO, EventType.ERROR, EventType.ERROR]
+        assert events[-1].data["error_code"] == "EXIT_BEFORE_OUTPUT"
+        assert events[-1].data["exit_code"] == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_derived_from_latency_percentiles(self, tmp_path):
+        """Test a fast agent gets a short timeout once it has enough samples."""
+        from latency import LatencyTracker
+
+        latency = LatencyTracker(min_samples=3, timeout_multiplier=2.0, min_timeout=0.3)
+        for _ in range(3):
+            latency.record("scheduling", 0.01, 0.05)
+        runtime = self._runtime(tmp_path, latency=latency)
+        command = [sys.executable, "-c", "import time; time.sleep(10)"]
+
+        started = time.monotonic()
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+
+        assert time.monotonic() - started < 2.0
+        assert events[-1].data["error_code"] == "TIMEOUT"
+        assert "0.3s" in events[-1].data["error"]
+
+    @pytest.mark.asyncio
+    async def test_timed_out_run_is_recorded_at_its_limit(self, tmp_path):
+        """Test a run stopped by the derived timeout raises the next timeout."""
+        from latency import LatencyTracker
+
+        latency = LatencyTracker(min_samples=3, timeout_multiplier=2.0, min_timeout=0.1)
+        for _ in range(3):
+            latency.record("scheduling", 0.01, 0.1)
+        runtime = self._runtime(tmp_path, latency=latency)
+        command = [sys.executable, "-c", "import time; time.sleep(10)"]
+
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+
+        assert events[-1].data["error_code"] == "TIMEOUT"
+        assert latency.stopped_runs == 1
+        assert latency.timeout_for("scheduling") == pytest.approx(0.4, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_fails_without_spawning(self, tmp_path):
+        """Test a caller deadline in the past ends the run before cagent starts."""
+        runtime = self._runtime(tmp_path)
+
+        with patch.object(runtime, "spawn_process") as spawn:
+            events = [e async for e in runtime.execute_agent("scheduling", "x", deadline=time.time() - 1)]
+
+        assert not spawn.called
+        assert events[0].data["error_code"] == "DEADLINE_EXCEEDED"
+
+    @pytest.mark.asyncio
+    async def test_late_first_event_is_hedged(self, tmp_path):
+        """Test a duplicate run starts after the p95 first-event time and the loser is killed."""
+        from latency import LatencyTracker
+
+        latency = LatencyTracker(min_samples=3)
+        for _ in range(3):
+            latency.record("scheduling", 0.2, None)
+        runtime = self._runtime(tmp_path, latency=latency, hedge=True)
+        command = self._script(
+            tmp_path,
+            "time.sleep(10); print(json.dumps({'result': 'slow'}))",
+            "print(json.dumps({'result': 'fast'}))",
+        )
+
+        started = time.monotonic()
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+
+        assert time.monotonic() - started < 3.0
+        assert events[-1].data == {"result": "fast"}
+        assert (latency.hedges, latency.hedge_wins) == (1, 1)
+        assert not runtime.active_processes
+
+    @pytest.mark.asyncio
+    async def test_hedge_takes_batch_slot(self, tmp_path):
+        """Test a hedged run holds a scheduler slot while it runs and is skipped without one."""
+        from latency import LatencyTracker
+        from scheduler import AdmissionScheduler
+
+        latency = LatencyTracker(min_samples=3)
+        for _ in range(3):
+            latency.record("scheduling", 0.2, None)
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_agent=2)
+        runtime = self._runtime(tmp_path, latency=latency, hedge=True, scheduler=scheduler)
+        command = self._script(
+            tmp_path,
+            "time.sleep(0.8); print(json.dumps({'result': 'slow'}))",
+            "print(json.dumps({'result': 'fast'}))",
+        )
+
+        primary = scheduler.submit("scheduling")
+        with patch.object(runtime, "build_command", return_value=command):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+        assert events[-1].data == {"result": "fast"}
+        assert (latency.hedges, latency.hedges_skipped) == (1, 0)
+        assert scheduler.running == 1  # the hedge's slot was given back
+
+        blocker = scheduler.submit("scheduling")
+        slow = [sys.executable, "-c", "import json, time; time.sleep(0.5); print(json.dumps({'result': 'slow'}))"]
+        with patch.object(runtime, "build_command", return_value=slow):
+            events = [e async for e in runtime.execute_agent("scheduling", "x")]
+        assert events[-1].data == {"result": "slow"}
+        assert (latency.hedges, latency.hedges_skipped) == (1, 1)
+        primary.release()
+        blocker.release()
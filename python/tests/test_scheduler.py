@@ -0,0 +1,166 @@
+"""Unit tests for scheduler module."""
+
+import asyncio
+import pytest
+
+from scheduler import AdmissionScheduler, Priority, SchedulerQueueFullError
+
+
+class TestAdmission:
+    """Tests for concurrency caps."""
+
+    def test_admits_under_global_cap(self):
+        """Test runs are admitted immediately while capacity remains."""
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_agent=2)
+        first = scheduler.submit("a")
+        second = scheduler.submit("b")
+
+        assert first.admitted and second.admitted
+        assert scheduler.running == 2
+
+    def test_queues_over_global_cap(self):
+        """Test runs beyond the global cap wait in the queue."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        scheduler.submit("a")
+        waiting = scheduler.submit("b")
+
+        assert not waiting.admitted
+        assert waiting.position == 1
+        assert scheduler.queued == 1
+
+    def test_per_agent_cap(self):
+        """Test one agent cannot take every slot."""
+        scheduler = AdmissionScheduler(max_concurrent=3, max_per_agent=1)
+        scheduler.submit("a")
+        same_agent = scheduler.submit("a")
+        other_agent = scheduler.submit("b")
+
+        assert not same_agent.admitted
+        assert other_agent.admitted
+
+    def test_release_admits_next_waiter(self):
+        """Test releasing a slot admits the next queued run."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        running = scheduler.submit("a")
+        waiting = scheduler.submit("b")
+
+        running.release()
+        assert waiting.admitted
+        assert scheduler.running == 1
+        assert scheduler.queued == 0
+
+    def test_try_submit_never_queues(self):
+        """Test try_submit admits into a free slot and otherwise returns None."""
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_agent=2)
+        scheduler.submit("a")
+        extra = scheduler.try_submit("a")
+
+        assert extra.admitted and extra.priority == Priority.BATCH
+        assert scheduler.try_submit("a") is None
+        assert scheduler.queued == 0
+
+        extra.release()
+        assert scheduler.running == 1
+
+    def test_release_is_idempotent(self):
+        """Test double release does not free two slots."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        ticket = scheduler.submit("a")
+        ticket.release()
+        ticket.release()
+        assert scheduler.running == 0
+
+    def test_waiter_blocked_by_agent_cap_is_skipped(self):
+        """Test a waiter for a saturated agent does not block other agents."""
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_agent=1)
+        a_running = scheduler.submit("a")
+        b_running = scheduler.submit("b")
+        a_waiting = scheduler.submit("a")
+        c_waiting = scheduler.submit("c")
+
+        b_running.release()
+        assert c_waiting.admitted
+        assert not a_waiting.admitted
+
+        a_running.release()
+        assert a_waiting.admitted
+
+
+class TestPriorityLanes:
+    """Tests for interactive and batch lanes."""
+
+    def test_interactive_admitted_before_batch(self):
+        """Test interactive runs overtake queued batch runs."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        running = scheduler.submit("a")
+        batch = scheduler.submit("b", priority=Priority.BATCH)
+        interactive = scheduler.submit("c", priority=Priority.INTERACTIVE)
+
+        assert interactive.position == 1
+        assert batch.position == 2
+
+        running.release()
+        assert interactive.admitted
+        assert not batch.admitted
+
+    def test_unknown_priority_rejected(self):
+        """Test unknown lanes are rejected."""
+        scheduler = AdmissionScheduler()
+        with pytest.raises(ValueError):
+            scheduler.submit("a", priority="urgent")
+
+
+class TestBoundedQueue:
+    """Tests for queue limits and position updates."""
+
+    def test_queue_full_raises(self):
+        """Test submissions beyond max_queue are rejected with retry_after."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1, max_queue=1, retry_after=7.0)
+        scheduler.submit("a")
+        scheduler.submit("b")
+
+        with pytest.raises(SchedulerQueueFullError) as exc_info:
+            scheduler.submit("c")
+
+        assert exc_info.value.retry_after == 7.0
+        assert scheduler.stats()["rejected_total"] == 1
+
+    def test_position_callback_on_queue_and_advance(self):
+        """Test waiters are told their position as the queue moves."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        positions = []
+        running = scheduler.submit("a")
+        scheduler.submit("b")
+        scheduler.submit("c", on_position=positions.append)
+
+        running.release()
+        assert positions == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_wait_until_admitted(self):
+        """Test ticket.wait() returns once a slot is free."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        running = scheduler.submit("a")
+        waiting = scheduler.submit("b")
+
+        waiter = asyncio.create_task(waiting.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        running.release()
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_leaves_queue(self):
+        """Test cancelling a queued run frees its queue position."""
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        scheduler.submit("a")
+        waiting = scheduler.submit("b")
+
+        waiter = asyncio.create_task(waiting.wait())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert scheduler.queued == 0
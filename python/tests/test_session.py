@@ -0,0 +1,202 @@
+"""Unit tests for session module."""
+
+import asyncio
+import sys
+import pytest
+from unittest.mock import AsyncMock
+
+from event_parser import EventType
+from session import AgentSession, SessionError, SessionManager
+
+# Minimal session speaking the line-delimited protocol: echoes each input,
+# answers "slow" after a delay, "big" with a 200 KB result, "many" after 20
+# status lines, exits on "crash" and never answers "hang".
+FAKE_SESSION = r"""
+import json, sys, threading, time
+
+def answer(request):
+    if request["input"] == "slow":
+        time.sleep(0.2)
+    if request["input"] == "big":
+        print(json.dumps({"id": request["id"], "result": "x" * 200_000}), flush=True)
+        return
+    if request["input"] == "many":
+        for i in range(20):
+            print(json.dumps({"id": request["id"], "status": i}), flush=True)
+    print(json.dumps({"id": request["id"], "status": "thinking"}), flush=True)
+    print(json.dumps({"id": request["id"], "result": "echo " + request["input"]}), flush=True)
+
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get("cancel") or request["input"] == "hang":
+        continue
+    if request["input"] == "crash":
+        sys.exit(3)
+    threading.Thread(target=answer, args=(request,)).start()
+"""
+
+
+async def _terminate(pid: int) -> None:
+    """Kill a test session process."""
+    import psutil
+
+    try:
+        psutil.Process(pid).kill()
+    except psutil.NoSuchProcess:
+        pass
+
+
+def _session(**kwargs) -> AgentSession:
+    return AgentSession("scheduling", [sys.executable, "-c", FAKE_SESSION], _terminate, **kwargs)
+
+
+async def _collect(session: AgentSession, conversation_id: str, user_input: str, timeout: float = 5.0):
+    return [event async for event in session.execute(conversation_id, user_input, timeout=timeout)]
+
+
+class TestAgentSession:
+    """Tests for conversation multiplexing and supervision."""
+
+    @pytest.mark.asyncio
+    async def test_single_conversation(self):
+        """Test a conversation receives its events and ends at the result."""
+        session = _session()
+        await session.start()
+        events = await _collect(session, "c1", "hello")
+        await session.close()
+
+        assert [event.event_type for event in events] == [EventType.INFO, EventType.RESULT]
+        assert events[-1].data == {"result": "echo hello"}
+        assert "id" not in events[0].data
+
+    @pytest.mark.asyncio
+    async def test_concurrent_conversations_share_one_process(self):
+        """Test interleaved output is routed back to the right conversation."""
+        session = _session()
+        await session.start()
+        pid = session.proc.pid
+        slow, fast = await asyncio.gather(
+            _collect(session, "slow-1", "slow"),
+            _collect(session, "fast-1", "fast"),
+        )
+        await session.close()
+
+        assert slow[-1].data == {"result": "echo slow"}
+        assert fast[-1].data == {"result": "echo fast"}
+        assert session.stats()["pid"] == pid
+        assert session.conversations_total == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_yields_error(self):
+        """Test a conversation that never answers times out with an error event."""
+        session = _session()
+        await session.start()
+        events = await _collect(session, "c1", "hang", timeout=0.2)
+        await session.close()
+
+        assert events[-1].event_type == EventType.ERROR
+        assert "timeout" in events[-1].data["error"]
+        assert session.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_crash_fails_in_flight_and_restarts(self):
+        """Test a crashed session errors its conversations and comes back."""
+        session = _session(restart_backoff=0.01)
+        await session.start()
+        first_pid = session.proc.pid
+
+        crashed = await _collect(session, "c1", "crash")
+        assert crashed[-1].event_type == EventType.ERROR
+        assert "exited with code 3" in crashed[-1].data["error"]
+
+        recovered = await _collect(session, "c2", "again")
+        await session.close()
+
+        assert recovered[-1].data == {"result": "echo again"}
+        assert session.restarts == 1
+        assert session.proc.pid != first_pid
+
+    @pytest.mark.asyncio
+    async def test_line_longer_than_stream_limit(self):
+        """Test an output line over asyncio's 64 KiB readline limit is delivered."""
+        session = _session()
+        await session.start()
+        big = await _collect(session, "c1", "big")
+        after = await _collect(session, "c2", "again")
+        await session.close()
+
+        assert big[-1].data == {"result": "x" * 200_000}
+        assert after[-1].data == {"result": "echo again"}
+        assert session.restarts == 0
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue_delivers_everything(self):
+        """Test a conversation queue smaller than its output pauses rather than drops."""
+        session = _session(queue_size=2)
+        await session.start()
+        events = []
+        async for event in session.execute("c1", "many", timeout=5.0):
+            await asyncio.sleep(0.001)
+            events.append(event)
+        await session.close()
+
+        assert len(events) == 22
+        assert events[-1].data == {"result": "echo many"}
+
+    @pytest.mark.asyncio
+    async def test_reader_failure_fails_in_flight_and_restarts(self):
+        """Test a broken stdout reader errors conversations and restarts the session."""
+        session = _session(restart_backoff=0.01)
+        await session.start()
+        first_pid = session.proc.pid
+        parse_object = session.parser.parse_object
+
+        def broken(obj):
+            raise RuntimeError("boom")
+
+        session.parser.parse_object = broken
+
+        failed = await _collect(session, "c1", "hello")
+        session.parser.parse_object = parse_object
+        recovered = await _collect(session, "c2", "again")
+        await session.close()
+
+        assert failed[-1].event_type == EventType.ERROR
+        assert recovered[-1].data == {"result": "echo again"}
+        assert session.restarts == 1
+        assert session.proc.pid != first_pid
+
+    @pytest.mark.asyncio
+    async def test_closed_session_rejects_conversations(self):
+        """Test execute() on a closed session raises."""
+        session = _session()
+        await session.start()
+        await session.close()
+
+        with pytest.raises(SessionError):
+            await _collect(session, "c1", "late")
+
+
+class TestSessionManager:
+    """Tests for per-agent session bookkeeping."""
+
+    def test_command_template_substitution(self):
+        """Test team.yaml path and agent id are substituted into the command."""
+        manager = SessionManager(
+            ["cagent", "session", "{team_yaml}", "--agent", "{agent_id}"],
+            "team.yaml",
+            ["scheduling"],
+            terminate=AsyncMock(),
+        )
+        assert manager.get("scheduling").command == [
+            "cagent", "session", "team.yaml", "--agent", "scheduling"
+        ]
+        assert manager.get("orchestrator") is None
+
+    @pytest.mark.asyncio
+    async def test_failed_start_falls_back(self):
+        """Test agents whose session cannot start are served by exec instead."""
+        manager = SessionManager(["/nonexistent/cagent"], "team.yaml", ["scheduling"], AsyncMock())
+        await manager.start()
+        assert manager.get("scheduling") is None
+        assert manager.stats() == {}
@@ -0,0 +1,43 @@
+"""Unit tests for singleflight module."""
+
+from singleflight import Singleflight
+
+
+class TestSingleflight:
+    """Tests for leader/follower bookkeeping."""
+
+    def test_first_request_leads(self):
+        """Test nothing is joined when no identical run is in flight."""
+        flights = Singleflight()
+        assert flights.join("k", "a") is None
+
+    def test_identical_request_follows_leader(self):
+        """Test a second identical request is attached to the leader."""
+        flights = Singleflight()
+        flights.lead("k", "a")
+
+        assert flights.join("k", "b") == "a"
+        assert flights.join("other", "c") is None
+        assert flights.stats()["followers"] == 1
+        assert flights.stats()["coalesced_total"] == 1
+
+    def test_done_returns_followers_and_clears_key(self):
+        """Test finishing the leader releases its followers and the key."""
+        flights = Singleflight()
+        flights.lead("k", "a")
+        flights.join("k", "b")
+        flights.join("k", "c")
+
+        assert flights.done("k", "a") == ["b", "c"]
+        assert flights.join("k", "d") is None
+        assert flights.stats()["in_flight"] == 0
+
+    def test_done_by_stale_leader_is_ignored(self):
+        """Test a finished run cannot release a newer leader's key."""
+        flights = Singleflight()
+        flights.lead("k", "a")
+        flights.done("k", "a")
+        flights.lead("k", "b")
+
+        assert flights.done("k", "a") == []
+        assert flights.join("k", "c") == "b"
@@ -0,0 +1,139 @@
+"""Unit tests for worker_pool module."""
+
+import asyncio
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+
+from worker_pool import PooledWorker, WorkerPool
+
+
+async def _spawn_parked(agent_id: str) -> asyncio.subprocess.Process:
+    """Start a real process that blocks on stdin like a parked cagent."""
+    return await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        "import sys; sys.stdin.read()",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+
+async def _terminate(*pids: int) -> None:
+    """Kill parked test processes."""
+    import psutil
+
+    for pid in pids:
+        try:
+            process = psutil.Process(pid)
+            process.kill()
+            await asyncio.to_thread(process.wait, 2)
+        except psutil.NoSuchProcess:
+            pass
+
+
+@pytest.fixture
+def pool():
+    return WorkerPool(_spawn_parked, _terminate, ["orchestrator"], size_per_agent=2)
+
+
+class TestWorkerPool:
+    """Tests for pre-spawning, hand-out and recycling."""
+
+    @pytest.mark.asyncio
+    async def test_start_fills_pool(self, pool):
+        """Test start() parks size_per_agent processes per agent."""
+        await pool.start()
+        assert pool.stats()["parked"] == {"orchestrator": 2}
+        assert pool.spawned_total == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_acquire_hands_out_and_replenishes(self, pool):
+        """Test a hit returns a live process and the pool refills in the background."""
+        await pool.start()
+        worker = await pool.acquire("orchestrator")
+
+        assert worker is not None and worker.is_healthy()
+        assert pool.hits == 1
+        await asyncio.wait_for(pool._refills["orchestrator"], timeout=5.0)
+        assert len(pool.parked["orchestrator"]) == 2
+        await _terminate(worker.proc.pid)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_unpooled_agent_is_not_served(self, pool):
+        """Test agents outside the pool fall back to spawning."""
+        await pool.start()
+        assert await pool.acquire("extraction") is None
+        assert pool.misses == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_aged_workers_are_recycled(self, pool):
+        """Test processes older than max_age are killed instead of handed out."""
+        await pool.start()
+        parked = list(pool.parked["orchestrator"])
+        pool.max_age = 0.0
+
+        assert await pool.acquire("orchestrator") is None
+        assert pool.misses == 1
+        assert pool.recycled_total == 2
+        for worker in parked:
+            await asyncio.wait_for(worker.proc.wait(), timeout=5.0)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_is_skipped(self, pool):
+        """Test a parked process that exited is never handed out."""
+        await pool.start()
+        dead = pool.parked["orchestrator"][0]
+        await _terminate(dead.proc.pid)
+        await dead.proc.wait()
+
+        worker = await pool.acquire("orchestrator")
+        assert worker is not None and worker is not dead
+        await _terminate(worker.proc.pid)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_spawn_failure_is_counted(self):
+        """Test a failing spawn leaves the pool empty instead of raising."""
+        async def failing_spawn(agent_id):
+            raise FileNotFoundError("cagent")
+
+        worker_pool = WorkerPool(failing_spawn, _terminate, ["orchestrator"])
+        await worker_pool.start()
+        assert worker_pool.spawn_failures == 1
+        assert await worker_pool.acquire("orchestrator") is None
+        await worker_pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_kills_parked_processes(self, pool):
+        """Test close() terminates every parked process."""
+        await pool.start()
+        parked = list(pool.parked["orchestrator"])
+        await pool.close()
+
+        for worker in parked:
+            await asyncio.wait_for(worker.proc.wait(), timeout=5.0)
+        assert pool.stats()["parked"] == {"orchestrator": 0}
+        assert await pool.acquire("orchestrator") is None
+
+
+class TestPooledWorker:
+    """Tests for worker health checks."""
+
+    def test_exited_process_is_unhealthy(self):
+        """Test a process with a return code is unhealthy."""
+        proc = MagicMock(returncode=0)
+        assert not PooledWorker("a", proc).is_healthy()
+
+    def test_vanished_process_is_unhealthy(self):
+        """Test a pid that no longer exists is unhealthy."""
+        import psutil
+
+        proc = MagicMock(returncode=None, pid=12345)
+        with patch("worker_pool.psutil.Process", side_effect=psutil.NoSuchProcess(12345)):
+            assert not PooledWorker("a", proc).is_healthy()
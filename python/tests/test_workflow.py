@@ -0,0 +1,170 @@
+"""Unit tests for workflow module."""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from event_parser import CagentEvent, EventType
+from runtime import CagentRuntime
+from scheduler import AdmissionScheduler
+from workflow import (
+    CheckpointStore,
+    Workflow,
+    WorkflowError,
+    WorkflowExecutor,
+    WorkflowStep,
+    render_step_input,
+)
+
+
+def pipeline() -> Workflow:
+    """extraction -> (planner, ideas) -> captioning."""
+    return Workflow(
+        steps=[
+            WorkflowStep("extraction", "extraction"),
+            WorkflowStep("planner", "creative_planner", ["extraction"], "Plan posts for {extraction}"),
+            WorkflowStep("ideas", "idea_validator", ["extraction"]),
+            WorkflowStep("captioning", "captioning", ["planner", "ideas"], "{planner} / {ideas} / {input}"),
+        ],
+        name="social",
+    )
+
+
+def make_runtime(tmp_path) -> CagentRuntime:
+    """Runtime with the cagent check patched out."""
+    team_yaml = tmp_path / "team.yaml"
+    team_yaml.write_text("metadata:\n  author: test\n")
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = Mock(returncode=0, stdout="cagent version v1.0.0\n")
+        return CagentRuntime(str(team_yaml), resource_sample_interval=0)
+
+
+def fake_agents(calls: list, delay: float = 0.05, failing: set = frozenset()):
+    """execute_agent stand-in answering "<agent>(<input>)" after delay."""
+    async def fake_execute_agent(agent_id, user_input, context=None, timeout=300.0, pipeline_stats=None):
+        calls.append((agent_id, user_input, time.monotonic()))
+        yield CagentEvent(EventType.THINKING, {"content": agent_id}, time.time())
+        await asyncio.sleep(delay)
+        if agent_id in failing:
+            yield CagentEvent(EventType.ERROR, {"error": f"{agent_id} broke"}, time.time())
+        else:
+            yield CagentEvent(EventType.RESULT, {"result": f"{agent_id}({user_input})"}, time.time())
+
+    return fake_execute_agent
+
+
+class TestWorkflowDefinition:
+    """Tests for DAG validation and input rendering."""
+
+    def test_topological_order(self):
+        """Test steps are ordered after their dependencies."""
+        order = pipeline().validate()
+        assert order[0] == "extraction"
+        assert order[-1] == "captioning"
+        assert pipeline().sinks() == ["captioning"]
+
+    @pytest.mark.parametrize(
+        "steps,message",
+        [
+            ([WorkflowStep("a", "x", ["b"]), WorkflowStep("b", "x", ["a"])], "cycle"),
+            ([WorkflowStep("a", "x", ["missing"])], "unknown step"),
+            ([WorkflowStep("a", "x"), WorkflowStep("a", "y")], "unique"),
+            ([WorkflowStep("a", "x"), WorkflowStep("b", "x", [], "{a}")], "not a dependency"),
+            ([], "at least one step"),
+        ],
+    )
+    def test_invalid_workflows(self, steps, message):
+        """Test invalid definitions are rejected with a reason."""
+        with pytest.raises(WorkflowError, match=message):
+            Workflow(steps=steps).validate()
+
+    def test_render_step_input(self):
+        """Test templates, root steps and untemplated dependencies."""
+        results = {"planner": "plan", "ideas": {"score": 8}}
+        workflow = pipeline()
+
+        assert render_step_input(workflow.by_id["extraction"], "photos", {}) == "photos"
+        assert render_step_input(workflow.by_id["captioning"], "photos", results) == 'plan / {"score": 8} / photos'
+        assert render_step_input(WorkflowStep("c", "x", ["planner"]), "photos", results) == "plan"
+
+
+class TestWorkflowExecutor:
+    """Tests for running workflows on the runtime."""
+
+    @pytest.mark.asyncio
+    async def test_outputs_feed_dependents_and_branches_run_in_parallel(self, tmp_path):
+        """Test independent steps overlap and results flow into dependent inputs."""
+        runtime = make_runtime(tmp_path)
+        calls = []
+        executor = WorkflowExecutor(runtime, CheckpointStore())
+
+        with patch.object(runtime, "execute_agent", fake_agents(calls)):
+            events = [e async for e in executor.run(pipeline(), "photos", run_id="run-1")]
+
+        started = {agent_id: at for agent_id, _, at in calls}
+        assert abs(started["creative_planner"] - started["idea_validator"]) < 0.03
+        captioning_input = next(user_input for agent_id, user_input, _ in calls if agent_id == "captioning")
+        assert captioning_input == (
+            "creative_planner(Plan posts for extraction(photos)) / idea_validator(extraction(photos)) / photos"
+        )
+        assert events[-1].event_type == EventType.RESULT
+        assert list(events[-1].data["result"]) == ["captioning"]
+        assert events[-1].data["run_id"] == "run-1"
+        assert sum(e.event_type == EventType.BRANCH_RESULT for e in events) == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_run_resumes_from_checkpoints(self, tmp_path):
+        """Test a rerun with the same run_id only executes the steps that did not complete."""
+        runtime = make_runtime(tmp_path)
+        store = CheckpointStore(db_path=str(tmp_path / "checkpoints.db"))
+
+        calls = []
+        with patch.object(runtime, "execute_agent", fake_agents(calls, failing={"idea_validator"})):
+            events = [e async for e in WorkflowExecutor(runtime, store).run(pipeline(), "photos", run_id="r")]
+        assert events[-1].event_type == EventType.ERROR
+        assert events[-1].data["failed_step"] == "ideas"
+        assert events[-1].data["completed"] == ["extraction", "planner"]
+        assert "captioning" not in [agent_id for agent_id, _, _ in calls]
+        store.close()
+
+        # A fresh store on the same file, as after a sidecar restart
+        store = CheckpointStore(db_path=str(tmp_path / "checkpoints.db"))
+        calls = []
+        with patch.object(runtime, "execute_agent", fake_agents(calls)):
+            events = [e async for e in WorkflowExecutor(runtime, store).run(pipeline(), "photos", run_id="r")]
+
+        assert [agent_id for agent_id, _, _ in calls] == ["idea_validator", "captioning"]
+        resumed = [e.data["branch"] for e in events if e.data.get("resumed")]
+        assert resumed == ["extraction", "planner"]
+        assert events[-1].event_type == EventType.RESULT
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_resume_with_different_input_rejected(self, tmp_path):
+        """Test checkpoints are only reused for the same workflow and input."""
+        runtime = make_runtime(tmp_path)
+        store = CheckpointStore()
+        with patch.object(runtime, "execute_agent", fake_agents([], delay=0)):
+            async for _ in WorkflowExecutor(runtime, store).run(pipeline(), "photos", run_id="r"):
+                pass
+
+            with pytest.raises(WorkflowError, match="different workflow or input"):
+                async for _ in WorkflowExecutor(runtime, store).run(pipeline(), "videos", run_id="r"):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_steps_take_admission_slots(self, tmp_path):
+        """Test every step runs under a scheduler slot that is released afterwards."""
+        runtime = make_runtime(tmp_path)
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_agent=1)
+        calls = []
+        executor = WorkflowExecutor(runtime, CheckpointStore(), admit=scheduler.submit)
+
+        with patch.object(runtime, "execute_agent", fake_agents(calls, delay=0.02)):
+            events = [e async for e in executor.run(pipeline(), "photos")]
+
+        started = sorted(at for _, _, at in calls)
+        assert all(later - earlier >= 0.015 for earlier, later in zip(started, started[1:]))
+        assert events[-1].event_type == EventType.RESULT
+        assert scheduler.running == 0
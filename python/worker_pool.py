@@ -0,0 +1,195 @@
+"""
+Worker Pool: Pre-spawned cagent processes parked until a request needs them.
+
+Starting `cagent exec` pays for process creation, team.yaml parsing and the
+MCP toolset boot (osxphotos_mcp_server.py, npx servers) before the first
+event can be produced. The pool keeps a few processes per agent_id started
+ahead of time, blocked on stdin, and hands one out per execution. Parked
+processes are health checked, recycled after max_age and replenished in the
+background.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class PooledWorker:
+    """A parked cagent process waiting for its input on stdin."""
+
+    def __init__(self, agent_id: str, proc: asyncio.subprocess.Process):
+        """
+        Initialize worker.
+
+        Args:
+            agent_id: Agent the process was started for
+            proc: Process started with stdin, stdout and stderr pipes
+        """
+        self.agent_id = agent_id
+        self.proc = proc
+        self.spawned_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the process was started."""
+        return time.monotonic() - self.spawned_at
+
+    def is_healthy(self) -> bool:
+        """Whether the process is still alive and able to accept input."""
+        if self.proc.returncode is not None:
+            return False
+        try:
+            return psutil.Process(self.proc.pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+
+
+class WorkerPool:
+    """Keep size_per_agent parked cagent processes for each configured agent."""
+
+    def __init__(
+        self,
+        spawn: Callable[[str], Awaitable[asyncio.subprocess.Process]],
+        terminate: Callable[..., Awaitable[None]],
+        agent_ids: list[str],
+        size_per_agent: int = 1,
+        max_age: float = 600.0,
+        health_interval: float = 10.0,
+    ):
+        """
+        Initialize pool.
+
+        Args:
+            spawn: Starts a cagent process for an agent_id
+            terminate: Kills the process trees of the given pids
+            agent_ids: Agents to keep warm processes for
+            size_per_agent: Parked processes kept per agent
+            max_age: Seconds after which a parked process is recycled
+            health_interval: Seconds between background health checks
+        """
+        self.spawn = spawn
+        self.terminate = terminate
+        self.size_per_agent = size_per_agent
+        self.max_age = max_age
+        self.health_interval = health_interval
+
+        self.parked: dict[str, deque[PooledWorker]] = {agent_id: deque() for agent_id in agent_ids}
+        self._refills: dict[str, asyncio.Task] = {}
+        self._maintainer: Optional[asyncio.Task] = None
+        self.closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.spawned_total = 0
+        self.recycled_total = 0
+        self.spawn_failures = 0
+
+    async def start(self) -> None:
+        """Fill the pool and start background maintenance."""
+        for agent_id in self.parked:
+            await self._refill(agent_id)
+        self._maintainer = asyncio.create_task(self._maintain())
+        logger.info(
+            f"Worker pool started: {self.size_per_agent} per agent for {', '.join(self.parked)}"
+        )
+
+    async def acquire(self, agent_id: str) -> Optional[PooledWorker]:
+        """
+        Take a healthy parked process for agent_id.
+
+        Args:
+            agent_id: Agent to execute
+
+        Returns:
+            Worker owned by the caller from now on, or None if none is ready
+        """
+        parked = self.parked.get(agent_id)
+        if parked is None or self.closed:
+            return None
+
+        worker = None
+        while parked:
+            candidate = parked.popleft()
+            if candidate.age < self.max_age and candidate.is_healthy():
+                worker = candidate
+                break
+            await self._retire(candidate)
+
+        if worker is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self._schedule_refill(agent_id)
+        return worker
+
+    async def close(self) -> None:
+        """Stop maintenance and kill every parked process."""
+        self.closed = True
+        tasks = list(self._refills.values())
+        if self._maintainer is not None:
+            tasks.append(self._maintainer)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+        self._maintainer = None
+
+        pids = []
+        for parked in self.parked.values():
+            pids.extend(worker.proc.pid for worker in parked if worker.proc.returncode is None)
+            parked.clear()
+        if pids:
+            await self.terminate(*pids)
+
+    def stats(self) -> dict:
+        """Snapshot of pool state for the metrics endpoint."""
+        return {
+            "parked": {agent_id: len(parked) for agent_id, parked in self.parked.items()},
+            "size_per_agent": self.size_per_agent,
+            "hits": self.hits,
+            "misses": self.misses,
+            "spawned_total": self.spawned_total,
+            "recycled_total": self.recycled_total,
+            "spawn_failures": self.spawn_failures,
+        }
+
+    def _schedule_refill(self, agent_id: str) -> None:
+        task = self._refills.get(agent_id)
+        if self.closed or (task is not None and not task.done()):
+            return
+        self._refills[agent_id] = asyncio.create_task(self._refill(agent_id))
+
+    async def _refill(self, agent_id: str) -> None:
+        parked = self.parked[agent_id]
+        while not self.closed and len(parked) < self.size_per_agent:
+            try:
+                proc = await self.spawn(agent_id)
+            except Exception:
+                self.spawn_failures += 1
+                logger.exception(f"Failed to pre-spawn worker for {agent_id}")
+                return
+            self.spawned_total += 1
+            parked.append(PooledWorker(agent_id, proc))
+            logger.debug(f"Parked worker for {agent_id}: PID={proc.pid}")
+
+    async def _retire(self, worker: PooledWorker) -> None:
+        self.recycled_total += 1
+        if worker.proc.returncode is None:
+            await self.terminate(worker.proc.pid)
+        logger.debug(f"Retired worker for {worker.agent_id}: PID={worker.proc.pid}")
+
+    async def _maintain(self) -> None:
+        while not self.closed:
+            await asyncio.sleep(self.health_interval)
+            for agent_id, parked in self.parked.items():
+                for worker in list(parked):
+                    if worker.age >= self.max_age or not worker.is_healthy():
+                        parked.remove(worker)
+                        await self._retire(worker)
+                self._schedule_refill(agent_id)
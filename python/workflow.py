@@ -0,0 +1,448 @@
+"""
+Workflow Module: Declarative DAGs of agent steps run by the sidecar.
+
+A workflow lists agent steps and their data dependencies, e.g. the
+extraction -> creative_planner -> creative_worker -> captioning ->
+scheduling pipeline of team.yaml, so handoffs no longer cost an
+orchestrator LLM round trip. Steps whose dependencies are complete run
+concurrently through CagentRuntime.execute_agent. A step's input is a
+template filled from the workflow input and its dependencies' results:
+
+    {"id": "captioning", "agent_id": "captioning",
+     "depends_on": ["creative_worker"],
+     "input": "Write captions for: {creative_worker}"}
+
+Every completed step's result is checkpointed under the run_id, so a failed
+run started again with the same run_id resumes after its last completed
+steps instead of from scratch.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import string
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import AsyncGenerator, Callable, Optional
+
+from event_parser import CagentEvent, EventType
+from runtime import CagentRuntime
+from scheduler import AdmissionTicket
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowError(Exception):
+    """Invalid workflow definition or mismatched resume."""
+
+    pass
+
+
+@dataclass
+class WorkflowStep:
+    """One agent execution in a workflow."""
+    id: str
+    agent_id: str
+    depends_on: list[str] = field(default_factory=list)
+    input: Optional[str] = None  # template; "{input}" and "{<step id>}" are substituted
+    context: Optional[dict] = None  # merged over the workflow context
+
+
+@dataclass
+class Workflow:
+    """A DAG of agent steps."""
+    steps: list[WorkflowStep]
+    name: str = "workflow"
+
+    def __post_init__(self):
+        self.by_id = {step.id: step for step in self.steps}
+
+    def validate(self) -> list[str]:
+        """
+        Check the definition and return the step ids in topological order.
+
+        Raises:
+            WorkflowError: On duplicate ids, unknown dependencies, bad templates or cycles
+        """
+        if not self.steps:
+            raise WorkflowError("A workflow needs at least one step")
+        if len(self.by_id) != len(self.steps):
+            raise WorkflowError("Step ids must be unique")
+
+        for step in self.steps:
+            for dependency in step.depends_on:
+                if dependency not in self.by_id:
+                    raise WorkflowError(f"Step {step.id} depends on unknown step {dependency}")
+            for name in _template_fields(step.input):
+                if name != "input" and name not in step.depends_on:
+                    raise WorkflowError(
+                        f"Step {step.id} input references {{{name}}}, which is not a dependency"
+                    )
+
+        # Kahn's algorithm
+        remaining = {step.id: set(step.depends_on) for step in self.steps}
+        order = []
+        ready = [step.id for step in self.steps if not step.depends_on]
+        while ready:
+            step_id = ready.pop(0)
+            order.append(step_id)
+            for other, dependencies in remaining.items():
+                if step_id in dependencies:
+                    dependencies.discard(step_id)
+                    if not dependencies:
+                        ready.append(other)
+        if len(order) != len(self.steps):
+            cyclic = sorted(step_id for step_id in remaining if step_id not in order)
+            raise WorkflowError(f"Workflow has a dependency cycle through: {', '.join(cyclic)}")
+        return order
+
+    def digest(self, user_input: str, context: Optional[dict] = None) -> str:
+        """Hash of the definition and input; a run only resumes with both unchanged."""
+        definition = json.dumps(
+            {"steps": [asdict(step) for step in self.steps], "input": user_input, "context": context or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+    def sinks(self) -> list[str]:
+        """Steps no other step depends on; their results form the workflow result."""
+        needed = {dependency for step in self.steps for dependency in step.depends_on}
+        return [step.id for step in self.steps if step.id not in needed]
+
+
+def _template_fields(template: Optional[str]) -> list[str]:
+    if not template:
+        return []
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+
+def _as_text(value: object) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def render_step_input(step: WorkflowStep, user_input: str, results: dict[str, object]) -> str:
+    """
+    Build a step's prompt from the workflow input and its dependencies' results.
+
+    Args:
+        step: Step to render
+        user_input: Workflow input
+        results: Results of completed steps by id
+
+    Returns:
+        The template with placeholders filled, or without a template the
+        workflow input for root steps and the dependency results otherwise
+    """
+    if step.input is not None:
+        values = {"input": user_input}
+        values.update({dependency: _as_text(results[dependency]) for dependency in step.depends_on})
+        return step.input.format_map(values)
+    if not step.depends_on:
+        return user_input
+    if len(step.depends_on) == 1:
+        return _as_text(results[step.depends_on[0]])
+    return json.dumps({dependency: results[dependency] for dependency in step.depends_on}, ensure_ascii=False)
+
+
+class CheckpointStore:
+    """Completed step results per run, in memory with an optional SQLite tier."""
+
+    def __init__(self, db_path: Optional[str] = None, max_runs: int = 256):
+        """
+        Initialize store.
+
+        Args:
+            db_path: Optional SQLite file so checkpoints survive restarts
+            max_runs: Runs kept in memory
+        """
+        self.db_path = db_path
+        self.max_runs = max_runs
+        self._memory: OrderedDict[str, tuple[str, dict[str, object]]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS workflow_checkpoints ("
+                "run_id TEXT NOT NULL, workflow TEXT NOT NULL, step_id TEXT NOT NULL, "
+                "result TEXT NOT NULL, completed_at REAL NOT NULL, PRIMARY KEY (run_id, step_id))"
+            )
+            self._db.commit()
+
+    async def load(self, run_id: str, workflow_digest: str) -> dict[str, object]:
+        """
+        Return the checkpointed step results of a run.
+
+        Args:
+            run_id: Run to resume
+            workflow_digest: Workflow.digest() of the workflow and input being run
+
+        Raises:
+            WorkflowError: If the run was started with a different workflow or input
+        """
+        cached = self._memory.get(run_id)
+        if cached is None and self._db is not None:
+            cached = await asyncio.to_thread(self._db_load, run_id)
+        if cached is None:
+            return {}
+        digest, results = cached
+        if digest != workflow_digest:
+            raise WorkflowError(f"Run {run_id} was started with a different workflow or input")
+        self._remember(run_id, digest, results)
+        return dict(results)
+
+    async def save(self, run_id: str, workflow_digest: str, step_id: str, result: object) -> None:
+        """Checkpoint one completed step."""
+        cached = self._memory.get(run_id)
+        results = dict(cached[1]) if cached is not None and cached[0] == workflow_digest else {}
+        results[step_id] = result
+        self._remember(run_id, workflow_digest, results)
+        if self._db is not None:
+            await asyncio.to_thread(self._db_save, run_id, workflow_digest, step_id, result)
+
+    async def get(self, run_id: str) -> Optional[dict[str, object]]:
+        """Checkpointed step results of a run, or None if the run is unknown."""
+        cached = self._memory.get(run_id)
+        if cached is None and self._db is not None:
+            cached = await asyncio.to_thread(self._db_load, run_id)
+        return dict(cached[1]) if cached is not None else None
+
+    def close(self) -> None:
+        """Close the SQLite tier, if any."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, run_id: str, digest: str, results: dict[str, object]) -> None:
+        self._memory[run_id] = (digest, results)
+        self._memory.move_to_end(run_id)
+        while len(self._memory) > self.max_runs:
+            self._memory.popitem(last=False)
+
+    def _db_load(self, run_id: str) -> Optional[tuple[str, dict[str, object]]]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT workflow, step_id, result FROM workflow_checkpoints WHERE run_id = ?",
+                (run_id,),
+            ).fetchall()
+        if not rows:
+            return None
+        return rows[0][0], {step_id: json.loads(result) for _, step_id, result in rows}
+
+    def _db_save(self, run_id: str, digest: str, step_id: str, result: object) -> None:
+        payload = json.dumps(result)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workflow_checkpoints "
+                "(run_id, workflow, step_id, result, completed_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, digest, step_id, payload, time.time()),
+            )
+            self._db.commit()
+
+
+class WorkflowExecutor:
+    """Run workflow DAGs on a CagentRuntime with per-step checkpoints."""
+
+    def __init__(
+        self,
+        runtime: CagentRuntime,
+        checkpoints: CheckpointStore,
+        admit: Optional[Callable[[str], AdmissionTicket]] = None,
+    ):
+        """
+        Initialize executor.
+
+        Args:
+            runtime: Runtime executing the steps
+            checkpoints: Where completed step results are kept
+            admit: Returns an admission ticket for an agent_id, awaited before
+                each step starts and released when it ends
+        """
+        self.runtime = runtime
+        self.checkpoints = checkpoints
+        self.admit = admit
+
+    async def run(
+        self,
+        workflow: Workflow,
+        user_input: str,
+        context: Optional[dict] = None,
+        run_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncGenerator[CagentEvent, None]:
+        """
+        Execute (or resume) a workflow and stream its events.
+
+        Step events carry data["branch"] = step id, as in fan-out groups; a
+        step's own outcome is yielded as BRANCH_RESULT/BRANCH_ERROR, and
+        checkpointed steps of a resumed run as BRANCH_RESULT with
+        "resumed": true. After a failure no new steps start, running ones
+        finish and are checkpointed, then an ERROR with the run_id ends the
+        stream. Otherwise a RESULT carries the sink steps' results.
+
+        Args:
+            workflow: Workflow to run
+            user_input: Workflow input
+            context: Optional context shared by all steps
+            run_id: Run to resume; a new run is started when None
+            timeout: Execution timeout in seconds per step (default: per agent)
+
+        Yields:
+            CagentEvent objects, ending with one workflow RESULT or ERROR
+
+        Raises:
+            WorkflowError: If the workflow is invalid or run_id belongs to another workflow or input
+        """
+        order = workflow.validate()
+        digest = workflow.digest(user_input, context)
+        run_id = run_id or uuid.uuid4().hex
+        results = await self.checkpoints.load(run_id, digest)
+
+        logger.info(
+            f"[{run_id}] Running workflow {workflow.name}: {len(order)} steps, "
+            f"{len(results)} already checkpointed"
+        )
+        for step_id in order:
+            if step_id in results:
+                yield CagentEvent(
+                    event_type=EventType.BRANCH_RESULT,
+                    data={"result": results[step_id], "branch": step_id, "resumed": True},
+                    timestamp=time.time(),
+                )
+
+        merged: asyncio.Queue[tuple[str, Optional[CagentEvent]]] = asyncio.Queue(
+            maxsize=self.runtime.line_queue_size
+        )
+        running: dict[str, asyncio.Task] = {}
+        outcomes: dict[str, CagentEvent] = {}
+        failed_step: Optional[str] = None
+
+        def _launch_ready() -> None:
+            for step_id in order:
+                step = workflow.by_id[step_id]
+                if (
+                    step_id not in results
+                    and step_id not in running
+                    and all(dependency in results for dependency in step.depends_on)
+                ):
+                    running[step_id] = asyncio.create_task(
+                        self._run_step(step, user_input, context, results, timeout, merged)
+                    )
+
+        try:
+            _launch_ready()
+            while running:
+                step_id, event = await merged.get()
+                if event is None:
+                    running.pop(step_id)
+                    if step_id not in outcomes:
+                        outcomes[step_id] = CagentEvent(
+                            event_type=EventType.ERROR,
+                            data={"error": "Agent finished without a result"},
+                            timestamp=time.time(),
+                        )
+                        failed_step = failed_step or step_id
+                        yield CagentEvent(
+                            event_type=EventType.BRANCH_ERROR,
+                            data={**outcomes[step_id].data, "branch": step_id},
+                            timestamp=time.time(),
+                        )
+                    if failed_step is None:
+                        _launch_ready()
+                    continue
+                if step_id in outcomes:
+                    continue  # output after the step's terminal event
+
+                if event.event_type == EventType.RESULT:
+                    outcomes[step_id] = event
+                    results[step_id] = event.data.get("result")
+                    await self.checkpoints.save(run_id, digest, step_id, results[step_id])
+                    yield CagentEvent(
+                        event_type=EventType.BRANCH_RESULT,
+                        data={**event.data, "branch": step_id},
+                        timestamp=event.timestamp,
+                    )
+                elif event.event_type == EventType.ERROR:
+                    outcomes[step_id] = event
+                    failed_step = failed_step or step_id
+                    yield CagentEvent(
+                        event_type=EventType.BRANCH_ERROR,
+                        data={**event.data, "branch": step_id},
+                        timestamp=event.timestamp,
+                    )
+                else:
+                    event.data = {**event.data, "branch": step_id}
+                    yield event
+
+        finally:
+            for task in running.values():
+                task.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
+
+        if failed_step is not None:
+            logger.warning(f"[{run_id}] Workflow {workflow.name} failed at step {failed_step}")
+            yield CagentEvent(
+                event_type=EventType.ERROR,
+                data={
+                    "error": f"Step {failed_step} failed: {outcomes[failed_step].data.get('error')}",
+                    "failed_step": failed_step,
+                    "run_id": run_id,
+                    "completed": [step_id for step_id in order if step_id in results],
+                },
+                timestamp=time.time(),
+            )
+            return
+
+        logger.info(f"[{run_id}] Workflow {workflow.name} completed")
+        yield CagentEvent(
+            event_type=EventType.RESULT,
+            data={
+                "result": {step_id: results[step_id] for step_id in workflow.sinks()},
+                "steps": {step_id: results[step_id] for step_id in order},
+                "run_id": run_id,
+            },
+            timestamp=time.time(),
+        )
+
+    async def _run_step(
+        self,
+        step: WorkflowStep,
+        user_input: str,
+        context: Optional[dict],
+        results: dict[str, object],
+        timeout: Optional[float],
+        merged: asyncio.Queue,
+    ) -> None:
+        ticket = None
+        events = None
+        try:
+            if self.admit is not None:
+                ticket = self.admit(step.agent_id)
+                await ticket.wait()
+            events = self.runtime.execute_agent(
+                agent_id=step.agent_id,
+                user_input=render_step_input(step, user_input, results),
+                context={**(context or {}), **(step.context or {})},
+                timeout=timeout,
+            )
+            async for event in events:
+                await merged.put((step.id, event))
+        except Exception as e:
+            logger.exception(f"Workflow step {step.id} failed")
+            await merged.put((
+                step.id,
+                CagentEvent(event_type=EventType.ERROR, data={"error": str(e)}, timestamp=time.time()),
+            ))
+        finally:
+            if events is not None:
+                await events.aclose()
+            if ticket is not None:
+                ticket.release()
+        await merged.put((step.id, None))
@@ -5,6 +5,8 @@
  * - /health - health checks
  * - /agent/execute - agent execution
  * - /agent/stream - event streaming
+ * - DELETE /agent/{request_id} - run cancellation
+ * - /agent/result, /agent/runs - journaled run outcomes
  * - /shutdown - shutdown notification
  */
 
@@ -33,6 +35,32 @@ interface StreamEvent {
 	timestamp: number;
 }
 
+interface RunSummary {
+	request_id: string;
+	kind: 'agent' | 'group' | 'workflow';
+	agent_id: string | null;
+	status: 'running' | 'completed' | 'failed' | 'cancelled' | 'interrupted';
+	coalesced_with: string | null;
+	started_at: number;
+	finished_at: number | null;
+	event_count: number;
+}
+
+interface RunRecord extends RunSummary {
+	request: Record<string, unknown>;
+	outcome: StreamEvent | null;
+	result: unknown;
+	error: unknown;
+	events?: (StreamEvent & { id: number })[];
+}
+
+interface RunListing {
+	runs: RunSummary[];
+	total: number;
+	limit: number;
+	offset: number;
+}
+
 export class CagentClient {
 	private baseUrl: string;
 
@@ -91,6 +119,40 @@ export class CagentClient {
 		return eventSource;
 	}
 
+	/**
+	 * Cancel a running execution; open streams receive a `cancelled` event
+	 */
+	async cancelExecution(requestId: string): Promise<void> {
+		const response = await fetch(`${this.baseUrl}/agent/${requestId}`, { method: 'DELETE' });
+		// 404/409: the run is unknown or already finished, nothing left to cancel
+		if (!response.ok && response.status !== 404 && response.status !== 409) {
+			throw new Error(`Cancel failed: ${response.statusText}`);
+		}
+	}
+
+	/**
+	 * Fetch the journaled outcome of a run, also after a sidecar restart
+	 */
+	async getResult(requestId: string, includeEvents = false): Promise<RunRecord> {
+		const query = includeEvents ? '?events=true' : '';
+		const response = await fetch(`${this.baseUrl}/agent/result/${requestId}${query}`);
+		if (!response.ok) {
+			throw new Error(`Result lookup failed: ${response.statusText}`);
+		}
+		return response.json();
+	}
+
+	/**
+	 * List journaled runs, newest first
+	 */
+	async listRuns(limit = 50, offset = 0): Promise<RunListing> {
+		const response = await fetch(`${this.baseUrl}/agent/runs?limit=${limit}&offset=${offset}`);
+		if (!response.ok) {
+			throw new Error(`Run listing failed: ${response.statusText}`);
+		}
+		return response.json();
+	}
+
 	/**
 	 * Notify sidecar of shutdown
 	 */
@@ -138,6 +200,16 @@ export class CagentClient {
 			onClose?.();
 		});
 
+		eventSource.addEventListener('cancelled', (e) => {
+			onEvent({
+				event_type: 'cancelled',
+				data: JSON.parse((e as MessageEvent).data),
+				timestamp: Date.now(),
+			});
+			eventSource.close();
+			onClose?.();
+		});
+
 		eventSource.addEventListener('error', (e) => {
 			const message = (e as MessageEvent).data || 'Unknown error';
 			const error = new Error(`Agent error: ${message}`);